@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Alert Engine - stanowe alerty z histerezą, cooldownem i deduplikacją
+
+Silnik uruchamiany po każdej analizie ocenia reguły i wysyła zdarzenie tylko
+przy ZMIANIE stanu reguły (wejście w alarm / powrót do normy), a nie przy
+każdym przeładowaniu strony:
+
+- histereza: alarm włącza się po przekroczeniu `trigger`, a gasi dopiero po
+  powrocie za `clear` (wartość krążąca wokół progu nie generuje serii alertów)
+- cooldown: ten sam klucz deduplikacji nie wyśle ponownego alarmu przez N sekund
+- klucz deduplikacji: reguła (+ wskaźnik dla alertów z analizy)
+
+Stan reguł jest zapisywany w pliku JSON, więc restart aplikacji / kolejne
+uruchomienia CLI nie wysyłają znowu tych samych alertów. Dostarczanie (plik,
+webhook, email, historia) działa w osobnym wątku - wolny odbiorca nie blokuje
+renderowania dashboardu. Aplikacja ma jeden silnik (jeden plik stanu) - adresy
+email użytkowników to subskrypcje odbiorcy SMTP (subscribe / unsubscribe).
+
+Użycie:
+    engine = AlertEngine(default_rules(score_threshold=-30), sinks=[FileSink('alert_events.jsonl')])
+    events = engine.evaluate(indicators, analysis)
+"""
+
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime
+from email.mime.text import MIMEText
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+
+class AlertRule:
+    """
+    Reguła progowa z histerezą
+
+    Args:
+        name: Unikalna nazwa (klucz deduplikacji)
+        metric: (indicators, analysis) -> wartość albo None gdy brak danych
+        direction: 'below' (alarm gdy wartość < trigger) albo 'above'
+        trigger: Próg włączenia alarmu
+        clear: Próg wyłączenia (dla 'below' powyżej trigger, dla 'above' poniżej)
+        severity: 'critical' / 'warning'
+        cooldown: Minimalny odstęp (s) między kolejnymi alarmami tej reguły
+        message: Szablon treści - {value}, {trigger}, {clear}
+    """
+
+    def __init__(self, name: str, metric: Callable[[Dict, Dict], Optional[float]], direction: str,
+                 trigger: float, clear: float, severity: str = 'warning', cooldown: float = 3600,
+                 message: str = '{value:.2f} (prog {trigger})'):
+        self.name = name
+        self.metric = metric
+        self.direction = direction
+        self.trigger = trigger
+        self.clear = clear
+        self.severity = severity
+        self.cooldown = cooldown
+        self.message = message
+
+    def breached(self, value: float) -> bool:
+        return value < self.trigger if self.direction == 'below' else value > self.trigger
+
+    def cleared(self, value: float) -> bool:
+        return value >= self.clear if self.direction == 'below' else value <= self.clear
+
+
+def _indicator(name: str) -> Callable[[Dict, Dict], Optional[float]]:
+    """Metryka = bieżąca wartość wskaźnika"""
+    return lambda indicators, analysis: indicators[name]['current'] if name in indicators else None
+
+
+def default_rules(score_threshold: float = -30) -> List[AlertRule]:
+    """Domyślny zestaw reguł (progi jak w LiquidityMonitor.thresholds)"""
+    return [
+        AlertRule('score', lambda indicators, analysis: analysis['overall_score'],
+                  'below', score_threshold, score_threshold + 10, 'critical',
+                  message='Ocena plynnosci {value:.0f} ponizej progu {trigger:.0f}'),
+        AlertRule('sofr_iorb_spread', _indicator('sofr_iorb_spread'),
+                  'above', 0.15, 0.10, 'critical',
+                  message='Spread SOFR-IORB {value:.3f}% powyzej {trigger}%'),
+        AlertRule('vix', _indicator('vix'), 'above', 30, 25, 'warning',
+                  message='VIX {value:.1f} powyzej {trigger}'),
+        AlertRule('hy_spread', _indicator('hy_spread'), 'above', 5.0, 4.5, 'warning',
+                  message='High Yield spread {value:.2f}% powyzej {trigger}%'),
+        AlertRule('reserves', _indicator('reserves'), 'below', 2800, 2900, 'critical',
+                  message='Rezerwy bankow ${value:.0f}B ponizej ${trigger}B'),
+    ]
+
+
+class AlertEvent:
+    """Zdarzenie do dostarczenia: 'fired' (wejście w alarm) albo 'resolved' (powrót do normy)"""
+
+    def __init__(self, key: str, rule: str, kind: str, severity: str, indicator: str,
+                 message: str, value: Optional[float] = None):
+        self.key = key
+        self.rule = rule
+        self.kind = kind
+        self.severity = severity
+        self.indicator = indicator
+        self.message = message
+        self.value = value
+        self.timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"AlertEvent({self.kind} {self.key}: {self.message})"
+
+
+# === ODBIORCY (SINKS) ===
+
+class FileSink:
+    """Dopisuje zdarzenia do pliku (JSON na linię)"""
+
+    name = 'file'
+
+    def __init__(self, path: str = 'alert_events.jsonl'):
+        self.path = path
+
+    def send(self, event: AlertEvent):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event.to_dict(), ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """POST zdarzenia jako JSON (Slack/Teams/własny endpoint)"""
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = 10, headers: Optional[Dict] = None):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+
+    def send(self, event: AlertEvent):
+        payload = event.to_dict()
+        payload['text'] = f"[{event.severity.upper()}] {event.message}"  # Dla webhooków w stylu Slack
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class SmtpSink:
+    """
+    Email przez SMTP (opcjonalnie STARTTLS + logowanie)
+
+    Lista odbiorców może się zmieniać w trakcie działania (subscribe /
+    unsubscribe z sesji aplikacji) - bez odbiorców zdarzenie jest pomijane.
+    """
+
+    name = 'smtp'
+
+    def __init__(self, host: str, to: List[str], port: int = 25, sender: str = 'liquidity-monitor@localhost',
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = False, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.to = list(to)
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def subscribe(self, address: str):
+        # Nowa lista zamiast modyfikacji w miejscu - wątek wysyłki widzi starą albo nową, nigdy w połowie zmiany
+        if address not in self.to:
+            self.to = self.to + [address]
+
+    def unsubscribe(self, address: str):
+        self.to = [a for a in self.to if a != address]
+
+    def send(self, event: AlertEvent):
+        to = self.to
+        if not to:
+            return
+        prefix = '🚨 ALERT' if event.kind == 'fired' else '✅ OK'
+        msg = MIMEText(f"{event.message}\n\nRegula: {event.rule}\nCzas: {event.timestamp}", 'plain', 'utf-8')
+        msg['Subject'] = f"{prefix}: {event.indicator} - {event.message}"
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(to)
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as server:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password or '')
+            server.send_message(msg)
+
+
+class HistorySink:
+    """
+    Zapisuje alarmy reguł w HistoryStore (zakładka Alerty w aplikacji)
+
+    Alerty z analizy (klucze 'analysis:*') pomija - HistoryStore.record
+    zapisuje je już razem z przebiegiem.
+    """
+
+    name = 'history'
+
+    def __init__(self, store):
+        self.store = store
+
+    def send(self, event: AlertEvent):
+        if event.kind == 'fired' and event.rule != 'analysis':
+            self.store.add_alert(event.severity, event.indicator, event.message, timestamp=event.timestamp)
+
+
+class Dispatcher:
+    """
+    Dostarczanie zdarzeń w tle - osobna kolejka i wątek na odbiorcę
+
+    Wolny lub niedostępny odbiorca (np. SMTP z timeoutem) opóźnia tylko siebie,
+    a nie pozostałych odbiorców ani wywołującego evaluate().
+    """
+
+    def __init__(self, sinks: List, retries: int = 3, backoff: float = 2.0):
+        self.sinks = list(sinks)
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {'sent': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()  # Liczniki zwiększane z wątków wszystkich odbiorców
+        self._queues: List['queue.Queue'] = []
+        for sink in self.sinks:
+            q: 'queue.Queue' = queue.Queue()
+            threading.Thread(target=self._run, args=(sink, q), name=f'alert-{sink.name}', daemon=True).start()
+            self._queues.append(q)
+
+    def submit(self, event: AlertEvent):
+        for q in self._queues:
+            q.put(event)
+
+    def _run(self, sink, q: 'queue.Queue'):
+        while True:
+            event = q.get()
+            try:
+                for attempt in range(self.retries):
+                    try:
+                        sink.send(event)
+                        self._count('sent')
+                        break
+                    except Exception as e:
+                        if attempt == self.retries - 1:
+                            self._count('failed')
+                            print(f"[ERROR] Alert nie dostarczony ({sink.name}): {e}")
+                        else:
+                            time.sleep(self.backoff * (attempt + 1))
+            finally:
+                q.task_done()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def pending(self) -> int:
+        return sum(q.unfinished_tasks for q in self._queues)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Czeka na dostarczenie kolejek (CLI przed wyjściem). False po przekroczeniu czasu."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.pending():
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+class AlertEngine:
+    """
+    Ocena reguł po analizie + stan (aktywne alarmy, ostatnie wysyłki) na dysku
+
+    Args:
+        rules: Lista AlertRule
+        sinks: Odbiorcy zdarzeń (FileSink, WebhookSink, SmtpSink, HistorySink)
+        state_path: Plik stanu (None = tylko w pamięci)
+        analysis_severity: Alerty z analizy o tej ważności też są deduplikowane
+                           i wysyłane (None = wyłączone)
+        analysis_cooldown: Cooldown (s) dla alertów z analizy
+    """
+
+    def __init__(self, rules: List[AlertRule], sinks: Optional[List] = None,
+                 state_path: Optional[str] = 'alert_state.json',
+                 analysis_severity: Optional[str] = 'critical', analysis_cooldown: float = 6 * 3600):
+        self.rules = {rule.name: rule for rule in rules}
+        self.state_path = state_path
+        self.analysis_severity = analysis_severity
+        self.analysis_cooldown = analysis_cooldown
+        self.dispatcher = Dispatcher(sinks or [])
+        self._lock = threading.Lock()
+        self.state: Dict[str, Dict] = self._load_state()
+
+    def _load_state(self) -> Dict[str, Dict]:
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Nie udalo sie wczytac stanu alertow: {e}")
+        return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def update_rule(self, name: str, **changes):
+        """Zmienia parametry reguły (np. próg z suwaka w aplikacji)"""
+        rule = self.rules[name]
+        with self._lock:
+            for key, value in changes.items():
+                setattr(rule, key, value)
+
+    def subscribe(self, address: str):
+        """Dodaje adres email do odbiorców SMTP (bez odbiorcy SMTP - bez efektu)"""
+        for sink in self.dispatcher.sinks:
+            if hasattr(sink, 'subscribe'):
+                sink.subscribe(address)
+
+    def unsubscribe(self, address: str):
+        for sink in self.dispatcher.sinks:
+            if hasattr(sink, 'unsubscribe'):
+                sink.unsubscribe(address)
+
+    def _transition(self, key: str, rule_name: str, active_now: bool, severity: str,
+                    indicator: str, message: str, value: Optional[float], now: float,
+                    cooldown: float) -> Optional[AlertEvent]:
+        """Aktualizuje stan klucza; zwraca zdarzenie tylko przy zmianie stanu (i po cooldownie)"""
+        entry = self.state.setdefault(key, {'active': False, 'notified': False, 'last_fired': 0.0})
+        entry['value'] = value
+
+        if active_now and not entry['active']:
+            entry['active'] = True
+            # Ten sam alarm niedawno wysłany (flapping) - stan się zmienia, ale bez powiadomienia
+            entry['notified'] = now - entry['last_fired'] >= cooldown
+            if not entry['notified']:
+                return None
+            entry['last_fired'] = now
+            return AlertEvent(key, rule_name, 'fired', severity, indicator, message, value)
+
+        if not active_now and entry['active']:
+            entry['active'] = False
+            if not entry['notified']:
+                return None
+            return AlertEvent(key, rule_name, 'resolved', 'info', indicator, f"Powrot do normy: {message}", value)
+
+        return None
+
+    def evaluate(self, indicators: Dict, analysis: Dict) -> List[AlertEvent]:
+        """
+        Ocenia reguły dla nowej analizy i przekazuje zmiany stanu do odbiorców
+
+        Returns:
+            Zdarzenia wysłane w tym przebiegu (zwykle pusta lista)
+        """
+        now = time.time()
+        events = []
+
+        with self._lock:
+            for rule in self.rules.values():
+                value = rule.metric(indicators, analysis)
+                if value is None:
+                    continue
+                value = float(value)
+                entry = self.state.get(rule.name, {})
+                # Histereza: aktywny alarm trwa aż do przekroczenia progu `clear`
+                active_now = not rule.cleared(value) if entry.get('active') else rule.breached(value)
+                message = rule.message.format(value=value, trigger=rule.trigger, clear=rule.clear)
+                event = self._transition(rule.name, rule.name, active_now, rule.severity,
+                                         rule.name, message, value, now, rule.cooldown)
+                if event:
+                    events.append(event)
+
+            if self.analysis_severity:
+                # Alerty z analizy - klucz per wskaźnik (treść zawiera liczby, więc jej nie porównujemy)
+                current = {a['indicator']: a for a in analysis.get('alerts', [])
+                           if a['severity'] == self.analysis_severity}
+                known = {k[len('analysis:'):] for k, v in self.state.items()
+                         if k.startswith('analysis:') and v['active']}
+                for indicator in set(current) | known:
+                    alert = current.get(indicator)
+                    event = self._transition(
+                        f"analysis:{indicator}", 'analysis', alert is not None, self.analysis_severity,
+                        indicator, alert['message'] if alert else indicator, None, now, self.analysis_cooldown,
+                    )
+                    if event:
+                        events.append(event)
+
+            self._save_state()
+
+        for event in events:
+            self.dispatcher.submit(event)
+        return events
+
+    def active(self) -> List[str]:
+        """Klucze reguł, które są teraz w stanie alarmu"""
+        return sorted(key for key, entry in self.state.items() if entry['active'])
+
+    def flush(self, timeout: Optional[float] = 30) -> bool:
+        return self.dispatcher.flush(timeout)
+
+
+def sinks_from_env(history=None, email: Optional[str] = None) -> List:
+    """
+    Odbiorcy skonfigurowani zmiennymi środowiskowymi:
+
+    LIQUIDITY_ALERT_FILE       - plik JSONL ze zdarzeniami
+    LIQUIDITY_WEBHOOK_URL      - adres webhooka
+    LIQUIDITY_SMTP_HOST/PORT   - serwer SMTP (+ LIQUIDITY_SMTP_USER/PASSWORD/FROM/STARTTLS)
+    LIQUIDITY_ALERT_EMAIL      - odbiorcy emaili (po przecinku; `email` ma pierwszeństwo)
+
+    Odbiorca SMTP powstaje przy samym LIQUIDITY_SMTP_HOST - adresy można
+    dopisać później przez AlertEngine.subscribe.
+
+    Args:
+        history: HistoryStore - alarmy trafiają też do historii alertów
+        email: Adres(y) z ustawień aplikacji
+    """
+    env = os.environ
+    recipients = email or env.get('LIQUIDITY_ALERT_EMAIL')
+    sinks = []
+    if history is not None:
+        sinks.append(HistorySink(history))
+    if env.get('LIQUIDITY_ALERT_FILE'):
+        sinks.append(FileSink(env['LIQUIDITY_ALERT_FILE']))
+    if env.get('LIQUIDITY_WEBHOOK_URL'):
+        sinks.append(WebhookSink(env['LIQUIDITY_WEBHOOK_URL']))
+    if env.get('LIQUIDITY_SMTP_HOST'):
+        sinks.append(SmtpSink(
+            env['LIQUIDITY_SMTP_HOST'],
+            to=[a.strip() for a in (recipients or '').split(',') if a.strip()],
+            port=int(env.get('LIQUIDITY_SMTP_PORT', 25)),
+            sender=env.get('LIQUIDITY_SMTP_FROM', 'liquidity-monitor@localhost'),
+            username=env.get('LIQUIDITY_SMTP_USER'),
+            password=env.get('LIQUIDITY_SMTP_PASSWORD'),
+            starttls=env.get('LIQUIDITY_SMTP_STARTTLS', '').lower() in ('1', 'true', 'yes'),
+        ))
+    return sinks
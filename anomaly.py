@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Anomaly - strumieniowy z-score nowych odczytów każdej serii
+
+Zamiast stałych progów change_7d (spread +0.05, VIX +5) każda seria ma
+własne statystyki zmian między kolejnymi odczytami, aktualizowane w O(1)
+na obserwację:
+
+    EWMA     - wykładnicza średnia i wariancja zmian (szybko się adaptuje)
+    robust   - mediana i MAD zmian (aproksymacja stochastyczna - jeden
+               skok nie rozdmuchuje skali, jak w przypadku wariancji)
+
+Nowy odczyt oceniany jest względem statystyk SPRZED niego, potem je
+aktualizuje. Stan (statystyki + data ostatniego odczytu) trzymany jest w
+pliku JSON - po restarcie przetwarzane są tylko odczyty nowsze niż zapisane,
+a nie dekady historii. Rewizje starszych odczytów są ignorowane.
+
+Użycie:
+    detector = AnomalyDetector('anomaly_state.json')
+    for event in detector.update_indicators(indicators):
+        print(event['indicator'], event['robust_z'])
+"""
+
+import json
+import math
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class SeriesStats:
+    """
+    Statystyki online zmian jednej serii
+
+    Args:
+        halflife: Półokres EWMA i kroku mediany/MAD (w odczytach)
+        warmup: Ile pierwszych zmian zbierać, zanim statystyki zostaną zainicjalizowane dokładnie
+    """
+
+    FIELDS = ('last_date', 'last_value', 'count', 'mean', 'var', 'median', 'mad', 'buffer', 'last')
+
+    def __init__(self, halflife: float = 60, warmup: int = 30):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.warmup = warmup
+        self.last_date: Optional[str] = None
+        self.last_value: Optional[float] = None
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.median = 0.0
+        self.mad = 0.0
+        self.buffer: List[float] = []
+        self.last: Optional[Dict] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.warmup
+
+    def robust_scale(self) -> float:
+        # MAD = 0 (seria zmienia się rzadko, np. stopy Fed) - wtedy odchylenie EWMA
+        return 1.4826 * self.mad if self.mad > 0 else math.sqrt(self.var)
+
+    def score(self, change: float):
+        """(z EWMA, z robust) dla zmiany - względem dotychczasowych statystyk"""
+        if not self.ready:
+            return None, None
+        std, scale = math.sqrt(self.var), self.robust_scale()
+        z = (change - self.mean) / std if std > 0 else (0.0 if change == self.mean else math.inf)
+        robust_z = (change - self.median) / scale if scale > 0 else (0.0 if change == self.median else math.inf)
+        return z, robust_z
+
+    def update(self, change: float):
+        self.count += 1
+        if self.count < self.warmup:
+            self.buffer.append(change)
+            return
+        if self.count == self.warmup:
+            # Koniec rozgrzewki - dokładne statystyki z bufora, dalej tylko O(1)
+            sample = np.array(self.buffer + [change])
+            self.mean, self.var = float(sample.mean()), float(sample.var())
+            self.median = float(np.median(sample))
+            self.mad = float(np.median(np.abs(sample - self.median)))
+            self.buffer = []
+            return
+
+        a = self.alpha
+        diff = change - self.mean
+        self.mean += a * diff
+        self.var = (1 - a) * (self.var + a * diff * diff)
+
+        # Mediana i MAD: krok w stronę obserwacji proporcjonalny do skali (równowaga = kwantyl 50%)
+        step = a * max(self.mad, 0.1 * math.sqrt(self.var), 1e-12)
+        self.median += step if change > self.median else (-step if change < self.median else 0.0)
+        deviation = abs(change - self.median)
+        self.mad += step if deviation > self.mad else (-step if deviation < self.mad else 0.0)
+        self.mad = max(self.mad, 0.0)
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict, halflife: float, warmup: int) -> 'SeriesStats':
+        stats = cls(halflife, warmup)
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(stats, field, data[field])
+        return stats
+
+
+class AnomalyDetector:
+    """
+    Detektor nietypowych ruchów dla wszystkich serii + stan na dysku
+
+    Args:
+        state_path: Plik stanu (None = tylko w pamięci)
+        halflife: Półokres statystyk (w odczytach serii)
+        threshold: Próg |z| dla anomalii
+        method: 'robust' (mediana/MAD, domyślnie) albo 'ewma' - który z-score decyduje
+        warmup: Minimalna liczba zmian, zanim seria może zgłaszać anomalie
+    """
+
+    def __init__(self, state_path: Optional[str] = 'anomaly_state.json', halflife: float = 60,
+                 threshold: float = 4.0, method: str = 'robust', warmup: int = 30):
+        if method not in ('robust', 'ewma'):
+            raise ValueError(f"Nieznana metoda: {method}")
+        self.state_path = state_path
+        self.halflife = halflife
+        self.threshold = threshold
+        self.method = method
+        self.warmup = warmup
+        self._lock = threading.Lock()
+        self.series: Dict[str, SeriesStats] = self._load_state()
+
+    def _load_state(self) -> Dict[str, SeriesStats]:
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    data = json.load(f)
+                return {name: SeriesStats.from_dict(entry, self.halflife, self.warmup)
+                        for name, entry in data.items()}
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Nie udalo sie wczytac stanu anomalii: {e}")
+        return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({name: stats.to_dict() for name, stats in self.series.items()}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _observe(self, name: str, stats: SeriesStats, date: str, value: float) -> Optional[Dict]:
+        if stats.last_value is None:
+            stats.last_date, stats.last_value = date, value
+            return None
+
+        change = value - stats.last_value
+        z, robust_z = stats.score(change)
+        stats.update(change)
+        stats.last_date, stats.last_value = date, value
+
+        decisive = robust_z if self.method == 'robust' else z
+        # Zmiana serii, która dotąd stała w miejscu, daje z = inf - w JSON jako null
+        stats.last = {
+            'indicator': name,
+            'date': date,
+            'value': value,
+            'change': change,
+            'z': z if z is None or math.isfinite(z) else None,
+            'robust_z': robust_z if robust_z is None or math.isfinite(robust_z) else None,
+            'anomaly': decisive is not None and abs(decisive) >= self.threshold,
+        }
+        return stats.last
+
+    def update(self, name: str, dates, values) -> List[Dict]:
+        """
+        Przetwarza odczyty serii nowsze niż ostatni zapisany (bez zapisu stanu)
+
+        Args:
+            dates: Daty odczytów 'YYYY-MM-DD' (rosnąco)
+            values: Wartości
+
+        Returns:
+            Anomalie wśród nowych odczytów. Dla serii bez stanu (pierwsze uruchomienie)
+            cała historia tylko buduje statystyki - zgłaszany jest co najwyżej ostatni odczyt.
+        """
+        dates = np.asarray(dates, dtype=str)
+        stats = self.series.get(name)
+        if stats is None:
+            stats = self.series[name] = SeriesStats(self.halflife, self.warmup)
+            report_from = dates[-1] if len(dates) else None
+        else:
+            report_from = None
+
+        # Wyszukiwanie binarne zamiast przeglądania przetworzonej historii - pętla tylko po nowych odczytach
+        start = 0 if stats.last_date is None else int(np.searchsorted(dates, stats.last_date, side='right'))
+        anomalies = []
+        for date, value in zip(dates[start:].tolist(), values[start:]):
+            if value is None or not math.isfinite(value):
+                continue
+            result = self._observe(name, stats, date, float(value))
+            if result and result['anomaly'] and (report_from is None or date >= report_from):
+                anomalies.append(result)
+        return anomalies
+
+    def update_indicators(self, indicators: Dict) -> List[Dict]:
+        """
+        Wszystkie serie z get_all_indicators() - nowe odczyty, zapis stanu (gdy były), lista anomalii
+
+        Koszt przebiegu bez nowych odczytów to wyszukiwanie binarne na serię - daty
+        formatowane są tylko dla ogona nowszego niż zapisany.
+        """
+        anomalies = []
+        with self._lock:
+            changed = False
+            for name, data in indicators.items():
+                df = data.get('data')
+                if df is None or df.empty:
+                    continue
+                stats = self.series.get(name)
+                last_date = stats.last_date if stats is not None else None
+                start = 0 if last_date is None else int(df['date'].searchsorted(np.datetime64(last_date), side='right'))
+                if start >= len(df):
+                    continue
+                tail = df.iloc[start:]
+                anomalies.extend(self.update(name, tail['date'].dt.strftime('%Y-%m-%d').to_numpy(),
+                                             tail['value'].to_numpy(dtype=float)))
+                changed = changed or self.series[name].last_date != last_date
+            if changed:
+                self._save_state()
+
+        for event in anomalies:
+            scores = ', '.join(f"{label} {event[key]:+.1f}" if event[key] is not None else f"{label} inf"
+                               for key, label in (('robust_z', 'z robust'), ('z', 'z EWMA')))
+            print(f"[ANOMALY] {event['indicator']} {event['date']}: zmiana {event['change']:+.4g} ({scores})")
+        return anomalies
+
+    def latest(self) -> Dict[str, Dict]:
+        """Ocena ostatniego odczytu każdej serii (także gdy nie był anomalią)"""
+        return {name: stats.last for name, stats in self.series.items() if stats.last}
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+API Server - lokalne HTTP/JSON API nad LiquidityMonitor
+
+Serwuje ocenę, reżim, alerty, percentyle, wzorce i historie serii innym
+systemom. Odpowiedzi pochodzą z migawki w pamięci, odświeżanej w tle -
+żadne zapytanie HTTP nie czeka na FRED. Ciała odpowiedzi są serializowane
+(i kompresowane gzip) raz na odświeżenie, a ETag liczony z treści pozwala
+klientom odpytującym cyklicznie dostawać 304 bez ciała.
+
+Endpointy (GET):
+    /api/health                 - stan serwisu (wiek migawki, ostatni błąd)
+    /api/snapshot               - ocena + alerty + sygnały + bieżące wartości
+    /api/analysis               - pełna analiza (reżim, wynik, interpretacja)
+    /api/indicators             - bieżące wartości i zmiany wskaźników
+    /api/percentiles            - percentyle historyczne
+    /api/patterns               - konflikty / wzmocnienia / sygnały złożone
+    /api/series                 - lista dostępnych serii
+    /api/series/<nazwa>         - historia serii; ?start=YYYY-MM-DD&end=...&limit=N
+
+Endpointy (POST, ciało JSON):
+    /api/scenarios              - what-if na bieżącej migawce:
+                                  {"scenarios": [{"name": ..., "shocks": {"vix": 35, "reserves": {"delta": -200}}}]}
+                                  albo {"grid": {"x": "vix", "x_values": [...], "y": ..., "y_values": [...]}}
+
+Użycie:
+    python api_server.py --port 8080 --refresh 900
+    curl -i localhost:8080/api/snapshot
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from history_store import HistoryStore
+from liquidity_monitor import LiquidityMonitor
+from scenarios import ScenarioEngine
+
+
+# Mniejszych odpowiedzi nie opłaca się kompresować
+GZIP_MIN_BYTES = 1024
+
+# Ile różnych wycinków historii trzymać zserializowanych na migawkę
+SLICE_CACHE_SIZE = 256
+
+# Limity zapytań what-if (liczba scenariuszy / rozmiar ciała)
+MAX_SCENARIOS = 10000
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Czy klient przyjmie gzip - z wagami q z nagłówka Accept-Encoding
+
+    'gzip;q=0' to jawna odmowa, '*' obejmuje gzip, jeśli nie wymieniono go
+    osobno. Wpis z niepoprawną wagą jest pomijany.
+    """
+    weights = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None:
+            weights[coding] = q
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in weights:
+            return weights[coding] > 0
+    return False
+
+
+def _json_default(obj):
+    """Typy numpy / pandas, których json nie zna"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+class _Body:
+    """Gotowa odpowiedź: bajty, wersja gzip i ETag"""
+
+    __slots__ = ('raw', 'gzipped', 'etag')
+
+    def __init__(self, payload):
+        self.raw = json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+        self.gzipped = gzip.compress(self.raw, 6) if len(self.raw) >= GZIP_MIN_BYTES else None
+        self.etag = '"' + hashlib.sha1(self.raw).hexdigest()[:20] + '"'
+
+
+class _Snapshot:
+    """Niezmienny obraz danych - podmieniany w całości przy odświeżeniu"""
+
+    def __init__(self, indicators: Dict, analysis: Dict, snapshot: Dict, days_back: int,
+                 scenarios: Optional[ScenarioEngine] = None):
+        self.created = time.time()
+        self.scenarios = scenarios
+        self.updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.days_back = days_back
+
+        regime = analysis.get('market_regime', {})
+        summary = {
+            'score': analysis['overall_score'],
+            'raw_score': analysis.get('raw_score'),
+            'regime': regime.get('regime'),
+            'regime_name': regime.get('name'),
+            'interpretation': analysis['interpretation'],
+        }
+
+        self.bodies: Dict[str, _Body] = {
+            '/api/snapshot': _Body(dict(snapshot, analysis=dict(snapshot['analysis'], **summary))),
+            '/api/analysis': _Body(dict(
+                summary,
+                timestamp=analysis['timestamp'],
+                market_regime=regime,
+                signals=analysis['signals'],
+                alerts=analysis['alerts'],
+            )),
+            '/api/indicators': _Body({'timestamp': analysis['timestamp'], 'indicators': snapshot['indicators']}),
+            '/api/percentiles': _Body({'timestamp': analysis['timestamp'],
+                                       'percentiles': analysis.get('percentiles', {})}),
+            '/api/patterns': _Body({'timestamp': analysis['timestamp'],
+                                    'patterns': analysis.get('patterns', {})}),
+            '/api/series': _Body({'series': sorted(indicators)}),
+        }
+
+        # Historie jako tablice - wycinki po dacie przez searchsorted, bez pandas na ścieżce zapytania
+        self.series: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name, data in indicators.items():
+            df = data['data']
+            dates = df['date'].to_numpy(dtype='datetime64[D]')
+            values = df['value'].to_numpy(dtype=float)
+            self.series[name] = (dates, values)
+
+        self._slices: 'OrderedDict[Tuple, _Body]' = OrderedDict()
+        self._slices_lock = threading.Lock()
+
+    def series_slice(self, name: str, start: Optional[str], end: Optional[str],
+                     limit: Optional[int]) -> _Body:
+        if limit is not None and limit <= 0:
+            raise ValueError(f"limit musi byc dodatni: {limit}")
+        key = (name, start, end, limit)
+        with self._slices_lock:
+            body = self._slices.get(key)
+            if body is not None:
+                self._slices.move_to_end(key)
+                return body
+
+        dates, values = self.series[name]
+        lo = np.searchsorted(dates, np.datetime64(start, 'D'), 'left') if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), 'right') if end else len(dates)
+        if limit is not None:
+            lo = max(lo, hi - limit)  # Ostatnie N obserwacji w zakresie
+
+        body = _Body({
+            'series': name,
+            'count': int(hi - lo),
+            'dates': dates[lo:hi].astype(str).tolist(),
+            'values': [None if np.isnan(v) else v for v in values[lo:hi].tolist()],
+        })
+
+        with self._slices_lock:
+            self._slices[key] = body
+            if len(self._slices) > SLICE_CACHE_SIZE:
+                self._slices.popitem(last=False)
+        return body
+
+
+class LiquidityService:
+    """
+    Migawka analizy w pamięci + wątek odświeżający ją w tle
+
+    Args:
+        monitor: Skonfigurowany LiquidityMonitor
+        days_back: Okno historii pobierane przy każdym odświeżeniu
+        refresh_interval: Co ile sekund odświeżać dane
+        history: Opcjonalny magazyn historii - każda odświeżona analiza jest w nim zapisywana
+    """
+
+    def __init__(self, monitor: LiquidityMonitor, days_back: int = 90, refresh_interval: float = 900,
+                 history: Optional[HistoryStore] = None):
+        self.monitor = monitor
+        self.days_back = days_back
+        self.refresh_interval = refresh_interval
+        self.history = history
+        self.snapshot: Optional[_Snapshot] = None
+        self.last_error: Optional[str] = None
+        self.refreshing = False
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """Pobiera dane, analizuje i podmienia migawkę. Przy błędzie zostaje poprzednia."""
+        with self._refresh_lock:
+            self.refreshing = True
+            try:
+                indicators = self.monitor.get_all_indicators(days_back=self.days_back)
+                if not indicators:
+                    raise RuntimeError("Nie udalo sie pobrac zadnych danych")
+                analysis = self.monitor.analyze_liquidity_conditions(indicators)
+                snapshot = self.monitor.snapshot(indicators, analysis)
+                self.snapshot = _Snapshot(indicators, analysis, snapshot, self.days_back,
+                                          scenarios=ScenarioEngine(self.monitor, indicators))
+                self.last_error = None
+                if self.history is not None:
+                    self.history.record(indicators, analysis, source='api')
+                print(f"[API] Migawka odswiezona ({len(indicators)} wskaznikow, "
+                      f"ocena {analysis['overall_score']})")
+                return True
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"[ERROR] Odswiezenie migawki nie powiodlo sie: {self.last_error}")
+                return False
+            finally:
+                self.refreshing = False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='liquidity-refresh', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def health(self) -> Dict:
+        snapshot = self.snapshot
+        return {
+            'status': 'ok' if snapshot and not self.last_error else ('stale' if snapshot else 'starting'),
+            'updated_at': snapshot.updated_at if snapshot else None,
+            'age_seconds': round(time.time() - snapshot.created, 1) if snapshot else None,
+            'days_back': self.days_back,
+            'refresh_interval': self.refresh_interval,
+            'refreshing': self.refreshing,
+            'last_error': self.last_error,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routing GET / POST - wszystko czytane z bieżącej migawki serwisu"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive: klienci odpytujący nie otwierają połączenia co raz
+    server_version = 'LiquidityAPI/1.0'
+    disable_nagle_algorithm = True  # Nagłówki i ciało idą osobno - bez tego każde zapytanie czeka ~40 ms na ACK
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/') or '/'
+        service: LiquidityService = self.server.service
+
+        if path == '/api/health':
+            return self._send_json(200, service.health())
+
+        snapshot = service.snapshot
+        if snapshot is None:
+            return self._send_json(503, {'error': 'Dane jeszcze sie laduja'}, {'Retry-After': '5'})
+
+        body = snapshot.bodies.get(path)
+        if body is None and path.startswith('/api/series/'):
+            name = path[len('/api/series/'):]
+            if name not in snapshot.series:
+                return self._send_json(404, {'error': f'Nieznana seria: {name}'})
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                limit = int(params['limit']) if 'limit' in params else None
+                body = snapshot.series_slice(name, params.get('start'), params.get('end'), limit)
+            except ValueError as e:
+                return self._send_json(400, {'error': f'Niepoprawny parametr: {e}'})
+
+        if body is None:
+            return self._send_json(404, {'error': f'Nieznany endpoint: {path}'})
+
+        self._send_body(body)
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip('/')
+        if path != '/api/scenarios':
+            return self._send_json(404, {'error': f'Nieznany endpoint: {path}'})
+
+        snapshot = self.server.service.snapshot
+        if snapshot is None:
+            return self._send_json(503, {'error': 'Dane jeszcze sie laduja'}, {'Retry-After': '5'})
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._send_json(413, {'error': f'Za duze zapytanie (max {MAX_BODY_BYTES} B)'})
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if 'grid' in request:
+                grid = request['grid']
+                size = len(grid['x_values']) * len(grid.get('y_values', [0]))
+                if size > MAX_SCENARIOS:
+                    raise ValueError(f"Za duzo scenariuszy: {size} (max {MAX_SCENARIOS})")
+                results = snapshot.scenarios.grid(
+                    grid['x'], grid['x_values'], grid.get('y'), grid.get('y_values', [0]),
+                    x_mode=grid.get('x_mode', 'value'), y_mode=grid.get('y_mode', 'value'),
+                )
+            else:
+                scenarios = request['scenarios']
+                if not isinstance(scenarios, list) or len(scenarios) > MAX_SCENARIOS:
+                    raise ValueError(f"'scenarios' musi byc lista (max {MAX_SCENARIOS})")
+                results = snapshot.scenarios.run(scenarios)
+        except (KeyError, TypeError, ValueError) as e:
+            return self._send_json(400, {'error': f'Niepoprawne zapytanie: {e}'})
+
+        self._send_json(200, {'updated_at': snapshot.updated_at, 'results': results.to_dict('records')})
+
+    def _send_body(self, body: _Body):
+        headers = {
+            'ETag': body.etag,
+            'Cache-Control': 'no-cache',  # Wolno trzymać, ale zawsze rewalidować ETagiem
+            'Vary': 'Accept-Encoding',
+        }
+
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or body.etag in if_none_match):
+            self.send_response(304)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        payload = body.raw
+        if body.gzipped is not None and accepts_gzip(self.headers.get('Accept-Encoding')):
+            payload = body.gzipped
+            headers['Content-Encoding'] = 'gzip'
+        self._write(200, payload, headers)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        raw = json.dumps(payload, default=_json_default, ensure_ascii=False).encode('utf-8')
+        self._write(status, raw, dict(headers or {}, **{'Cache-Control': 'no-store'}))
+
+    def _write(self, status: int, payload: bytes, headers: Dict):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class LiquidityAPIServer:
+    """Serwer HTTP + serwis migawek (start/stop, context manager)"""
+
+    def __init__(self, service: LiquidityService, host: str = '127.0.0.1', port: int = 8080,
+                 verbose: bool = False):
+        self.service = service
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.service = service
+        self.httpd.verbose = verbose
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, background_refresh: bool = True):
+        if background_refresh:
+            self.service.start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.service.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Liquidity Monitor - lokalne HTTP/JSON API')
+    parser.add_argument('--host', default='127.0.0.1', help='Adres nasluchu (domyslnie tylko lokalnie)')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--refresh', type=float, default=900, help='Odswiezanie danych co N sekund')
+    parser.add_argument('--days-back', type=int, default=90, help='Okno historii w dniach')
+    parser.add_argument('--api-key', help='Klucz FRED (domyslnie FRED_API_KEY)')
+    parser.add_argument('--history', metavar='DB', help='Zapisuj kazda analize w historii (np. history.db)')
+    parser.add_argument('--verbose', action='store_true', help='Loguj kazde zapytanie HTTP')
+    args = parser.parse_args()
+
+    api_key = args.api_key or os.environ.get('FRED_API_KEY')
+    if not api_key:
+        print("[ERROR] Brak klucza: ustaw FRED_API_KEY albo podaj --api-key")
+        return 2
+
+    monitor = LiquidityMonitor(fred_api_key=api_key)
+    history = HistoryStore(args.history) if args.history else None
+    service = LiquidityService(monitor, days_back=args.days_back, refresh_interval=args.refresh,
+                               history=history)
+    server = LiquidityAPIServer(service, host=args.host, port=args.port, verbose=args.verbose).start()
+
+    print(f"[API] Nasluchuje na {server.url}/api/snapshot (odswiezanie co {args.refresh:.0f}s)")
+    print("Ctrl+C aby zakonczyc")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
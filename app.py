@@ -11,8 +11,17 @@ from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import json
 import os
+import time
 from dotenv import load_dotenv
 from liquidity_monitor import LiquidityMonitor
+from history_store import HistoryStore
+from alert_engine import AlertEngine, default_rules, sinks_from_env
+from scenarios import ScenarioEngine
+from correlations import RollingCorrelation, build_panel
+from anomaly import AnomalyDetector
+from workers import WorkerPool, load_and_analyze
+from figure_cache import FigureCache, downsample, series_version
+from data_version import combine, indicators_version
 
 # Załaduj zmienne środowiskowe z pliku .env
 load_dotenv()
@@ -35,16 +44,28 @@ if 'analysis' not in st.session_state:
 if 'alert_email' not in st.session_state:
     st.session_state.alert_email = ""
 
-# Funkcja do ładowania danych
-@st.cache_data(ttl=3600)  # Cache na 1 godzinę
-def load_data(api_key, days_back=90):
-    """Ładuje dane z FRED"""
-    monitor = LiquidityMonitor(fred_api_key=api_key)
-    indicators = monitor.get_all_indicators(days_back=days_back)  # Przekazujemy days_back!
-    if indicators:
-        analysis = monitor.analyze_liquidity_conditions(indicators)
-        return indicators, analysis, monitor
-    return None, None, monitor
+@st.cache_resource
+def get_monitor(api_key):
+    """
+    Wspólny monitor (źródła danych z ostatnimi dobrymi kopiami serii) - po wygaśnięciu
+    wyniku zadania serie po TTL czekają na FRED najwyżej revalidate_timeout, potem wraca kopia
+    """
+    return LiquidityMonitor(fred_api_key=api_key)
+
+@st.cache_resource
+def get_workers():
+    """
+    Wspólna pula zadań - pobieranie i analiza poza wątkiem strony; sesje z tym samym
+    kluczem dostają to samo zadanie, wynik żyje godzinę (jak dawny cache)
+    """
+    return WorkerPool(result_ttl=3600)
+
+@st.cache_resource
+def get_history_store():
+    """Wspólny dla wszystkich sesji magazyn historii analiz (+ import starego alert_log.json)"""
+    store = HistoryStore(os.environ.get('LIQUIDITY_HISTORY_DB', 'history.db'))
+    store.import_alert_log('alert_log.json')
+    return store
 
 def get_glossary():
     """Słownik pojęć - proste wyjaśnienia skomplikowanych terminów"""
@@ -99,28 +120,39 @@ def get_glossary():
         }
     }
 
-def create_metric_card(label, value, change, unit="B USD", inverse=False):
-    """Tworzy kartę z metryką"""
+def create_metric_card(label, value, change, unit="B USD", inverse=False, stale_age=None):
+    """Tworzy kartę z metryką (stale_age - wiek ostatniej dobrej kopii w sekundach, gdy dane nieaktualne)"""
     change_color = "inverse" if inverse else "normal"
     delta_color = "inverse" if (change < 0 and not inverse) or (change > 0 and inverse) else "normal"
+    help_text = None
+    if stale_age is not None:
+        label = f"{label} ⏳"
+        help_text = f"Dane nieaktualne - ostatnia dobra kopia sprzed {stale_age / 3600:.1f} h"
 
     if unit == "%":
         st.metric(
             label=label,
             value=f"{value:.2f}%",
             delta=f"{change:+.2f}%",
-            delta_color=delta_color
+            delta_color=delta_color,
+            help=help_text
         )
     else:
         st.metric(
             label=label,
             value=f"${value:.1f}B",
             delta=f"${change:+.1f}B",
-            delta_color=delta_color
+            delta_color=delta_color,
+            help=help_text
         )
 
-def create_time_series_chart(indicators, metric_name, title):
-    """Tworzy interaktywny wykres czasowy"""
+def _xy(data, max_points=None):
+    """x / y serii do go.Scatter - przerzedzone do max_points punktów (minimum i maksimum w przedziałach)"""
+    x, y = downsample(data['date'].to_numpy(), data['value'].to_numpy(dtype=float), max_points)
+    return {'x': x, 'y': y}
+
+def create_time_series_chart(indicators, metric_name, title, max_points=None):
+    """Tworzy interaktywny wykres czasowy (max_points - limit punktów linii, średnia z pełnych danych)"""
     if metric_name not in indicators:
         return None
 
@@ -129,8 +161,7 @@ def create_time_series_chart(indicators, metric_name, title):
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
-        x=data['date'],
-        y=data['value'],
+        **_xy(data, max_points),
         mode='lines',
         name=title,
         line=dict(color='#1f77b4', width=2),
@@ -159,7 +190,7 @@ def create_time_series_chart(indicators, metric_name, title):
 
     return fig
 
-def create_multi_indicator_chart(indicators):
+def create_multi_indicator_chart(indicators, max_points=None):
     """Tworzy wykres z wieloma wskaźnikami"""
     fig = make_subplots(
         rows=3, cols=2,
@@ -175,7 +206,7 @@ def create_multi_indicator_chart(indicators):
     if 'reserves' in indicators:
         data = indicators['reserves']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='Rezerwy', line=dict(color='blue')),
+            go.Scatter(**_xy(data, max_points), name='Rezerwy', line=dict(color='blue')),
             row=1, col=1
         )
 
@@ -183,7 +214,7 @@ def create_multi_indicator_chart(indicators):
     if 'tga' in indicators:
         data = indicators['tga']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='TGA', line=dict(color='green')),
+            go.Scatter(**_xy(data, max_points), name='TGA', line=dict(color='green')),
             row=1, col=2
         )
 
@@ -191,7 +222,7 @@ def create_multi_indicator_chart(indicators):
     if 'reverse_repo' in indicators:
         data = indicators['reverse_repo']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='RRP', line=dict(color='orange')),
+            go.Scatter(**_xy(data, max_points), name='RRP', line=dict(color='orange')),
             row=2, col=1
         )
 
@@ -199,7 +230,7 @@ def create_multi_indicator_chart(indicators):
     if 'fed_balance' in indicators:
         data = indicators['fed_balance']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='Fed Balance', line=dict(color='purple')),
+            go.Scatter(**_xy(data, max_points), name='Fed Balance', line=dict(color='purple')),
             row=2, col=2
         )
 
@@ -208,19 +239,19 @@ def create_multi_indicator_chart(indicators):
         sofr_data = indicators['sofr']['data']
         iorb_data = indicators['iorb']['data']
         fig.add_trace(
-            go.Scatter(x=sofr_data['date'], y=sofr_data['value'], name='SOFR', line=dict(color='red')),
+            go.Scatter(**_xy(sofr_data, max_points), name='SOFR', line=dict(color='red')),
             row=3, col=1
         )
         fig.add_trace(
-            go.Scatter(x=iorb_data['date'], y=iorb_data['value'], name='IORB', line=dict(color='darkred')),
+            go.Scatter(**_xy(iorb_data, max_points), name='IORB', line=dict(color='darkred')),
             row=3, col=1
         )
 
-        # Spread
-        merged = pd.merge(sofr_data, iorb_data, on='date', suffixes=('_sofr', '_iorb'))
-        merged['spread'] = merged['value_sofr'] - merged['value_iorb']
+    # Spread (seria pochodna z build_indicators)
+    if 'sofr_iorb_spread' in indicators:
+        spread_data = indicators['sofr_iorb_spread']['data']
         fig.add_trace(
-            go.Scatter(x=merged['date'], y=merged['spread'], name='Spread', line=dict(color='crimson')),
+            go.Scatter(**_xy(spread_data, max_points), name='Spread', line=dict(color='crimson')),
             row=3, col=2
         )
 
@@ -233,7 +264,31 @@ def create_multi_indicator_chart(indicators):
 
     return fig
 
-def create_tier1_charts(indicators):
+def create_net_liquidity_chart(indicators, max_points=None):
+    """Net liquidity (bilans Fed - TGA - RRP) i jej składniki"""
+    fig = make_subplots(
+        rows=2, cols=1, shared_xaxes=True, row_heights=[0.6, 0.4],
+        subplot_titles=('Net Liquidity (Bilans Fed - TGA - RRP)', 'Składniki')
+    )
+
+    data = indicators['net_liquidity']['data']
+    fig.add_trace(
+        go.Scatter(**_xy(data, max_points), name='Net Liquidity', line=dict(color='teal', width=2)),
+        row=1, col=1
+    )
+    for name, label, color in (('fed_balance', 'Bilans Fed', 'purple'), ('tga', 'TGA', 'green'),
+                               ('reverse_repo', 'RRP', 'orange')):
+        if name in indicators:
+            component = indicators[name]['data']
+            fig.add_trace(
+                go.Scatter(**_xy(component, max_points), name=label, line=dict(color=color)),
+                row=2, col=1
+            )
+
+    fig.update_layout(height=600, template='plotly_white', hovermode='x unified')
+    return fig
+
+def create_tier1_charts(indicators, max_points=None):
     """Tworzy wykresy dla Tier 1 wskaźników"""
     fig = make_subplots(
         rows=3, cols=2,
@@ -249,7 +304,7 @@ def create_tier1_charts(indicators):
     if 'm2' in indicators:
         data = indicators['m2']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='M2', line=dict(color='blue')),
+            go.Scatter(**_xy(data, max_points), name='M2', line=dict(color='blue')),
             row=1, col=1
         )
 
@@ -257,7 +312,7 @@ def create_tier1_charts(indicators):
     if 'yield_curve' in indicators:
         data = indicators['yield_curve']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='10Y-2Y', line=dict(color='green')),
+            go.Scatter(**_xy(data, max_points), name='10Y-2Y', line=dict(color='green')),
             row=1, col=2
         )
         # Dodaj linię na 0 (inwersja)
@@ -267,7 +322,7 @@ def create_tier1_charts(indicators):
     if 'vix' in indicators:
         data = indicators['vix']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='VIX', line=dict(color='red')),
+            go.Scatter(**_xy(data, max_points), name='VIX', line=dict(color='red')),
             row=2, col=1
         )
         # Dodaj linie progowe
@@ -278,7 +333,7 @@ def create_tier1_charts(indicators):
     if 'fin_conditions' in indicators:
         data = indicators['fin_conditions']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='NFCI', line=dict(color='purple')),
+            go.Scatter(**_xy(data, max_points), name='NFCI', line=dict(color='purple')),
             row=2, col=2
         )
         # Dodaj linię na 0
@@ -288,7 +343,7 @@ def create_tier1_charts(indicators):
     if 'dollar_index' in indicators:
         data = indicators['dollar_index']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='DXY', line=dict(color='orange')),
+            go.Scatter(**_xy(data, max_points), name='DXY', line=dict(color='orange')),
             row=3, col=1
         )
 
@@ -296,7 +351,7 @@ def create_tier1_charts(indicators):
     if 'reserves_alt' in indicators:
         data = indicators['reserves_alt']['data']
         fig.add_trace(
-            go.Scatter(x=data['date'], y=data['value'], name='Rezerwy', line=dict(color='darkblue')),
+            go.Scatter(**_xy(data, max_points), name='Rezerwy', line=dict(color='darkblue')),
             row=3, col=2
         )
 
@@ -309,37 +364,120 @@ def create_tier1_charts(indicators):
 
     return fig
 
-def save_alert_settings(email, threshold):
+def create_score_gauge(score):
+    """Wskaźnik oceny płynności (-100..+100)"""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=score,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Ocena Płynności", 'font': {'size': 24}},
+        delta={'reference': 0},
+        gauge={
+            'axis': {'range': [-100, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
+            'bar': {'color': "darkblue"},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "gray",
+            'steps': [
+                {'range': [-100, -40], 'color': '#ffcccc'},
+                {'range': [-40, 0], 'color': '#ffe6cc'},
+                {'range': [0, 40], 'color': '#e6f3ff'},
+                {'range': [40, 100], 'color': '#ccffcc'}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': score
+            }
+        }
+    ))
+
+    fig.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20))
+    return fig
+
+# Limit punktów na linię w wykresach przeglądowych - 50 lat serii dziennej to ~13 tys. punktów
+# na linię; 2000 (minimum i maksimum w przedziałach) wygląda tak samo przy szerokości ekranu
+CHART_MAX_POINTS = 2000
+
+@st.cache_resource
+def get_figure_cache():
+    """Wspólna dla sesji pamięć gotowych wykresów - budowane raz na wersję danych"""
+    return FigureCache()
+
+def cached_figure(kind, indicators, names, build, *args, max_points=CHART_MAX_POINTS):
+    """
+    Wykres z FigureCache - klucz (rodzaj, serie, wersja ich danych, przerzedzenie);
+    przy braku wpisu build(indicators, *args, max_points=max_points)
+    """
+    names = tuple(name for name in names if name in indicators)
+    return get_figure_cache().get(kind, names, series_version(indicators, names), max_points,
+                                  lambda: build(indicators, *args, max_points=max_points))
+
+# Najdłuższe okno historii - pobierane raz, suwak "Dni historii" przycina tylko widok (window_view)
+HISTORY_DAYS = 18250
+
+def window_view(indicators, days):
+    """Wskaźniki przycięte do ostatnich `days` dni (wyszukiwanie binarne po datach, bez kopiowania)"""
+    cutoff = pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+    view = {}
+    for name, data in indicators.items():
+        frame = data['data']
+        start = int(frame['date'].searchsorted(cutoff, side='left'))
+        if start == 0:
+            view[name] = data
+        else:
+            # Ostatni odczyt zostaje zawsze (rzadkie serie starsze niż okno)
+            start = min(start, len(frame) - 1)
+            view[name] = dict(data, data=frame.iloc[start:], history=frame['value'].iloc[start:])
+    return view
+
+def load_alert_settings():
+    """
+    Ustawienia alertów z alert_settings.json - jeden próg oceny i lista
+    subskrybentów wspólne dla wszystkich sesji (starszy format: pole 'email')
+    """
+    try:
+        with open('alert_settings.json') as f:
+            settings = json.load(f)
+    except (OSError, ValueError):
+        settings = {}
+    emails = settings.get('emails')
+    if emails is None:
+        emails = [settings['email']] if settings.get('email') else []
+    return {'emails': emails, 'threshold': settings.get('threshold', -30)}
+
+def save_alert_settings(emails, threshold):
     """Zapisuje ustawienia alertów"""
     settings = {
-        'email': email,
+        'emails': emails,
         'threshold': threshold,
         'updated_at': datetime.now().isoformat()
     }
     with open('alert_settings.json', 'w') as f:
         json.dump(settings, f, indent=2)
 
-def check_and_send_alerts(analysis, email):
-    """Sprawdza warunki i wysyła alerty"""
-    if not email:
-        return
-
-    score = analysis['overall_score']
-
-    # Tutaj możesz dodać kod do wysyłania emaili
-    # Na razie tylko zapisujemy alert do pliku
-    if score < -30:
-        alert_log = {
-            'timestamp': datetime.now().isoformat(),
-            'score': score,
-            'interpretation': analysis['interpretation'],
-            'alerts': analysis['alerts']
-        }
-
-        with open('alert_log.json', 'a') as f:
-            f.write(json.dumps(alert_log) + '\n')
-
-        st.warning(f"⚠️ Alert zapisany! Score: {score}")
+@st.cache_resource
+def get_alert_engine():
+    """
+    Wspólny dla sesji silnik alertów - jeden stan w alert_state.json
+
+    Wysyła tylko przy zmianie stanu reguły, więc przeładowania strony nie
+    zalewają historii ani skrzynki. Próg oceny i subskrybenci (odbiorca SMTP,
+    wymaga LIQUIDITY_SMTP_HOST) pochodzą z alert_settings.json i zmieniają się
+    tylko po "Zapisz" - przebiegi sesji ich nie nadpisują.
+    """
+    settings = load_alert_settings()
+    sinks = sinks_from_env(history=get_history_store())
+    engine = AlertEngine(default_rules(score_threshold=settings['threshold']), sinks=sinks,
+                         state_path='alert_state.json')
+    for email in settings['emails']:
+        engine.subscribe(email)
+    return engine
+
+@st.cache_resource
+def get_anomaly_detector():
+    """Detektor nietypowych ruchów - statystyki online w anomaly_state.json (restart bez przeliczania historii)"""
+    return AnomalyDetector('anomaly_state.json')
 
 # === GŁÓWNA APLIKACJA ===
 
@@ -354,19 +492,23 @@ except (AttributeError, FileNotFoundError, KeyError):
     # Jeśli nie ma st.secrets, użyj .env (dla lokalnego użycia)
     api_key = os.environ.get('FRED_API_KEY', '')
 
-# Zakres dat
+# Zakres dat - tylko widok: pobierana jest zawsze najdłuższa historia (HISTORY_DAYS), więc zmiana
+# suwaka nie pobiera danych od nowa, a percentyle (1y / 5y / 20y / cała) liczone są z pełnej historii
 days_back = st.sidebar.slider(
     "Dni historii",
     min_value=30,
-    max_value=18250,  # 50 LAT HISTORII!
+    max_value=HISTORY_DAYS,  # 50 LAT HISTORII!
     value=365,
     step=365,
-    help="Wybierz zakres danych: 30-18250 dni (do 50 LAT!)"
+    help="Zakres wykresów i analiz: 30-18250 dni (do 50 LAT!) - bez ponownego pobierania danych"
 )
 
 # Przycisk odświeżania
 if st.sidebar.button("🔄 Odśwież dane", type="primary"):
     st.cache_data.clear()
+    get_workers().forget()
+    if api_key:
+        get_monitor(api_key).sources.expire()  # Kopie źródeł też do odświeżenia, nie tylko wynik zadania
     st.session_state.last_update = datetime.now()
     st.rerun()
 
@@ -734,17 +876,63 @@ if not api_key:
         """)
     st.stop()
 
-# Ładuj dane
-with st.spinner('Ładowanie danych z FRED...'):
-    indicators, analysis, monitor = load_data(api_key, days_back)
+def render_early_summary(container, monitor, partial, progress):
+    """Wstępna ocena i karty krytyczne z pierwszych grup serii (wynik częściowy zadania) - zanim dojdą pozostałe"""
+    with container.container():
+        st.progress(progress, text="⏳ Ładowanie danych z FRED w tle...")
+        if not partial:
+            return
+        indicators, partial_analysis = partial['indicators'], partial['analysis']
+        st.info(f"⏳ Wczytano {partial['loaded']}/{partial['total']} grup danych "
+                f"({len(indicators)}/{len(monitor.series)} serii) - "
+                f"ocena wstępna z najważniejszych wskaźników, reszta w drodze...")
+        cols = st.columns(4)
+        cols[0].metric("Ocena (wstępna)", f"{partial_analysis['overall_score']:.0f}")
+        critical = [('sofr_iorb_spread', 'SOFR-IORB Spread', '{:.3f}%'), ('reserves', 'Rezerwy Banków', '${:.0f}B'),
+                    ('yield_curve', 'Yield Curve (10Y-2Y)', '{:.2f}%')]
+        for col, (name, label, fmt) in zip(cols[1:], critical):
+            if name in indicators:
+                col.metric(label, fmt.format(indicators[name]['current']), f"{indicators[name]['change_7d']:+.3g}")
+
+# Ładuj dane w puli zadań - strona nie czeka na sieć: dopóki zadanie trwa, pokazuje postęp
+# i wstępną ocenę z najważniejszych grup serii (wg indicator_weights) i odświeża się co chwilę
+monitor = get_monitor(api_key)
+load_job = get_workers().submit(('load', api_key, HISTORY_DAYS), load_and_analyze, monitor, HISTORY_DAYS)
+if not load_job.done():
+    render_early_summary(st.empty(), monitor, load_job.partial, load_job.progress)
+    time.sleep(0.5)
+    st.rerun()
+
+if load_job.error() is not None:
+    st.error(f"❌ Nie udało się pobrać danych: {load_job.error()}")
+    st.stop()
+full_indicators, analysis = load_job.result()
 
-if not indicators:
+if not full_indicators:
     st.error("❌ Nie udało się pobrać danych. Sprawdź klucz API i połączenie.")
     st.stop()
 
+# Wykresy, korelacje i anomalie w oknie z suwaka; ocena i percentyle z pełnej historii
+indicators = window_view(full_indicators, days_back)
 st.session_state.indicators = indicators
 st.session_state.analysis = analysis
 
+# Serie z ostatniej dobrej kopii (FRED nie odpowiada / odświeżanie w tle) i serie bez danych
+if analysis.get('stale'):
+    stale_text = ", ".join(f"{name} ({age / 3600:.1f} h)" for name, age in
+                           sorted(analysis['stale'].items(), key=lambda item: -item[1]))
+    st.warning(f"⏳ **Dane nieaktualne** - ostatnia dobra kopia, odświeżanie w tle: {stale_text}")
+if analysis.get('unavailable'):
+    st.error(f"❌ **Brak danych** (pominięte w ocenie): {', '.join(analysis['unavailable'])}")
+
+# Każda nowa analiza trafia do historii (przeładowanie strony z cache nie tworzy duplikatu)
+history = get_history_store()
+history.record(indicators, analysis, source='app')
+
+# Nowe odczyty aktualizują statystyki anomalii - bez nowych: wyszukiwanie binarne na serię, bez zapisu stanu
+anomaly_detector = get_anomaly_detector()
+anomaly_detector.update_indicators(indicators)
+
 # === EXECUTIVE SUMMARY - CO ROBIĆ? ===
 score = analysis['overall_score']
 regime = analysis.get('market_regime', {})
@@ -1004,7 +1192,7 @@ if 'percentiles' in analysis and analysis['percentiles']:
         - Rynek się zmienia, progi powinny się dostosowywać!
 
         **Percentyle uwzględniają kontekst:**
-        - Porównują obecną wartość do **ostatnich N dni** (np. 365)
+        - Porównują obecną wartość do **ostatniego roku, 5 lat, 20 lat i całej historii** (wybór okna poniżej)
         - Automatycznie dostosowują się do zmiennych warunków
         - Dają Ci **relatywny** obraz sytuacji
 
@@ -1015,6 +1203,22 @@ if 'percentiles' in analysis and analysis['percentiles']:
         To samo VIX, ale **zupełnie inny kontekst**!
         """)
 
+    # Okno porównania - wszystkie okna policzone w analizie z jednej pobranej historii, wybór bez pobierania
+    window_labels = {'1y': 'Ostatni rok', '5y': '5 lat', '20y': '20 lat', 'all': 'Cała historia'}
+    windows = list(monitor.percentile_windows)
+    comparison_window = st.radio(
+        "Okno porównania", windows, index=windows.index('1y') if '1y' in windows else 0, horizontal=True,
+        format_func=lambda window: window_labels.get(window, window)
+    )
+
+    def window_entry(p):
+        """Percentyl w wybranym oknie (wpis bez okien - percentyl z całej pobranej historii)"""
+        entry = p.get('windows', {}).get(comparison_window)
+        if entry is None:
+            return {'percentile': p['percentile'], 'interpretation': p['interpretation'],
+                    'min': p['historical_min'], 'max': p['historical_max'], 'mean': p['historical_mean']}
+        return entry
+
     # Wyświetl percentyle dla kluczowych wskaźników
     with st.expander(f"📈 Percentyle wskaźników ({len(percentiles)} dostępnych)", expanded=True):
         # Grupuj po kategoriach
@@ -1027,7 +1231,18 @@ if 'percentiles' in analysis and analysis['percentiles']:
             for ind in critical_indicators:
                 if ind in percentiles:
                     p = percentiles[ind]
-                    percentile = p['percentile']
+                    w = window_entry(p)
+                    percentile = w['percentile']
+                    # Wszystkie okna obok siebie (* = historia krótsza niż okno)
+                    side_by_side = " | ".join(
+                        f"{window_labels.get(window, window)}: {entry['percentile']:.0f}%"
+                        f"{'' if entry['complete'] else '*'}"
+                        for window, entry in p.get('windows', {}).items()
+                    )
+                    if p.get('sketch'):
+                        # Szkic kwantyli (LIQUIDITY_SKETCH_STATE) - wszystkie odczyty od startu monitora
+                        side_by_side += (f" | Od {p['sketch']['since']}: {p['sketch']['percentile']:.0f}% "
+                                         f"(±{p['sketch']['error']:.1f})")
 
                     # Kolor paska percentyla
                     if percentile >= 95 or percentile <= 5:
@@ -1049,10 +1264,13 @@ if 'percentiles' in analysis and analysis['percentiles']:
                             </div>
                         </div>
                         <div style="font-size: 0.85em; color: #555; margin-top: 5px;">
-                            {p['interpretation']}
+                            {w['interpretation']}
                         </div>
                         <div style="font-size: 0.75em; color: #999; margin-top: 3px;">
-                            Zakres historyczny: {p['historical_min']:.2f} - {p['historical_max']:.2f} (śr: {p['historical_mean']:.2f})
+                            Zakres w oknie: {w['min']:.2f} - {w['max']:.2f} (śr: {w['mean']:.2f})
+                        </div>
+                        <div style="font-size: 0.75em; color: #999; margin-top: 3px;">
+                            {side_by_side}
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -1063,7 +1281,8 @@ if 'percentiles' in analysis and analysis['percentiles']:
             cols = st.columns(2)
             for idx, ind in enumerate(other_indicators):
                 p = percentiles[ind]
-                percentile = p['percentile']
+                w = window_entry(p)
+                percentile = w['percentile']
 
                 with cols[idx % 2]:
                     if percentile >= 95 or percentile <= 5:
@@ -1077,7 +1296,7 @@ if 'percentiles' in analysis and analysis['percentiles']:
                         f"{status} {ind.replace('_', ' ').title()}",
                         f"{p['current']:.2f}",
                         f"Percentyl: {percentile:.0f}%",
-                        help=p['interpretation']
+                        help=w['interpretation']
                     )
 
     st.markdown("---")
@@ -1242,33 +1461,7 @@ if 'patterns' in analysis and analysis['patterns']:
 # Score gauge
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
-    fig_gauge = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=score,
-        domain={'x': [0, 1], 'y': [0, 1]},
-        title={'text': "Ocena Płynności", 'font': {'size': 24}},
-        delta={'reference': 0},
-        gauge={
-            'axis': {'range': [-100, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
-            'bar': {'color': "darkblue"},
-            'bgcolor': "white",
-            'borderwidth': 2,
-            'bordercolor': "gray",
-            'steps': [
-                {'range': [-100, -40], 'color': '#ffcccc'},
-                {'range': [-40, 0], 'color': '#ffe6cc'},
-                {'range': [0, 40], 'color': '#e6f3ff'},
-                {'range': [40, 100], 'color': '#ccffcc'}
-            ],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': score
-            }
-        }
-    ))
-
-    fig_gauge.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20))
+    fig_gauge = get_figure_cache().get('gauge', (), f"{score}", None, lambda: create_score_gauge(score))
     st.plotly_chart(fig_gauge, use_container_width=True)
 
 st.markdown("---")
@@ -1284,7 +1477,8 @@ with col1:
         create_metric_card(
             "Rezerwy Banków",
             indicators['reserves']['current'],
-            indicators['reserves']['change_7d']
+            indicators['reserves']['change_7d'],
+            stale_age=indicators['reserves'].get('stale_age')
         )
 
 with col2:
@@ -1293,7 +1487,8 @@ with col2:
             "TGA",
             indicators['tga']['current'],
             indicators['tga']['change_7d'],
-            inverse=True
+            inverse=True,
+            stale_age=indicators['tga'].get('stale_age')
         )
 
 with col3:
@@ -1301,7 +1496,8 @@ with col3:
         create_metric_card(
             "Reverse Repo",
             indicators['reverse_repo']['current'],
-            indicators['reverse_repo']['change_7d']
+            indicators['reverse_repo']['change_7d'],
+            stale_age=indicators['reverse_repo'].get('stale_age')
         )
 
 with col4:
@@ -1309,7 +1505,8 @@ with col4:
         create_metric_card(
             "Bilans Fed",
             indicators['fed_balance']['current'],
-            indicators['fed_balance']['change_7d']
+            indicators['fed_balance']['change_7d'],
+            stale_age=indicators['fed_balance'].get('stale_age')
         )
 
 # Dodatkowe metryki stóp procentowych
@@ -1321,7 +1518,8 @@ with col5:
             "SOFR",
             indicators['sofr']['current'],
             indicators['sofr']['change_7d'],
-            unit="%"
+            unit="%",
+            stale_age=indicators['sofr'].get('stale_age')
         )
 
 with col6:
@@ -1330,7 +1528,8 @@ with col6:
             "IORB",
             indicators['iorb']['current'],
             indicators['iorb']['change_7d'],
-            unit="%"
+            unit="%",
+            stale_age=indicators['iorb'].get('stale_age')
         )
 
 with col7:
@@ -1339,15 +1538,14 @@ with col7:
             "EFFR",
             indicators['effr']['current'],
             indicators['effr']['change_7d'],
-            unit="%"
+            unit="%",
+            stale_age=indicators['effr'].get('stale_age')
         )
 
 with col8:
-    if 'sofr' in indicators and 'iorb' in indicators:
-        spread = indicators['sofr']['current'] - indicators['iorb']['current']
-        prev_spread = (indicators['sofr']['current'] - indicators['sofr']['change_7d']) - \
-                      (indicators['iorb']['current'] - indicators['iorb']['change_7d'])
-        spread_change = spread - prev_spread
+    if 'sofr_iorb_spread' in indicators:
+        spread = indicators['sofr_iorb_spread']['current']
+        spread_change = indicators['sofr_iorb_spread']['change_7d']
         st.metric(
             label="SOFR-IORB Spread",
             value=f"{spread:.2f}%",
@@ -1366,7 +1564,8 @@ with col9:
         create_metric_card(
             "Rezerwy (WRESBAL)",
             indicators['reserves_alt']['current'],
-            indicators['reserves_alt']['change_7d']
+            indicators['reserves_alt']['change_7d'],
+            stale_age=indicators['reserves_alt'].get('stale_age')
         )
 
 with col10:
@@ -1437,6 +1636,16 @@ if analysis['alerts']:
         elif severity == 'warning':
             st.warning(f"⚠️ **OSTRZEŻENIE**: {message}")
 
+# === NIETYPOWE RUCHY (anomalie ostatnich odczytów) ===
+
+unusual = [item for item in anomaly_detector.latest().values() if item['anomaly'] and item['indicator'] in indicators]
+if unusual:
+    st.markdown("### 📊 Nietypowe Ruchy")
+    for item in sorted(unusual, key=lambda i: -abs(i['robust_z'] or float('inf'))):
+        z_text = f"{item['robust_z']:+.1f}σ" if item['robust_z'] is not None else "pierwsza zmiana od dawna"
+        st.warning(f"**{item['indicator']}** ({item['date']}): zmiana {item['change']:+.4g} - {z_text} "
+                   f"względem typowych ruchów tej serii")
+
 # === SYGNAŁY ===
 
 if analysis['signals']:
@@ -1459,13 +1668,19 @@ st.markdown("---")
 
 # === ZAKŁADKI Z WYKRESAMI ===
 
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Wszystkie Wykresy", "🎯 Tier 1 Indicators", "📈 Pojedyncze Wskaźniki", "📋 Dane Tabelaryczne", "🔔 Alerty", "📚 Słownik Pojęć"])
+tab1, tab2, tab3, tab4, tab5, tab7, tab8, tab6 = st.tabs(["📊 Wszystkie Wykresy", "🎯 Tier 1 Indicators", "📈 Pojedyncze Wskaźniki", "📋 Dane Tabelaryczne", "🔔 Alerty", "🧪 Scenariusze", "🔗 Korelacje", "📚 Słownik Pojęć"])
 
 with tab1:
     st.markdown("### Wszystkie Wskaźniki na Jednym Wykresie")
-    multi_chart = create_multi_indicator_chart(indicators)
+    multi_chart = cached_figure('multi', indicators, ('reserves', 'tga', 'reverse_repo', 'fed_balance', 'sofr', 'iorb',
+                                                      'sofr_iorb_spread'), create_multi_indicator_chart)
     st.plotly_chart(multi_chart, use_container_width=True)
 
+    if 'net_liquidity' in indicators:
+        st.markdown("### 💧 Net Liquidity")
+        st.plotly_chart(cached_figure('net_liquidity', indicators, ('net_liquidity', 'fed_balance', 'tga', 'reverse_repo'),
+                                      create_net_liquidity_chart), use_container_width=True)
+
 with tab2:
     st.markdown("### Tier 1 Indicators - Extended Analysis")
     st.info("""
@@ -1477,7 +1692,8 @@ with tab2:
     - **Dollar Index (DXY)**: Siła dolara
     - **Rezerwy (WRESBAL)**: Alternatywna miara rezerw bankowych
     """)
-    tier1_chart = create_tier1_charts(indicators)
+    tier1_chart = cached_figure('tier1', indicators, ('m2', 'yield_curve', 'vix', 'fin_conditions', 'dollar_index',
+                                                      'reserves_alt'), create_tier1_charts)
     st.plotly_chart(tier1_chart, use_container_width=True)
 
 with tab3:
@@ -1490,6 +1706,7 @@ with tab3:
         'TGA': 'tga',
         'Reverse Repo': 'reverse_repo',
         'Bilans Fed': 'fed_balance',
+        'Net Liquidity': 'net_liquidity',
         'SOFR': 'sofr',
         'IORB': 'iorb',
         'EFFR': 'effr',
@@ -1515,11 +1732,10 @@ with tab3:
         options=list(indicator_options.keys())
     )
 
-    chart = create_time_series_chart(
-        indicators,
-        indicator_options[selected_indicator],
-        selected_indicator
-    )
+    chart = None
+    if indicator_options[selected_indicator] in indicators:
+        chart = cached_figure(f"series:{selected_indicator}", indicators, (indicator_options[selected_indicator],),
+                              create_time_series_chart, indicator_options[selected_indicator], selected_indicator)
 
     if chart:
         st.plotly_chart(chart, use_container_width=True)
@@ -1602,41 +1818,261 @@ with tab5:
         placeholder="twoj@email.com"
     )
 
+    # Próg jest wspólny dla wszystkich sesji - suwak pokazuje zapisany, zmiana dopiero po "Zapisz"
+    alert_engine = get_alert_engine()
     alert_threshold = st.slider(
         "Próg alertu (score)",
         min_value=-100,
         max_value=0,
-        value=-30,
-        help="Wyślij alert gdy score spadnie poniżej tej wartości"
+        value=int(alert_engine.rules['score'].trigger),
+        help="Wyślij alert gdy score spadnie poniżej tej wartości (wspólny dla wszystkich użytkowników)"
     )
 
-    if st.button("💾 Zapisz ustawienia alertów"):
+    save_col, unsubscribe_col = st.columns(2)
+    if save_col.button("💾 Zapisz ustawienia alertów"):
+        settings = load_alert_settings()
+        emails = [e for e in settings['emails'] if e != st.session_state.alert_email]
+        if st.session_state.alert_email and st.session_state.alert_email != alert_email:
+            alert_engine.unsubscribe(st.session_state.alert_email)
+        if alert_email:
+            emails += [] if alert_email in emails else [alert_email]
+            alert_engine.subscribe(alert_email)
         st.session_state.alert_email = alert_email
-        save_alert_settings(alert_email, alert_threshold)
+        alert_engine.update_rule('score', trigger=alert_threshold, clear=alert_threshold + 10)
+        save_alert_settings(emails, alert_threshold)
         st.success("✅ Ustawienia zapisane!")
+    if st.session_state.alert_email and unsubscribe_col.button("🔕 Wypisz adres"):
+        settings = load_alert_settings()
+        alert_engine.unsubscribe(st.session_state.alert_email)
+        save_alert_settings([e for e in settings['emails'] if e != st.session_state.alert_email],
+                            settings['threshold'])
+        st.session_state.alert_email = ""
+        st.success("✅ Adres wypisany z powiadomień")
+
+    # Ocena reguł alertów (histereza + cooldown - wysyłka w tle, nie blokuje strony)
+    for event in alert_engine.evaluate(indicators, analysis):
+        if event.kind == 'fired':
+            st.warning(f"⚠️ Alert wysłany: {event.message}")
+        else:
+            st.success(f"✅ {event.message}")
+
+    active_alarms = alert_engine.active()
+    if active_alarms:
+        st.error(f"🚨 Aktywne alarmy: {', '.join(active_alarms)}")
+
+    # Historia ocen
+    st.markdown("### 📈 Historia Oceny")
+
+    history_days = st.selectbox("Zakres", [7, 30, 90, 365, 3650], index=2,
+                                format_func=lambda d: f"Ostatnie {d} dni")
+    df_scores = history.scores(days=history_days)
+    if not df_scores.empty:
+        fig_history = go.Figure(go.Scatter(
+            x=df_scores['timestamp'], y=df_scores['score'], mode='lines+markers',
+            name='Score', text=df_scores['regime'],
+            hovertemplate='%{x}<br>Score: %{y}<br>%{text}<extra></extra>'
+        ))
+        fig_history.add_hline(y=alert_engine.rules['score'].trigger, line_dash='dash', line_color='red')
+        fig_history.update_layout(height=300, template='plotly_white', margin=dict(t=20, b=20))
+        st.plotly_chart(fig_history, use_container_width=True)
+    else:
+        st.info("Brak zapisanych analiz w tym zakresie")
 
-    # Sprawdź czy wysłać alert
-    if alert_email and analysis['overall_score'] < alert_threshold:
-        check_and_send_alerts(analysis, alert_email)
-
-    # Historia alertów
+    # Historia alertów - stronicowana z bazy (kursor zamiast wczytywania całego logu)
     st.markdown("### 📜 Historia Alertów")
 
-    if os.path.exists('alert_log.json'):
-        alerts_history = []
-        with open('alert_log.json', 'r') as f:
-            for line in f:
-                alerts_history.append(json.loads(line))
-
-        if alerts_history:
-            df_alerts = pd.DataFrame(alerts_history)
-            df_alerts = df_alerts.sort_values('timestamp', ascending=False)
-            st.dataframe(df_alerts, use_container_width=True)
-        else:
-            st.info("Brak alertów w historii")
+    filter_cols = st.columns(2)
+    with filter_cols[0]:
+        severity_filter = st.selectbox("Ważność", ["", "critical", "warning"],
+                                       format_func=lambda x: x or "Wszystkie")
+    with filter_cols[1]:
+        indicator_filter = st.selectbox("Wskaźnik", [""] + history.alert_indicators(),
+                                        format_func=lambda x: x or "Wszystkie")
+
+    alert_filter = (severity_filter or None, indicator_filter or None)
+    if st.session_state.get('alert_filter') != alert_filter:
+        st.session_state.alert_filter = alert_filter
+        st.session_state.alert_cursors = [None]  # Stos kursorów - powrót do nowszych stron
+
+    cursors = st.session_state.alert_cursors
+    page = history.alerts(severity=alert_filter[0], indicator=alert_filter[1],
+                          limit=25, before=cursors[-1])
+
+    if not page.empty:
+        total = history.count_alerts(severity=alert_filter[0], indicator=alert_filter[1])
+        st.caption(f"Strona {len(cursors)} z {max(1, -(-total // 25))} ({total} alertów)")
+        st.dataframe(page.drop(columns=['id', 'run_id']), use_container_width=True, hide_index=True)
+
+        nav_cols = st.columns(2)
+        with nav_cols[0]:
+            if st.button("⬅️ Nowsze", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with nav_cols[1]:
+            if st.button("Starsze ➡️", disabled=page.attrs['cursor'] is None):
+                cursors.append(page.attrs['cursor'])
+                st.rerun()
     else:
         st.info("Brak alertów w historii")
 
+with tab7:
+    st.markdown("### 🧪 Scenariusze What-If")
+    st.caption("Co się stanie z oceną, jeśli wskaźniki się zmienią? Szoki nakładane są na bieżące dane, "
+               "a wszystkie scenariusze liczone naraz tymi samymi regułami co ocena powyżej.")
+
+    scenario_engine = ScenarioEngine(monitor, indicators)
+    shock_names = sorted(indicators)
+    mode_labels = {'pct': 'Zmiana %', 'delta': 'Zmiana o', 'value': 'Wartość'}
+
+    def shock_range(name, mode):
+        current = float(indicators[name]['current'])
+        if mode == 'pct':
+            return -50.0, 50.0
+        if mode == 'delta':
+            return -abs(current) * 0.5, abs(current) * 0.5
+        return current * 0.5, current * 1.5
+
+    # Siatka dwóch wskaźników -> mapa ciepła oceny
+    st.markdown("#### Siatka scenariuszy")
+    axis_cols = st.columns(2)
+    axes = []
+    for col, label, default in zip(axis_cols, ("Oś X", "Oś Y"), ('vix', 'reserves')):
+        with col:
+            name = st.selectbox(label, shock_names, key=f"grid_{label}",
+                                index=shock_names.index(default) if default in shock_names else 0)
+            mode = st.radio("Rodzaj szoku", list(mode_labels), format_func=mode_labels.get,
+                            horizontal=True, key=f"grid_mode_{label}")
+            low, high = shock_range(name, mode)
+            range_cols = st.columns(2)
+            low = range_cols[0].number_input("Od", value=round(low, 2), key=f"grid_low_{label}_{name}_{mode}")
+            high = range_cols[1].number_input("Do", value=round(high, 2), key=f"grid_high_{label}_{name}_{mode}")
+            axes.append((name, mode, [low + (high - low) * i / 10 for i in range(11)]))
+
+    (x_name, x_mode, x_values), (y_name, y_mode, y_values) = axes
+    if x_name == y_name:
+        st.warning("Wybierz dwa różne wskaźniki")
+    else:
+        grid = scenario_engine.grid(x_name, x_values, y_name, y_values, x_mode=x_mode, y_mode=y_mode)
+        scores = grid.pivot(index=y_name, columns=x_name, values='score')
+        regimes = grid.pivot(index=y_name, columns=x_name, values='regime')
+        fig_grid = go.Figure(go.Heatmap(
+            z=scores.values, x=[f"{v:.4g}" for v in scores.columns], y=[f"{v:.4g}" for v in scores.index],
+            customdata=regimes.values, colorscale='RdYlGn', zmin=-100, zmax=100,
+            text=scores.values, texttemplate='%{text:.0f}',
+            hovertemplate=f"{x_name}: %{{x}}<br>{y_name}: %{{y}}<br>Score: %{{z:.0f}}<br>%{{customdata}}<extra></extra>"
+        ))
+        fig_grid.update_layout(height=450, template='plotly_white', margin=dict(t=20, b=20),
+                               xaxis_title=f"{x_name} ({mode_labels[x_mode]})",
+                               yaxis_title=f"{y_name} ({mode_labels[y_mode]})")
+        st.plotly_chart(fig_grid, use_container_width=True)
+
+    # Własne scenariusze - jeden wiersz = jeden szok, wiersze o tej samej nazwie tworzą scenariusz
+    st.markdown("#### Własne scenariusze")
+    if 'scenario_rows' not in st.session_state:
+        st.session_state.scenario_rows = pd.DataFrame([
+            {'scenariusz': 'VIX 35, rezerwy -200B', 'wskaźnik': 'vix', 'tryb': 'value', 'wartość': 35.0},
+            {'scenariusz': 'VIX 35, rezerwy -200B', 'wskaźnik': 'reserves', 'tryb': 'delta', 'wartość': -200.0},
+            {'scenariusz': 'Stres kredytowy', 'wskaźnik': 'hy_spread', 'tryb': 'pct', 'wartość': 80.0},
+        ])
+    rows = st.data_editor(
+        st.session_state.scenario_rows, num_rows='dynamic', use_container_width=True, hide_index=True,
+        column_config={
+            'wskaźnik': st.column_config.SelectboxColumn(options=shock_names, required=True),
+            'tryb': st.column_config.SelectboxColumn(options=list(mode_labels), required=True),
+        },
+    )
+
+    scenario_list = [{'name': 'Bieżący', 'shocks': {}}]
+    for scenario_name, group in rows.dropna().groupby('scenariusz', sort=False):
+        scenario_list.append({
+            'name': scenario_name,
+            'shocks': {row['wskaźnik']: {row['tryb']: row['wartość']} for _, row in group.iterrows()},
+        })
+    try:
+        results = scenario_engine.run(scenario_list)
+        results['alerts'] = results['alerts'].map(
+            lambda entries: ', '.join(f"{a['indicator']} ({a['severity']})" for a in entries))
+        results['patterns'] = results['patterns'].map(', '.join)
+        st.dataframe(results, use_container_width=True, hide_index=True)
+    except ValueError as e:
+        st.error(f"Niepoprawny scenariusz: {e}")
+
+with tab8:
+    st.markdown("### 🔗 Korelacje Kroczące")
+    st.caption("Korelacje zmian wskaźników w oknie kroczącym. Załamanie = korelacja w oknie istotnie "
+               "różna (test Fishera) od korelacji z okresu przed oknem.")
+
+    corr_cols = st.columns(4)
+    with corr_cols[0]:
+        corr_freq = st.selectbox("Siatka", ['W-WED', 'B'],
+                                 format_func={'W-WED': 'Tygodniowo', 'B': 'Dni robocze'}.get)
+    with corr_cols[1]:
+        corr_transform = st.selectbox("Dane", ['diff', 'pct', 'level'],
+                                      format_func={'diff': 'Zmiany', 'pct': 'Zmiany %', 'level': 'Poziomy'}.get)
+    with corr_cols[2]:
+        corr_window = st.number_input("Okno (okresy)", min_value=5, max_value=520,
+                                      value=26 if corr_freq == 'W-WED' else 60)
+    with corr_cols[3]:
+        corr_method = st.selectbox("Metoda", ['pearson', 'spearman'], format_func=str.capitalize)
+
+    # Panel i korelacje kroczące kluczowane treścią wskaźników - przełączanie zakładek i widżetów
+    # przy niezmienionych danych nie liczy ich od nowa (także w innych sesjach)
+    panel_version = combine(indicators_version(indicators), corr_freq, corr_transform)
+    panel = monitor.artifacts.get_or_compute(
+        'panel', panel_version, lambda: build_panel(indicators, freq=corr_freq, transform=corr_transform)
+    )
+    if len(panel) < corr_window:
+        st.info(f"Za mało danych ({len(panel)} okresów) dla okna {corr_window} - zwiększ zakres historii")
+    else:
+        rolling = monitor.artifacts.get_or_compute(
+            'rolling_correlation', combine(panel_version, int(corr_window), corr_method),
+            lambda: RollingCorrelation(panel, window=int(corr_window), spearman=corr_method == 'spearman')
+        )
+        matrix = rolling.matrix(corr_method)
+        fig_corr = go.Figure(go.Heatmap(
+            z=matrix.values, x=matrix.columns, y=matrix.index, colorscale='RdBu', zmin=-1, zmax=1,
+            text=matrix.values, texttemplate='%{text:.2f}', textfont={'size': 9},
+            hovertemplate='%{y} / %{x}: %{z:.2f}<extra></extra>'
+        ))
+        fig_corr.update_layout(height=650, template='plotly_white', margin=dict(t=20, b=20))
+        st.plotly_chart(fig_corr, use_container_width=True)
+        st.caption(f"Stan na {rolling.dates[-1]:%Y-%m-%d}, okno {corr_window} okresów")
+
+        corr_breaks = rolling.breaks()
+        if corr_breaks:
+            st.markdown("#### ⚡ Załamania korelacji")
+            for item in corr_breaks[:10]:
+                a, b = item['pair']
+                flip = " (zmiana znaku!)" if item['sign_flip'] else ""
+                st.warning(f"**{a} / {b}**: {item['baseline']:+.2f} → {item['correlation']:+.2f}"
+                           f" (z = {item['z']:+.1f}){flip}")
+        else:
+            st.success("Brak istotnych załamań korelacji")
+
+        key_pairs = rolling.key_pairs()
+        if key_pairs:
+            st.markdown("#### Kluczowe pary")
+            st.dataframe(pd.DataFrame([{
+                'para': f"{item['pair'][0]} / {item['pair'][1]}",
+                'korelacja': round(item['pearson'], 2),
+                'spearman': round(item['spearman'], 2) if item['spearman'] is not None else None,
+                'bazowa': round(item['baseline'], 2),
+                'z': round(item['z'], 1),
+            } for item in key_pairs]), use_container_width=True, hide_index=True)
+
+        pair_labels = [f"{a} / {b}" for a, b in rolling.pairs]
+        default_pair = 'reserves / sofr_iorb_spread'
+        selected_pair = st.selectbox("Historia pary", pair_labels,
+                                     index=pair_labels.index(default_pair) if default_pair in pair_labels else 0)
+        pair_df = rolling.pair_history(*selected_pair.split(' / '))
+        fig_pair = go.Figure()
+        for column, label in (('pearson', 'Pearson'), ('spearman', 'Spearman'), ('baseline', 'Bazowa')):
+            if pair_df[column].notna().any():
+                fig_pair.add_trace(go.Scatter(x=pair_df.index, y=pair_df[column], mode='lines', name=label,
+                                              line=dict(dash='dot') if column == 'baseline' else None))
+        fig_pair.update_layout(height=300, template='plotly_white', margin=dict(t=20, b=20), yaxis_range=[-1, 1])
+        st.plotly_chart(fig_pair, use_container_width=True)
+
 with tab6:
     st.markdown("### 📚 Słownik Pojęć - Przewodnik dla Początkujących")
 
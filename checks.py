@@ -0,0 +1,32 @@
+"""
+Wspólne narzędzia skryptów testowych (test_*.py).
+
+check() liczy nieudane sprawdzenia, finish() drukuje stopkę i kończy
+proces kodem 1, jeśli którekolwiek sprawdzenie się nie powiodło - dzięki
+temu `python test_x.py` (i pytest przez conftest.py) zgłasza porażkę CI.
+"""
+
+import sys
+
+failed = 0
+
+
+def check(condition, message):
+    """Wypisuje wynik sprawdzenia i zlicza porażki"""
+    global failed
+    if condition:
+        print(f"   [OK] {message}")
+    else:
+        print(f"   [ERROR] {message}")
+        failed += 1
+
+
+def finish(success_message):
+    """Stopka skryptu - kod wyjścia 1 przy nieudanych testach"""
+    print("\n" + "="*70)
+    if failed:
+        print(f"[ERROR] Nieudane testy: {failed}")
+    else:
+        print(f"[SUCCESS] {success_message}")
+    print("="*70)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Chunked download - długie historie FRED pobierane kawałkami, równolegle
+
+Jedno zapytanie o 50 lat serii dziennej jest wolne (jedna odpowiedź na
+kilkanaście tysięcy obserwacji, bez równoległości) i przy limicie FRED na
+liczbę obserwacji w odpowiedzi może zostać ucięte. Tutaj zakres dat dzielony
+jest na kawałki wyrównane do kalendarza (np. co 10 lat od 1970-01-01):
+
+    - kawałki pobierane są równolegle w puli wątków - wspólny RateLimiter
+      monitora pilnuje limitu zapytań, więc pula wykorzystuje cały budżet,
+    - w obrębie kawałka odpowiedź jest stronicowana przez limit/offset,
+    - wyniki składane są w kolejności dat (kawałki się nie nakładają),
+    - zamknięte kawałki (w całości przed końcem zakresu) trafiają do katalogu
+      punktów kontrolnych (skompresowane bloki obs_cache) - przerwany backfill
+      startuje od brakujących.
+
+Wyrównanie do kalendarza sprawia, że granice kawałków są takie same w każdym
+uruchomieniu: jutrzejsze pobranie korzysta z dzisiejszych punktów kontrolnych,
+a z sieci idzie tylko ostatni, otwarty kawałek. Punkty kontrolne starsze niż
+`checkpoint_ttl` są pobierane ponownie (rewizje danych).
+
+Użycie:
+    downloader = ChunkedDownloader(monitor, checkpoint_dir='chunks')
+    dates, values = downloader.download('WALCL', '1975-01-01', '2025-01-01')
+    downloader.backfill(['WALCL', 'SOFR'], days_back=18250)   # {series_id: (daty, wartości)}
+"""
+
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from fred_parser import parse_observations
+from obs_cache import decode_observations, encode_observations
+
+
+# FRED zwraca najwyżej 100 000 obserwacji w odpowiedzi
+MAX_PAGE_SIZE = 100000
+
+# Liczba wszystkich obserwacji zakresu - w nagłówku odpowiedzi, przed listą obserwacji
+_COUNT = re.compile(rb'"count"\s*:\s*(\d+)')
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def plan_chunks(start: str, end: str, chunk_days: int) -> List[Tuple[np.datetime64, np.datetime64, bool]]:
+    """
+    Dzieli zakres [start, end] na kawałki wyrównane do wielokrotności chunk_days od 1970-01-01
+
+    Returns:
+        Lista (pierwszy dzień, ostatni dzień, zamknięty) - zamknięty kawałek kończy się przed `end`
+        i obejmuje całe okno kalendarzowe (ta sama granica w każdym uruchomieniu)
+    """
+    first = np.datetime64(start, 'D')
+    last = np.datetime64(end, 'D')
+    if last < first:
+        return []
+
+    step = np.timedelta64(chunk_days, 'D')
+    chunk_start = _EPOCH + (first - _EPOCH) // step * step
+    chunks = []
+    while chunk_start <= last:
+        chunk_end = chunk_start + step - np.timedelta64(1, 'D')
+        closed = chunk_end < last
+        chunks.append((chunk_start, chunk_end if closed else last, closed))
+        chunk_start = chunk_end + np.timedelta64(1, 'D')
+    return chunks
+
+
+class ChunkedDownloader:
+    """Równoległe, stronicowane pobieranie długich zakresów series/observations z punktami kontrolnymi"""
+
+    def __init__(self, monitor, chunk_days: int = 3652, max_workers: int = 4,
+                 page_size: int = MAX_PAGE_SIZE, checkpoint_dir: Optional[str] = None,
+                 checkpoint_ttl: float = 7 * 86400):
+        """
+        Args:
+            monitor: LiquidityMonitor (fetch_fred_raw - sesja, limiter, adres API)
+            chunk_days: Długość kawałka w dniach (domyślnie ~10 lat)
+            max_workers: Liczba równoległych zapytań (limit i tak pilnuje RateLimiter)
+            page_size: Limit obserwacji na stronę (limit/offset w obrębie kawałka)
+            checkpoint_dir: Katalog na zamknięte kawałki (None = bez punktów kontrolnych)
+            checkpoint_ttl: Po ilu sekundach zamknięty kawałek jest pobierany ponownie
+        """
+        self.monitor = monitor
+        self.chunk_days = chunk_days
+        self.max_workers = max_workers
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_ttl = checkpoint_ttl
+        self.stats = {'chunks': 0, 'from_checkpoint': 0, 'requests': 0}
+        self.errors: Dict[str, Exception] = {}
+        self._lock = threading.Lock()
+
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # Monitor (razem z downloaderem) bywa picklowany przez st.cache_data - Lock nie jest picklowalny
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # === PUNKTY KONTROLNE ===
+
+    def _checkpoint_path(self, series_id: str, first: np.datetime64, last: np.datetime64) -> str:
+        return os.path.join(self.checkpoint_dir, f"{series_id}_{first}_{last}.obs")
+
+    def _load_checkpoint(self, path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        try:
+            if time.time() - os.path.getmtime(path) > self.checkpoint_ttl:
+                return None
+            with open(path, 'rb') as f:
+                return decode_observations(f.read())
+        except (OSError, ValueError, zlib.error):
+            return None  # Brak albo uszkodzony plik (przerwany zapis) - kawałek do pobrania
+
+    def _save_checkpoint(self, path: str, dates: np.ndarray, values: np.ndarray):
+        # Zapis do pliku tymczasowego + os.replace - przerwanie nie zostawia połowy kawałka
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(encode_observations(dates, values))
+        os.replace(temporary, path)
+
+    def checkpoint_bytes(self) -> Dict[str, int]:
+        """{series_id: bajty punktów kontrolnych na dysku}"""
+        sizes: Dict[str, int] = {}
+        if not self.checkpoint_dir:
+            return sizes
+        for name in os.listdir(self.checkpoint_dir):
+            if name.endswith('.obs'):
+                series_id = name.rsplit('_', 2)[0]
+                sizes[series_id] = sizes.get(series_id, 0) + os.path.getsize(os.path.join(self.checkpoint_dir, name))
+        return sizes
+
+    # === POBIERANIE ===
+
+    def _fetch_chunk(self, series_id: str, first: np.datetime64, last: np.datetime64) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Jeden kawałek, strona po stronie (limit/offset) - zwraca (daty, wartości, liczba zapytań)"""
+        pages = []
+        offset = 0
+        while True:
+            content = self.monitor.fetch_fred_raw(
+                'series/observations', series_id=series_id,
+                observation_start=str(first), observation_end=str(last),
+                limit=self.page_size, offset=offset,
+            )
+            pages.append(parse_observations(content))
+            offset += self.page_size
+            match = _COUNT.search(content[:512])
+            if match is None or offset >= int(match.group(1)):
+                break
+
+        dates = np.concatenate([page[0] for page in pages])
+        values = np.concatenate([page[1] for page in pages])
+        return dates, values, len(pages)
+
+    def _chunk(self, series_id: str, first: np.datetime64, last: np.datetime64,
+               closed: bool) -> Tuple[np.ndarray, np.ndarray, bool, int]:
+        """Kawałek z punktu kontrolnego albo z sieci - zwraca (daty, wartości, z punktu kontrolnego, zapytania)"""
+        path = self._checkpoint_path(series_id, first, last) if self.checkpoint_dir and closed else None
+        if path:
+            cached = self._load_checkpoint(path)
+            if cached is not None:
+                return cached[0], cached[1], True, 0
+
+        dates, values, requests_made = self._fetch_chunk(series_id, first, last)
+        if path:
+            self._save_checkpoint(path, dates, values)
+        return dates, values, False, requests_made
+
+    def _download(self, ranges: Dict[str, Tuple[str, str]]):
+        plans = {series_id: plan_chunks(start, end, self.chunk_days) for series_id, (start, end) in ranges.items()}
+        parts: Dict[str, List] = {series_id: [None] * len(chunks) for series_id, chunks in plans.items()}
+        errors: Dict[str, Exception] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._chunk, series_id, first, last, closed): (series_id, k)
+                for series_id, chunks in plans.items()
+                for k, (first, last, closed) in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                series_id, k = futures[future]
+                try:
+                    dates, values, from_checkpoint, requests_made = future.result()
+                except Exception as e:
+                    errors.setdefault(series_id, e)
+                    continue
+                parts[series_id][k] = (dates, values)
+                with self._lock:
+                    self.stats['chunks'] += 1
+                    self.stats['from_checkpoint'] += from_checkpoint
+                    self.stats['requests'] += requests_made
+
+        results = {}
+        for series_id, chunks in parts.items():
+            if series_id in errors:
+                continue
+            # Kawałki w kolejności dat; pierwszy (wyrównany do kalendarza) przycinany do zakresu
+            start = np.datetime64(ranges[series_id][0], 'D')
+            dates = np.concatenate([c[0] for c in chunks]) if chunks else np.empty(0, dtype='datetime64[D]')
+            values = np.concatenate([c[1] for c in chunks]) if chunks else np.empty(0)
+            keep = dates >= start
+            results[series_id] = (dates[keep], values[keep])
+        return results, errors
+
+    def download_many(self, ranges: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Pobiera wiele serii naraz - kawałki wszystkich serii w jednej puli wątków
+
+        Args:
+            ranges: {series_id: (pierwszy dzień, ostatni dzień)}
+
+        Returns:
+            {series_id: (daty datetime64[D] rosnąco, wartości)}. Błąd kawałka przerywa tylko
+            jego serię (wyjątek w `errors`) - pobrane kawałki zostają w punktach kontrolnych.
+        """
+        results, self.errors = self._download(ranges)
+        return results
+
+    def download(self, series_id: str, start: str, end: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Jedna seria w zakresie [start, end] - rzuca wyjątek, gdy któryś kawałek się nie pobrał"""
+        results, errors = self._download({series_id: (start, end)})
+        if series_id in errors:
+            raise errors[series_id]
+        return results[series_id]
+
+    def backfill(self, series_ids: Iterable[str], days_back: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Pełna historia wielu serii (np. 50 lat) - przerwany backfill wznawia się od brakujących kawałków
+
+        Returns:
+            {series_id: (daty, wartości)} dla serii pobranych w całości
+        """
+        end = datetime.now()
+        start = (end - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        series_ids = list(series_ids)
+        results = self.download_many({series_id: (start, end.strftime('%Y-%m-%d')) for series_id in series_ids})
+
+        for series_id, error in self.errors.items():
+            print(f"[ERROR] Backfill {series_id} przerwany: {error} (pobrane kawalki zostaja w punktach kontrolnych)")
+        print(f"[BACKFILL] {len(results)}/{len(series_ids)} serii, {self.stats['chunks']} kawalkow "
+              f"({self.stats['from_checkpoint']} z punktow kontrolnych, {self.stats['requests']} zapytan)")
+        return results
@@ -0,0 +1,49 @@
+"""
+Konfiguracja pytest - skrypty test_*.py uruchamiane jako osobne procesy.
+
+Skrypty testowe wykonują się od góry do dołu (jak `python test_x.py`),
+więc pytest ich nie importuje przy zbieraniu - każdy skrypt to jeden test,
+zaliczony gdy proces kończy się kodem 0 (patrz checks.finish). Skrypty
+wymagające internetu i klucza FRED są pomijane bez FRED_API_KEY.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+NETWORK_SCRIPTS = {'test_api.py', 'test_percentiles.py'}
+SCRIPT_TIMEOUT = 900  # sekundy na skrypt
+
+
+class ScriptFailed(Exception):
+    """Skrypt testowy zakończył się kodem różnym od 0"""
+
+
+class ScriptFile(pytest.File):
+    def collect(self):
+        yield ScriptRun.from_parent(self, name=self.path.name)
+
+
+class ScriptRun(pytest.Item):
+    def runtest(self):
+        if self.path.name in NETWORK_SCRIPTS and not os.environ.get('FRED_API_KEY'):
+            pytest.skip("wymaga internetu i FRED_API_KEY")
+        result = subprocess.run([sys.executable, str(self.path)], cwd=str(self.path.parent),
+                                capture_output=True, text=True, timeout=SCRIPT_TIMEOUT)
+        if result.returncode:
+            raise ScriptFailed(f"kod wyjscia {result.returncode}\n{result.stdout}\n{result.stderr}")
+
+    def repr_failure(self, excinfo):
+        if isinstance(excinfo.value, ScriptFailed):
+            return str(excinfo.value)
+        return super().repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, 0, self.name
+
+
+def pytest_pycollect_makemodule(module_path, parent):
+    """Zamiast importu modułu - jeden test uruchamiający skrypt"""
+    return ScriptFile.from_parent(parent, path=module_path)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Correlations - kroczące korelacje wszystkich par wskaźników
+
+detect_correlations_and_conflicts sprawdza stałe progi poziomów. Tu liczone
+są prawdziwe korelacje statystyczne na wyrównanym panelu (wszystkie serie na
+wspólnej siatce dat): Pearson i Spearman w oknie kroczącym dla każdej pary,
+np. rezerwy vs SOFR-IORB spread albo VIX vs HY spread.
+
+Pearson liczony jest z sum kumulacyjnych (liczność, Σx, Σy, Σx², Σy², Σxy) -
+suma w oknie to różnica dwóch sum kumulacyjnych, więc pełna historia
+korelacji pary kosztuje O(n), niezależnie od długości okna. Te same sumy dają
+korelację "bazową" z okresu przed oknem - zmiana korelacji istotna w teście
+Fishera (z) to "załamanie reżimu korelacji".
+
+Użycie:
+    panel = build_panel(indicators, freq='W-WED', transform='diff')
+    corr = RollingCorrelation(panel, window=26)
+    corr.matrix('pearson')          # macierz na ostatnią datę
+    corr.breaks()                   # pary, których korelacja się załamała
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Pary szczególnie ważne dla płynności - pokazywane zawsze, nawet bez załamania
+KEY_PAIRS = [
+    ('reserves', 'sofr_iorb_spread'),
+    ('vix', 'hy_spread'),
+    ('reverse_repo', 'reserves'),
+    ('tga', 'reserves'),
+    ('dollar_index', 'vix'),
+    ('treasury_10y', 'hy_spread'),
+]
+
+# Ile par liczyć naraz (pamięć: 6 sum x n x blok)
+PAIR_BLOCK = 64
+
+# Ile rang Spearmana trzymać naraz (kolumny x dni x okno) - ~8 MB float64 na tablicę bloku;
+# rangi całej historii to kolumny x n x okno (20 serii, 20 lat dziennie, okno 260 = ~0.8 GB)
+SPEARMAN_CELLS = 1 << 20
+
+
+def build_panel(indicators: Dict, freq: str = 'W-WED', transform: str = 'diff',
+                names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Wyrównany panel: jedna kolumna na wskaźnik, wspólna siatka dat
+
+    Args:
+        indicators: Wynik get_all_indicators()
+        freq: Częstotliwość siatki ('W-WED' - tydzień H.4.1, 'B' - dni robocze)
+        transform: 'diff' - zmiany (domyślnie; poziomy większości serii są niestacjonarne),
+                   'pct' - zmiany procentowe, 'level' - poziomy
+        names: Podzbiór wskaźników (domyślnie wszystkie)
+    """
+    columns = {}
+    for name in names or sorted(indicators):
+        data = indicators.get(name, {}).get('data')
+        if data is None or data.empty:
+            continue
+        series = data.set_index(pd.to_datetime(data['date']))['value'].astype(float)
+        series = series[~series.index.duplicated(keep='last')].sort_index()
+        columns[name] = series.resample(freq).last()
+
+    if not columns:
+        return pd.DataFrame()
+
+    # Serie rzadsze niż siatka (miesięczne) trzymają ostatnią znaną wartość
+    panel = pd.DataFrame(columns).ffill()
+    if transform == 'diff':
+        panel = panel.diff()
+    elif transform == 'pct':
+        panel = panel.pct_change(fill_method=None) * 100
+    elif transform != 'level':
+        raise ValueError(f"Nieznana transformacja: {transform}")
+    return panel.iloc[1:] if transform != 'level' else panel
+
+
+def _window_sums(cumulative: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    return cumulative[:, end] - cumulative[:, start]
+
+
+def _pearson(sums: np.ndarray, min_periods: int) -> Tuple[np.ndarray, np.ndarray]:
+    count, sx, sy, sxx, syy, sxy = sums
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / count
+        var = (sxx - sx ** 2 / count) * (syy - sy ** 2 / count)
+        corr = cov / np.sqrt(var)
+    corr[(count < min_periods) | ~(var > 1e-12)] = np.nan
+    return np.clip(corr, -1, 1), count
+
+
+def _ranks(windows: np.ndarray) -> np.ndarray:
+    """Rangi średnie (remisy jak w Spearmanie) w każdym wierszu (m x w) - bez pętli po wierszach"""
+    m, w = windows.shape
+    order = np.argsort(windows, axis=1, kind='stable')
+    ordered = np.take_along_axis(windows, order, axis=1)
+
+    # Pierwsza i ostatnia pozycja grupy równych wartości -> ranga średnia grupy
+    position = np.broadcast_to(np.arange(1, w + 1), (m, w))
+    starts = np.ones((m, w), dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = np.ones((m, w), dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, position, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, position, w + 1)[:, ::-1], axis=1)[:, ::-1]
+
+    ranks = np.empty((m, w))
+    np.put_along_axis(ranks, order, (first + last) / 2.0, axis=1)
+    return ranks
+
+
+class RollingCorrelation:
+    """
+    Historia korelacji Pearsona i Spearmana każdej pary kolumn panelu
+
+    Args:
+        panel: Wynik build_panel()
+        window: Długość okna (w okresach panelu)
+        baseline: Długość okresu bazowego przed oknem (domyślnie 4 x window)
+        min_periods: Minimalna liczba wspólnych obserwacji w oknie (domyślnie połowa okna, min. 5)
+        spearman: Czy liczyć też Spearmana (O(n * window) na parę - rangi w każdym oknie,
+                  liczone blokami dni, więc pamięć nie rośnie z długością historii)
+    """
+
+    def __init__(self, panel: pd.DataFrame, window: int = 26, baseline: Optional[int] = None,
+                 min_periods: Optional[int] = None, spearman: bool = True):
+        if window < 3:
+            raise ValueError("Okno musi miec co najmniej 3 okresy")
+        self.window = window
+        self.baseline_window = baseline or 4 * window
+        self.min_periods = min_periods or max(5, window // 2)
+
+        self.names = list(panel.columns)
+        self.dates = panel.index
+        i, j = np.triu_indices(len(self.names), 1)
+        self.pair_index = (i, j)
+        self.pairs: List[Tuple[str, str]] = [(self.names[a], self.names[b]) for a, b in zip(i, j)]
+
+        # Standaryzacja kolumn - korelacja się nie zmienia, a sumy kumulacyjne nie tracą precyzji
+        values = panel.to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            std = np.nanstd(values, axis=0)
+            Z = (values - np.nanmean(values, axis=0)) / np.where(std > 0, std, 1)
+        self._Z = Z
+
+        n = len(Z)
+        end = np.arange(1, n + 1)
+        start = np.maximum(end - window, 0)
+        baseline_start = np.maximum(start - self.baseline_window, 0)
+
+        shape = (n, len(self.pairs))
+        self.pearson = np.full(shape, np.nan)
+        self.baseline = np.full(shape, np.nan)
+        self.break_z = np.full(shape, np.nan)
+
+        for block in range(0, len(self.pairs), PAIR_BLOCK):
+            a, b = i[block:block + PAIR_BLOCK], j[block:block + PAIR_BLOCK]
+            x, y = Z[:, a], Z[:, b]
+            mask = ~np.isnan(x) & ~np.isnan(y)
+            x0, y0 = np.where(mask, x, 0.0), np.where(mask, y, 0.0)
+
+            # Jedna suma kumulacyjna na wielkość - każde okno to różnica dwóch wierszy
+            cumulative = np.zeros((6, n + 1, len(a)))
+            for k, term in enumerate((mask.astype(float), x0, y0, x0 * x0, y0 * y0, x0 * y0)):
+                np.cumsum(term, axis=0, out=cumulative[k, 1:])
+
+            current, n_current = _pearson(_window_sums(cumulative, start, end), self.min_periods)
+            base, n_base = _pearson(_window_sums(cumulative, baseline_start, start), self.min_periods)
+
+            # Test Fishera: czy korelacja w oknie różni się od bazowej
+            with np.errstate(invalid='ignore', divide='ignore'):
+                dz = np.arctanh(np.clip(current, -0.999, 0.999)) - np.arctanh(np.clip(base, -0.999, 0.999))
+                se = np.sqrt(1 / (n_current - 3) + 1 / (n_base - 3))
+                z = dz / se
+
+            columns = slice(block, block + len(a))
+            self.pearson[:, columns] = current
+            self.baseline[:, columns] = base
+            self.break_z[:, columns] = z
+
+        self.spearman = self._rolling_spearman() if spearman else None
+
+    def _rolling_spearman(self) -> np.ndarray:
+        """Spearman = Pearson rang w oknie; liczony tylko dla pełnych okien (bez braków)"""
+        Z, w = self._Z, self.window
+        n, k = Z.shape
+        result = np.full((n, len(self.pairs)), np.nan)
+        if n < w:
+            return result
+
+        # Okna blokami dni - w pamięci rangi tylko jednego bloku (SPEARMAN_CELLS), nie całej historii
+        views = [sliding_window_view(Z[:, c], w) for c in range(k)]
+        block = max(1, SPEARMAN_CELLS // (k * w))
+        i, j = self.pair_index
+        for first in range(0, n - w + 1, block):
+            # Rangi w każdym oknie, wycentrowane i unormowane - korelacja pary to iloczyn skalarny
+            ranked, complete = [], []
+            for view in views:
+                windows = view[first:first + block]
+                full = ~np.isnan(windows).any(axis=1)
+                ranks = _ranks(np.where(np.isnan(windows), 0.0, windows))
+                ranks -= ranks.mean(axis=1, keepdims=True)
+                norm = np.sqrt((ranks ** 2).sum(axis=1, keepdims=True))
+                ranked.append(np.divide(ranks, norm, out=np.zeros_like(ranks), where=norm > 0))
+                complete.append(full & (norm[:, 0] > 0))
+
+            rows = slice(w - 1 + first, w - 1 + first + len(ranked[0]))
+            for p, (a, b) in enumerate(zip(i, j)):
+                corr = np.einsum('tw,tw->t', ranked[a], ranked[b])
+                result[rows, p] = np.where(complete[a] & complete[b], np.clip(corr, -1, 1), np.nan)
+        return result
+
+    def _row(self, at) -> int:
+        """Wiersz dla daty (ostatni nie późniejszy) albo pozycji; poza zakresem panelu - IndexError"""
+        n = len(self.dates)
+        if at is None:
+            row = n - 1
+        elif isinstance(at, (int, np.integer)):
+            row = int(at) + n if at < 0 else int(at)
+        else:
+            row = int(self.dates.searchsorted(pd.Timestamp(at), side='right')) - 1
+        if not 0 <= row < n:
+            raise IndexError(f"Poza zakresem panelu ({n} okresow): {at}")
+        return row
+
+    def matrix(self, method: str = 'pearson', at=None) -> pd.DataFrame:
+        """Macierz korelacji (k x k) na wybraną datę (domyślnie ostatnią)"""
+        values = self.pearson if method == 'pearson' else self.spearman
+        if values is None:
+            raise ValueError(f"Korelacja {method} nie byla liczona")
+        row = values[self._row(at)]
+        k = len(self.names)
+        matrix = np.eye(k)
+        i, j = self.pair_index
+        matrix[i, j] = row
+        matrix[j, i] = row
+        return pd.DataFrame(matrix, index=self.names, columns=self.names)
+
+    def pair_history(self, a: str, b: str) -> pd.DataFrame:
+        """Historia korelacji jednej pary (kolejność nazw dowolna)"""
+        key = (a, b) if (a, b) in self.pairs else (b, a)
+        p = self.pairs.index(key)
+        return pd.DataFrame({
+            'pearson': self.pearson[:, p],
+            'spearman': self.spearman[:, p] if self.spearman is not None else np.nan,
+            'baseline': self.baseline[:, p],
+            'break_z': self.break_z[:, p],
+        }, index=self.dates)
+
+    def breaks(self, z_threshold: float = 3.0, at=None, min_change: float = 0.3) -> List[Dict]:
+        """
+        Pary, których korelacja w oknie odbiegła od bazowej (załamanie reżimu korelacji)
+
+        Args:
+            z_threshold: Próg statystyki Fishera |z|
+            min_change: Minimalna zmiana samej korelacji (odsiewa istotne, ale małe zmiany)
+
+        Returns:
+            Lista posortowana malejąco po |z|: pair, correlation, baseline, z, sign_flip
+        """
+        row = self._row(at)
+        current, base, z = self.pearson[row], self.baseline[row], self.break_z[row]
+        with np.errstate(invalid='ignore'):
+            flagged = (np.abs(z) >= z_threshold) & (np.abs(current - base) >= min_change)
+
+        result = []
+        for p in np.flatnonzero(flagged):
+            result.append({
+                'pair': self.pairs[p],
+                'correlation': float(current[p]),
+                'baseline': float(base[p]),
+                'z': float(z[p]),
+                'sign_flip': bool(np.sign(current[p]) != np.sign(base[p])
+                                  and min(abs(current[p]), abs(base[p])) >= 0.2),
+            })
+        return sorted(result, key=lambda item: -abs(item['z']))
+
+    def key_pairs(self, at=None) -> List[Dict]:
+        """Bieżące korelacje par z KEY_PAIRS dostępnych w panelu"""
+        row = self._row(at)
+        result = []
+        for a, b in KEY_PAIRS:
+            key = (a, b) if (a, b) in self.pairs else (b, a)
+            if key in self.pairs:
+                p = self.pairs.index(key)
+                result.append({
+                    'pair': (a, b),
+                    'pearson': float(self.pearson[row, p]),
+                    'spearman': float(self.spearman[row, p]) if self.spearman is not None else None,
+                    'baseline': float(self.baseline[row, p]),
+                    'z': float(self.break_z[row, p]),
+                })
+        return result
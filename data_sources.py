@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Data Sources - wymienne źródła danych dla Liquidity Monitor
+
+Rejestr źródeł (FRED, NY Fed Markets API, pliki lokalne). Każde źródło ma
+własną pulę połączeń i cache. Historia serii pochodzi z pierwszego źródła,
+które ją ma (kolejność rejestracji), a źródło z nowszymi obserwacjami dokłada
+tylko brakujący ogon (np. NY Fed publikuje SOFR rano, FRED z opóźnieniem).
+W ramach jednego odświeżenia ta sama seria jest pobierana tylko raz.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from fred_parser import observations_frame
+
+
+class DataSource:
+    """
+    Bazowa klasa źródła danych - cache z TTL wspólny dla wszystkich źródeł
+
+    Polityka stale-while-revalidate: po upływie TTL seria jest pobierana od
+    nowa (jeden wątek na serię), ale fetch czeka na nią najwyżej
+    `revalidate_timeout` sekund - świeże dane, gdy źródło zdąży, a ostatnia
+    dobra kopia tylko przy błędzie albo przekroczeniu czasu (pobieranie kończy
+    się wtedy w tle). Pierwsze pobranie serii blokuje w całości - a gdy się nie
+    uda, zwracana jest dowolna znana kopia (także z dysku, patrz _fallback).
+    Wiek zwróconych danych trafia do `freshness`, więc nieaktualne serie są
+    oznaczane, a nie znikają po cichu z analizy.
+    """
+
+    name = 'base'
+    max_days_back: Optional[int] = None  # Źródło tylko najnowszych obserwacji - zapytania przycięte do tylu dni
+
+    def __init__(self, cache_ttl: float = 300, max_stale: float = 7 * 86400, revalidate_timeout: float = 2.0):
+        """
+        Args:
+            cache_ttl: Ważność wpisu w cache źródła (sekundy)
+            max_stale: Do jakiego wieku kopia może zastąpić nieudane odświeżenie (starsza - pobranie
+                       bez limitu czasu)
+            revalidate_timeout: Ile sekund fetch czeka na odświeżenie po TTL, zanim zwróci kopię
+        """
+        self.cache_ttl = cache_ttl
+        self.max_stale = max_stale
+        self.revalidate_timeout = revalidate_timeout
+        self._cache: Dict = {}
+        self._cache_lock = threading.Lock()
+        self._revalidating: Dict[tuple, threading.Event] = {}
+        self._expired_before = 0.0  # Wpisy zapisane wcześniej są po TTL (expire - przycisk odświeżania)
+        self.freshness: Dict[str, Dict] = {}  # series_id -> wiek / nieaktualność ostatnio zwróconych danych
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_cache_lock']
+        state['_revalidating'] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache_lock = threading.Lock()
+
+    def supports(self, series_id: str) -> bool:
+        """Czy źródło potrafi dostarczyć daną serię"""
+        return True
+
+    def _cached(self, series_id: str, days_back: int, covering: bool = True):
+        """Wpis (czas, dane) dla serii - dokładny zakres albo dłuższy (przycięty); covering=False - dowolny"""
+        with self._cache_lock:
+            entry = self._cache.get((series_id, days_back))
+            if entry is None:
+                longer = [(key[1], value) for key, value in self._cache.items()
+                          if key[0] == series_id and (key[1] >= days_back or not covering)]
+                if longer:
+                    entry = max(longer, key=lambda item: item[0])[1]
+        if entry is None or entry[1].empty:
+            return entry
+        cutoff = pd.Timestamp(datetime.now() - timedelta(days=days_back))
+        data = entry[1]
+        if data['date'].iloc[0] < cutoff:
+            data = data[data['date'] >= cutoff].reset_index(drop=True)
+        return entry[0], data
+
+    def _serve(self, series_id: str, saved_at: float, data: pd.DataFrame, error: Optional[str] = None) -> pd.DataFrame:
+        age = time.time() - saved_at
+        stale = age >= self.cache_ttl or saved_at < self._expired_before
+        self.freshness[series_id] = {'age': age, 'stale': stale, 'error': error}
+        return data
+
+    def fetch(self, series_id: str, days_back: int = 90) -> pd.DataFrame:
+        """
+        Pobiera serię (z cache jeśli świeży; po TTL odświeżenie z limitem czasu, kopia przy błędzie)
+
+        Returns:
+            DataFrame z kolumnami date/value posortowany po dacie (pusty przy błędzie i braku kopii)
+        """
+        if self.max_days_back is not None:
+            days_back = min(days_back, self.max_days_back)
+        entry = self._cached(series_id, days_back)
+        if entry:
+            age = time.time() - entry[0]
+            if age < self.cache_ttl and entry[0] >= self._expired_before:
+                return self._serve(series_id, *entry)
+            if age < self.max_stale:
+                done = self._revalidate(series_id, days_back)
+                done.wait(self.revalidate_timeout)
+                fresh = self._cached(series_id, days_back)
+                if fresh and fresh[0] > entry[0]:
+                    return self._serve(series_id, *fresh)
+                # Błąd albo przekroczony czas - ostatnia dobra kopia (odświeżenie może się jeszcze udać w tle)
+                return self._serve(series_id, *entry, error='niedostepne' if done.is_set() else None)
+
+        data = self._fetch(series_id, days_back)
+        if not data.empty:
+            self._store(series_id, days_back, data)
+            return self._serve(series_id, time.time(), data)
+
+        # Źródło nie odpowiada - dowolna znana kopia (także krótsza albo z dysku) zamiast pustej serii
+        entry = self._cached(series_id, days_back, covering=False) or self._fallback(series_id, days_back)
+        if entry:
+            print(f"[STALE] {self.name}: {series_id} z kopii sprzed {_age_text(time.time() - entry[0])}")
+            return self._serve(series_id, *entry, error='niedostepne')
+        self.freshness.pop(series_id, None)
+        return data
+
+    def _store(self, series_id: str, days_back: int, data: pd.DataFrame, saved_at: Optional[float] = None):
+        with self._cache_lock:
+            self._cache[(series_id, days_back)] = (saved_at or time.time(), data)
+
+    def _revalidate(self, series_id: str, days_back: int) -> threading.Event:
+        """
+        Odświeżenie w osobnym wątku - jedno naraz dla serii i zakresu; błąd zostawia nieaktualną kopię
+
+        Returns:
+            Zdarzenie ustawiane po zakończeniu (to samo dla równoczesnych wywołań)
+        """
+        key = (series_id, days_back)
+        with self._cache_lock:
+            if key in self._revalidating:
+                return self._revalidating[key]
+            done = self._revalidating[key] = threading.Event()
+
+        def run():
+            try:
+                data = self._fetch(series_id, days_back)
+                if not data.empty:
+                    self._store(series_id, days_back, data)
+            except Exception as e:
+                print(f"[STALE] {self.name}: odswiezenie {series_id} w tle nieudane: {e}")
+            finally:
+                with self._cache_lock:
+                    del self._revalidating[key]
+                done.set()
+
+        threading.Thread(target=run, name=f"revalidate-{self.name}-{series_id}", daemon=True).start()
+        return done
+
+    def _fallback(self, series_id: str, days_back: int):
+        """Kopia spoza pamięci (np. z dysku) - (czas zapisu, dane) albo None"""
+        return None
+
+    def _fetch(self, series_id: str, days_back: int) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def expire(self):
+        """Wszystkie wpisy po TTL - kolejny fetch odświeża (kopie zostają na wypadek błędu)"""
+        self._expired_before = time.time()
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+        self.freshness.clear()
+
+
+def _age_text(seconds: float) -> str:
+    """Wiek danych po ludzku: 45 s / 12 min / 3.5 h / 2.0 dni"""
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} dni"
+
+
+class FredSource(DataSource):
+    """FRED - korzysta z warstwy pobierania monitora (jego sesja i limiter)"""
+
+    name = 'fred'
+
+    def __init__(self, monitor, cache_ttl: float = 300):
+        super().__init__(cache_ttl)
+        self.monitor = monitor
+
+    def _fetch(self, series_id: str, days_back: int) -> pd.DataFrame:
+        return self.monitor.fetch_fred_data(series_id, days_back=days_back)
+
+    def _fallback(self, series_id: str, days_back: int):
+        # Ostatnia dobra kopia z dysku (LIQUIDITY_OBS_CACHE) - przeżywa restart procesu
+        cache = getattr(self.monitor, 'obs_cache', None)
+        cached = cache.get(series_id) if cache is not None else None
+        if not cached or not len(cached[0]):
+            return None
+        dates, values, saved_at = cached
+        cutoff = np.datetime64(datetime.now() - timedelta(days=days_back), 'D')
+        keep = dates >= cutoff
+        data = observations_frame(dates[keep], values[keep]) if keep.any() else observations_frame(dates[-1:], values[-1:])
+        self._store(series_id, days_back, data, saved_at)
+        return saved_at, data
+
+
+class NYFedSource(DataSource):
+    """
+    NY Fed Markets API (https://markets.newyorkfed.org)
+    Stopy referencyjne (SOFR, EFFR) i operacje ON RRP - publikowane przed FRED.
+    """
+
+    name = 'nyfed'
+    # Tylko świeży ogon serii - długa historia i tak pochodzi z FRED, więc każde
+    # wczytanie (także 50 lat) pyta NY Fed o ten sam krótki zakres (jeden wpis cache)
+    max_days_back = 30
+
+    # series_id FRED -> (ścieżka API, rodzaj odpowiedzi)
+    ENDPOINTS = {
+        'SOFR': ('/api/rates/secured/sofr/search.json', 'rates'),
+        'EFFR': ('/api/rates/unsecured/effr/search.json', 'rates'),
+        'RRPONTSYD': ('/api/rp/reverserepo/propositions/search.json', 'rrp'),
+    }
+
+    def __init__(self, base_url: str = 'https://markets.newyorkfed.org', cache_ttl: float = 300,
+                 timeout: float = 15):
+        super().__init__(cache_ttl)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+    def supports(self, series_id: str) -> bool:
+        return series_id in self.ENDPOINTS
+
+    def _fetch(self, series_id: str, days_back: int) -> pd.DataFrame:
+        path, kind = self.ENDPOINTS[series_id]
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+
+        try:
+            response = self.session.get(
+                self.base_url + path,
+                params={'startDate': start_date.strftime('%Y-%m-%d'), 'endDate': end_date.strftime('%Y-%m-%d')},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except Exception as e:
+            print(f"[ERROR] NY Fed: blad pobierania {series_id}: {e}")
+            return pd.DataFrame()
+
+        if kind == 'rates':
+            rows = [(r['effectiveDate'], r.get('percentRate')) for r in payload.get('refRates', [])]
+        else:
+            # Kwoty w USD - FRED (RRPONTSYD) podaje mld USD
+            operations = payload.get('repo', {}).get('operations', [])
+            rows = [(op['operationDate'], (op.get('totalAmtAccepted') or 0) / 1e9) for op in operations]
+
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows, columns=['date', 'value'])
+        df['date'] = pd.to_datetime(df['date'])
+        df['value'] = pd.to_numeric(df['value'], errors='coerce')
+        df = df.dropna().groupby('date', as_index=False)['value'].sum()
+        return df.sort_values('date').reset_index(drop=True)
+
+
+class LocalFileSource(DataSource):
+    """Pliki CSV z katalogu lokalnego: <katalog>/<SERIES_ID>.csv z kolumnami date,value"""
+
+    name = 'local'
+
+    def __init__(self, directory: str = 'data', cache_ttl: float = 300):
+        super().__init__(cache_ttl)
+        self.directory = directory
+
+    def _path(self, series_id: str) -> str:
+        return os.path.join(self.directory, f"{series_id}.csv")
+
+    def supports(self, series_id: str) -> bool:
+        return os.path.exists(self._path(series_id))
+
+    def fetch(self, series_id: str, days_back: int = 90) -> pd.DataFrame:
+        # Cache unieważniany zmianą pliku (mtime), nie tylko TTL
+        path = self._path(series_id)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        with self._cache_lock:
+            entry = self._cache.get((series_id, days_back))
+        if entry and entry[2] == mtime:
+            return entry[1]
+
+        data = self._fetch(series_id, days_back)
+        with self._cache_lock:
+            self._cache[(series_id, days_back)] = (time.time(), data, mtime)
+        return data
+
+    def _fetch(self, series_id: str, days_back: int) -> pd.DataFrame:
+        try:
+            df = pd.read_csv(self._path(series_id))
+        except Exception as e:
+            print(f"[ERROR] Plik lokalny {series_id}: {e}")
+            return pd.DataFrame()
+
+        df['date'] = pd.to_datetime(df['date'])
+        df['value'] = pd.to_numeric(df['value'], errors='coerce')
+        df = df[['date', 'value']].dropna().sort_values('date')
+        cutoff = pd.Timestamp(datetime.now() - timedelta(days=days_back))
+        return df[df['date'] >= cutoff].reset_index(drop=True)
+
+
+class SourceRegistry:
+    """
+    Rejestr źródeł danych
+
+    Kolejność rejestracji = priorytet: pierwsze źródło z danymi daje historię,
+    kolejne tylko obserwacje nowsze niż jej ostatnia data.
+    """
+
+    def __init__(self):
+        self._sources: List[DataSource] = []
+        self._restrict: Dict[str, Optional[set]] = {}
+        self._memo: Optional[Dict] = None
+        self._refresh_depth = 0
+        self._lock = threading.Lock()
+        self.last_source: Dict[str, str] = {}  # series_id -> nazwa źródła najnowszych obserwacji
+        self.freshness: Dict[str, Dict] = {}    # series_id -> wiek danych tego źródła (DataSource.freshness)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_memo'] = None
+        state['_refresh_depth'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def register(self, source: DataSource, series_ids: Optional[List[str]] = None):
+        """
+        Args:
+            source: Źródło danych
+            series_ids: Opcjonalne ograniczenie do wybranych serii
+        """
+        self._sources.append(source)
+        self._restrict[source.name] = set(series_ids) if series_ids is not None else None
+
+    def expire(self):
+        """Przycisk "Odśwież dane" - każde źródło pobiera serie od nowa przy następnym fetch"""
+        for source in self._sources:
+            source.expire()
+
+    def get(self, name: str) -> Optional[DataSource]:
+        for source in self._sources:
+            if source.name == name:
+                return source
+        return None
+
+    def sources_for(self, series_id: str) -> List[DataSource]:
+        result = []
+        for source in self._sources:
+            allowed = self._restrict.get(source.name)
+            if (allowed is None or series_id in allowed) and source.supports(series_id):
+                result.append(source)
+        return result
+
+    @contextmanager
+    def refresh(self):
+        """
+        Jedno odświeżenie danych - w jego trakcie każda seria pobierana jest raz
+
+        Zagnieżdżone wywołania współdzielą pamięć zewnętrznego odświeżenia.
+        """
+        with self._lock:
+            if self._refresh_depth == 0:
+                self._memo = {}
+            self._refresh_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._refresh_depth -= 1
+                if self._refresh_depth == 0:
+                    self._memo = None
+
+    def fetch(self, series_id: str, days_back: int = 90) -> pd.DataFrame:
+        """
+        Pobiera serię - historia z pierwszego źródła z danymi, nowszy ogon z kolejnych
+
+        Źródło z późniejszą ostatnią obserwacją nie zastępuje całej ramki
+        (30 dni z NY Fed nie może wyprzeć wieloletniej historii z FRED) -
+        dokleja tylko wiersze po ostatniej dacie dotychczasowych danych.
+
+        W trakcie refresh() wynik jest zapamiętywany - kolejne zapytanie o tę
+        samą serię (także o krótszy zakres) nie idzie już do sieci.
+        """
+        memo = self._memo
+        if memo is not None:
+            entry = memo.get(series_id)
+            if entry is not None and entry[0] >= days_back:
+                data = entry[1]
+                if entry[0] == days_back or data.empty:
+                    return data
+                cutoff = pd.Timestamp(datetime.now() - timedelta(days=days_back))
+                return data[data['date'] >= cutoff].reset_index(drop=True)
+
+        best, best_source = pd.DataFrame(), None
+        for source in self.sources_for(series_id):
+            data = source.fetch(series_id, days_back=days_back)
+            if data.empty:
+                continue
+            if best.empty:
+                best, best_source = data, source
+            elif data['date'].iloc[-1] > best['date'].iloc[-1]:
+                tail = data[data['date'] > best['date'].iloc[-1]]
+                best, best_source = pd.concat([best, tail], ignore_index=True), source
+
+        if best_source:
+            self.last_source[series_id] = best_source.name
+            self.freshness[series_id] = dict(best_source.freshness.get(series_id) or {}, source=best_source.name)
+        else:
+            self.freshness.pop(series_id, None)
+        if memo is not None:
+            memo[series_id] = (days_back, best)
+        return best
+
+
+def default_registry(monitor, data_dir: str = 'data', nyfed_url: str = 'https://markets.newyorkfed.org') -> SourceRegistry:
+    """Domyślny rejestr: FRED (wszystko), NY Fed (SOFR/EFFR/RRP), pliki lokalne"""
+    registry = SourceRegistry()
+    registry.register(FredSource(monitor))
+    registry.register(NYFedSource(nyfed_url))
+    registry.register(LocalFileSource(data_dir))
+    return registry
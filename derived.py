@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Derived - rejestr serii pochodnych (spready, ilorazy, net liquidity, z-score, średnie)
+
+Zamiast kopiowanych bloków pd.merge w build_indicators (i kolejnych kopii w
+raporcie i w aplikacji) każda seria pochodna to deklaracja:
+
+    DerivedSeries('sofr_iorb_spread', 'linear', ('sofr', 'iorb'), weights=(1, -1))
+    DerivedSeries('net_liquidity', 'linear', ('fed_balance', 'tga', 'reverse_repo'),
+                  weights=(1, -1, -1), align='asof', max_age={'fed_balance': 14, ...})
+
+Operacje:
+    linear  - suma ważona wejść (różnica, spread, net liquidity)
+    ratio   - iloraz dwóch wejść
+    zscore  - kroczący z-score jednego wejścia (okno w odczytach)
+    ma      - krocząca średnia jednego wejścia
+
+Wyrównanie wejść o różnej częstotliwości:
+    'inner' - tylko daty obecne we wszystkich wejściach (jak dotychczasowy merge spreadów)
+    'asof'  - siatka dat (suma dat wejść albo `freq`, np. 'W-WED'), każde wejście
+              z ostatnim odczytem o dacie <= dacie siatki, ale nie starszym niż
+              max_age dni (odczyt tygodniowy "ważny" do następnego, a nie w nieskończoność)
+Seria zaczyna się od daty, od której dostępne są wszystkie wejścia.
+
+Wejściem może być inna seria pochodna - rejestr liczy je w kolejności
+zależności. Wyniki są zapamiętywane (domyślnie wspólnie dla wszystkich
+monitorów w procesie) razem z wejściami: przy niezmienionych danych seria
+nie jest liczona ponownie, a gdy składnik dostaje nowe odczyty, przeliczany
+jest tylko ogon od daty pierwszej zmiany.
+
+Użycie:
+    registry = DerivedRegistry()
+    frames = registry.evaluate({name: data['data'] for name, data in indicators.items()})
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+class DerivedSeries:
+    """
+    Deklaracja jednej serii pochodnej
+
+    Args:
+        name: Nazwa wskaźnika wynikowego
+        op: 'linear', 'ratio', 'zscore' albo 'ma'
+        inputs: Nazwy wskaźników wejściowych (bazowych albo pochodnych)
+        weights: Wagi dla 'linear' (domyślnie 1 dla każdego wejścia)
+        window: Okno (w odczytach) dla 'zscore' / 'ma'
+        align: 'inner' albo 'asof' - wyrównanie dat wejść
+        freq: Siatka dla 'asof' (zakotwiczony alias pandas, np. 'W-WED', 'B'); None = suma dat wejść
+        max_age: Dla 'asof' - najstarszy dopuszczalny odczyt w dniach (liczba albo {wejście: dni})
+        label: Nazwa do raportów i wykresów
+        unit: Jednostka do raportów
+    """
+
+    OPS = ('linear', 'ratio', 'zscore', 'ma')
+
+    def __init__(self, name: str, op: str, inputs: Sequence[str], weights: Optional[Sequence[float]] = None,
+                 window: Optional[int] = None, align: str = 'inner', freq: Optional[str] = None,
+                 max_age: Union[None, float, Dict[str, float]] = None, label: Optional[str] = None,
+                 unit: str = ''):
+        if op not in self.OPS:
+            raise ValueError(f"Nieznana operacja serii pochodnej {name}: {op}")
+        if align not in ('inner', 'asof'):
+            raise ValueError(f"Nieznane wyrownanie serii pochodnej {name}: {align}")
+        if (freq is not None or max_age is not None) and align != 'asof':
+            raise ValueError(f"Seria {name}: freq / max_age tylko dla align='asof'")
+        inputs = tuple(inputs)
+        expected = {'ratio': 2, 'zscore': 1, 'ma': 1}.get(op)
+        if not inputs or (expected and len(inputs) != expected):
+            raise ValueError(f"Seria {name} ({op}) - niepoprawna liczba wejsc: {len(inputs)}")
+        if op in ('zscore', 'ma') and (window is None or window < 2):
+            raise ValueError(f"Seria {name} ({op}) wymaga okna >= 2")
+        if weights is not None and len(weights) != len(inputs):
+            raise ValueError(f"Seria {name} - liczba wag rozna od liczby wejsc")
+
+        self.name = name
+        self.op = op
+        self.inputs = inputs
+        self.weights = np.asarray(weights if weights is not None else [1.0] * len(inputs), dtype=float)
+        self.window = window
+        self.align = align
+        self.freq = freq
+        if max_age is None or isinstance(max_age, dict):
+            self.max_age = dict(max_age or {})
+        else:
+            self.max_age = {dependency: max_age for dependency in inputs}
+        self.label = label or name
+        self.unit = unit
+
+    @property
+    def key(self) -> tuple:
+        """Wszystko, od czego zależy wynik (klucz pamięci wyników)"""
+        return (self.name, self.op, self.inputs, tuple(self.weights), self.window, self.align, self.freq,
+                tuple(sorted(self.max_age.items())))
+
+    @property
+    def lookback(self) -> int:
+        """Ile odczytów każdego wejścia sprzed daty zmiany potrzeba do przeliczenia ogona"""
+        if self.op in ('zscore', 'ma'):
+            return self.window - 1
+        return 1 if self.align == 'asof' else 0
+
+    def panel(self, frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+        """Wejścia wyrównane na wspólnej siatce dat (kolumny w kolejności inputs)"""
+        if self.align == 'inner':
+            columns = [frame.set_index('date')['value'].astype(float) for frame in frames]
+            return pd.concat(columns, axis=1, keys=range(len(columns)), join='inner').sort_index().dropna()
+
+        dates = [frame['date'].to_numpy() for frame in frames]
+        start = max(d[0] for d in dates)
+        if self.freq:
+            grid = pd.date_range(start, max(d[-1] for d in dates), freq=self.freq).to_numpy()
+        else:
+            grid = np.unique(np.concatenate(dates))
+            grid = grid[grid >= start]
+
+        columns = []
+        for dependency, d, frame in zip(self.inputs, dates, frames):
+            idx = np.searchsorted(d, grid, side='right') - 1
+            column = frame['value'].to_numpy(dtype=float)[idx]
+            limit = self.max_age.get(dependency)
+            if limit is not None:
+                column = np.where(grid - d[idx] <= np.timedelta64(int(limit), 'D'), column, np.nan)
+            columns.append(column)
+        panel = pd.DataFrame(np.column_stack(columns), index=grid)
+        return panel.dropna()
+
+    def compute(self, frames: Sequence[pd.DataFrame], since=None) -> pd.DataFrame:
+        """
+        Ramka date/value serii pochodnej z ramek wejść
+
+        Args:
+            since: Tylko odczyty od tej daty (ogon) - wejścia są przycinane do
+                   `lookback` odczytów przed nią, więc koszt zależy od długości ogona
+        """
+        if since is not None:
+            frames = [frame.iloc[max(int(np.searchsorted(frame['date'].to_numpy(), since)) - self.lookback, 0):]
+                      for frame in frames]
+            if any(frame.empty for frame in frames):
+                return pd.DataFrame({'date': frames[0]['date'].to_numpy()[:0], 'value': np.empty(0)})
+
+        panel = self.panel(frames)
+        values = panel.to_numpy()
+
+        if self.op == 'linear':
+            result = values @ self.weights
+        elif self.op == 'ratio':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = values[:, 0] / values[:, 1]
+        else:
+            series = pd.Series(values[:, 0])
+            rolling = series.rolling(self.window, min_periods=self.window)
+            if self.op == 'ma':
+                result = rolling.mean().to_numpy()
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    result = ((series - rolling.mean()) / rolling.std()).to_numpy()
+
+        frame = pd.DataFrame({'date': panel.index, 'value': result})
+        keep = np.isfinite(frame['value'].to_numpy())
+        if since is not None:
+            keep &= frame['date'].to_numpy() >= since
+        return frame[keep].reset_index(drop=True)
+
+
+# Jednostki jak w monitorze - wskaźniki bilansowe w mld USD, stopy w %
+DEFAULT_DERIVED = [
+    # SOFR-IORB - NAJWAŻNIEJSZY wskaźnik napięć (według Dan Kostecki)
+    DerivedSeries('sofr_iorb_spread', 'linear', ('sofr', 'iorb'), weights=(1, -1),
+                  label='SOFR-IORB spread', unit='%'),
+    DerivedSeries('effr_iorb_spread', 'linear', ('effr', 'iorb'), weights=(1, -1),
+                  label='EFFR-IORB spread', unit='%'),
+    # Net liquidity = bilans Fed - TGA - RRP. WALCL i WTREGEN to stany na środę
+    # (tygodniowe), RRP dzienne: każdy dzień z ostatnim znanym odczytem składnika.
+    # Odczyt tygodniowy ważny do 14 dni (jedna opóźniona publikacja), dzienny do 5
+    # (długie weekendy) - starszy oznacza brak danych, a nie "zamrożoną" wartość.
+    DerivedSeries('net_liquidity', 'linear', ('fed_balance', 'tga', 'reverse_repo'), weights=(1, -1, -1),
+                  align='asof', max_age={'fed_balance': 14, 'tga': 14, 'reverse_repo': 5},
+                  label='Net liquidity', unit='B USD'),
+]
+
+# Pamięć wyników wspólna dla wszystkich rejestrów z shared=True (np. monitory kolejnych sesji)
+_shared_cache: Dict[tuple, tuple] = {}
+_shared_lock = threading.Lock()
+
+# Znacznik "zmieniony początek wejścia - przelicz całość"
+_FULL = object()
+
+
+def _first_change(old, new):
+    """
+    Data pierwszej różnicy między zapamiętanymi a nowymi (daty, wartości) wejścia
+
+    Returns:
+        None - bez zmian, _FULL - zmieniony początek, inaczej data (datetime64)
+    """
+    old_dates, old_values = old
+    new_dates, new_values = new
+    if not len(old_dates) or not len(new_dates) or old_dates[0] != new_dates[0]:
+        return _FULL
+    n = min(len(old_dates), len(new_dates))
+    same = (old_dates[:n] == new_dates[:n]) & ((old_values[:n] == new_values[:n]) |
+                                               (np.isnan(old_values[:n]) & np.isnan(new_values[:n])))
+    differ = np.flatnonzero(~same)
+    k = int(differ[0]) if len(differ) else n
+    if k == len(old_dates) == len(new_dates):
+        return None
+    candidates = [d[k] for d in (old_dates, new_dates) if k < len(d)]
+    return min(candidates)
+
+
+class DerivedRegistry:
+    """
+    Zbiór serii pochodnych liczonych w kolejności zależności, z pamięcią wyników
+
+    Args:
+        definitions: Lista DerivedSeries (domyślnie DEFAULT_DERIVED)
+        shared: Pamięć wyników wspólna dla procesu (False - własna pamięć rejestru)
+    """
+
+    def __init__(self, definitions: Optional[Sequence[DerivedSeries]] = None, shared: bool = True):
+        self.definitions: Dict[str, DerivedSeries] = {}
+        self.order: List[str] = []
+        self._cache = _shared_cache if shared else {}
+        self._lock = _shared_lock if shared else threading.Lock()
+        for definition in (DEFAULT_DERIVED if definitions is None else definitions):
+            self.register(definition)
+
+    def __getstate__(self):
+        # Monitor (razem z rejestrem) bywa picklowany (procesy WorkerPool) - Lock nie jest picklowalny,
+        # a pamięć wspólna zostaje w procesie; po odtworzeniu rejestr korzysta z pamięci nowego procesu
+        state = self.__dict__.copy()
+        state['_shared'] = self._cache is _shared_cache
+        del state['_lock']
+        if state['_shared']:
+            del state['_cache']
+        return state
+
+    def __setstate__(self, state):
+        shared = state.pop('_shared')
+        self.__dict__.update(state)
+        self._cache = _shared_cache if shared else self.__dict__.get('_cache', {})
+        self._lock = _shared_lock if shared else threading.Lock()
+
+    def register(self, definition: DerivedSeries):
+        """Dodaje (albo zastępuje) serię pochodną"""
+        previous = self.definitions.get(definition.name)
+        self.definitions[definition.name] = definition
+        try:
+            self.order = self._resolve_order()
+        except ValueError:
+            if previous is None:
+                del self.definitions[definition.name]
+            else:
+                self.definitions[definition.name] = previous
+            raise
+
+    def _resolve_order(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cykl zaleznosci serii pochodnych: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self.definitions[name].inputs:
+                if dependency in self.definitions:
+                    visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.definitions:
+            visit(name, [])
+        return order
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.definitions
+
+    def get(self, name: str) -> Optional[DerivedSeries]:
+        return self.definitions.get(name)
+
+    def linear(self) -> List[DerivedSeries]:
+        """Serie liniowe w kolejności zależności (scenariusze przesuwają je razem ze składnikami)"""
+        return [self.definitions[name] for name in self.order if self.definitions[name].op == 'linear']
+
+    def _evaluate_one(self, definition: DerivedSeries, inputs: List[pd.DataFrame]) -> pd.DataFrame:
+        arrays = [(frame['date'].to_numpy(), frame['value'].to_numpy(dtype=float)) for frame in inputs]
+        with self._lock:
+            cached = self._cache.get(definition.key)
+
+        since = _FULL
+        if cached is not None:
+            firsts = [_first_change(old, new) for old, new in zip(cached[0], arrays)]
+            if any(first is _FULL for first in firsts):
+                since = _FULL
+            elif all(first is None for first in firsts):
+                return cached[1]
+            else:
+                since = min(first for first in firsts if first is not None)
+
+        if since is _FULL:
+            frame = definition.compute(inputs)
+        else:
+            previous = cached[1]
+            head = previous[previous['date'].to_numpy() < since]
+            frame = pd.concat([head, definition.compute(inputs, since=since)], ignore_index=True)
+
+        with self._lock:
+            self._cache[definition.key] = (arrays, frame)
+        return frame
+
+    def evaluate(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Liczy wszystkie serie pochodne, dla których są wejścia
+
+        Args:
+            frames: {nazwa wskaźnika: DataFrame z kolumnami date/value}
+
+        Returns:
+            {nazwa serii pochodnej: DataFrame date/value} - pomija serie bez wejść
+            albo z pustym wynikiem (np. brak wspólnych dat)
+        """
+        available = dict(frames)
+        derived = {}
+
+        for name in self.order:
+            definition = self.definitions[name]
+            inputs = [available.get(dependency) for dependency in definition.inputs]
+            if any(frame is None or frame.empty for frame in inputs):
+                continue
+
+            frame = self._evaluate_one(definition, inputs)
+            if not frame.empty:
+                available[name] = derived[name] = frame
+        return derived
@@ -2,13 +2,30 @@
 """
 Odkrywanie dodatkowych wskaźników FRED
 Testuje dostępność i jakość danych
+
+Skaner działa równolegle (pula wątków + limiter 120 zapytań/min) na warstwie
+pobierania LiquidityMonitor, a wyniki trzyma w cache z TTL. Poza listą
+poniżej może przeskanować całą kategorię lub release FRED (tysiące serii).
+
+Użycie:
+    python discover_indicators.py                    # domyślna lista kandydatów
+    python discover_indicators.py --category 32991   # cała kategoria FRED
+    python discover_indicators.py --release 20 --metadata-only
 """
 
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
 import requests
-from datetime import datetime, timedelta
 
-API_KEY = 'fc1ef11c8f65429677a78db10a3a4d2e'
-BASE_URL = 'https://api.stlouisfed.org/fred/series/observations'
+from liquidity_monitor import LiquidityMonitor
 
 # Dodatkowe wskaźniki do przetestowania
 additional_indicators = {
@@ -79,130 +96,336 @@ additional_indicators = {
     'WSHOMCB': 'Mortgage-Backed Securities Held by Fed',
 }
 
-print("="*80)
-print("  ODKRYWANIE DODATKOWYCH WSKAZNIKOW FRED")
-print("="*80)
-print(f"\nTestuje {len(additional_indicators)} nowych wskaznikow...\n")
-
-end_date = datetime.now()
-start_date = end_date - timedelta(days=90)
+# Po ilu dniach bez nowej obserwacji seria jest "ograniczona"
+STALE_AFTER_DAYS = 90
+
+
+def infer_frequency(dates: List[str]) -> str:
+    """Zgaduje częstotliwość serii (D/W/M/Q/A) z odstępów między datami"""
+    if len(dates) < 2:
+        return '?'
+
+    days = np.sort(np.array(dates, dtype='datetime64[D]').astype(np.int64))
+    gap = float(np.median(np.diff(days)))
+
+    if gap <= 1.5:
+        return 'D'
+    elif gap <= 8:
+        return 'W'
+    elif gap <= 35:
+        return 'M'
+    elif gap <= 95:
+        return 'Q'
+    return 'A'
+
+
+def is_definitive(error: Exception) -> bool:
+    """
+    Czy błąd sondowania jest trwałą odpowiedzią FRED (400 / 404 - nieznana seria)
+
+    Timeout, zerwane połączenie, 429 i błędy 5xx są przejściowe - taki wynik
+    nie trafia do cache, więc kolejny skan sprawdza serię od nowa.
+    """
+    response = getattr(error, 'response', None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code in (400, 404)
+
+
+class IndicatorScanner:
+    """Równoległy skaner dostępności serii FRED z cache wyników"""
+
+    def __init__(self, monitor: LiquidityMonitor, max_workers: int = 8,
+                 cache_path: Optional[str] = 'discovery_cache.json', cache_ttl: float = 6 * 3600):
+        """
+        Args:
+            monitor: LiquidityMonitor - jego sesja HTTP i limiter są współdzielone
+            max_workers: Liczba równoległych wątków
+            cache_path: Plik cache wyników (None = bez cache)
+            cache_ttl: Ważność wyniku w cache (sekundy)
+        """
+        self.monitor = monitor
+        self.max_workers = max_workers
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self._cache = self._load_cache()
+        self._cache_lock = threading.Lock()
+
+    def _load_cache(self) -> Dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self._cache_lock:
+            snapshot = dict(self._cache)
+        with open(self.cache_path, 'w') as f:
+            json.dump(snapshot, f)
+
+    def _cached(self, series_id: str) -> Optional[Dict]:
+        entry = self._cache.get(series_id)
+        if entry and time.time() - entry['checked_at'] < self.cache_ttl:
+            return dict(entry['result'], cached=True)
+        return None
+
+    def probe(self, series_id: str, description: str = '') -> Dict:
+        """
+        Sprawdza jedną serię: dostępność, częstotliwość, opóźnienie i "nieświeżość"
+
+        Pobiera tylko kilka najnowszych obserwacji (sort_order=desc), więc
+        koszt nie zależy od długości historii serii.
+        """
+        result = {
+            'id': series_id,
+            'name': description,
+            'status': 'unavailable',
+            'frequency': '?',
+            'latency_ms': None,
+            'latest_date': None,
+            'latest_value': None,
+            'staleness_days': None,
+            'error': None,
+            'retryable': False,
+        }
+
+        started = time.perf_counter()
+        try:
+            data = self.monitor.fetch_fred_json(
+                'series/observations', series_id=series_id, sort_order='desc', limit=12
+            )
+        except Exception as e:
+            result['error'] = str(e)
+            result['retryable'] = not is_definitive(e)
+            return result
+        finally:
+            result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+        valid_obs = [o for o in data.get('observations', []) if o['value'] != '.']
+        if not valid_obs:
+            result['error'] = 'Brak obserwacji'
+            return result
+
+        latest = valid_obs[0]
+        staleness = (datetime.now() - datetime.strptime(latest['date'], '%Y-%m-%d')).days
+
+        result.update({
+            'status': 'available' if staleness <= STALE_AFTER_DAYS else 'limited',
+            'frequency': infer_frequency([o['date'] for o in valid_obs]),
+            'latest_date': latest['date'],
+            'latest_value': latest['value'],
+            'staleness_days': staleness,
+        })
+        return result
+
+    def from_metadata(self, series_id: str, meta: Dict) -> Dict:
+        """Buduje wynik bez sondowania - z metadanych listingu kategorii/release"""
+        latest_date = meta.get('observation_end')
+        staleness = (datetime.now() - datetime.strptime(latest_date, '%Y-%m-%d')).days if latest_date else None
+        return {
+            'id': series_id,
+            'name': meta.get('title', ''),
+            'status': 'available' if staleness is not None and staleness <= STALE_AFTER_DAYS else 'limited',
+            'frequency': meta.get('frequency_short', '?'),
+            'latency_ms': None,
+            'latest_date': latest_date,
+            'latest_value': None,
+            'staleness_days': staleness,
+            'error': None,
+            'retryable': False,
+        }
+
+    def scan(self, candidates: Dict[str, str], use_cache: bool = True) -> List[Dict]:
+        """
+        Skanuje wielu kandydatów równolegle
+
+        Do cache trafiają tylko odpowiedzi rozstrzygające (także "Brak obserwacji"
+        i nieznana seria) - wyniki z przejściowym błędem (retryable) nie.
+
+        Args:
+            candidates: {series_id: opis}
+            use_cache: Czy korzystać z wyników w cache (w granicach TTL)
+        """
+        results = {}
+        to_probe = {}
+
+        for series_id, description in candidates.items():
+            cached = self._cached(series_id) if use_cache else None
+            if cached:
+                results[series_id] = cached
+            else:
+                to_probe[series_id] = description
+
+        print(f"[SCAN] {len(candidates)} serii: {len(results)} z cache, {len(to_probe)} do sprawdzenia "
+              f"({self.max_workers} watkow)")
+
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.probe, sid, desc): sid for sid, desc in to_probe.items()}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['id']] = result
+                if not result['retryable']:
+                    with self._cache_lock:
+                        self._cache[result['id']] = {'checked_at': time.time(), 'result': result}
+
+                done += 1
+                if done % 100 == 0:
+                    print(f"   ... {done}/{len(to_probe)}")
+                    self._save_cache()  # Checkpoint dla długich skanów
+
+        self._save_cache()
+        return [results[sid] for sid in candidates]
+
+    def _list_series(self, endpoint: str, **params) -> Dict[str, Dict]:
+        """Stronicuje listing serii (limit 1000 na stronę) i zwraca {id: metadane}"""
+        listing = {}
+        offset = 0
+        while True:
+            data = self.monitor.fetch_fred_json(endpoint, limit=1000, offset=offset, **params)
+            page = data.get('seriess', [])
+            for meta in page:
+                listing[meta['id']] = meta
+            offset += len(page)
+            if not page or offset >= int(data.get('count', 0)):
+                break
+        return listing
+
+    def candidates_from_category(self, category_id: int) -> Dict[str, Dict]:
+        """Wszystkie serie z kategorii FRED"""
+        return self._list_series('category/series', category_id=category_id)
+
+    def candidates_from_release(self, release_id: int) -> Dict[str, Dict]:
+        """Wszystkie serie z release FRED"""
+        return self._list_series('release/series', release_id=release_id)
+
+
+def print_summary(results: List[Dict]):
+    """Wyświetla podsumowanie skanu"""
+    available = [r for r in results if r['status'] == 'available']
+    limited = [r for r in results if r['status'] == 'limited']
+    unavailable = [r for r in results if r['status'] == 'unavailable']
+
+    print("="*80)
+    print("  PODSUMOWANIE")
+    print("="*80)
+
+    print(f"\n[OK] Dostepne i aktualne ({len(available)}):")
+    print("-"*80)
+    print(f"  {'ID':15} {'FREQ':4} {'NAJNOWSZE':10} {'WIEK':>6} {'LATENCJA':>9}  OPIS")
+    for item in available:
+        if item.get('cached') or item['latency_ms'] is None:
+            latency = 'cache'
+        else:
+            latency = f"{item['latency_ms']:.0f}ms"
+        print(f"  {item['id']:15} {item['frequency']:4} {item['latest_date']:10} "
+              f"{item['staleness_days']:>5}d {latency:>9}  {item['name'][:40]}")
+
+    print(f"\n[WARN] Ograniczone dane ({len(limited)}):")
+    print("-"*80)
+    for item in limited:
+        age = f"{item['staleness_days']}d" if item['staleness_days'] is not None else '?'
+        print(f"  {item['id']:15} - {item['name'][:50]} (ostatnie dane {age} temu)")
+
+    print(f"\n[ERROR] Niedostepne ({len(unavailable)}):")
+    print("-"*80)
+    for item in unavailable:
+        print(f"  {item['id']:15} {item['error'] or ''}")
+
+    print("\n" + "="*80)
+
+
+def print_recommendations(results: List[Dict]):
+    """Rekomendacje dla domyślnej listy kandydatów"""
+    print("\n[REKOMENDACJE] Wskazniki do dodania:")
+    print("-"*80)
+
+    available_ids = [item['id'] for item in results if item['status'] == 'available']
+
+    print("\nNajwazniejsze dla analizy plynnosci:")
+    priority_indicators = [
+        ('M2SL', 'Podaz pieniadza M2 - kluczowy wskaznik plynnosci'),
+        ('WRESBAL', 'Rezerwy bankow (alternatywa dla TOTRESNS)'),
+        ('DGS10', 'Stopa 10-letnia - benchmark rynku'),
+        ('T10Y2Y', 'Krzywa dochodowosci - wskaznik recesji'),
+        ('NFCI', 'Warunki finansowe - kompleksowy wskaznik'),
+        ('VIXCLS', 'VIX - strach na rynku'),
+        ('DTWEXBGS', 'Indeks dolara - wplyw na globalna plynnosc'),
+        ('TEDRATE', 'TED Spread - napicia w systemie bankowym'),
+        ('CPIAUCSL', 'Inflacja - wplyw na polityka Fed'),
+    ]
+
+    for series_id, reason in priority_indicators:
+        if series_id in available_ids:
+            print(f"  [+] {series_id:12} - {reason}")
+        else:
+            print(f"  [-] {series_id:12} - {reason} (NIEDOSTEPNE)")
 
-results = {
-    'available': [],
-    'limited': [],
-    'unavailable': []
-}
+    print("\n" + "="*80)
 
-for series_id, description in additional_indicators.items():
-    print(f"[TEST] {series_id}: {description}")
 
-    params = {
-        'series_id': series_id,
-        'api_key': API_KEY,
-        'file_type': 'json',
-        'observation_start': start_date.strftime('%Y-%m-%d'),
-        'observation_end': end_date.strftime('%Y-%m-%d'),
-    }
+def main():
+    parser = argparse.ArgumentParser(description='Odkrywanie wskaznikow FRED')
+    parser.add_argument('--category', type=int, help='Skanuj wszystkie serie z kategorii FRED')
+    parser.add_argument('--release', type=int, help='Skanuj wszystkie serie z release FRED')
+    parser.add_argument('--workers', type=int, default=8, help='Liczba rownoleglych watkow')
+    parser.add_argument('--ttl', type=float, default=6.0, help='Waznosc cache w godzinach')
+    parser.add_argument('--no-cache', action='store_true', help='Ignoruj cache wynikow')
+    parser.add_argument('--metadata-only', action='store_true',
+                        help='Dla --category/--release: bez sondowania, tylko metadane listingu')
+    parser.add_argument('--json', help='Zapisz wyniki do pliku JSON')
+    args = parser.parse_args()
 
     try:
-        response = requests.get(BASE_URL, params=params, timeout=10)
-
-        if response.status_code == 200:
-            data = response.json()
-
-            if 'observations' in data:
-                obs = data['observations']
-                valid_obs = [o for o in obs if o['value'] != '.']
-
-                if len(valid_obs) > 0:
-                    latest = valid_obs[-1]
-                    print(f"   [OK] Dostepne! Najnowsze: {latest['date']} = {latest['value']}")
-                    print(f"   Obserwacji: {len(valid_obs)}")
-
-                    results['available'].append({
-                        'id': series_id,
-                        'name': description,
-                        'latest_date': latest['date'],
-                        'latest_value': latest['value'],
-                        'count': len(valid_obs)
-                    })
-                else:
-                    print(f"   [WARN] Seria istnieje, ale brak danych w ostatnich 90 dniach")
-                    results['limited'].append({
-                        'id': series_id,
-                        'name': description
-                    })
-            else:
-                print(f"   [WARN] Brak obserwacji")
-                results['unavailable'].append(series_id)
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    api_key = os.environ.get('FRED_API_KEY')
+    if not api_key:
+        print("[ERROR] Brak FRED_API_KEY (zmienna srodowiskowa lub plik .env)")
+        return
+
+    monitor = LiquidityMonitor(fred_api_key=api_key)
+    scanner = IndicatorScanner(monitor, max_workers=args.workers, cache_ttl=args.ttl * 3600)
+
+    print("="*80)
+    print("  ODKRYWANIE DODATKOWYCH WSKAZNIKOW FRED")
+    print("="*80)
+
+    started = time.perf_counter()
+
+    if args.category is not None or args.release is not None:
+        if args.category is not None:
+            listing = scanner.candidates_from_category(args.category)
         else:
-            print(f"   [ERROR] Status {response.status_code}")
-            results['unavailable'].append(series_id)
-
-    except Exception as e:
-        print(f"   [ERROR] {e}")
-        results['unavailable'].append(series_id)
-
-    print()
-
-# Podsumowanie
-print("="*80)
-print("  PODSUMOWANIE")
-print("="*80)
-
-print(f"\n[OK] Dostepne i aktualne ({len(results['available'])}):")
-print("-"*80)
-for item in results['available']:
-    print(f"  {item['id']:15} - {item['name']}")
-    print(f"  {'':15}   Najnowsze: {item['latest_date']} = {item['latest_value']}")
-
-print(f"\n[WARN] Ograniczone dane ({len(results['limited'])}):")
-print("-"*80)
-for item in results['limited']:
-    print(f"  {item['id']:15} - {item['name']}")
-
-print(f"\n[ERROR] Niedostepne ({len(results['unavailable'])}):")
-print("-"*80)
-for series_id in results['unavailable']:
-    print(f"  {series_id}")
-
-print("\n" + "="*80)
-
-# Rekomendacje
-print("\n[REKOMENDACJE] Wskazniki do dodania:")
-print("-"*80)
-
-# Grupuj po kategoriach
-categories = {
-    'Podaz pieniadza': ['M1SL', 'M2SL', 'M2V', 'BOGMBASE'],
-    'Stopy procentowe': ['DGS10', 'DGS2', 'DGS3MO', 'T10Y2Y', 'T10Y3M'],
-    'Warunki finansowe': ['NFCI', 'ANFCI', 'STLFSI4', 'VIXCLS'],
-    'Inflacja': ['CPIAUCSL', 'CPILFESL', 'T5YIE', 'T10YIE'],
-    'Kredyt': ['TOTLL', 'BUSLOANS', 'TEDRATE'],
-    'Dolar': ['DTWEXBGS'],
-    'Rynek pracy': ['UNRATE', 'PAYEMS'],
-    'Alternatywne rezerwy': ['WRESBAL', 'WORAL']
-}
+            listing = scanner.candidates_from_release(args.release)
+        print(f"\nZnaleziono {len(listing)} serii w listingu\n")
 
-available_ids = [item['id'] for item in results['available']]
-
-print("\nNajwazniejsze dla analizy plynnosci:")
-priority_indicators = [
-    ('M2SL', 'Podaz pieniadza M2 - kluczowy wskaznik plynnosci'),
-    ('WRESBAL', 'Rezerwy bankow (alternatywa dla TOTRESNS)'),
-    ('DGS10', 'Stopa 10-letnia - benchmark rynku'),
-    ('T10Y2Y', 'Krzywa dochodowosci - wskaznik recesji'),
-    ('NFCI', 'Warunki finansowe - kompleksowy wskaznik'),
-    ('VIXCLS', 'VIX - strach na rynku'),
-    ('DTWEXBGS', 'Indeks dolara - wplyw na globalna plynnosc'),
-    ('TEDRATE', 'TED Spread - napicia w systemie bankowym'),
-    ('CPIAUCSL', 'Inflacja - wplyw na polityka Fed'),
-]
-
-for series_id, reason in priority_indicators:
-    if series_id in available_ids:
-        print(f"  [+] {series_id:12} - {reason}")
+        if args.metadata_only:
+            results = [scanner.from_metadata(sid, meta) for sid, meta in listing.items()]
+        else:
+            results = scanner.scan({sid: meta.get('title', '') for sid, meta in listing.items()},
+                                   use_cache=not args.no_cache)
     else:
-        print(f"  [-] {series_id:12} - {reason} (NIEDOSTEPNE)")
+        print(f"\nTestuje {len(additional_indicators)} nowych wskaznikow...\n")
+        results = scanner.scan(additional_indicators, use_cache=not args.no_cache)
+
+    print(f"\n[SCAN] Gotowe w {time.perf_counter() - started:.1f}s\n")
+    print_summary(results)
+
+    if args.category is None and args.release is None:
+        print_recommendations(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"[SAVED] Wyniki zapisane do: {args.json}")
+
 
-print("\n" + "="*80)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Figure cache - gotowe wykresy Plotly współdzielone przez przebiegi i sesje
+
+Wykresy aplikacji (wszystkie wskaźniki, Tier 1, net liquidity, pojedyncza
+seria, wskaźnik oceny) były budowane od nowa przy każdym przebiegu skryptu
+w każdej sesji - tysiące punktów na serię przechodziły walidację Plotly i
+serializację, choć dane się nie zmieniły. Tutaj wykres jest budowany raz na
+klucz:
+
+    (rodzaj wykresu, zestaw serii, wersja danych, poziom przerzedzenia)
+
+    - wersja danych to skrót treści serii (series_version, data_version) -
+      nowy odczyt albo rewizja daje nowy klucz, stary wpis wypada z LRU,
+    - poziom przerzedzenia to limit punktów na linię (downsample: minimum i
+      maksimum w każdym przedziale - skoki zostają widoczne),
+    - wpis trzyma zbudowaną figurę - bez osobnej kopii JSON: st.plotly_chart
+      i tak serializuje figurę przy każdym przebiegu (słownik / JSON waliduje
+      od nowa), więc oszczędnością jest pominięcie budowy śladów i walidacji;
+      do budżetu pamięci liczone są tablice danych śladów (figure_bytes),
+    - równoległe sesje budujące ten sam wykres czekają na jedną budowę
+      (SingleFlight).
+
+Użycie:
+    cache = FigureCache()
+    names = ('reserves', 'tga')
+    fig = cache.get('multi', names, series_version(indicators, names), 2000,
+                    lambda: create_multi_indicator_chart(indicators, 2000))
+    cache.peek('multi', names, series_version(indicators, names), 2000)   # bez budowy, None gdy brak
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from data_version import combine, frame_version
+from singleflight import SingleFlight
+
+
+def series_version(indicators: Dict, names: Iterable[str]) -> str:
+    """Wersja danych wykresu - skróty treści serii (data_version.frame_version) z `names`"""
+    return combine(*((name, frame_version(indicators[name]['data'])) for name in names if name in indicators))
+
+
+def downsample(dates: np.ndarray, values: np.ndarray, max_points: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Przerzedza serię do najwyżej max_points punktów: pierwszy, ostatni oraz minimum
+    i maksimum w każdym z równych przedziałów (kolejność dat zachowana)
+
+    Args:
+        max_points: Limit punktów (None / 0 albo krótsza seria = bez zmian)
+    """
+    n = len(values)
+    if not max_points or n <= max(max_points, 4):
+        return dates, values
+
+    buckets = max(1, (max_points - 2) // 2)
+    inner = np.arange(1, n - 1)
+    bucket = (inner - 1) * buckets // (n - 2)
+    # W obrębie przedziału rosnąco po wartości - pierwszy to minimum, ostatni maksimum
+    order = np.lexsort((values[inner], bucket))
+    sorted_buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    keep = np.unique(np.concatenate([[0, n - 1], inner[order[starts]], inner[order[ends]]]))
+    return dates[keep], values[keep]
+
+
+def figure_bytes(figure: Any) -> int:
+    """Przybliżony rozmiar figury - tablice danych śladów (x, y, text, customdata) po 8 bajtów na punkt"""
+    total = 0
+    for trace in figure.data:
+        for name in ('x', 'y', 'text', 'customdata'):
+            value = getattr(trace, name, None)
+            if value is None or isinstance(value, str):
+                continue
+            total += value.nbytes if hasattr(value, 'nbytes') else len(value) * 8
+    return total + 1024  # Układ i opisy śladów
+
+
+class FigureCache:
+    """Wspólna pamięć LRU gotowych wykresów z budżetem bajtów"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Budżet na dane śladów (figure_bytes) - najdawniej używane wypadają
+        """
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+        self._entries: 'OrderedDict[Hashable, Tuple[int, Any]]' = OrderedDict()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, series: Iterable[str], version: str, level: Optional[int]) -> Hashable:
+        return kind, tuple(series), version, level
+
+    def get(self, kind: str, series: Iterable[str], version: str, level: Optional[int],
+            build: Callable[[], Any]) -> Any:
+        """
+        Figura dla klucza - z pamięci albo zbudowana przez `build` (jedna budowa naraz na klucz)
+
+        Args:
+            kind: Rodzaj wykresu (np. 'multi', 'tier1', 'series:vix')
+            series: Serie na wykresie
+            version: Wersja danych (series_version albo inna wartość zmieniająca się z danymi)
+            level: Poziom przerzedzenia (limit punktów na linię, None = pełne dane)
+            build: Buduje figurę Plotly (wywoływane tylko przy braku wpisu)
+        """
+        key = self._key(kind, series, version, level)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+
+        return self._flight.do(key, lambda: self._build(key, build))
+
+    def _build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)  # Zbudowana przez poprzedniego lidera
+            if entry is not None:
+                self.stats['hits'] += 1
+                return entry[1]
+
+        figure = build()
+        size = figure_bytes(figure)
+        with self._lock:
+            self.stats['misses'] += 1
+            self._entries[key] = (size, figure)
+            self.stats['bytes'] += size
+            while self.stats['bytes'] > self.max_bytes and len(self._entries) > 1:
+                _, (old_size, _) = self._entries.popitem(last=False)
+                self.stats['bytes'] -= old_size
+                self.stats['evictions'] += 1
+        return figure
+
+    def peek(self, kind: str, series: Iterable[str], version: str, level: Optional[int]) -> Any:
+        """Figura z pamięci albo None - bez budowy, bez zmiany kolejności LRU i statystyk"""
+        with self._lock:
+            entry = self._entries.get(self._key(kind, series, version, level))
+        return entry[1] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats['bytes'] = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+FRED parser - odpowiedź series/observations prosto do tablic NumPy
+
+Zamiast json.loads -> lista słowników -> DataFrame (z nieużywanymi kolumnami
+realtime_start / realtime_end) -> pd.to_datetime bez formatu -> pd.to_numeric
+-> dropna -> sort_values, surowe bajty odpowiedzi są skanowane w NumPy:
+
+    daty     - pola "date":"YYYY-MM-DD" -> dni od 1970-01-01 (datetime64[D], int64)
+    wartości - pola "value":"..." -> float64; znacznik braku '.' -> NaN (pomijany)
+
+Liczby dziesiętne są składane z cyfr jako całkowita mantysa / 10^k - jedno
+dzielenie dwóch dokładnych liczb daje ten sam, poprawnie zaokrąglony wynik
+co float(). Wartości w innej postaci (np. wykładnik) idą przez float().
+Gdy układ odpowiedzi jest inny niż oczekiwany (kolejność pól, spacje),
+parser wraca do json.loads - wynik jest ten sam, tylko wolniej.
+
+FRED zwraca obserwacje posortowane rosnąco - sortowanie jest pomijane, gdy
+daty już są rosnące. DataFrame powstaje tylko na żądanie (observations_frame).
+
+Użycie:
+    dates, values = parse_observations(response.content)
+    df = observations_frame(dates, values)      # date/value jak fetch_fred_data
+"""
+
+import json
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+_DATE_WORD = np.frombuffer(b'date', dtype='<u4')[0]
+_VALUE_KEY = np.frombuffer(b'","value":"', dtype=np.uint8)
+_QUOTE, _COLON, _DOT, _MINUS, _ZERO = ord('"'), ord(':'), ord('.'), ord('-'), ord('0')
+
+# Najdłuższa mantysa składana w int64 bez utraty dokładności (2^53) i najdłuższa wartość w skanie
+_MAX_DIGITS = 15
+_MAX_VALUE_LENGTH = 32
+
+# Rozdzielczość dat taka jak pd.to_datetime na tekście (zależy od wersji pandas) - ramki z
+# parsera i z innych źródeł (NY Fed, pliki) mają ten sam typ kolumny date
+_DATE_DTYPE = pd.to_datetime(pd.Series(['2000-01-01'])).dtype
+
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Dni od 1970-01-01 dla dat gregoriańskich (algorytm H. Hinnanta, wektorowo)"""
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _parse_dates(buffer: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    chars = buffer[starts[:, None] + np.arange(10)]
+    digits = chars - np.uint8(_ZERO)      # uint8: znaki spoza '0'..'9' dają > 9
+    numeric = digits[:, [0, 1, 2, 3, 5, 6, 8, 9]]
+    if not ((chars[:, 4] == _MINUS) & (chars[:, 7] == _MINUS) & (numeric <= 9).all(axis=1)).all():
+        raise ValueError("Niepoprawna data w odpowiedzi FRED")
+    digits = digits.astype(np.int64)
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    return _days_from_civil(year, month, day).astype('datetime64[D]')
+
+
+def _parse_values(buffer: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    n = len(starts)
+    last = len(buffer) - 1
+    negative = buffer[starts] == _MINUS
+    first = starts + negative
+
+    mantissa = np.zeros(n, dtype=np.int64)
+    digit_count = np.zeros(n, dtype=np.int64)
+    fraction = np.zeros(n, dtype=np.int64)
+    seen_dot = np.zeros(n, dtype=bool)
+    simple = np.ones(n, dtype=bool)
+    ends = np.full(n, -1, dtype=np.int64)
+    open_ = np.ones(n, dtype=bool)
+
+    # Kolumna po kolumnie aż do zamykającego cudzysłowu (wartości FRED mają kilkanaście znaków),
+    # każdy krok wektorowo po wszystkich obserwacjach
+    for column in range(_MAX_VALUE_LENGTH):
+        position = first + column
+        char = buffer[np.minimum(position, last)]
+        closing = open_ & (char == _QUOTE)
+        ends[closing] = position[closing]
+        open_ &= ~closing
+        if not open_.any():
+            break
+        digit = char - np.uint8(_ZERO)          # uint8: znaki spoza '0'..'9' dają > 9
+        is_digit = open_ & (digit <= 9)
+        is_dot = open_ & (char == _DOT)
+        simple &= ~open_ | is_digit | (is_dot & ~seen_dot)
+        mantissa = np.where(is_digit, mantissa * 10 + digit, mantissa)
+        digit_count += is_digit
+        fraction += is_digit & seen_dot
+        seen_dot |= is_dot
+    else:
+        raise ValueError("Zbyt dluga wartosc")
+
+    missing = (ends - starts == 1) & (buffer[starts] == _DOT)
+    simple &= ~missing & (digit_count > 0) & (digit_count <= _MAX_DIGITS)
+
+    parsed = mantissa.astype(np.float64) / np.power(10.0, fraction)
+    values = np.where(simple, np.where(negative, -parsed, parsed), np.nan)
+
+    # Pozostałe (wykładnik, inne znaki) - przez float(), tak jak pd.to_numeric(errors='coerce')
+    for i in np.flatnonzero(~simple & ~missing):
+        try:
+            values[i] = float(buffer[starts[i]:ends[i]].tobytes())
+        except ValueError:
+            values[i] = np.nan
+    return values
+
+
+def _find_date_keys(buffer: np.ndarray) -> np.ndarray:
+    """Pozycje słowa 'date' - porównanie 4-bajtowych słów w czterech przesunięciach"""
+    positions = []
+    for offset in range(4):
+        usable = (len(buffer) - offset) // 4 * 4
+        if usable <= 0:
+            continue
+        words = buffer[offset:offset + usable].view('<u4')
+        positions.append(np.flatnonzero(words == _DATE_WORD) * 4 + offset)
+    return np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64)
+
+
+def _scan(content: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Skan bajtów odpowiedzi - ValueError, gdy układ jest inny niż oczekiwany"""
+    buffer = np.frombuffer(content, dtype=np.uint8)
+    words = _find_date_keys(buffer)
+    words = words[(words >= 1) & (words + 7 < len(buffer))]
+
+    # Klucz "date" (w cudzysłowach), po nim musi być :" - inaczej układ jest inny niż oczekiwany
+    keys = words[(buffer[words - 1] == _QUOTE) & (buffer[words + 4] == _QUOTE)]
+    if not ((buffer[keys + 5] == _COLON) & (buffer[keys + 6] == _QUOTE)).all():
+        raise ValueError("Nieoczekiwany uklad pol 'date'")
+    if not len(keys):
+        return np.empty(0, dtype='datetime64[D]'), np.empty(0)
+
+    date_starts = keys + 7
+    value_keys = date_starts + 10
+    if value_keys[-1] + len(_VALUE_KEY) + 1 > len(buffer):
+        raise ValueError("Nieoczekiwany koniec odpowiedzi")
+    if not (buffer[value_keys[:, None] + np.arange(len(_VALUE_KEY))] == _VALUE_KEY).all():
+        raise ValueError("Pole 'value' nie nastepuje po 'date'")
+
+    return _parse_dates(buffer, date_starts), _parse_values(buffer, value_keys + len(_VALUE_KEY))
+
+
+def _from_observations(observations: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Ścieżka zapasowa - już zdekodowana lista obserwacji"""
+    dates = np.array([o['date'] for o in observations], dtype='datetime64[D]')
+    values = np.empty(len(observations))
+    for i, o in enumerate(observations):
+        try:
+            values[i] = float(o['value'])
+        except (TypeError, ValueError):
+            values[i] = np.nan
+    return dates, values
+
+
+def parse_observations(payload: Union[bytes, str, List[Dict]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Odpowiedź FRED series/observations -> (daty, wartości)
+
+    Args:
+        payload: Surowe bajty / tekst odpowiedzi albo zdekodowana lista obserwacji
+
+    Returns:
+        (datetime64[D] rosnąco, float64) - bez obserwacji z brakiem wartości ('.')
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    if isinstance(payload, bytes):
+        try:
+            dates, values = _scan(payload)
+        except ValueError:
+            dates, values = _from_observations(json.loads(payload).get('observations') or [])
+    else:
+        dates, values = _from_observations(payload or [])
+
+    keep = ~np.isnan(values)
+    if not keep.all():
+        dates, values = dates[keep], values[keep]
+
+    # FRED zwraca dane rosnąco - sortowanie tylko, gdy naprawdę trzeba (np. sort_order=desc)
+    if len(dates) > 1 and not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind='stable')
+        dates, values = dates[order], values[order]
+    return dates, values
+
+
+def observations_frame(dates: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    """DataFrame date/value (jak dotychczasowy fetch_fred_data) z tablic parse_observations"""
+    return pd.DataFrame({'date': dates.astype(_DATE_DTYPE), 'value': np.array(values, dtype=float)})
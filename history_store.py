@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+History Store - historia wszystkich analiz (tylko dopisywanie) w SQLite
+
+Każde uruchomienie analizy (aplikacja, CLI, API) zapisuje wiersz w `runs`,
+wartości wskaźników w `run_values` i alerty w `alerts`. Indeksy po czasie,
+wskaźniku i ważności sprawiają, że zapytania typu "ocena z ostatnich 90 dni"
+albo "wszystkie krytyczne alerty SOFR-IORB" oraz stronicowanie historii
+trwają milisekundy niezależnie od długości logu.
+
+Użycie:
+    store = HistoryStore('history.db')
+    store.record(indicators, analysis, source='cli')
+    store.scores(days=90)
+    store.alerts(severity='critical', indicator='SOFR-IORB')
+"""
+
+import calendar
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+# Górna granica dla zapytań prefiksowych po indeksie (indicator >= p AND indicator < p + MAX)
+_PREFIX_END = '\U0010ffff'
+
+
+def _to_epoch(timestamp: Optional[str] = None) -> int:
+    """
+    'YYYY-MM-DD HH:MM:SS' (format LiquidityMonitor) albo ISO -> sekundy
+
+    Czas lokalny liczony "jak UTC" - dzięki temu pd.to_datetime(ts, unit='s')
+    oddaje dokładnie ten czas, który widać w analysis['timestamp'].
+    """
+    dt = datetime.fromisoformat(timestamp.replace('Z', '')) if timestamp else datetime.now()
+    return calendar.timegm(dt.timetuple())
+
+
+class HistoryStore:
+    """Indeksowany magazyn historii analiz oparty o SQLite (WAL - czytelnicy nie blokują zapisu)"""
+
+    def __init__(self, path: str = 'history.db'):
+        """
+        Args:
+            path: Plik bazy SQLite (':memory:' dla testów)
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()  # Jedno połączenie współdzielone przez sesje Streamlit
+
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id             INTEGER PRIMARY KEY,
+                ts             INTEGER NOT NULL,
+                source         TEXT    NOT NULL,
+                score          REAL,
+                raw_score      REAL,
+                regime         TEXT,
+                interpretation TEXT,
+                payload        TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_runs_ts ON runs (ts, source);
+
+            CREATE TABLE IF NOT EXISTS run_values (
+                indicator TEXT    NOT NULL,
+                run_id    INTEGER NOT NULL,
+                ts        INTEGER NOT NULL,
+                obs_date  TEXT,
+                value     REAL,
+                change_1d REAL,
+                change_7d REAL,
+                PRIMARY KEY (indicator, ts, run_id)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS alerts (
+                id        INTEGER PRIMARY KEY,
+                run_id    INTEGER,
+                ts        INTEGER NOT NULL,
+                severity  TEXT    NOT NULL,
+                indicator TEXT    NOT NULL,
+                message   TEXT    NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+            CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts (severity, ts);
+            CREATE INDEX IF NOT EXISTS idx_alerts_indicator ON alerts (indicator, ts);
+            CREATE INDEX IF NOT EXISTS idx_alerts_indicator_severity ON alerts (indicator, severity, ts);
+
+            -- Słownik nazw wskaźników z alertami (filtr prefiksowy bez skanu alertów)
+            CREATE TABLE IF NOT EXISTS alert_names (
+                indicator TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.conn.commit()
+
+    # === ZAPIS ===
+
+    def record(self, indicators: Dict, analysis: Dict, source: str = 'app') -> Optional[int]:
+        """
+        Dopisuje uruchomienie analizy (ocena, wartości wskaźników, alerty)
+
+        Ta sama analiza (ten sam timestamp i źródło) zapisywana jest tylko raz -
+        aplikacja może wołać record() przy każdym przeładowaniu strony.
+
+        Returns:
+            id uruchomienia albo None, jeśli było już zapisane
+        """
+        ts = _to_epoch(analysis['timestamp'])
+        regime = analysis.get('market_regime', {})
+        values = {
+            name: (data['date'], float(data['current']), float(data['change_1d']), float(data['change_7d']))
+            for name, data in indicators.items()
+        }
+        payload = json.dumps({
+            'signals': analysis['signals'],
+            'percentiles': {name: p['percentile'] for name, p in analysis.get('percentiles', {}).items()},
+        }, default=str)
+
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO runs (ts, source, score, raw_score, regime, interpretation, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ts, source, analysis['overall_score'], analysis.get('raw_score'),
+                 regime.get('regime'), analysis['interpretation'], payload),
+            )
+            if cursor.rowcount == 0:
+                return None
+            run_id = cursor.lastrowid
+
+            self.conn.executemany(
+                "INSERT INTO run_values (indicator, run_id, ts, obs_date, value, change_1d, change_7d) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(name, run_id, ts) + row for name, row in values.items()],
+            )
+            self.conn.executemany(
+                "INSERT INTO alerts (run_id, ts, severity, indicator, message) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, ts, a['severity'], a['indicator'], a['message']) for a in analysis['alerts']],
+            )
+            self._add_names(a['indicator'] for a in analysis['alerts'])
+        return run_id
+
+    def _add_names(self, names):
+        self.conn.executemany("INSERT OR IGNORE INTO alert_names (indicator) VALUES (?)",
+                              [(name,) for name in set(names)])
+
+    def add_alert(self, severity: str, indicator: str, message: str,
+                  timestamp: Optional[str] = None, run_id: Optional[int] = None) -> int:
+        """Dopisuje pojedynczy alert spoza analizy (np. przekroczony próg oceny)"""
+        ts = _to_epoch(timestamp)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO alerts (run_id, ts, severity, indicator, message) VALUES (?, ?, ?, ?, ?)",
+                (run_id, ts, severity, indicator, message),
+            )
+            self._add_names([indicator])
+        return cursor.lastrowid
+
+    def import_alert_log(self, path: str = 'alert_log.json') -> int:
+        """
+        Jednorazowo przenosi stary alert_log.json (JSON na linię) do magazynu
+
+        Returns:
+            Liczba zaimportowanych alertów (0 jeśli plik już był zaimportowany)
+        """
+        if not os.path.exists(path) or self._meta('alert_log_imported') == path:
+            return 0
+
+        rows = []
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                ts = _to_epoch(entry['timestamp'])
+                rows.append((ts, 'critical', 'Ocena ogolna',
+                             f"Score {entry['score']}: {entry.get('interpretation', '')}"))
+                rows.extend((ts, a['severity'], a['indicator'], a['message']) for a in entry.get('alerts', []))
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO alerts (ts, severity, indicator, message) VALUES (?, ?, ?, ?)", rows)
+            self._add_names(row[2] for row in rows)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('alert_log_imported', ?)", (path,))
+        return len(rows)
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # === ZAPYTANIA ===
+
+    def _query(self, sql: str, params: List) -> pd.DataFrame:
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            rows = cursor.fetchall()
+        return self._frame(rows, columns)
+
+    @staticmethod
+    def _frame(rows: List, columns: List[str]) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=columns)
+        if 'ts' in df:
+            df.insert(0, 'timestamp', pd.to_datetime(df.pop('ts'), unit='s'))
+        return df
+
+    @staticmethod
+    def _since(days: Optional[float]) -> Optional[int]:
+        return int(_to_epoch() - days * 86400) if days is not None else None
+
+    def scores(self, days: Optional[float] = 90, source: Optional[str] = None) -> pd.DataFrame:
+        """Ocena i reżim w czasie (kolumny timestamp, source, score, raw_score, regime)"""
+        sql = "SELECT ts, source, score, raw_score, regime FROM runs WHERE ts >= ?"
+        params = [self._since(days) or 0]
+        if source:
+            sql += " AND source = ?"
+            params.append(source)
+        return self._query(sql + " ORDER BY ts", params)
+
+    def indicator_history(self, indicator: str, days: Optional[float] = 90) -> pd.DataFrame:
+        """Wartości wskaźnika zapisane przy kolejnych analizach (timestamp, obs_date, value, zmiany)"""
+        return self._query(
+            "SELECT ts, obs_date, value, change_1d, change_7d FROM run_values "
+            "WHERE indicator = ? AND ts >= ? ORDER BY ts",
+            [indicator, self._since(days) or 0],
+        )
+
+    def _alert_filter(self, severity: Optional[str], days: Optional[float],
+                      before: Optional[Tuple[int, int]]):
+        where, params = [], []
+        if severity:
+            where.append("severity = ?")
+            params.append(severity)
+        if days is not None:
+            where.append("ts >= ?")
+            params.append(self._since(days))
+        if before is not None:
+            where.append("(ts, id) < (?, ?)")
+            params += list(before)
+        return where, params
+
+    def _alert_selects(self, select: str, severity: Optional[str], indicator: Optional[str],
+                       days: Optional[float], before: Optional[Tuple[int, int]] = None):
+        """
+        Zapytania po alertach - jedno, albo po jednym na każdy wskaźnik pasujący do prefiksu
+
+        Z równością na wskaźniku (i ważności) indeks oddaje wiersze już posortowane
+        po czasie, więc LIMIT kończy odczyt po jednej stronie - zakres prefiksowy
+        w jednym zapytaniu wymagałby sortowania wszystkich pasujących alertów.
+        """
+        where, params = self._alert_filter(severity, days, before)
+        if indicator is None:
+            clause = f" WHERE {' AND '.join(where)}" if where else ""
+            return [(f"SELECT {select} FROM alerts{clause}", params)]
+
+        index = 'idx_alerts_indicator_severity' if severity else 'idx_alerts_indicator'
+        clause = " AND ".join(["indicator = ?"] + where)
+        return [
+            (f"SELECT {select} FROM alerts INDEXED BY {index} WHERE {clause}", [name] + params)
+            for name in self.alert_indicators(prefix=indicator)
+        ]
+
+    def alerts(self, severity: Optional[str] = None, indicator: Optional[str] = None,
+               days: Optional[float] = None, limit: int = 50,
+               before: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+        """
+        Strona alertów od najnowszych
+
+        Stronicowanie kursorem (ts, id) zamiast OFFSET - kolejne strony kosztują
+        tyle samo co pierwsza. Kursor do następnej strony: page.attrs['cursor'].
+
+        Args:
+            severity: 'critical' / 'warning' / ...
+            indicator: Nazwa wskaźnika albo jej początek (np. 'SOFR-IORB')
+            days: Tylko alerty z ostatnich N dni
+            limit: Rozmiar strony
+            before: Kursor z poprzedniej strony - zwróć alerty starsze
+        """
+        columns = ['id', 'ts', 'severity', 'indicator', 'message', 'run_id']
+        order = " ORDER BY ts DESC, id DESC LIMIT ?"
+        selects = self._alert_selects(', '.join(columns), severity, indicator, days, before)
+
+        # Każdy wskaźnik daje max jedną stronę, potem scalamy i przycinamy
+        sql = " UNION ALL ".join(f"SELECT * FROM ({q}{order})" for q, _ in selects)
+        params = [p for _, qp in selects for p in qp + [limit]]
+
+        rows = []
+        if selects:
+            with self._lock:
+                rows = self.conn.execute(sql + order, params + [limit]).fetchall()
+        page = self._frame(rows, columns)
+        page.attrs['cursor'] = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+        return page
+
+    def count_alerts(self, severity: Optional[str] = None, indicator: Optional[str] = None,
+                     days: Optional[float] = None) -> int:
+        """Liczba alertów spełniających filtr (do "strona X z Y")"""
+        selects = self._alert_selects("COUNT(*)", severity, indicator, days)
+        with self._lock:
+            return sum(self.conn.execute(q, p).fetchone()[0] for q, p in selects)
+
+    def alert_indicators(self, prefix: Optional[str] = None) -> List[str]:
+        """Nazwy wskaźników, które kiedykolwiek miały alert (opcjonalnie zaczynające się od prefix)"""
+        sql, params = "SELECT indicator FROM alert_names", []
+        if prefix:
+            sql += " WHERE indicator >= ? AND indicator < ?"
+            params = [prefix, prefix + _PREFIX_END]
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY indicator", params).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        """Zamyka połączenie z bazą"""
+        self.conn.close()
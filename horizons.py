@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Horizons - zmiany serii w dowolnych horyzontach przez wyszukiwanie binarne
+
+Zamiast filtrować całą ramkę (`data[data['date'] <= latest - 7 dni]`) dla
+każdego horyzontu, daty serii (posortowane rosnąco) przeszukiwane są
+binarnie - jedno np.searchsorted dla wszystkich horyzontów naraz. Koszt to
+O(log n) na horyzont, więc tabela zmian 1d / 7d / 30d / 90d / YTD / 1y dla
+wszystkich serii zajmuje mikrosekundy na serię nawet przy 50 latach danych.
+
+Semantyka "as-of": bazą horyzontu jest ostatni odczyt z datą <= (data
+ostatniego odczytu - horyzont). Wyjątki:
+    '1d'  - poprzedni odczyt (jak change_1d - dla serii tygodniowych to tydzień)
+    'ytd' - ostatni odczyt z poprzedniego roku kalendarzowego
+
+Użycie:
+    changes(dates, values, ('1d', '7d'))          # {'1d': ..., '7d': ...}
+    change_table(indicators)                       # DataFrame: serie x horyzonty
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+HORIZONS = ('1d', '7d', '30d', '90d', 'ytd', '1y')
+
+# Horyzonty kalendarzowe w dniach
+HORIZON_DAYS = {'7d': 7, '30d': 30, '90d': 90, '1y': 365}
+
+
+def base_indices(dates: np.ndarray, horizons: Sequence[str] = HORIZONS) -> np.ndarray:
+    """
+    Indeks odczytu bazowego dla każdego horyzontu (-1 = brak tak starego odczytu)
+
+    Args:
+        dates: Daty odczytów (datetime64 w dowolnej jednostce - bez konwersji, rosnąco)
+        horizons: Nazwy horyzontów ('1d', 'ytd' albo '<n>d' / '<n>y')
+    """
+    n = len(dates)
+    latest = dates[-1]
+    day = np.timedelta64(1, 'D')
+    tick = np.timedelta64(1, np.datetime_data(dates.dtype)[0])
+    targets = np.empty(len(horizons), dtype=dates.dtype)
+    previous = np.zeros(len(horizons), dtype=bool)
+
+    for k, horizon in enumerate(horizons):
+        if horizon == '1d':
+            previous[k] = True
+            targets[k] = latest
+        elif horizon == 'ytd':
+            # Ostatnia chwila poprzedniego roku
+            targets[k] = latest.astype('datetime64[Y]').astype(dates.dtype) - tick
+        elif horizon in HORIZON_DAYS:
+            targets[k] = latest - HORIZON_DAYS[horizon] * day
+        elif horizon[:-1].isdigit() and horizon[-1] in 'dy':
+            targets[k] = latest - int(horizon[:-1]) * (365 if horizon[-1] == 'y' else 1) * day
+        else:
+            raise ValueError(f"Nieznany horyzont: {horizon}")
+
+    indices = np.searchsorted(dates, targets, side='right') - 1
+    indices[previous] = n - 2
+    return indices
+
+
+def changes(dates: np.ndarray, values: np.ndarray, horizons: Sequence[str] = HORIZONS,
+            pct: bool = False, missing: str = 'nan') -> Dict[str, float]:
+    """
+    Zmiany ostatniego odczytu względem bazy każdego horyzontu
+
+    Args:
+        dates: Daty (datetime64, rosnąco)
+        values: Wartości
+        pct: Zmiana procentowa zamiast różnicy
+        missing: 'nan' - brak odczytu bazowego daje NaN,
+                 'latest' - bazą jest ostatni odczyt, czyli zmiana 0 (jak change_7d w monitorze)
+    """
+    if len(dates) == 0:
+        return {horizon: np.nan for horizon in horizons}
+
+    indices = base_indices(dates, horizons)
+    latest = float(values[-1])
+    found = indices >= 0
+    if missing == 'latest':
+        indices = np.where(found, indices, len(values) - 1)
+        found[:] = True
+    base = np.where(found, values[np.maximum(indices, 0)], np.nan).astype(float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = (latest / base - 1) * 100 if pct else latest - base
+    return {horizon: float(value) for horizon, value in zip(horizons, result)}
+
+
+def change_table(indicators: Dict, horizons: Sequence[str] = HORIZONS, pct: bool = False) -> pd.DataFrame:
+    """
+    Tabela zmian: wiersz = wskaźnik, kolumny = current + horyzonty
+
+    Args:
+        indicators: Wynik get_all_indicators()
+        pct: Zmiany procentowe zamiast różnic
+    """
+    rows = {}
+    for name, data in indicators.items():
+        df = data.get('data')
+        if df is None or df.empty:
+            continue
+        values = df['value'].to_numpy(dtype=float)
+        row = changes(df['date'].to_numpy(), values, horizons, pct=pct)
+        rows[name] = dict(current=values[-1], date=data.get('date'), **row)
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['current', 'date', *horizons])
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Liquidity CLI - tryb wsadowy (cron, potoki, harmonogram) bez pytań i bez UI
+
+Podkomendy:
+    fetch     - pobiera wskaźniki i dopisuje migawkę wartości
+    analyze   - pobiera + analizuje, dopisuje migawkę z oceną i alertami
+    backtest  - ocena dzień po dniu na danych point-in-time (VintageStore)
+    export    - eksport pełnych historii serii (CSV / JSON / Parquet)
+    backfill  - pełna historia wszystkich serii kawałkami, z punktami kontrolnymi
+
+Przykłady:
+    python liquidity_cli.py analyze --output history.jsonl
+    python liquidity_cli.py fetch --series vix,sofr,iorb --days-back 30 --output -
+    python liquidity_cli.py analyze --interval 3600 --output history.jsonl   # co godzinę
+    python liquidity_cli.py analyze --history history.db --output -
+    python liquidity_cli.py backtest --start 2023-01-01 --end 2024-01-01 --step 7 --sync
+    python liquidity_cli.py backtest --start 2005-01-01 --workers 4          # paczki dni w procesach
+    python liquidity_cli.py export --format parquet --output exports/
+    python liquidity_cli.py backfill --days-back 18250 --checkpoint-dir chunks   # wznawialny
+
+Migawki są DOPISYWANE (JSON Lines: jedna linia na uruchomienie, Parquet:
+nowy plik part-*.parquet w katalogu). Komunikaty diagnostyczne idą na
+stderr, więc stdout nadaje się do potoków.
+
+Kody wyjścia: 0 = OK, 1 = brak danych, 2 = błąd konfiguracji.
+"""
+
+# Tylko lekkie moduły na starcie - pandas/numpy/requests ładowane dopiero w podkomendach
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def _log(message: str):
+    print(message, file=sys.stderr)
+
+
+@contextlib.contextmanager
+def _diagnostics(quiet: bool):
+    """Przekierowuje printy monitora ze stdout (zarezerwowanego na dane) na stderr"""
+    target = open(os.devnull, 'w') if quiet else sys.stderr
+    try:
+        with contextlib.redirect_stdout(target):
+            yield
+    finally:
+        if quiet:
+            target.close()
+
+
+def _make_monitor(args):
+    from liquidity_monitor import LiquidityMonitor
+
+    api_key = args.api_key or os.environ.get('FRED_API_KEY')
+    if not api_key:
+        _log("[ERROR] Brak klucza: ustaw FRED_API_KEY albo podaj --api-key")
+        sys.exit(2)
+
+    monitor = LiquidityMonitor(fred_api_key=api_key)
+
+    if args.series:
+        wanted = [name.strip() for name in args.series.split(',') if name.strip()]
+        unknown = [name for name in wanted if name not in monitor.series]
+        if unknown:
+            _log(f"[ERROR] Nieznane serie: {', '.join(unknown)}")
+            _log(f"   Dostepne: {', '.join(monitor.series)}")
+            sys.exit(2)
+        monitor.series = {name: monitor.series[name] for name in wanted}
+
+    return monitor
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _append(records, args, flat_rows=None):
+    """Dopisuje rekordy w wybranym formacie (jsonl / json / parquet)"""
+    if args.format == 'parquet':
+        import pandas as pd
+
+        rows = flat_rows if flat_rows is not None else records
+        os.makedirs(args.output, exist_ok=True)
+        path = os.path.join(args.output, f"part-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}.parquet")
+        pd.DataFrame(rows).to_parquet(path, index=False)
+        _log(f"[SAVED] {len(rows)} wierszy -> {path}")
+        return
+
+    if args.format == 'json':
+        text = json.dumps(records if len(records) != 1 else records[0], indent=2, default=str) + '\n'
+    else:
+        text = ''.join(json.dumps(record, default=str) + '\n' for record in records)
+
+    if args.output in (None, '-'):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    else:
+        mode = 'w' if args.format == 'json' else 'a'
+        with open(args.output, mode) as f:
+            f.write(text)
+        _log(f"[SAVED] {len(records)} rekordow -> {args.output}")
+
+
+def _flatten(record):
+    """Migawka -> wiersze (jeden na wskaźnik) dla formatu kolumnowego"""
+    base = {k: v for k, v in record.items() if k not in ('indicators', 'alerts', 'signals', 'anomalies')}
+    return [dict(base, indicator=name, **values) for name, values in record['indicators'].items()]
+
+
+def cmd_fetch(args) -> int:
+    with _diagnostics(args.quiet):
+        monitor = _make_monitor(args)
+        indicators = monitor.get_all_indicators(days_back=args.days_back)
+
+    if not indicators:
+        _log("[ERROR] Nie udalo sie pobrac zadnych danych")
+        return 1
+
+    record = {
+        'timestamp': _now(),
+        'kind': 'fetch',
+        'days_back': args.days_back,
+        'indicators': {
+            name: {k: data[k] for k in ('current', 'date', 'change_1d', 'change_7d')}
+            for name, data in indicators.items()
+        },
+    }
+    _append([record], args, _flatten(record))
+    return 0
+
+
+def cmd_analyze(args) -> int:
+    with _diagnostics(args.quiet):
+        monitor = _make_monitor(args)
+        indicators = monitor.get_all_indicators(days_back=args.days_back)
+        if not indicators:
+            _log("[ERROR] Nie udalo sie pobrac zadnych danych")
+            return 1
+        analysis = monitor.analyze_liquidity_conditions(indicators)
+        if args.report:
+            monitor.print_report(indicators, analysis)
+        if args.sensitivity:
+            from sensitivity import analyze_sensitivity, print_sensitivity
+
+            sensitivity = analyze_sensitivity(monitor, indicators, analysis, n=args.sensitivity)
+            print_sensitivity(sensitivity)
+
+    anomalies = []
+    if args.anomalies:
+        from anomaly import AnomalyDetector
+
+        with _diagnostics(args.quiet):
+            anomalies = AnomalyDetector(args.anomalies, threshold=args.anomaly_threshold).update_indicators(indicators)
+
+    store = None
+    if args.history:
+        from history_store import HistoryStore
+
+        store = HistoryStore(args.history)
+        store.record(indicators, analysis, source='cli')
+
+    if args.alerts:
+        from alert_engine import AlertEngine, default_rules, sinks_from_env
+
+        engine = AlertEngine(default_rules(args.alert_threshold), sinks=sinks_from_env(history=store),
+                             state_path=args.alerts)
+        for event in engine.evaluate(indicators, analysis):
+            _log(f"[ALERT] {event.kind}: {event.message}")
+        if not engine.flush(timeout=60):
+            _log("[WARNING] Nie wszystkie alerty zostaly dostarczone w 60 s")
+
+    if store is not None:
+        store.close()
+
+    snapshot = monitor.snapshot(indicators, analysis)
+    record = {
+        'timestamp': _now(),
+        'kind': 'analysis',
+        'days_back': args.days_back,
+        'score': analysis['overall_score'],
+        'raw_score': analysis.get('raw_score'),
+        'weighted_score': analysis.get('weighted_score'),
+        'regime': analysis.get('market_regime', {}).get('regime'),
+        'interpretation': analysis['interpretation'],
+        'alerts': snapshot['analysis']['alerts'],
+        'signals': snapshot['analysis']['signals'],
+        'anomalies': anomalies,
+        'indicators': snapshot['indicators'],
+    }
+    _append([record], args, _flatten(record))
+    return 0
+
+
+def cmd_backtest(args) -> int:
+    import numpy as np
+    from vintage_store import VintageStore, backtest
+
+    with _diagnostics(args.quiet):
+        monitor = _make_monitor(args)
+        store = VintageStore(args.store)
+        if args.sync:
+            store.sync(monitor, days_back=args.sync_days)
+        store.close()
+
+    start = np.datetime64(args.start, 'D')
+    end = np.datetime64(args.end or datetime.now().strftime('%Y-%m-%d'), 'D')
+    as_of_dates = np.arange(start, end + 1, args.step)
+
+    if args.workers > 1:
+        # Paczki dni w procesach - analiza to czysty CPU (pandas/NumPy), wątki dzieliłyby GIL
+        from workers import WorkerPool
+
+        pool = WorkerPool(io_workers=1, cpu_workers=args.workers)
+        chunks = [(monitor, args.store, [str(day) for day in days], args.days_back)
+                  for days in np.array_split(as_of_dates, max(1, min(len(as_of_dates), args.workers * 4))) if len(days)]
+        job = pool.submit_cpu(('backtest', args.store, args.start, str(end), args.step), backtest, chunks)
+        try:
+            while not job.done():
+                time.sleep(1)
+                if not args.quiet:
+                    _log(f"   [BACKTEST] {job.stage}")
+            records = [record for part in job.result() for record in part]
+        finally:
+            pool.shutdown()
+    else:
+        records = backtest(monitor, args.store, [str(day) for day in as_of_dates], days_back=args.days_back)
+
+    if not records:
+        _log("[ERROR] Brak danych w magazynie vintage dla zakresu (uzyj --sync)")
+        return 1
+
+    _log(f"[BACKTEST] {len(records)} dni ({args.start} .. {end})")
+    _append(records, args)
+    return 0
+
+
+def cmd_export(args) -> int:
+    with _diagnostics(args.quiet):
+        monitor = _make_monitor(args)
+        indicators = monitor.get_all_indicators(days_back=args.days_back)
+
+    if not indicators:
+        _log("[ERROR] Nie udalo sie pobrac zadnych danych")
+        return 1
+
+    output = args.output if args.output not in (None, '-') else 'exports'
+    os.makedirs(output, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    for name, data in indicators.items():
+        df = data['data']
+        if args.format == 'parquet':
+            path = os.path.join(output, f"{name}_{stamp}.parquet")
+            df.to_parquet(path, index=False)
+        elif args.format == 'json':
+            path = os.path.join(output, f"{name}_{stamp}.json")
+            df.assign(date=df['date'].dt.strftime('%Y-%m-%d')).to_json(path, orient='records', indent=2)
+        else:
+            path = os.path.join(output, f"{name}_{stamp}.csv")
+            df.to_csv(path, index=False, date_format='%Y-%m-%d')
+    _log(f"[SAVED] {len(indicators)} serii -> {output}/")
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    from chunked_download import ChunkedDownloader
+
+    with _diagnostics(args.quiet):
+        monitor = _make_monitor(args)
+        downloader = ChunkedDownloader(monitor, chunk_days=args.chunk_days, max_workers=args.workers,
+                                       checkpoint_dir=args.checkpoint_dir)
+        results = downloader.backfill(monitor.series.values(), days_back=args.days_back)
+
+    transfer = monitor.storage_report()
+    on_disk = downloader.checkpoint_bytes()
+    for name, series_id in monitor.series.items():
+        if series_id in results:
+            dates, _ = results[series_id]
+            span = f"{dates[0]} .. {dates[-1]}" if len(dates) else "brak danych"
+            wire = transfer['wire_bytes'].get(series_id, 0)
+            _log(f"   {name:15} {series_id:14} {len(dates):6d} obs. ({span})  "
+                 f"siec {wire / 1024:7.1f} KB, dysk {on_disk.get(series_id, 0) / 1024:6.1f} KB")
+    _log(f"[BACKFILL] Razem: siec {transfer['wire_bytes'].sum() / 1024:.0f} KB, "
+         f"dysk {sum(on_disk.values()) / 1024:.0f} KB ({args.checkpoint_dir}/)")
+
+    if len(results) < len(monitor.series):
+        _log("[ERROR] Czesc serii nie pobrana - uruchom ponownie, pobrane kawalki zostana wczytane")
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='liquidity_cli.py',
+        description='Liquidity Monitor - tryb wsadowy (bez interakcji)',
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--api-key', help='Klucz FRED (domyslnie FRED_API_KEY)')
+    common.add_argument('--series', help='Podzbior wskaznikow, np. vix,sofr,iorb (nazwy z LiquidityMonitor.series)')
+    common.add_argument('--days-back', type=int, default=90, help='Okno historii w dniach (domyslnie 90)')
+    common.add_argument('--output', '-o', help="Plik / katalog wyjsciowy ('-' = stdout)")
+    common.add_argument('--quiet', '-q', action='store_true', help='Bez komunikatow diagnostycznych')
+    common.add_argument('--interval', type=float, help='Powtarzaj co N sekund (harmonogram bez crona)')
+
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('fetch', parents=[common], help='Pobierz wskazniki i dopisz migawke')
+    p.add_argument('--format', choices=['jsonl', 'json', 'parquet'], default='jsonl')
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser('analyze', parents=[common], help='Pobierz, przeanalizuj i dopisz migawke')
+    p.add_argument('--format', choices=['jsonl', 'json', 'parquet'], default='jsonl')
+    p.add_argument('--report', action='store_true', help='Wyswietl tez raport tekstowy (na stderr)')
+    p.add_argument('--history', metavar='DB', help='Zapisz analize w historii (np. history.db - ta sama co w aplikacji)')
+    p.add_argument('--alerts', metavar='STATE', nargs='?', const='alert_state.json',
+                   help='Ocen reguly alertow (stan w pliku, domyslnie alert_state.json; odbiorcy z LIQUIDITY_*)')
+    p.add_argument('--alert-threshold', type=float, default=-30, help='Prog oceny dla alertu (domyslnie -30)')
+    p.add_argument('--anomalies', metavar='STATE', nargs='?', const='anomaly_state.json',
+                   help='Wykryj nietypowe ruchy nowych odczytow (stan w pliku, domyslnie anomaly_state.json)')
+    p.add_argument('--anomaly-threshold', type=float, default=4.0, help='Prog |z| anomalii (domyslnie 4)')
+    p.add_argument('--sensitivity', type=int, metavar='N', nargs='?', const=10000, default=0,
+                   help='Monte Carlo stabilnosci oceny (N scenariuszy, domyslnie 10000; raport na stderr)')
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser('backtest', parents=[common], help='Ocena point-in-time dzien po dniu')
+    p.add_argument('--start', required=True, help='Pierwszy dzien (YYYY-MM-DD)')
+    p.add_argument('--end', help='Ostatni dzien (domyslnie dzis)')
+    p.add_argument('--step', type=int, default=1, help='Krok w dniach')
+    p.add_argument('--store', default='vintages.db', help='Plik magazynu vintage')
+    p.add_argument('--sync', action='store_true', help='Najpierw pobierz vintage z ALFRED')
+    p.add_argument('--sync-days', type=int, default=3650, help='Zakres obserwacji dla --sync')
+    p.add_argument('--workers', type=int, default=1, help='Procesy liczace paczki dni (domyslnie 1 = bez procesow)')
+    p.add_argument('--format', choices=['jsonl', 'json', 'parquet'], default='jsonl')
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser('export', parents=[common], help='Eksport pelnych historii serii')
+    p.add_argument('--format', choices=['csv', 'json', 'parquet'], default='csv')
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('backfill', parents=[common], help='Pelna historia kawalkami (wznawialna)')
+    p.add_argument('--checkpoint-dir', default='chunks', help='Katalog punktow kontrolnych (domyslnie chunks)')
+    p.add_argument('--chunk-days', type=int, default=3652, help='Dlugosc kawalka w dniach (domyslnie ~10 lat)')
+    p.add_argument('--workers', type=int, default=4, help='Rownolegle zapytania (limit FRED i tak pilnuje limiter)')
+    p.set_defaults(func=cmd_backfill)
+
+    return parser
+
+
+def _check_format(args):
+    """Błędy konfiguracji formatu przed pobieraniem (kod 2) - nie po całej pracy ani w pętli --interval"""
+    if getattr(args, 'format', None) != 'parquet':
+        return
+    if args.func is not cmd_export and args.output in (None, '-'):
+        _log("[ERROR] Parquet wymaga --output (katalog)")
+        sys.exit(2)
+    if not (importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet')):
+        _log("[ERROR] Parquet wymaga pyarrow (pip install pyarrow) albo fastparquet")
+        sys.exit(2)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    _check_format(args)
+
+    if not args.interval:
+        return args.func(args)
+
+    # Prosty harmonogram: kolejne uruchomienia co `interval` sekund (Ctrl+C kończy)
+    status = 0
+    try:
+        while True:
+            started = time.monotonic()
+            status = args.func(args)
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
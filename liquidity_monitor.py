@@ -4,14 +4,77 @@ Liquidity Monitor - System monitorowania wskaźników płynności rynkowej
 Śledzi: TGA, rezerwy banków, SOFR, reverse repo, bilans Fed
 """
 
+import copy
 import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
+import os
+import sys
 from typing import Dict, List, Optional
+import threading
 import time
 
+from chunked_download import ChunkedDownloader
+from data_sources import default_registry
+from data_version import ArtifactCache, combine, config_version, frame_version, indicators_version
+from derived import DerivedRegistry
+from fred_parser import observations_frame, parse_observations
+from horizons import changes
+from obs_cache import ObservationCache, TransferLog
+from percentile_windows import MIN_OBSERVATIONS, PERCENTILE_WINDOWS, WindowedHistory
+from quantile_sketch import SketchStore
+from scoring import ALERT_SEVERITIES, RULE_MESSAGES, ScoringModel, weighted_breakdown
+from singleflight import SingleFlight
+
+# Wspólne dla wszystkich instancji monitora (np. wielu sesji Streamlit):
+# identyczne równoległe zapytania do FRED idą do sieci tylko raz.
+# LIQUIDITY_LOCK_DIR włącza koalescencję także między procesami (CLI + aplikacja).
+fred_flight = SingleFlight(lock_dir=os.environ.get('LIQUIDITY_LOCK_DIR') or None)
+
+# Wskaźniki czytane przez detect_correlations_and_conflicts - wersja wzorców zależy tylko od nich
+# (nowa reguła na innym wskaźniku = dopisać go tutaj)
+PATTERN_INPUTS = ('vix', 'reserves', 'nfci', 'yield_curve', 'm2', 'hy_spread', 'tga', 'reverse_repo',
+                  'fed_balance', 'sofr', 'iorb')
+
+
+class RateLimiter:
+    """
+    Prosty token bucket - pilnuje limitu zapytań do FRED (120 na minutę)
+    Bezpieczny dla wątków, więc może go współdzielić wiele równoległych pobrań.
+    """
+
+    def __init__(self, rate_per_sec: float = 2.0, burst: int = 10):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # st.cache_data pickluje monitor razem z limiterem - Lock nie jest picklowalny
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blokuje aż będzie wolny "żeton" na kolejne zapytanie"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate_per_sec)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_sec
+            time.sleep(wait)
+
 
 class LiquidityMonitor:
     """Monitoruje kluczowe wskaźniki płynności finansowej"""
@@ -23,7 +86,46 @@ class LiquidityMonitor:
                          Rejestracja: https://fred.stlouisfed.org/docs/api/api_key.html
         """
         self.fred_api_key = fred_api_key
-        self.fred_base_url = "https://api.stlouisfed.org/fred/series/observations"
+        self.fred_api_root = "https://api.stlouisfed.org/fred"
+        self.fred_base_url = f"{self.fred_api_root}/series/observations"
+        self.request_timeout = 30
+
+        # Wspólna pula połączeń HTTP i limiter (120 zapytań/min w FRED)
+        self.session = requests.Session()
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'  # JSON FRED kompresuje się ~10x
+        self.rate_limiter = RateLimiter()
+        self.transfer = TransferLog()
+
+        # Ostatnia dobra kopia każdej serii FRED na dysku (skompresowana) - LIQUIDITY_OBS_CACHE = katalog
+        obs_dir = os.environ.get('LIQUIDITY_OBS_CACHE')
+        self.obs_cache = ObservationCache(obs_dir) if obs_dir else None
+
+        # Długie zakresy (dłuższe niż kawałek, ~10 lat) kawałkami po datach - tylko z punktami
+        # kontrolnymi (LIQUIDITY_CHUNK_DIR): bez nich każde ładowanie kosztowałoby kilka zapytań
+        # na serię z limitu FRED, z nimi kolejne ładowania pobierają tylko ostatni kawałek
+        self.downloader = ChunkedDownloader(self, checkpoint_dir=os.environ.get('LIQUIDITY_CHUNK_DIR') or None)
+
+        # Rejestr źródeł danych (FRED, NY Fed, pliki lokalne) - historia z FRED, świeższy ogon z innych
+        self.sources = default_registry(self)
+
+        # Serie pochodne (spready, net liquidity) - liczone raz na odświeżenie w build_indicators
+        self.derived = DerivedRegistry()
+
+        # Artefakty (percentyle, wzorce, analiza, panel korelacji) kluczowane skrótem treści danych;
+        # LIQUIDITY_ARTIFACT_DIR = katalog wspólny dla CLI, aplikacji i API
+        self.artifacts = ArtifactCache(os.environ.get('LIQUIDITY_ARTIFACT_DIR') or None)
+
+        # Okna percentyli (percentile_windows) - wszystkie z jednego sortowania pobranej historii
+        self.percentile_windows = PERCENTILE_WINDOWS
+
+        # Szkice kwantyli (quantile_sketch) - percentyl względem wszystkich odczytów od startu monitora
+        # w stałej pamięci; opcjonalne: LIQUIDITY_SKETCH_STATE = plik stanu (przetrwa restart)
+        sketch_path = os.environ.get('LIQUIDITY_SKETCH_STATE')
+        self.sketches: Optional[SketchStore] = SketchStore(sketch_path) if sketch_path else None
+
+        # Serie bez żadnych danych w ostatnim get_all_indicators (źródła nie odpowiadają, brak kopii)
+        self.unavailable: List[str] = []
         
         # Definicje serii danych FRED
         self.series = {
@@ -54,6 +156,13 @@ class LiquidityMonitor:
             'unemployment': 'UNRATE',    # Unemployment Rate
         }
         
+        # Serie FRED w mln USD - przeliczane na mld USD w build_indicators, jak pozostałe kwoty
+        # (RRPONTSYD, TOTRESNS, M2SL są w mld); progi, punkty, net liquidity i raporty liczą w mld USD
+        self.series_scale = {
+            'WALCL': 1e-3,
+            'WTREGEN': 1e-3,
+        }
+
         # Progi dla alertów
         self.thresholds = {
             # Rezerwy
@@ -64,6 +173,10 @@ class LiquidityMonitor:
             'sofr_iorb_spread_warning': 0.15,  # 15 bps - ostrzeżenie (napięcia)
             'sofr_iorb_spread_critical': 0.20,  # 20 bps - krytyczne (REPO STRESS!)
 
+            # Net liquidity (bilans Fed - TGA - RRP) - zmiana tygodniowa
+            'net_liquidity_drain': -100,      # mld USD/tydzień - odpływ płynności
+            'net_liquidity_injection': 100,   # mld USD/tydzień - dopływ płynności
+
             # TIER 1 - Nowe progi
             'yield_curve_inverted': 0.0,  # Ujemna krzywa = recesja blisko!
             'yield_curve_steep': 1.0,  # Bardzo stroma = ekspansja
@@ -85,7 +198,9 @@ class LiquidityMonitor:
         }
 
         # === SYSTEM WAG ===
-        # Wagi określają jak ważny jest dany wskaźnik (suma = 100%)
+        # Wagi określają jak ważny jest dany wskaźnik - względnie: suma to 1.20, a ocena ważona
+        # (weighted_score) dzieli przez sumę wag dostępnych wskaźników, więc udział wskaźnika to
+        # waga / suma (np. SOFR-IORB 0.20 / 1.20 = 17%)
         # Zaktualizowane według analiz Dan Kostecki (2024-2025)
         self.indicator_weights = {
             # KRYTYCZNE (łącznie 50%) - bezpośredni wpływ na płynność
@@ -98,10 +213,13 @@ class LiquidityMonitor:
             'nfci': 0.10,               # 10% - warunki finansowe
             'hy_spread': 0.10,          # 10% - ryzyko kredytowe
 
-            # POMOCNICZE (łącznie 20%) - kontekst makro
+            # POMOCNICZE (łącznie 0.40) - kontekst makro
             'tga': 0.08,                # 8% - ruch płynności
             'reverse_repo': 0.07,       # 7% - bufor płynności
             'fed_balance': 0.05,        # 5% - polityka Fed (QE/QT)
+            # Net liquidity = bilans Fed - TGA - RRP, więc jej waga liczy te same składniki drugi raz:
+            # blok bilansu Fed (fed_balance + tga + reverse_repo + net_liquidity) ma razem 0.25 / 1.20
+            'net_liquidity': 0.05,      # 5% - bilans Fed netto (po TGA i RRP)
             'm2': 0.04,                 # 4% - podaż pieniądza
             'dollar_index': 0.03,       # 3% - globalny wpływ
             'treasury_10y': 0.03,       # 3% - koszt kapitału
@@ -251,41 +369,71 @@ class LiquidityMonitor:
         - 5-25 = niski
         - <5 = ekstremalnie niski
 
+        Poza percentylem względem całej pobranej historii każdy wpis ma 'windows' - percentyl
+        w oknach self.percentile_windows (np. 1y / 5y / 20y / all) z jednego sortowania serii,
+        a przy włączonych szkicach (self.sketches) 'sketch' - percentyl względem wszystkich
+        odczytów od startu monitora z dokładnością 'error' punktów procentowych.
+
         Returns:
             Dict z percentylami dla każdego wskaźnika
         """
         percentiles = {}
+        if self.sketches is not None:
+            self.sketches.update_indicators(indicators)  # Tylko odczyty nowsze niż w szkicach
 
         for indicator_name, data in indicators.items():
-            if 'history' not in data or len(data['history']) < 10:
+            frame = data.get('data')
+            if frame is None or len(frame) < MIN_OBSERVATIONS:
                 continue  # Nie ma wystarczającej historii
 
-            # Pobierz wartości historyczne (ostatnie N dni)
-            history_values = [float(val) for val in data['history'].values if val != '.']
-
-            if len(history_values) < 10:
+            # Percentyl zależy tylko od historii, bieżącej wartości i okien - niezmieniony wskaźnik z pamięci
+            version = combine(indicator_name, frame_version(frame), float(data['current']),
+                              tuple(self.percentile_windows))
+            entry = self.artifacts.get_or_compute(
+                'percentile', version, lambda: self._percentile_entry(indicator_name, frame, data['current'])
+            )
+            if entry is None:
                 continue
-
-            current = data['current']
-
-            # Prostszy sposób - ile % wartości jest mniejszych od obecnej
-            below = sum(1 for v in history_values if v < current)
-            percentile_rank = (below / len(history_values)) * 100
-
-            percentiles[indicator_name] = {
-                'current': current,
-                'percentile': percentile_rank,
-                'historical_min': min(history_values),
-                'historical_max': max(history_values),
-                'historical_mean': np.mean(history_values),
-                'historical_std': np.std(history_values),
-                'interpretation': self._interpret_percentile(percentile_rank, indicator_name)
-            }
+            # Szkic zmienia się z każdym odczytem - poza wpisem z pamięci artefaktów
+            sketch = self.sketches.summary(indicator_name, data['current']) if self.sketches is not None else None
+            percentiles[indicator_name] = dict(entry, sketch=sketch) if sketch else entry
 
         print(f"\n[PERCENTILES] Obliczono percentyle dla {len(percentiles)} wskaźników")
 
         return percentiles
 
+    def _percentile_entry(self, indicator_name: str, frame: pd.DataFrame, current) -> Optional[Dict]:
+        """
+        Percentyl jednego wskaźnika względem całej pobranej historii oraz w oknach
+        self.percentile_windows ('windows') - jedno sortowanie, okna przez wyszukiwanie binarne
+
+        Returns:
+            None, gdy za mało historii
+        """
+        history = WindowedHistory(frame['date'].to_numpy(), frame['value'].to_numpy(dtype=float))
+        overall = history.summary(float(current), 'all')
+        if overall is None:
+            return None
+
+        windows = {}
+        for window in self.percentile_windows:
+            summary = overall if window == 'all' else history.summary(float(current), window)
+            if summary is not None:
+                windows[window] = dict(summary, interpretation=self._interpret_percentile(summary['percentile'],
+                                                                                         indicator_name))
+
+        # Pola główne - ile % całej pobranej historii jest poniżej obecnej wartości
+        return {
+            'current': current,
+            'percentile': overall['percentile'],
+            'historical_min': overall['min'],
+            'historical_max': overall['max'],
+            'historical_mean': overall['mean'],
+            'historical_std': overall['std'],
+            'interpretation': self._interpret_percentile(overall['percentile'], indicator_name),
+            'windows': windows,
+        }
+
     def _interpret_percentile(self, percentile: float, indicator: str) -> str:
         """Interpretuje percentyl wskaźnika"""
 
@@ -293,7 +441,7 @@ class LiquidityMonitor:
         bad_high = ['vix', 'hy_spread', 'nfci', 'sofr', 'treasury_10y', 'unemployment']
 
         # Dla wskaźników gdzie NISKI = ZŁY (rezerwy, M2, krzywa)
-        bad_low = ['reserves', 'm2', 'yield_curve', 'reverse_repo', 'fed_balance']
+        bad_low = ['reserves', 'm2', 'yield_curve', 'reverse_repo', 'fed_balance', 'net_liquidity']
 
         if percentile >= 95:
             if any(ind in indicator for ind in bad_high):
@@ -502,58 +650,160 @@ class LiquidityMonitor:
 
         return patterns
 
-    def fetch_fred_data(self, series_id: str, days_back: int = 90) -> pd.DataFrame:
+    def fetch_fred_json(self, endpoint: str, **params) -> Dict:
         """
-        Pobiera dane z FRED API
-        
+        Wysyła zapytanie do dowolnego endpointu FRED API (series, category/series, ...)
+
+        Wspólna warstwa pobierania: pula połączeń, limiter i timeout.
+        Rzuca wyjątek przy błędzie HTTP - obsługa błędów po stronie wywołującego.
+
         Args:
-            series_id: ID serii w FRED
-            days_back: Ile dni wstecz pobrać dane
+            endpoint: Ścieżka względna, np. 'series/observations'
+            **params: Parametry zapytania (api_key i file_type dodawane automatycznie)
+        """
+        return json.loads(self.fetch_fred_raw(endpoint, **params))
+
+    def fetch_fred_raw(self, endpoint: str, **params) -> bytes:
+        """Jak fetch_fred_json, ale zwraca surowe bajty odpowiedzi (dla fred_parser)"""
+        query = {'api_key': self.fred_api_key, 'file_type': 'json'}
+        query.update(params)
+
+        self.rate_limiter.acquire()
+        response = self.session.get(f"{self.fred_api_root}/{endpoint}", params=query, timeout=self.request_timeout)
+        response.raise_for_status()
+        content = response.content
+        # raw.tell() - bajty odczytane z gniazda (przed dekompresją gzip/deflate)
+        wire_bytes = getattr(response.raw, 'tell', lambda: len(content))() or len(content)
+        self.transfer.record(params.get('series_id', endpoint), wire_bytes, len(content))
+        return content
+
+    def _request_observations(self, series_id: str, days_back: int, arrays: bool = False, **extra_params):
+        """
+        Wysyła zapytanie series/observations do FRED
+
+        Args:
+            arrays: Zwróć (daty, wartości) z fred_parser zamiast listy słowników
+
+        Returns:
+            Lista słowników z FRED (albo krotka tablic) albo None przy błędzie / braku klucza
         """
         if not self.fred_api_key:
             print(f"[WARN] Brak klucza API FRED - nie moge pobrac danych dla {series_id}")
             print("   Zarejestruj sie na: https://fred.stlouisfed.org/docs/api/api_key.html")
-            return pd.DataFrame()
-        
+            return None
+
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
-        
+
         params = {
             'series_id': series_id,
-            'api_key': self.fred_api_key,
-            'file_type': 'json',
             'observation_start': start_date.strftime('%Y-%m-%d'),
             'observation_end': end_date.strftime('%Y-%m-%d'),
         }
-        
+        params.update(extra_params)
+
+        # Klucz z api_key - błąd nieprawidłowego klucza nie może trafić do sesji z innym kluczem
+        # (w nazwie pliku blokady jest tylko skrót klucza)
+        flight_key = (self.fred_api_root, self.fred_api_key, series_id, arrays) + tuple(sorted(params.items()))
+        if arrays and not extra_params and self.downloader.checkpoint_dir and days_back > self.downloader.chunk_days:
+            load = lambda: self.downloader.download(series_id, params['observation_start'], params['observation_end'])
+        elif arrays:
+            load = lambda: parse_observations(self.fetch_fred_raw('series/observations', **params))
+        else:
+            load = lambda: self.fetch_fred_json('series/observations', **params).get('observations')
+
         try:
-            response = requests.get(self.fred_base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'observations' not in data:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(data['observations'])
-            df['date'] = pd.to_datetime(df['date'])
-            df['value'] = pd.to_numeric(df['value'], errors='coerce')
-            df = df[['date', 'value']].dropna()
-            df = df.sort_values('date')
-            
-            return df
-            
+            return fred_flight.do(flight_key, load)
+
         except Exception as e:
             print(f"[ERROR] Blad pobierania {series_id}: {e}")
+            return None
+
+    def fetch_fred_arrays(self, series_id: str, days_back: int = 90):
+        """
+        Pobiera dane z FRED API jako tablice (bez budowania DataFrame)
+
+        Returns:
+            (daty datetime64[D] rosnąco, wartości float64) - puste przy błędzie.
+            Tablice mogą być współdzielone z innymi wywołaniami - nie modyfikować.
+        """
+        result = self._request_observations(series_id, days_back, arrays=True)
+        if result is None:
+            return np.empty(0, dtype='datetime64[D]'), np.empty(0)
+        if self.obs_cache is not None and len(result[0]):
+            self.obs_cache.merge(series_id, *result)
+        return result
+
+    def storage_report(self) -> pd.DataFrame:
+        """
+        Bajty per seria: pobrane siecią (po kompresji), po dekompresji i na dysku (obs_cache)
+
+        Returns:
+            DataFrame indeksowany series_id: requests, wire_bytes, decoded_bytes, disk_bytes, observations
+        """
+        rows = {series_id: dict(entry) for series_id, entry in self.transfer.series.items()}
+        if self.obs_cache is not None:
+            for series_id, size in self.obs_cache.disk_bytes().items():
+                row = rows.setdefault(series_id, {})
+                row['disk_bytes'] = size
+                cached = self.obs_cache.get(series_id)
+                row['observations'] = len(cached[0]) if cached else 0
+        columns = ['requests', 'wire_bytes', 'decoded_bytes', 'disk_bytes', 'observations']
+        return pd.DataFrame.from_dict(rows, orient='index', columns=columns).fillna(0).astype(int)
+
+    def fetch_fred_data(self, series_id: str, days_back: int = 90) -> pd.DataFrame:
+        """
+        Pobiera dane z FRED API
+
+        Args:
+            series_id: ID serii w FRED
+            days_back: Ile dni wstecz pobrać dane
+        """
+        dates, values = self.fetch_fred_arrays(series_id, days_back)
+
+        if not len(dates):
             return pd.DataFrame()
+
+        return observations_frame(dates, values)
+
+    def fetch_fred_vintages(self, series_id: str, days_back: int = 90) -> pd.DataFrame:
+        """
+        Pobiera wszystkie vintage (wersje) obserwacji z ALFRED
+
+        Każdy wiersz mówi: wartość `value` dla daty `date` obowiązywała
+        w okresie [realtime_start, realtime_end]. Dzięki temu można odtworzyć
+        dane dokładnie tak, jak były znane w dowolnym dniu (bez look-ahead).
+
+        Args:
+            series_id: ID serii w FRED
+            days_back: Ile dni wstecz pobrać obserwacje
+        """
+        observations = self._request_observations(
+            series_id, days_back,
+            realtime_start='1776-07-04',
+            realtime_end='9999-12-31',
+        )
+
+        if not observations:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(observations)
+        df['date'] = pd.to_datetime(df['date'])
+        df['value'] = pd.to_numeric(df['value'], errors='coerce')
+        # '9999-12-31' nie mieści się w datetime64[ns] - zostawiamy jako tekst ISO
+        df = df[['date', 'value', 'realtime_start', 'realtime_end']].dropna()
+        df = df.sort_values(['date', 'realtime_start'])
+
+        return df
     
     def fetch_ny_fed_sofr(self) -> Dict:
         """
         Pobiera aktualne dane SOFR z NY Fed
         Strona: https://www.newyorkfed.org/markets/reference-rates/sofr
         """
-        # NY Fed ma API, ale wymaga parsowania lub web scraping
-        # Dla uproszczenia używamy FRED
-        sofr_data = self.fetch_fred_data('SOFR', days_back=30)
+        # NY Fed Markets API publikuje SOFR wcześniej niż FRED - rejestr
+        # źródeł wybiera świeższe (FRED zostaje jako zapas)
+        sofr_data = self.sources.fetch('SOFR', days_back=30)
         
         if sofr_data.empty:
             return {}
@@ -565,11 +815,13 @@ class LiquidityMonitor:
             'rate': latest['value'],
             'date': latest['date'].strftime('%Y-%m-%d'),
             'change': latest['value'] - previous['value'] if previous is not None else 0,
+            'source': self.sources.last_source.get('SOFR'),
         }
     
     def fetch_reverse_repo(self) -> Dict:
         """Pobiera dane ON RRP"""
-        rrp_data = self.fetch_fred_data('RRPONTSYD', days_back=30)
+        # W ramach sources.refresh() seria z get_all_indicators nie jest pobierana drugi raz
+        rrp_data = self.sources.fetch('RRPONTSYD', days_back=30)
         
         if rrp_data.empty:
             return {}
@@ -584,61 +836,142 @@ class LiquidityMonitor:
         }
     
     def get_all_indicators(self, days_back: int = 90) -> Dict:
-        """Pobiera wszystkie kluczowe wskaźniki"""
+        """Pobiera wszystkie kluczowe wskaźniki (w kolejności priorytetu - patrz load_tiers)"""
         print(f"[INFO] Pobieram dane wskaznikow plynnosci (ostatnie {days_back} dni)...")
 
-        indicators = {}
+        with self.sources.refresh():
+            raw_data = self.fetch_raw([name for tier in self.load_tiers() for name in tier], days_back)
 
-        for name, series_id in self.series.items():
+        return self.indicators_from_raw(raw_data)
+
+    def load_tiers(self, boundaries=(0.15, 0.05)) -> List[List[str]]:
+        """
+        Serie podzielone na grupy ładowania według wpływu na ocenę
+
+        Priorytet serii = jej waga w indicator_weights + wagi serii pochodnych, do których
+        wchodzi (SOFR i IORB dziedziczą 20% spreadu SOFR-IORB). Pierwsza grupa wystarcza do
+        wstępnej oceny i kart krytycznych, kolejne ją uzupełniają.
+
+        Args:
+            boundaries: Minimalny priorytet kolejnych grup (reszta trafia do ostatniej)
+
+        Returns:
+            Lista grup nazw serii (z self.series), każda posortowana malejąco po priorytecie
+        """
+        priority = {name: self.indicator_weights.get(name, 0.0) for name in self.series}
+        for name in self.derived.order:
+            weight = self.indicator_weights.get(name, 0.0)
+            for source in self.derived.get(name).inputs:
+                if source in priority:
+                    priority[source] += weight
+
+        ordered = sorted(priority, key=lambda name: -priority[name])  # sorted jest stabilne - remis wg self.series
+        tiers = [[] for _ in range(len(boundaries) + 1)]
+        for name in ordered:
+            level = next((k for k, bound in enumerate(boundaries) if priority[name] >= bound), len(boundaries))
+            tiers[level].append(name)
+        return [tier for tier in tiers if tier]
+
+    def fetch_raw(self, names: List[str], days_back: int = 90) -> Dict[str, pd.DataFrame]:
+        """Pobiera wybrane serie (nazwy z self.series) - {nazwa: DataFrame date/value}"""
+        raw_data = {}
+        for name in names:
             print(f"   Pobieram {name}...")
-            data = self.fetch_fred_data(series_id, days_back=days_back)
-            
-            if not data.empty:
-                latest = data.iloc[-1]
-                if len(data) > 1:
-                    previous = data.iloc[-2]
-                    week_ago = data[data['date'] <= latest['date'] - timedelta(days=7)]
-                    week_ago_value = week_ago.iloc[-1]['value'] if not week_ago.empty else latest['value']
-                else:
-                    previous = latest
-                    week_ago_value = latest['value']
-                
-                indicators[name] = {
-                    'current': latest['value'],
-                    'date': latest['date'].strftime('%Y-%m-%d'),
-                    'change_1d': latest['value'] - previous['value'],
-                    'change_7d': latest['value'] - week_ago_value,
-                    'data': data,
-                    'history': data['value'],  # Dla obliczania percentyli
-                }
+            raw_data[name] = self.sources.fetch(self.series[name], days_back=days_back)
+        return raw_data
+
+    def indicators_from_raw(self, raw_data: Dict[str, pd.DataFrame], expected: Optional[List[str]] = None) -> Dict:
+        """
+        build_indicators + oznaczenie nieaktualnych / brakujących serii
+
+        Args:
+            expected: Serie, które miały być pobrane (None = wszystkie) - przy częściowym
+                      ładowaniu brak pozostałych nie trafia do self.unavailable
+        """
+        # Kolejność wskaźników jak w self.series, niezależnie od kolejności pobierania
+        ordered = {name: raw_data[name] for name in self.series if name in raw_data}
+        ordered.update({name: data for name, data in raw_data.items() if name not in ordered})
+        indicators = self.build_indicators(ordered)
+        self._mark_freshness(indicators, expected)
+        return indicators
+
+    def iter_indicators(self, days_back: int = 90):
+        """
+        Ładowanie progresywne - po każdej grupie z load_tiers zwraca dotychczasowe wskaźniki
+
+        Yields:
+            (numer grupy od 1, liczba grup, wskaźniki z pobranych dotąd serii)
+        """
+        tiers = self.load_tiers()
+        raw_data, loaded = {}, []
+        with self.sources.refresh():
+            for k, tier in enumerate(tiers, start=1):
+                raw_data.update(self.fetch_raw(tier, days_back))
+                loaded += tier
+                yield k, len(tiers), self.indicators_from_raw(raw_data, loaded)
+
+    def _mark_freshness(self, indicators: Dict, expected: Optional[List[str]] = None):
+        """
+        Oznacza serie podane z nieaktualnej kopii (źródło nie odpowiada / odświeżanie w tle):
+        'stale_age' w sekundach; serie pochodne dziedziczą wiek najstarszego składnika.
+        Serie bez żadnych danych trafiają do self.unavailable.
+        """
+        self.unavailable = [name for name in (expected or self.series) if name not in indicators]
+        for name, series_id in self.series.items():
+            info = self.sources.freshness.get(series_id)
+            if name in indicators and info and info.get('stale'):
+                indicators[name]['stale_age'] = info['age']
+
+        for name in self.derived.order:
+            if name in indicators:
+                ages = [indicators[source].get('stale_age') for source in self.derived.get(name).inputs
+                        if source in indicators]
+                ages = [age for age in ages if age is not None]
+                if ages:
+                    indicators[name]['stale_age'] = max(ages)
+
+    def _build_indicator(self, data: pd.DataFrame) -> Dict:
+        """Buduje słownik wskaźnika (current, zmiany, historia) z ramki date/value"""
+        latest = data.iloc[-1]
+        # Zmiany przez wyszukiwanie binarne po posortowanych datach (bez filtrowania całej ramki)
+        change = changes(data['date'].to_numpy(), data['value'].to_numpy(dtype=float),
+                         ('1d', '7d'), missing='latest')
+
+        return {
+            'current': latest['value'],
+            'date': latest['date'].strftime('%Y-%m-%d'),
+            'change_1d': change['1d'],
+            'change_7d': change['7d'],
+            'data': data,
+            'history': data['value'],  # Same wartości (percentyle liczone z 'data' - potrzebne daty okien)
+        }
+
+    def build_indicators(self, raw_data: Dict[str, pd.DataFrame]) -> Dict:
+        """
+        Buduje słownik wskaźników z już pobranych szeregów
+
+        Args:
+            raw_data: {nazwa wskaźnika: DataFrame z kolumnami date/value}
+                      (z FRED albo odtworzone z VintageStore na dany dzień) - w jednostkach FRED,
+                      serie z series_scale są tu przeliczane na mld USD
+        """
+        indicators = {}
+
+        for name, data in raw_data.items():
+            if data is not None and not data.empty:
+                scale = self.series_scale.get(self.series.get(name))
+                if scale is not None:
+                    data = data.assign(value=data['value'] * scale)
+                indicators[name] = self._build_indicator(data)
+
+        # === SERIE POCHODNE (spready według Dan Kostecki, net liquidity) ===
+        derived = self.derived.evaluate({name: data['data'] for name, data in indicators.items()})
+        for name, data in derived.items():
+            indicators[name] = self._build_indicator(data)
 
-        # === OBLICZ KLUCZOWE SPREADY (według Dan Kostecki) ===
         # SOFR-IORB spread - NAJWAŻNIEJSZY wskaźnik napięć!
-        if 'sofr' in indicators and 'iorb' in indicators:
-            sofr_data = indicators['sofr']['data']
-            iorb_data = indicators['iorb']['data']
-
-            # Merge obu szeregów czasowych
-            merged = pd.merge(sofr_data, iorb_data, on='date', suffixes=('_sofr', '_iorb'))
-            merged['spread'] = merged['value_sofr'] - merged['value_iorb']
-
-            latest_spread = merged.iloc[-1]['spread']
-            if len(merged) > 1:
-                previous_spread = merged.iloc[-2]['spread']
-                week_ago_spread_data = merged[merged['date'] <= merged.iloc[-1]['date'] - timedelta(days=7)]
-                week_ago_spread = week_ago_spread_data.iloc[-1]['spread'] if not week_ago_spread_data.empty else latest_spread
-            else:
-                previous_spread = latest_spread
-                week_ago_spread = latest_spread
-
-            indicators['sofr_iorb_spread'] = {
-                'current': latest_spread,
-                'date': merged.iloc[-1]['date'].strftime('%Y-%m-%d'),
-                'change_1d': latest_spread - previous_spread,
-                'change_7d': latest_spread - week_ago_spread,
-                'data': merged[['date', 'spread']].rename(columns={'spread': 'value'}),
-                'history': merged['spread'],
-            }
+        if 'sofr_iorb_spread' in indicators:
+            latest_spread = indicators['sofr_iorb_spread']['current']
             # Status bez emoji dla kompatybilności z Windows console
             if latest_spread > 0.20:
                 status = "STRESS!"
@@ -648,42 +981,55 @@ class LiquidityMonitor:
                 status = "OK"
             print(f"   SOFR-IORB Spread: {latest_spread:.3f}% [{status}]")
 
-        # EFFR-IORB spread (FFR-IORB)
-        if 'effr' in indicators and 'iorb' in indicators:
-            effr_data = indicators['effr']['data']
-            iorb_data = indicators['iorb']['data']
-
-            merged = pd.merge(effr_data, iorb_data, on='date', suffixes=('_effr', '_iorb'))
-            merged['spread'] = merged['value_effr'] - merged['value_iorb']
-
-            latest_spread = merged.iloc[-1]['spread']
-            if len(merged) > 1:
-                previous_spread = merged.iloc[-2]['spread']
-                week_ago_spread_data = merged[merged['date'] <= merged.iloc[-1]['date'] - timedelta(days=7)]
-                week_ago_spread = week_ago_spread_data.iloc[-1]['spread'] if not week_ago_spread_data.empty else latest_spread
-            else:
-                previous_spread = latest_spread
-                week_ago_spread = latest_spread
-
-            indicators['effr_iorb_spread'] = {
-                'current': latest_spread,
-                'date': merged.iloc[-1]['date'].strftime('%Y-%m-%d'),
-                'change_1d': latest_spread - previous_spread,
-                'change_7d': latest_spread - week_ago_spread,
-                'data': merged[['date', 'spread']].rename(columns={'spread': 'value'}),
-                'history': merged['spread'],
-            }
-            print(f"   EFFR-IORB Spread: {latest_spread:.3f}%")
+        if 'effr_iorb_spread' in indicators:
+            print(f"   EFFR-IORB Spread: {indicators['effr_iorb_spread']['current']:.3f}%")
 
         return indicators
     
+    def analysis_version(self, indicators: Dict) -> str:
+        """Wersja analizy - treść wszystkich wskaźników, konfiguracja (progi, wagi) i stan szkiców"""
+        sketches = self.sketches.version() if self.sketches is not None else None
+        return combine(indicators_version(indicators), config_version(self.thresholds, self.indicator_weights),
+                       tuple(self.percentile_windows), sketches)
+
     def analyze_liquidity_conditions(self, indicators: Dict) -> Dict:
         """
         Analizuje warunki płynności i generuje ocenę
-        
+
+        Ocena jest artefaktem wersji danych (analysis_version): te same wskaźniki i progi
+        nie są analizowane ponownie (także w innym procesie przy LIQUIDITY_ARTIFACT_DIR).
+        Czas analizy i aktualność danych (nieaktualne / brakujące serie) są zawsze bieżące.
+
         Returns:
             Dict z oceną warunków i alertami
         """
+        if self.sketches is not None:
+            self.sketches.update_indicators(indicators)  # Przed wersją - wersja obejmuje stan szkiców
+        version = self.analysis_version(indicators)
+        computed = []
+        cached = self.artifacts.get_or_compute('analysis', version,
+                                               lambda: computed.append(True) or self._analyze(indicators))
+        if not computed:
+            print(f"[ANALYSIS] Dane bez zmian (wersja {version}) - ocena {cached['overall_score']:.1f} z pamieci")
+
+        analysis = copy.deepcopy(cached)
+        analysis['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        analysis['data_version'] = version
+
+        # === AKTUALNOŚĆ DANYCH ===
+        # Ocena liczona z ostatnich dobrych kopii - ale jawnie: wiek nieaktualnych serii i brakujące serie
+        analysis['stale'] = {name: data['stale_age'] for name, data in indicators.items() if 'stale_age' in data}
+        analysis['unavailable'] = [name for name in self.unavailable if name not in indicators]
+        if analysis['stale']:
+            oldest = max(analysis['stale'].values())
+            print(f"[STALE] {len(analysis['stale'])} serii z ostatniej dobrej kopii (najstarsza sprzed {oldest / 3600:.1f} h)")
+        if analysis['unavailable']:
+            print(f"[WARN] Brak danych (pominiete w ocenie): {', '.join(analysis['unavailable'])}")
+
+        return analysis
+
+    def _analyze(self, indicators: Dict) -> Dict:
+        """Ocena z samych wartości wskaźników i konfiguracji (bez aktualności danych)"""
         analysis = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'overall_score': 0,  # -100 do +100
@@ -694,8 +1040,6 @@ class LiquidityMonitor:
             'weighted_scores': {},  # Punkty z wagami dla każdego wskaźnika
         }
 
-        score = 0
-
         # === WYKRYJ REŻIM RYNKOWY ===
         regime = self.detect_market_regime(indicators)
         analysis['market_regime'] = regime
@@ -709,7 +1053,11 @@ class LiquidityMonitor:
         analysis['percentiles'] = percentiles
 
         # === WYKRYJ KORELACJE I KONFLIKTY ===
-        patterns = self.detect_correlations_and_conflicts(indicators)
+        # Wzorce zależą tylko od PATTERN_INPUTS - zmiana innych serii ich nie przelicza
+        patterns = self.artifacts.get_or_compute(
+            'patterns', indicators_version(indicators, PATTERN_INPUTS),
+            lambda: self.detect_correlations_and_conflicts(indicators)
+        )
         analysis['patterns'] = patterns
 
         # Dodaj wykryte wzorce do sygnałów
@@ -736,337 +1084,21 @@ class LiquidityMonitor:
                 'message': f"{compound['name']}: {compound['interpretation']}"
             })
 
-        # === SCORING Z WAGAMI ===
-        # Każdy wskaźnik dostaje punkty -100 do +100, potem mnożone przez wagę
-        weighted_score = 0
-
-        # 1. Analiza rezerw banków
-        if 'reserves' in indicators:
-            reserves = indicators['reserves']['current']
-            reserves_change = indicators['reserves']['change_7d']
-            
-            if reserves > self.thresholds['reserves_comfortable']:
-                score += 30
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Rezerwy banków',
-                    'message': f'Wysokie rezerwy: ${reserves:.0f}B - system luźny',
-                })
-            elif reserves < self.thresholds['reserves_minimum']:
-                score -= 40
-                analysis['alerts'].append({
-                    'severity': 'critical',
-                    'indicator': 'Rezerwy bankow',
-                    'message': f'[CRITICAL] REZERWY NISKIE: ${reserves:.0f}B - ryzyko napiec',
-                })
-            
-            if reserves_change < -50:  # spadek > 50B w tydzień
-                score -= 20
-                analysis['alerts'].append({
-                    'severity': 'warning',
-                    'indicator': 'Rezerwy banków',
-                    'message': f'Szybki spadek rezerw: {reserves_change:.0f}B/tydzień',
-                })
-        
-        # 2. Analiza TGA
-        if 'tga' in indicators:
-            tga = indicators['tga']['current']
-            tga_change = indicators['tga']['change_7d']
-            
-            if tga_change > 50:  # wzrost > 50B
-                score -= 15
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'TGA',
-                    'message': f'TGA rośnie (+${tga_change:.0f}B) - drenuje płynność',
-                })
-            elif tga_change < -50:  # spadek > 50B
-                score += 15
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'TGA',
-                    'message': f'TGA spada ({tga_change:.0f}B) - dodaje płynność',
-                })
-        
-        # 3. Analiza SOFR-IORB SPREAD (według Dan Kostecki - KLUCZOWY WSKAŹNIK!)
-        if 'sofr_iorb_spread' in indicators:
-            spread = indicators['sofr_iorb_spread']['current']
-            spread_change = indicators['sofr_iorb_spread']['change_7d']
-
-            # REPO STRESS - spread > 0.20% (20 bps)
-            if spread > self.thresholds['sofr_iorb_spread_critical']:
-                score -= 40  # Zwiększony impact (było -30)
-                analysis['alerts'].append({
-                    'severity': 'critical',
-                    'indicator': 'SOFR-IORB Spread',
-                    'message': f'🚨 REPO STRESS! SOFR-IORB: {spread:.3f}% - Kryzys płynności! Hedge funds pod presją!',
-                })
-
-            # NAPIĘCIA - spread > 0.15% (15 bps)
-            elif spread > self.thresholds['sofr_iorb_spread_warning']:
-                score -= 25  # Zwiększony impact (było -15)
-                analysis['alerts'].append({
-                    'severity': 'warning',
-                    'indicator': 'SOFR-IORB Spread',
-                    'message': f'⚠️ UWAGA! SOFR-IORB: {spread:.3f}% - Rosnące koszty lewara. Basis trade zagrożony!',
-                })
-
-            # STABILNY - spread < 0.10%
-            elif spread < 0.10:
-                score += 15
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'SOFR-IORB Spread',
-                    'message': f'✅ SOFR stabilny ({spread:.3f}%) - Płynność OK, tani lewar',
-                })
-
-            # Dodatkowy alert jeśli spread rośnie szybko
-            if spread_change > 0.05:  # wzrost > 5 bps w tydzień
-                score -= 10
-                analysis['alerts'].append({
-                    'severity': 'warning',
-                    'indicator': 'SOFR-IORB Trend',
-                    'message': f'📈 SOFR spread rośnie szybko: +{spread_change:.3f}% w tydzień',
-                })
-        
-        # 4. Analiza Reverse Repo
-        if 'reverse_repo' in indicators:
-            rrp = indicators['reverse_repo']['current']
-            rrp_change = indicators['reverse_repo']['change_7d']
-            
-            if rrp < 100:  # poniżej 100B
-                score -= 10
-                analysis['signals'].append({
-                    'type': 'neutral',
-                    'indicator': 'Reverse Repo',
-                    'message': f'RRP bardzo niskie: ${rrp:.0f}B - brak bufora',
-                })
-            elif rrp > 500:
-                score += 10
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Reverse Repo',
-                    'message': f'RRP wysoki: ${rrp:.0f}B - jest bufor płynności',
-                })
-        
-        # 5. Analiza bilansu Fed
-        if 'fed_balance' in indicators:
-            balance_change = indicators['fed_balance']['change_7d']
-            
-            if balance_change < -20:  # QT > 20B/tydzień
-                score -= 10
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'Bilans Fed',
-                    'message': f'QT aktywne: {balance_change:.0f}B/tydzień',
-                })
-            elif balance_change > 20:  # ekspansja
-                score += 15
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Bilans Fed',
-                    'message': f'Fed zwieksza bilans: +{balance_change:.0f}B/tydzien',
-                })
-
-        # === TIER 1 - Nowe wskazniki ===
-
-        # 6. Analiza krzywej dochodowosci (10Y-2Y)
-        if 'yield_curve' in indicators:
-            curve = indicators['yield_curve']['current']
-
-            if curve < self.thresholds['yield_curve_inverted']:
-                score -= 30
-                analysis['alerts'].append({
-                    'severity': 'critical',
-                    'indicator': 'Krzywa dochodowosci',
-                    'message': f'[CRITICAL] KRZYWA ODWROCONA: {curve:.2f}% - Ryzyko recesji!',
-                })
-            elif curve < 0.25:
-                score -= 15
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'Krzywa dochodowosci',
-                    'message': f'Krzywa plaska: {curve:.2f}% - Spowolnienie wzrostu',
-                })
-            elif curve > self.thresholds['yield_curve_steep']:
-                score += 15
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Krzywa dochodowosci',
-                    'message': f'Krzywa stroma: {curve:.2f}% - Ekspansja gospodarcza',
-                })
-
-        # 7. Analiza VIX (strach na rynku)
-        if 'vix' in indicators:
-            vix = indicators['vix']['current']
-            vix_change = indicators['vix']['change_7d']
-
-            if vix > self.thresholds['vix_fear']:
-                score -= 25
-                analysis['alerts'].append({
-                    'severity': 'warning',
-                    'indicator': 'VIX',
-                    'message': f'[WARN] VIX wysoki: {vix:.1f} - Panika na rynku!',
-                })
-            elif vix < self.thresholds['vix_greed']:
-                score += 10
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'VIX',
-                    'message': f'VIX niski: {vix:.1f} - Spokoj na rynku',
-                })
-
-            if vix_change > 5:  # VIX wzrósł > 5 punktów
-                score -= 10
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'VIX',
-                    'message': f'VIX gwaltownie rosnie: +{vix_change:.1f}',
-                })
-
-        # 8. Analiza warunkow finansowych (NFCI)
-        if 'fin_conditions' in indicators:
-            nfci = indicators['fin_conditions']['current']
-
-            if nfci > self.thresholds['nfci_tight']:
-                score -= 20
-                analysis['alerts'].append({
-                    'severity': 'warning',
-                    'indicator': 'Warunki finansowe',
-                    'message': f'[WARN] NFCI dodatni: {nfci:.2f} - Napięcia finansowe',
-                })
-            elif nfci < self.thresholds['nfci_loose']:
-                score += 20
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Warunki finansowe',
-                    'message': f'NFCI bardzo ujemny: {nfci:.2f} - Luźne warunki',
-                })
-
-        # 9. Analiza indeksu dolara (DXY)
-        if 'dollar_index' in indicators:
-            dxy = indicators['dollar_index']['current']
-            dxy_change = indicators['dollar_index']['change_7d']
-
-            if dxy > self.thresholds['dollar_strong']:
-                score -= 10
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'Dollar Index',
-                    'message': f'DXY bardzo wysoki: {dxy:.1f} - Silny dolar zabiera plynnosc',
-                })
-            elif dxy < self.thresholds['dollar_weak']:
-                score += 10
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Dollar Index',
-                    'message': f'DXY niski: {dxy:.1f} - Slaby dolar dodaje plynnosc',
-                })
-
-            if dxy_change > 2:  # DXY wzrósł > 2 punkty
-                score -= 5
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'Dollar Index',
-                    'message': f'DXY gwaltownie rosnie: +{dxy_change:.1f}',
-                })
-
-        # 10. Analiza M2 (podaz pieniadza)
-        if 'm2' in indicators:
-            m2_change = indicators['m2']['change_7d']
-
-            if m2_change < -100:  # M2 spada > 100B
-                score -= 10
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'M2 Money Supply',
-                    'message': f'M2 spada: {m2_change:.0f}B - Kurczy sie podaz pieniadza',
-                })
-            elif m2_change > 100:  # M2 rośnie > 100B
-                score += 10
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'M2 Money Supply',
-                    'message': f'M2 rosnie: +{m2_change:.0f}B - Wzrost podazy pieniadza',
-                })
-
-        # === TIER 2 - Nowe wskazniki ===
-
-        # 11. Analiza 10-Year Treasury
-        if 'treasury_10y' in indicators:
-            t10y = indicators['treasury_10y']['current']
-
-            if t10y > self.thresholds['treasury_10y_high']:
-                score -= 15
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': '10Y Treasury',
-                    'message': f'10Y wysoko: {t10y:.2f}% - Wysokie koszty dlugu',
-                })
-            elif t10y < self.thresholds['treasury_10y_low']:
-                score += 10
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': '10Y Treasury',
-                    'message': f'10Y nisko: {t10y:.2f}% - Tanie finansowanie',
-                })
-
-        # 12. Analiza High Yield Spread
-        if 'hy_spread' in indicators:
-            hy = indicators['hy_spread']['current']
-
-            if hy > self.thresholds['hy_spread_high']:
-                score -= 20
-                analysis['alerts'].append({
-                    'severity': 'warning',
-                    'indicator': 'High Yield Spread',
-                    'message': f'[WARN] HY Spread wysoki: {hy:.2f}% - Strach o kredyt!',
-                })
-            elif hy < 3.0:
-                score += 5
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'High Yield Spread',
-                    'message': f'HY Spread niski: {hy:.2f}% - Dobry apetyt na ryzyko',
-                })
-
-        # 13. Analiza 5Y Breakeven Inflation
-        if 'inflation_5y' in indicators:
-            infl = indicators['inflation_5y']['current']
-
-            if infl > self.thresholds['inflation_high']:
-                score -= 10
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': '5Y Inflation',
-                    'message': f'Oczekiwana inflacja wysoka: {infl:.2f}%',
-                })
-            elif infl < self.thresholds['inflation_low']:
-                score -= 5
-                analysis['signals'].append({
-                    'type': 'neutral',
-                    'indicator': '5Y Inflation',
-                    'message': f'Oczekiwana inflacja niska: {infl:.2f}% - Ryzyko deflacji?',
-                })
-
-        # 14. Analiza bezrobocia
-        if 'unemployment' in indicators:
-            unemp = indicators['unemployment']['current']
-
-            if unemp > self.thresholds['unemployment_high']:
-                score -= 15
-                analysis['signals'].append({
-                    'type': 'negative',
-                    'indicator': 'Unemployment',
-                    'message': f'Bezrobocie wysokie: {unemp:.1f}% - Slaby rynek pracy',
-                })
-            elif unemp < self.thresholds['unemployment_low']:
-                score += 10
-                analysis['signals'].append({
-                    'type': 'positive',
-                    'indicator': 'Unemployment',
-                    'message': f'Bezrobocie niskie: {unemp:.1f}% - Mocny rynek pracy',
-                })
+        # === PUNKTACJA Z TABELI REGUŁ ===
+        # SCORING_RULES (scoring.py) to jedyne źródło progów i punktów - te same reguły oceniają
+        # scenariusze i wrażliwość; tu dodatkowo komunikaty zadziałanych reguł (RULE_MESSAGES)
+        model = ScoringModel(self.thresholds, self.indicator_weights)
+        x = model.feature_vector(indicators)
+        fired = model.fired(x)
+        score = float(model.raw_score(fired)[0])
+
+        for rule in np.flatnonzero(fired[0]):
+            kind, indicator, template = RULE_MESSAGES[model.rule_names[rule]]
+            message = template.format(value=x[model.rule_feature[rule]])
+            if kind in ALERT_SEVERITIES:
+                analysis['alerts'].append({'severity': kind, 'indicator': indicator, 'message': message})
+            else:
+                analysis['signals'].append({'type': kind, 'indicator': indicator, 'message': message})
 
         # === DODAJ KOREKTY Z KORELACJI ===
         # Najpierw dodajemy punkty z wykrytych wzorców
@@ -1089,7 +1121,12 @@ class LiquidityMonitor:
         analysis['raw_score'] = score  # Dla debugowania
         analysis['regime_adjustment'] = adjusted_score - score
 
-        print(f"[SCORING] Raw: {score:.1f} | Adjusted: {adjusted_score:.1f} | Final: {analysis['overall_score']:.1f}")
+        # Ocena ważona wg indicator_weights (informacyjnie - overall_score bez zmian)
+        weighted, analysis['weighted_scores'] = weighted_breakdown(model, indicators)
+        analysis['weighted_score'] = weighted
+
+        print(f"[SCORING] Raw: {score:.1f} | Adjusted: {adjusted_score:.1f} | Final: {analysis['overall_score']:.1f}"
+              f" | Weighted: {weighted:+.1f}")
 
         # === INTERPRETACJA (uwzględnia reżim) ===
         regime_prefix = f"[{regime['regime']}] "
@@ -1122,6 +1159,7 @@ class LiquidityMonitor:
         print("-"*80)
         
         for name, data in indicators.items():
+            definition = self.derived.get(name)
             label = {
                 'reserves': 'Rezerwy banków',
                 'tga': 'TGA (konto rządu)',
@@ -1130,18 +1168,18 @@ class LiquidityMonitor:
                 'sofr': 'SOFR',
                 'iorb': 'IORB',
                 'effr': 'EFFR',
-            }.get(name, name)
+            }.get(name, definition.label if definition else name)
             
-            unit = '%' if name in ['sofr', 'iorb', 'effr'] else 'B USD'
+            if definition:
+                unit = definition.unit
+            else:
+                unit = '%' if name in ['sofr', 'iorb', 'effr'] else 'B USD'
             value = data['current']
             change_7d = data['change_7d']
             change_symbol = '▲' if change_7d > 0 else '▼' if change_7d < 0 else '='
             
-            print(f"{label:25} {value:10.2f} {unit:6} | 7d: {change_symbol} {change_7d:+8.2f}")
-        
-        if 'sofr' in indicators and 'iorb' in indicators:
-            spread = indicators['sofr']['current'] - indicators['iorb']['current']
-            print(f"{'SOFR-IORB spread':25} {spread:10.2f} {'%':6} |")
+            stale = f"  [dane sprzed {data['stale_age'] / 3600:.1f} h]" if 'stale_age' in data else ''
+            print(f"{label:25} {value:10.2f} {unit:6} | 7d: {change_symbol} {change_7d:+8.2f}{stale}")
         
         # Alerty
         if analysis['alerts']:
@@ -1162,15 +1200,17 @@ class LiquidityMonitor:
         
         print("\n" + "="*80 + "\n")
     
-    def save_to_json(self, indicators: Dict, analysis: Dict, filename: str = 'liquidity_data.json'):
-        """Zapisuje dane do pliku JSON"""
-        output = {
+    def snapshot(self, indicators: Dict, analysis: Dict) -> Dict:
+        """Zwięzły, serializowalny do JSON obraz analizy (bez pełnej historii serii)"""
+        return {
             'timestamp': analysis['timestamp'],
             'analysis': {
                 'score': analysis['overall_score'],
                 'interpretation': analysis['interpretation'],
                 'alerts': analysis['alerts'],
                 'signals': analysis['signals'],
+                'stale': analysis.get('stale', {}),
+                'unavailable': analysis.get('unavailable', []),
             },
             'indicators': {
                 name: {
@@ -1178,10 +1218,15 @@ class LiquidityMonitor:
                     'date': data['date'],
                     'change_1d': data['change_1d'],
                     'change_7d': data['change_7d'],
+                    **({'stale_age': data['stale_age']} if 'stale_age' in data else {}),
                 }
                 for name, data in indicators.items()
             }
         }
+
+    def save_to_json(self, indicators: Dict, analysis: Dict, filename: str = 'liquidity_data.json'):
+        """Zapisuje dane do pliku JSON"""
+        output = self.snapshot(indicators, analysis)
         
         with open(filename, 'w') as f:
             json.dump(output, f, indent=2)
@@ -1198,7 +1243,6 @@ def main():
     """)
     
     # Sprawdź czy jest klucz API
-    import os
     api_key = os.environ.get('FRED_API_KEY')
     
     if not api_key:
@@ -1207,6 +1251,9 @@ def main():
         print("   https://fred.stlouisfed.org/docs/api/api_key.html")
         print("   Nastepnie ustaw zmienna srodowiskowa:")
         print("   export FRED_API_KEY='twoj_klucz'\n")
+        if not sys.stdin.isatty():
+            # Cron / potok - nie ma kogo zapytać (tryb wsadowy: liquidity_cli.py)
+            return
         response = input("   Kontynuowac bez klucza (dane demo)? [t/N]: ")
         if response.lower() != 't':
             return
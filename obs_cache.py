@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Observation cache - skompresowane przechowywanie obserwacji na dysku
+
+Format bloku (encode_observations) - kilka KB na 50 lat serii dziennej:
+
+    daty     - pierwszy dzień + różnice w dniach (zwykle 1 / 3 / 7) w najwęższym
+               typie całkowitym (zwykle 1 bajt)
+    wartości - FRED publikuje liczby dziesiętne o kilku cyfrach po przecinku:
+               wartość * 10^k jest całkowita, więc zapisywane są różnice
+               kolejnych mantys (zigzag, najwęższy typ, bajty "przetasowane"
+               jak w blosc - starsze bajty obok siebie). Gdy skalowanie nie jest
+               dokładne (dowolne float), zapisywane są surowe float64.
+    całość   - zlib na poziomie 1 (szybki, w bibliotece standardowej; lz4 / zstd
+               nie są wymagane)
+
+Dekodowanie odtwarza daty i wartości bit w bit.
+
+ObservationCache trzyma jeden plik na serię (ostatnia dobra kopia, scalana z
+nowymi pobraniami), TransferLog liczy bajty przesłane siecią (po kompresji
+gzip) i po dekompresji - storage_report w monitorze zestawia oba z bajtami
+na dysku.
+
+Użycie:
+    cache = ObservationCache('obs_cache')
+    cache.merge('WALCL', dates, values)
+    dates, values, saved_at = cache.get('WALCL')
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+_MAGIC = b'LOB1'
+# magic, liczba obserwacji, pierwszy dzień, pierwsza mantysa, skala (255 = surowe float64),
+# szerokość różnic dat, szerokość różnic wartości
+_HEADER = struct.Struct('<4sIqqBBB')
+_RAW = 255
+_MAX_SCALE = 9
+
+
+def _width(values: np.ndarray) -> int:
+    """Najwęższa szerokość (bajty) typu bez znaku mieszcząca wszystkie wartości"""
+    top = int(values.max()) if len(values) else 0
+    for width in (1, 2, 4):
+        if top < 1 << (8 * width):
+            return width
+    return 8
+
+
+def _shuffle(values: np.ndarray, width: int) -> bytes:
+    """Bajty kolejnych liczb pogrupowane według pozycji (najpierw wszystkie najmłodsze)"""
+    data = values.astype(f'<u{width}')
+    return data.view(np.uint8).reshape(-1, width).T.tobytes() if width > 1 else data.tobytes()
+
+
+def _unshuffle(buffer: bytes, count: int, width: int) -> np.ndarray:
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if width > 1:
+        data = np.ascontiguousarray(data.reshape(width, count).T)
+    return data.view(f'<u{width}').reshape(count).astype(np.uint64)
+
+
+def _decimal_scale(values: np.ndarray) -> Tuple[int, Optional[np.ndarray]]:
+    """Najmniejsze k, przy którym values * 10^k to dokładne liczby całkowite (bit w bit po dzieleniu)"""
+    finite = np.isfinite(values).all()
+    for scale in range(_MAX_SCALE + 1):
+        if not finite:
+            break
+        factor = 10.0 ** scale
+        mantissa = np.round(values * factor)
+        if np.abs(mantissa).max(initial=0) >= 2 ** 53:
+            break
+        if np.array_equal(mantissa / factor, values) and not np.signbit(values[mantissa == 0]).any():
+            return scale, mantissa.astype(np.int64)
+    return _RAW, None
+
+
+def encode_observations(dates: np.ndarray, values: np.ndarray, level: int = 1) -> bytes:
+    """
+    Koduje obserwacje (daty rosnąco) w skompresowany blok
+
+    Args:
+        dates: datetime64 (dowolna jednostka - zapisywane dni)
+        values: float64
+        level: Poziom zlib (1 = najszybszy)
+    """
+    days = np.asarray(dates).astype('datetime64[D]').astype(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    count = len(days)
+    if count == 0:
+        return _HEADER.pack(_MAGIC, 0, 0, 0, _RAW, 1, 8)
+
+    day_steps = np.diff(days).astype(np.uint64)
+    day_width = _width(day_steps)
+    scale, mantissa = _decimal_scale(values)
+
+    if mantissa is None:
+        value_width, first_mantissa = 8, 0
+        value_block = _shuffle(values.view(np.uint64), 8)
+    else:
+        steps = np.diff(mantissa)
+        zigzag = ((steps << 1) ^ (steps >> 63)).astype(np.uint64)
+        value_width, first_mantissa = _width(zigzag), int(mantissa[0])
+        value_block = _shuffle(zigzag, value_width)
+
+    header = _HEADER.pack(_MAGIC, count, int(days[0]), first_mantissa, scale, day_width, value_width)
+    return header + zlib.compress(_shuffle(day_steps, day_width) + value_block, level)
+
+
+def decode_observations(blob: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Odwrotność encode_observations - (datetime64[D], float64); ValueError przy złym formacie"""
+    if len(blob) < _HEADER.size:
+        raise ValueError("Blok obserwacji jest za krotki")
+    magic, count, first_day, first_mantissa, scale, day_width, value_width = _HEADER.unpack_from(blob)
+    if magic != _MAGIC:
+        raise ValueError("To nie jest blok obserwacji")
+    if count == 0:
+        return np.empty(0, dtype='datetime64[D]'), np.empty(0)
+
+    body = zlib.decompress(blob[_HEADER.size:])
+    day_bytes = (count - 1) * day_width
+    day_steps = _unshuffle(body[:day_bytes], count - 1, day_width).astype(np.int64)
+    days = np.concatenate([[first_day], first_day + np.cumsum(day_steps)])
+
+    if scale == _RAW:
+        values = _unshuffle(body[day_bytes:], count, 8).view(np.float64)
+    else:
+        zigzag = _unshuffle(body[day_bytes:], count - 1, value_width)
+        steps = (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+        mantissa = np.concatenate([[first_mantissa], first_mantissa + np.cumsum(steps)])
+        values = mantissa / 10.0 ** scale
+    return days.astype('datetime64[D]'), values
+
+
+class ObservationCache:
+    """Ostatnia dobra kopia każdej serii na dysku - jeden skompresowany plik na serię"""
+
+    def __init__(self, directory: str = 'obs_cache', level: int = 1):
+        """
+        Args:
+            directory: Katalog na pliki <SERIES_ID>.obs
+            level: Poziom zlib
+        """
+        self.directory = directory
+        self.level = level
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, series_id: str) -> str:
+        return os.path.join(self.directory, f"{series_id}.obs")
+
+    def get(self, series_id: str) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+        """(daty, wartości, czas zapisu) albo None, gdy brak / uszkodzony plik"""
+        path = self._path(series_id)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+            saved_at = os.path.getmtime(path)
+            dates, values = decode_observations(blob)
+        except (OSError, ValueError, zlib.error):
+            return None
+        return dates, values, saved_at
+
+    def put(self, series_id: str, dates: np.ndarray, values: np.ndarray) -> int:
+        """Zapisuje serię (atomowo - plik tymczasowy + os.replace); zwraca bajty na dysku"""
+        blob = encode_observations(dates, values, self.level)
+        path = self._path(series_id)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(blob)
+        os.replace(temporary, path)
+        return len(blob)
+
+    def merge(self, series_id: str, dates: np.ndarray, values: np.ndarray) -> int:
+        """
+        Scala nowe pobranie z kopią na dysku: nowe dane zastępują zakres [pierwsza, ostatnia data],
+        starsze obserwacje spoza niego zostają (krótkie odświeżenie nie kasuje długiej historii)
+        """
+        dates = np.asarray(dates).astype('datetime64[D]')
+        with self._lock:
+            cached = self.get(series_id)
+            if cached is not None and len(dates):
+                older = cached[0] < dates[0]
+                dates = np.concatenate([cached[0][older], dates])
+                values = np.concatenate([cached[1][older], values])
+            return self.put(series_id, dates, values)
+
+    def disk_bytes(self) -> Dict[str, int]:
+        """{series_id: bajty na dysku}"""
+        sizes = {}
+        for name in os.listdir(self.directory):
+            if name.endswith('.obs'):
+                sizes[name[:-4]] = os.path.getsize(os.path.join(self.directory, name))
+        return sizes
+
+
+class TransferLog:
+    """Bajty pobrane z sieci (po kompresji) i po dekompresji - per seria, bezpieczne dla wątków"""
+
+    def __init__(self):
+        self.series: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, series_id: str, wire_bytes: int, decoded_bytes: int):
+        with self._lock:
+            entry = self.series.setdefault(series_id, {'requests': 0, 'wire_bytes': 0, 'decoded_bytes': 0})
+            entry['requests'] += 1
+            entry['wire_bytes'] += wire_bytes
+            entry['decoded_bytes'] += decoded_bytes
+            entry['last'] = time.time()
+
+    def clear(self):
+        with self._lock:
+            self.series.clear()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Percentile windows - percentyle w wielu oknach z jednego przejścia po serii
+
+Percentyl liczony był względem tego okna, które akurat pobrano (days_back).
+Tutaj pobierana jest najdłuższa historia, a percentyl bieżącej wartości w
+każdym oknie (ostatni rok, 5 lat, 20 lat, cała historia) wynika z sum
+liczonych od końca serii:
+
+    - początek okna: np.searchsorted po datach (jak w horizons.py), O(log n),
+    - liczba odczytów < current, minimum, maksimum, suma i suma kwadratów
+      od i-tego odczytu do ostatniego: jedno przejście (cumsum / accumulate
+      od końca) na serię i wartość current,
+    - percentyl i statystyki okna: odczyt tych sum w indeksie początku, O(1).
+
+Kolejne okno kosztuje więc jedno wyszukiwanie binarne. Do rang dowolnych
+wartości (np. cała tablica naraz) służy rank(): seria jest sortowana raz
+(argsort), wartości okna to filtr globalnej kolejności (podciąg posortowanego
+ciągu jest posortowany), a ranga to np.searchsorted.
+
+Okno sięga od ostatniego odczytu wstecz: odczyty z datą > (ostatni - okno).
+Okno dłuższe niż dostępna historia jest liczone z tego, co jest, i oznaczone
+'complete': False.
+
+Użycie:
+    history = WindowedHistory(df['date'].to_numpy(), df['value'].to_numpy())
+    history.summary(current, '5y')                # percentyl i statystyki okna
+    history.rank(values, '20y')                   # procent odczytów < każdej z values
+    window_percentiles(dates, values, current)    # {'1y': {...}, '5y': {...}, ...}
+"""
+
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+
+PERCENTILE_WINDOWS = ('1y', '5y', '20y', 'all')
+
+# Minimum odczytów w oknie, żeby percentyl miał sens (jak w calculate_percentiles)
+MIN_OBSERVATIONS = 10
+
+
+def window_days(window: str) -> Optional[int]:
+    """Długość okna w dniach ('<n>y', '<n>d'; 'all' = None - cała historia)"""
+    if window == 'all':
+        return None
+    if window[:-1].isdigit() and window[-1] in 'dy':
+        return int(window[:-1]) * (365 if window[-1] == 'y' else 1)
+    raise ValueError(f"Nieznane okno percentyli: {window}")
+
+
+def _from_end(ufunc, values: np.ndarray) -> np.ndarray:
+    """ufunc.accumulate od końca - element i dotyczy odczytów od i-tego do ostatniego"""
+    return ufunc.accumulate(values[::-1])[::-1]
+
+
+class WindowedHistory:
+    """Historia serii - percentyle i statystyki w dowolnym oknie bez filtrowania danych"""
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray):
+        """
+        Args:
+            dates: Daty odczytów (datetime64, rosnąco)
+            values: Wartości (NaN są pomijane)
+        """
+        values = np.asarray(values, dtype=float)
+        keep = ~np.isnan(values)
+        self.dates = np.asarray(dates)[keep]
+        self.values = values[keep]
+        n = len(self.values)
+
+        # Sumy od końca (względem ostatniej wartości - mniejsza utrata precyzji przy wariancji)
+        self._shift = self.values[-1] if n else 0.0
+        centered = self.values - self._shift
+        self._min = _from_end(np.minimum, self.values)
+        self._max = _from_end(np.maximum, self.values)
+        self._sum = _from_end(np.add, centered)
+        self._squares = _from_end(np.add, centered * centered)
+        self._below = None  # (current, liczba odczytów < current od końca)
+        self._order = None  # argsort - dopiero przy pierwszym rank()
+        self._sorted: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def start(self, window: str) -> int:
+        """Indeks pierwszego odczytu w oknie (0 dla 'all' i okien dłuższych niż historia)"""
+        days = window_days(window)
+        if days is None or len(self.dates) == 0:
+            return 0
+        cutoff = self.dates[-1] - np.timedelta64(days, 'D')
+        return int(np.searchsorted(self.dates, cutoff, side='right'))
+
+    def complete(self, window: str) -> bool:
+        """Czy historia sięga początku okna (inaczej okno liczone z krótszej historii)"""
+        days = window_days(window)
+        return days is None or (len(self.dates) > 0 and
+                                self.dates[0] <= self.dates[-1] - np.timedelta64(days, 'D'))
+
+    def _below_counts(self, current: float) -> np.ndarray:
+        if self._below is None or self._below[0] != current:
+            self._below = (current, _from_end(np.add, (self.values < current).astype(np.int64)))
+        return self._below[1]
+
+    def summary(self, current: float, window: str = 'all') -> Optional[Dict]:
+        """Percentyl current i statystyki okna (None, gdy w oknie mniej niż MIN_OBSERVATIONS odczytów)"""
+        start = self.start(window)
+        count = len(self.values) - start
+        if count < MIN_OBSERVATIONS:
+            return None
+        mean = self._sum[start] / count
+        variance = max(self._squares[start] / count - mean * mean, 0.0)
+        return {
+            'percentile': float(self._below_counts(current)[start] / count * 100),
+            'count': count,
+            'start': str(self.dates[start].astype('datetime64[D]')),
+            'complete': self.complete(window),
+            'min': float(self._min[start]),
+            'max': float(self._max[start]),
+            'mean': float(mean + self._shift),
+            'std': float(np.sqrt(variance)),
+        }
+
+    def sorted_values(self, window: str = 'all') -> np.ndarray:
+        """Wartości okna rosnąco - z jednego sortowania serii, okna bez ponownego sortowania"""
+        if self._order is None:
+            self._order = np.argsort(self.values, kind='stable')
+        start = self.start(window)
+        if start not in self._sorted:
+            order = self._order if start == 0 else self._order[self._order >= start]
+            self._sorted[start] = self.values[order]
+        return self._sorted[start]
+
+    def rank(self, value: Union[float, np.ndarray], window: str = 'all') -> Union[float, np.ndarray]:
+        """Procent odczytów okna mniejszych od value (także tablica wartości naraz)"""
+        ordered = self.sorted_values(window)
+        if len(ordered) == 0:
+            return np.nan
+        return np.searchsorted(ordered, value, side='left') / len(ordered) * 100
+
+
+def window_percentiles(dates: np.ndarray, values: np.ndarray, current: float,
+                       windows: Sequence[str] = PERCENTILE_WINDOWS) -> Dict[str, Dict]:
+    """
+    Percentyl current we wszystkich oknach z jednego przejścia po serii
+
+    Returns:
+        {okno: summary} - okna z za małą liczbą odczytów są pomijane
+    """
+    history = WindowedHistory(dates, values)
+    result = {}
+    for window in windows:
+        summary = history.summary(current, window)
+        if summary is not None:
+            result[window] = summary
+    return result
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Quantile sketch - percentyle strumieniowe w stałej pamięci (KLL)
+
+Dokładny percentyl (calculate_percentiles, percentile_windows) potrzebuje
+całej historii w pamięci. Dla monitora działającego bez przerwy (serie
+śróddzienne, pochodne o wysokiej częstotliwości) każda seria może mieć
+szkic KLL (Karnin, Lang, Liberty 2016):
+
+    - poziomy (compactors) - poziom h trzyma odczyty z wagą 2^h; pełny
+      poziom jest sortowany, a co drugi element (losowy początek) przechodzi
+      wyżej z podwójną wagą - suma wag zawsze równa liczbie odczytów,
+    - pojemność poziomu h to ~k * (2/3)^(H-h-1), więc cały szkic ma około
+      3k elementów niezależnie od długości historii,
+    - aktualizacja: O(1) zamortyzowane na odczyt,
+    - zapytanie: posortowany widok szkicu (budowany raz po zmianach)
+      i wyszukiwanie binarne - czas i pamięć zależą tylko od k,
+    - łączenie: szkice z różnych procesów / paczek łączone są poziom po
+      poziomie (wynik jak jeden szkic z obu strumieni).
+
+Gwarancja błędu (rank_error): błąd rangi pojedynczego zapytania jest z
+prawdopodobieństwem 99% mniejszy niż 2.296 / k^0.9723 liczby odczytów
+(dopasowanie z Apache DataSketches dla KLL), np. k=200 -> 1.3 punktu
+procentowego percentyla. Dopóki odczytów jest mniej niż pojemność
+pierwszego poziomu, szkic jest dokładny.
+
+SketchStore trzyma szkic każdej serii i datę ostatniego odczytu w pliku
+JSON (jak AnomalyDetector) - po restarcie dokładane są tylko nowsze odczyty,
+rewizje starszych są ignorowane. Łączone magazyny muszą widzieć rozłączne
+odczyty (np. różne serie albo różne zakresy dat) - ten sam odczyt w dwóch
+szkicach liczy się dwa razy.
+
+Użycie:
+    store = SketchStore('sketch_state.json')
+    store.update_indicators(indicators)
+    store.summary('vix', 18.5)      # {'percentile': ..., 'count': ..., 'error': ...}
+"""
+
+import json
+import math
+import os
+import random
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def rank_error(k: int) -> float:
+    """Błąd rangi (ułamek liczby odczytów) pojedynczego zapytania - 99% ufności"""
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """
+    Mergeowalny szkic kwantyli KLL jednej serii
+
+    Args:
+        k: Dokładność - pojemność najwyższego poziomu (pamięć ~3k liczb, błąd ~1/k)
+        seed: Ziarno losowania przy kompakcji (powtarzalne testy)
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.compactors: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._view = None  # (posortowane wartości, skumulowane wagi) - do najbliższej zmiany
+
+    def __len__(self) -> int:
+        """Liczba przechowywanych elementów (nie odczytów - te w self.n)"""
+        return self._size
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self._grow()
+            items.sort()
+            # Nieparzysty element zostaje na poziomie, z pary przechodzi wyżej jeden (losowo pierwszy / drugi)
+            keep = [items.pop()] if len(items) % 2 else []
+            self.compactors[level + 1].extend(items[self._rng.randint(0, 1)::2])
+            self.compactors[level] = keep
+            self._size = sum(len(c) for c in self.compactors)
+            if self._size < self._max_size:
+                break
+
+    def update(self, value: float):
+        """Dokłada jeden odczyt"""
+        self.compactors[0].append(value)
+        self.n += 1
+        self._size += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._view = None
+        if self._size >= self._max_size:
+            self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        """Dokłada odczyty innego szkicu (rozłączne z własnymi) - poziom po poziomie"""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._size = sum(len(c) for c in self.compactors)
+        self._view = None
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _sorted_view(self):
+        if self._view is None:
+            values = np.fromiter((v for items in self.compactors for v in items), dtype=float, count=self._size)
+            weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64)
+                                      for level, items in enumerate(self.compactors)])
+            order = np.argsort(values, kind='stable')
+            self._view = (values[order], np.concatenate([[0], np.cumsum(weights[order])]))
+        return self._view
+
+    def rank(self, value: float) -> float:
+        """Ułamek odczytów mniejszych od value (jak percentyl / 100 w calculate_percentiles)"""
+        if self.n == 0:
+            return math.nan
+        values, cumulative = self._sorted_view()
+        return float(cumulative[np.searchsorted(values, value, side='left')] / self.n)
+
+    def quantile(self, q: float) -> float:
+        """Najmniejsza wartość, od której nie większych jest co najmniej q odczytów (0 <= q <= 1)"""
+        if self.n == 0:
+            return math.nan
+        values, cumulative = self._sorted_view()
+        index = int(np.searchsorted(cumulative[1:], q * self.n, side='left'))
+        return float(values[min(index, len(values) - 1)])
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'n': self.n, 'min': self.min, 'max': self.max, 'compactors': self.compactors}
+
+    @classmethod
+    def from_dict(cls, data: Dict, seed: Optional[int] = None) -> 'KLLSketch':
+        sketch = cls(data['k'], seed)
+        sketch.compactors = [[float(v) for v in items] for items in data['compactors']] or [[]]
+        sketch.n = int(data['n'])
+        sketch.min, sketch.max = float(data['min']), float(data['max'])
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        sketch._max_size = sum(sketch._capacity(level) for level in range(len(sketch.compactors)))
+        return sketch
+
+
+class SketchStore:
+    """
+    Szkice wszystkich serii + stan na dysku
+
+    Args:
+        state_path: Plik stanu JSON (None = tylko w pamięci)
+        k: Dokładność szkiców (patrz rank_error)
+    """
+
+    def __init__(self, state_path: Optional[str] = 'sketch_state.json', k: int = 200):
+        self.state_path = state_path
+        self.k = k
+        self._lock = threading.Lock()
+        self.sketches: Dict[str, KLLSketch] = {}
+        self.first_dates: Dict[str, str] = {}
+        self.last_dates: Dict[str, str] = {}
+        self._load_state()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r') as f:
+                    data = json.load(f)
+                for name, entry in data.items():
+                    self.sketches[name] = KLLSketch.from_dict(entry['sketch'])
+                    self.first_dates[name] = entry['first_date']
+                    self.last_dates[name] = entry['last_date']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARNING] Nie udalo sie wczytac stanu szkicow: {e}")
+                self.sketches, self.first_dates, self.last_dates = {}, {}, {}
+
+    def save(self):
+        """Zapis stanu (atomowo - plik tymczasowy i podmiana)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            data = {name: {'sketch': sketch.to_dict(), 'first_date': self.first_dates[name],
+                           'last_date': self.last_dates[name]}
+                    for name, sketch in self.sketches.items()}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.state_path)
+
+    def update(self, name: str, dates, values) -> int:
+        """
+        Dokłada odczyty serii nowsze niż ostatni zapisany (bez zapisu stanu)
+
+        Args:
+            dates: Daty odczytów 'YYYY-MM-DD' (rosnąco)
+            values: Wartości (NaN pomijane)
+
+        Returns:
+            Liczba dołożonych odczytów
+        """
+        dates = np.asarray(dates, dtype=str)
+        values = np.asarray(values, dtype=float)
+        with self._lock:
+            last = self.last_dates.get(name)
+            start = 0 if last is None else int(np.searchsorted(dates, last, side='right'))
+            new = np.flatnonzero(~np.isnan(values[start:])) + start
+            if len(new) == 0:
+                return 0
+            sketch = self.sketches.get(name)
+            if sketch is None:
+                sketch = self.sketches[name] = KLLSketch(self.k)
+                self.first_dates[name] = str(dates[new[0]])
+            for value in values[new].tolist():
+                sketch.update(value)
+            self.last_dates[name] = str(dates[new[-1]])
+            return len(new)
+
+    def update_indicators(self, indicators: Dict) -> int:
+        """Wszystkie serie z get_all_indicators() - nowe odczyty i zapis stanu (gdy były)"""
+        added = 0
+        for name, data in indicators.items():
+            df = data.get('data')
+            if df is None or df.empty:
+                continue
+            added += self.update(name, df['date'].dt.strftime('%Y-%m-%d').to_numpy(), df['value'].to_numpy(dtype=float))
+        if added:
+            self.save()
+        return added
+
+    def merge(self, other: 'SketchStore'):
+        """Dokłada szkice innego magazynu (np. innego procesu) - odczyty muszą być rozłączne"""
+        with self._lock:
+            for name, sketch in other.sketches.items():
+                if name in self.sketches:
+                    self.sketches[name].merge(sketch)
+                    self.first_dates[name] = min(self.first_dates[name], other.first_dates[name])
+                    self.last_dates[name] = max(self.last_dates[name], other.last_dates[name])
+                else:
+                    self.sketches[name] = KLLSketch.from_dict(sketch.to_dict())
+                    self.first_dates[name] = other.first_dates[name]
+                    self.last_dates[name] = other.last_dates[name]
+
+    def summary(self, name: str, current: float) -> Optional[Dict]:
+        """Percentyl current względem wszystkich odczytów w szkicu (None, gdy serii nie ma)"""
+        with self._lock:
+            sketch = self.sketches.get(name)
+            if sketch is None or sketch.n == 0:
+                return None
+            return {
+                'percentile': sketch.rank(float(current)) * 100,
+                'count': sketch.n,
+                'since': self.first_dates[name],
+                'error': rank_error(sketch.k) * 100,  # Punkty procentowe (99% ufności)
+                'min': sketch.min,
+                'max': sketch.max,
+            }
+
+    def version(self) -> tuple:
+        """Stan szkiców do wersji analizy - zmienia się z każdym dołożonym odczytem"""
+        with self._lock:
+            return tuple(sorted((name, sketch.n, self.last_dates[name]) for name, sketch in self.sketches.items()))
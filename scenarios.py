@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Scenarios - "co się stanie z oceną, jeśli...?" dla wielu scenariuszy naraz
+
+Scenariusz to zestaw szoków wskaźników nałożonych na bieżące dane:
+
+    {'name': 'VIX 35, rezerwy -200B', 'shocks': {'vix': 35, 'reserves': {'delta': -200}}}
+
+Szok jednego wskaźnika:
+    35 albo {'value': 35}   - wartość bezwzględna
+    {'delta': -200}         - zmiana o tyle jednostek wskaźnika
+    {'pct': -10}            - zmiana procentowa
+    {'change_7d': 40}       - (dodatkowo) nadpisz zmianę tygodniową
+
+Szok poziomu traktowany jest jak ruch "w tym tygodniu" - przesuwa też
+change_7d. Szok składnika przesuwa liniowe serie pochodne z rejestru monitora
+(spready SOFR/EFFR-IORB, net liquidity), chyba że seria pochodna też jest
+szokowana wprost.
+
+Wszystkie scenariusze liczone są jednym wywołaniem ScoringModel (NumPy):
+ocena, reżim, ocena ważona, alerty i wzorce korelacji - te same reguły co
+analyze_liquidity_conditions, bez kopiowania słownika wskaźników.
+
+Użycie:
+    engine = ScenarioEngine(monitor, indicators)
+    results = engine.run([{'vix': 35, 'reserves': {'delta': -200}}, {'hy_spread': {'pct': 50}}])
+    grid = engine.grid('vix', [15, 25, 35], 'reserves', [-400, -200, 0], y_mode='delta')
+"""
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from scoring import PATTERN_RULES, REGIMES, RULE_ALERTS, ScoringModel
+
+
+SHOCK_MODES = ('value', 'delta', 'pct', 'change_7d')
+
+
+def _parse_shock(spec: Union[float, Dict]) -> Dict[str, float]:
+    if isinstance(spec, (int, float, np.number)):
+        return {'value': float(spec)}
+    if not isinstance(spec, dict) or not spec or set(spec) - set(SHOCK_MODES):
+        raise ValueError(f"Niepoprawny szok: {spec!r} (dozwolone: liczba albo {', '.join(SHOCK_MODES)})")
+    if sum(mode in spec for mode in ('value', 'delta', 'pct')) > 1:
+        raise ValueError(f"Szok moze miec tylko jedno z value / delta / pct: {spec!r}")
+    return {mode: float(value) for mode, value in spec.items()}
+
+
+class ScenarioEngine:
+    """
+    Scenariusze what-if nad jednym zestawem bieżących wskaźników
+
+    Args:
+        monitor: LiquidityMonitor (progi i wagi)
+        indicators: Wynik get_all_indicators() - punkt wyjścia dla szoków
+    """
+
+    def __init__(self, monitor, indicators: Dict):
+        self.model = ScoringModel(monitor.thresholds, monitor.indicator_weights)
+        self.base = self.model.feature_vector(indicators)
+        self.current = {name: float(data['current']) for name, data in indicators.items()}
+        self.column = {feature: i for i, feature in enumerate(self.model.features)}
+
+        # Liniowe serie pochodne (w kolejności zależności) - przesuwane razem ze składnikami
+        self.linear = monitor.derived.linear()
+        self.known = set(self.current) | {name for name, _field in self.model.features}
+        for definition in self.linear:
+            self.known.add(definition.name)
+            self.known.update(definition.inputs)
+
+        # Nazwy alertów w kolejności model.alert_rules + konflikty (alerty 'Korelacje')
+        self.alert_labels = [RULE_ALERTS[self.model.rule_names[i]] for i in self.model.alert_rules]
+        self.conflicts = np.array([k for k, p in enumerate(PATTERN_RULES) if p[1] == 'conflicts'], dtype=int)
+
+    def _base_current(self, name: str) -> float:
+        column = self.column.get((name, 'current'))
+        return self.base[column] if column is not None else self.current.get(name, np.nan)
+
+    def features(self, shocks: Dict[str, Dict[str, np.ndarray]], n: int) -> np.ndarray:
+        """
+        Macierz cech (N x F) po nałożeniu szoków
+
+        Args:
+            shocks: {wskaźnik: {tryb: tablica (N,)}} - NaN = brak szoku w danym scenariuszu
+            n: Liczba scenariuszy
+        """
+        X = np.repeat(self.base[None, :], n, axis=0)
+        moved = {}
+
+        for name, modes in shocks.items():
+            if name not in self.known:
+                raise ValueError(f"Nieznany wskaznik: {name}")
+            base = self._base_current(name)
+            nan = np.full(n, np.nan)
+            value, delta, pct = (modes.get(mode, nan) for mode in ('value', 'delta', 'pct'))
+
+            new = np.where(~np.isnan(value), value,
+                           np.where(~np.isnan(delta), base + delta,
+                                    np.where(~np.isnan(pct), base * (1 + pct / 100), base)))
+            with np.errstate(invalid='ignore'):
+                moved[name] = np.where(np.isnan(new - base), 0.0, new - base)
+
+            if (name, 'current') in self.column:
+                X[:, self.column[(name, 'current')]] = new
+            if (name, 'change_7d') in self.column:
+                column = self.column[(name, 'change_7d')]
+                change = X[:, column] + moved[name]
+                override = modes.get('change_7d', nan)
+                X[:, column] = np.where(~np.isnan(override), override, change)
+
+        for definition in self.linear:
+            if not any(name in moved for name in definition.inputs):
+                continue
+            shift = sum(weight * moved.get(name, 0.0) for name, weight in zip(definition.inputs, definition.weights))
+            # Seria szokowana wprost w danym scenariuszu ma pierwszeństwo
+            direct = np.zeros(n, dtype=bool)
+            for values in shocks.get(definition.name, {}).values():
+                direct |= ~np.isnan(values)
+            shift = np.where(direct, 0.0, shift)
+            moved[definition.name] = moved.get(definition.name, 0.0) + shift
+            for field in ('current', 'change_7d'):
+                if (definition.name, field) in self.column:
+                    X[:, self.column[(definition.name, field)]] += shift
+
+        return X
+
+    def evaluate(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Ocena wszystkich scenariuszy naraz - tablice (N,) i maski reguł / wzorców"""
+        fired = self.model.fired(X)
+        patterns = self.model.patterns(X)
+        adjustment = self.model.pattern_adjustment(patterns)
+        points = self.model.raw_score(fired)
+        regime = self.model.regime(X)
+        return {
+            'score': self.model.final_score(points, regime, adjustment),
+            'raw_score': points + adjustment,
+            'weighted_score': self.model.weighted_score(fired, self.model.present(X)),
+            'regime': regime,
+            'alerts': fired[:, self.model.alert_rules],
+            'patterns': patterns,
+        }
+
+    def _frame(self, result: Dict[str, np.ndarray], columns: Dict[str, Sequence]) -> pd.DataFrame:
+        alert_hits = result['alerts']
+        conflict_hits = result['patterns'][:, self.conflicts]
+
+        alerts, patterns = [], []
+        for i in range(len(result['score'])):
+            entries = [{'severity': severity, 'indicator': indicator}
+                       for (severity, indicator), hit in zip(self.alert_labels, alert_hits[i]) if hit]
+            entries += [{'severity': PATTERN_RULES[k][2], 'indicator': 'Korelacje', 'pattern': PATTERN_RULES[k][0]}
+                        for k, hit in zip(self.conflicts, conflict_hits[i]) if hit]
+            alerts.append(entries)
+            patterns.append([name for name, hit in zip(self.model.pattern_names, result['patterns'][i]) if hit])
+
+        frame = pd.DataFrame(columns)
+        frame['score'] = result['score']
+        frame['raw_score'] = result['raw_score']
+        frame['weighted_score'] = result['weighted_score'].round(1)
+        frame['regime'] = [REGIMES[r] for r in result['regime']]
+        frame['alerts'] = alerts
+        frame['critical_alerts'] = [sum(a['severity'] == 'critical' for a in entry) for entry in alerts]
+        frame['patterns'] = patterns
+        return frame
+
+    def run(self, scenarios: List[Dict]) -> pd.DataFrame:
+        """
+        Lista scenariuszy -> ramka z wynikiem każdego z nich
+
+        Args:
+            scenarios: [{'name': ..., 'shocks': {wskaźnik: szok}}] albo same słowniki szoków.
+                       Pusty słownik = stan bieżący (do porównania).
+
+        Returns:
+            DataFrame: scenario, score, raw_score, weighted_score, regime, alerts,
+            critical_alerts, patterns
+        """
+        n = len(scenarios)
+        shocks: Dict[str, Dict[str, np.ndarray]] = {}
+        names = []
+
+        for i, scenario in enumerate(scenarios):
+            if 'shocks' in scenario:
+                spec, name = scenario['shocks'], scenario.get('name')
+            else:
+                spec, name = scenario, None
+            for indicator, shock in spec.items():
+                for mode, value in _parse_shock(shock).items():
+                    shocks.setdefault(indicator, {}).setdefault(mode, np.full(n, np.nan))[i] = value
+            names.append(name or (', '.join(f"{k}: {v}" for k, v in spec.items()) or 'bieżący'))
+
+        result = self.evaluate(self.features(shocks, n))
+        return self._frame(result, {'scenario': names})
+
+    def grid(self, x: str, x_values: Sequence[float], y: Optional[str] = None,
+             y_values: Sequence[float] = (0,), x_mode: str = 'value', y_mode: str = 'value') -> pd.DataFrame:
+        """
+        Siatka scenariuszy: każda wartość x z każdą wartością y
+
+        Args:
+            x, y: Wskaźniki na osiach (y opcjonalny - wtedy siatka 1D)
+            x_values, y_values: Wartości szoków
+            x_mode, y_mode: 'value' / 'delta' / 'pct'
+
+        Returns:
+            DataFrame w formacie długim (kolumny x i y + wyniki) -
+            np. grid.pivot(index=y, columns=x, values='score')
+        """
+        for mode in (x_mode, y_mode):
+            if mode not in ('value', 'delta', 'pct'):
+                raise ValueError(f"Niepoprawny tryb szoku: {mode}")
+
+        xs, ys = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+        xs, ys = xs.ravel(), ys.ravel()
+        shocks = {x: {x_mode: xs}}
+        if y is not None:
+            if y == x:
+                raise ValueError("Osie siatki musza dotyczyc roznych wskaznikow")
+            shocks[y] = {y_mode: ys}
+
+        result = self.evaluate(self.features(shocks, len(xs)))
+        columns = {x: xs}
+        if y is not None:
+            columns[y] = ys
+        return self._frame(result, columns)
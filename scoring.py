@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Scoring - deklaratywna tabela reguł punktacji i wektorowa ocena w NumPy
+
+Tabela reguł jest jedynym źródłem punktacji: LiquidityMonitor.analyze_liquidity_conditions
+ocenia ją dla bieżących wskaźników (punkty + komunikaty z RULE_MESSAGES), a ten
+sam kod ocenia tysiące scenariuszy naraz (inne progi, inne wagi, inne wartości)
+- bez pętli w Pythonie.
+
+Dodatkowo liczona jest ocena WAŻONA wg LiquidityMonitor.indicator_weights:
+każdy wskaźnik dostaje -100..+100 (punkty z reguł / maksymalne możliwe
+punkty wskaźnika), a wynik to średnia ważona po dostępnych wskaźnikach.
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+# (wskaźnik, pole, operator, próg - klucz z monitor.thresholds albo liczba, punkty)
+# Reguły w jednej grupie to łańcuch if/elif - liczy się pierwsza spełniona.
+SCORING_RULES: List[List[Tuple[str, str, str, Union[str, float], float]]] = [
+    # 1. Rezerwy banków
+    [('reserves', 'current', '>', 'reserves_comfortable', 30),
+     ('reserves', 'current', '<', 'reserves_minimum', -40)],
+    [('reserves', 'change_7d', '<', -50, -20)],
+    # 2. TGA
+    [('tga', 'change_7d', '>', 50, -15),
+     ('tga', 'change_7d', '<', -50, 15)],
+    # 3. SOFR-IORB spread
+    [('sofr_iorb_spread', 'current', '>', 'sofr_iorb_spread_critical', -40),
+     ('sofr_iorb_spread', 'current', '>', 'sofr_iorb_spread_warning', -25),
+     ('sofr_iorb_spread', 'current', '<', 0.10, 15)],
+    [('sofr_iorb_spread', 'change_7d', '>', 0.05, -10)],
+    # 4. Reverse Repo
+    [('reverse_repo', 'current', '<', 100, -10),
+     ('reverse_repo', 'current', '>', 500, 10)],
+    # 5. Bilans Fed
+    [('fed_balance', 'change_7d', '<', -20, -10),
+     ('fed_balance', 'change_7d', '>', 20, 15)],
+    # 6. Krzywa dochodowości
+    [('yield_curve', 'current', '<', 'yield_curve_inverted', -30),
+     ('yield_curve', 'current', '<', 0.25, -15),
+     ('yield_curve', 'current', '>', 'yield_curve_steep', 15)],
+    # 7. VIX
+    [('vix', 'current', '>', 'vix_fear', -25),
+     ('vix', 'current', '<', 'vix_greed', 10)],
+    [('vix', 'change_7d', '>', 5, -10)],
+    # 8. NFCI
+    [('fin_conditions', 'current', '>', 'nfci_tight', -20),
+     ('fin_conditions', 'current', '<', 'nfci_loose', 20)],
+    # 9. Dollar Index
+    [('dollar_index', 'current', '>', 'dollar_strong', -10),
+     ('dollar_index', 'current', '<', 'dollar_weak', 10)],
+    [('dollar_index', 'change_7d', '>', 2, -5)],
+    # 10. M2
+    [('m2', 'change_7d', '<', -100, -10),
+     ('m2', 'change_7d', '>', 100, 10)],
+    # 11. 10Y Treasury
+    [('treasury_10y', 'current', '>', 'treasury_10y_high', -15),
+     ('treasury_10y', 'current', '<', 'treasury_10y_low', 10)],
+    # 12. High Yield spread
+    [('hy_spread', 'current', '>', 'hy_spread_high', -20),
+     ('hy_spread', 'current', '<', 3.0, 5)],
+    # 13. Inflacja 5Y
+    [('inflation_5y', 'current', '>', 'inflation_high', -10),
+     ('inflation_5y', 'current', '<', 'inflation_low', -5)],
+    # 14. Bezrobocie
+    [('unemployment', 'current', '>', 'unemployment_high', -15),
+     ('unemployment', 'current', '<', 'unemployment_low', 10)],
+    # 15. Net liquidity
+    [('net_liquidity', 'change_7d', '<', 'net_liquidity_drain', -15),
+     ('net_liquidity', 'change_7d', '>', 'net_liquidity_injection', 15)],
+]
+
+# Komunikat reguły: nazwa reguły -> (rodzaj, wskaźnik, szablon treści - {value} = wartość cechy reguły).
+# Rodzaj 'critical' / 'warning' = alert, 'positive' / 'negative' / 'neutral' = sygnał.
+RULE_MESSAGES: Dict[str, Tuple[str, str, str]] = {
+    'reserves.current > reserves_comfortable':
+        ('positive', 'Rezerwy banków', 'Wysokie rezerwy: ${value:.0f}B - system luźny'),
+    'reserves.current < reserves_minimum':
+        ('critical', 'Rezerwy bankow', '[CRITICAL] REZERWY NISKIE: ${value:.0f}B - ryzyko napiec'),
+    'reserves.change_7d < -50':
+        ('warning', 'Rezerwy banków', 'Szybki spadek rezerw: {value:.0f}B/tydzień'),
+    'tga.change_7d > 50':
+        ('negative', 'TGA', 'TGA rośnie (+${value:.0f}B) - drenuje płynność'),
+    'tga.change_7d < -50':
+        ('positive', 'TGA', 'TGA spada ({value:.0f}B) - dodaje płynność'),
+    'sofr_iorb_spread.current > sofr_iorb_spread_critical':
+        ('critical', 'SOFR-IORB Spread',
+         '🚨 REPO STRESS! SOFR-IORB: {value:.3f}% - Kryzys płynności! Hedge funds pod presją!'),
+    'sofr_iorb_spread.current > sofr_iorb_spread_warning':
+        ('warning', 'SOFR-IORB Spread',
+         '⚠️ UWAGA! SOFR-IORB: {value:.3f}% - Rosnące koszty lewara. Basis trade zagrożony!'),
+    'sofr_iorb_spread.current < 0.1':
+        ('positive', 'SOFR-IORB Spread', '✅ SOFR stabilny ({value:.3f}%) - Płynność OK, tani lewar'),
+    'sofr_iorb_spread.change_7d > 0.05':
+        ('warning', 'SOFR-IORB Trend', '📈 SOFR spread rośnie szybko: +{value:.3f}% w tydzień'),
+    'reverse_repo.current < 100':
+        ('neutral', 'Reverse Repo', 'RRP bardzo niskie: ${value:.0f}B - brak bufora'),
+    'reverse_repo.current > 500':
+        ('positive', 'Reverse Repo', 'RRP wysoki: ${value:.0f}B - jest bufor płynności'),
+    'fed_balance.change_7d < -20':
+        ('negative', 'Bilans Fed', 'QT aktywne: {value:.0f}B/tydzień'),
+    'fed_balance.change_7d > 20':
+        ('positive', 'Bilans Fed', 'Fed zwieksza bilans: +{value:.0f}B/tydzien'),
+    'yield_curve.current < yield_curve_inverted':
+        ('critical', 'Krzywa dochodowosci', '[CRITICAL] KRZYWA ODWROCONA: {value:.2f}% - Ryzyko recesji!'),
+    'yield_curve.current < 0.25':
+        ('negative', 'Krzywa dochodowosci', 'Krzywa plaska: {value:.2f}% - Spowolnienie wzrostu'),
+    'yield_curve.current > yield_curve_steep':
+        ('positive', 'Krzywa dochodowosci', 'Krzywa stroma: {value:.2f}% - Ekspansja gospodarcza'),
+    'vix.current > vix_fear':
+        ('warning', 'VIX', '[WARN] VIX wysoki: {value:.1f} - Panika na rynku!'),
+    'vix.current < vix_greed':
+        ('positive', 'VIX', 'VIX niski: {value:.1f} - Spokoj na rynku'),
+    'vix.change_7d > 5':
+        ('negative', 'VIX', 'VIX gwaltownie rosnie: +{value:.1f}'),
+    'fin_conditions.current > nfci_tight':
+        ('warning', 'Warunki finansowe', '[WARN] NFCI dodatni: {value:.2f} - Napięcia finansowe'),
+    'fin_conditions.current < nfci_loose':
+        ('positive', 'Warunki finansowe', 'NFCI bardzo ujemny: {value:.2f} - Luźne warunki'),
+    'dollar_index.current > dollar_strong':
+        ('negative', 'Dollar Index', 'DXY bardzo wysoki: {value:.1f} - Silny dolar zabiera plynnosc'),
+    'dollar_index.current < dollar_weak':
+        ('positive', 'Dollar Index', 'DXY niski: {value:.1f} - Slaby dolar dodaje plynnosc'),
+    'dollar_index.change_7d > 2':
+        ('negative', 'Dollar Index', 'DXY gwaltownie rosnie: +{value:.1f}'),
+    'm2.change_7d < -100':
+        ('negative', 'M2 Money Supply', 'M2 spada: {value:.0f}B - Kurczy sie podaz pieniadza'),
+    'm2.change_7d > 100':
+        ('positive', 'M2 Money Supply', 'M2 rosnie: +{value:.0f}B - Wzrost podazy pieniadza'),
+    'treasury_10y.current > treasury_10y_high':
+        ('negative', '10Y Treasury', '10Y wysoko: {value:.2f}% - Wysokie koszty dlugu'),
+    'treasury_10y.current < treasury_10y_low':
+        ('positive', '10Y Treasury', '10Y nisko: {value:.2f}% - Tanie finansowanie'),
+    'hy_spread.current > hy_spread_high':
+        ('warning', 'High Yield Spread', '[WARN] HY Spread wysoki: {value:.2f}% - Strach o kredyt!'),
+    'hy_spread.current < 3.0':
+        ('positive', 'High Yield Spread', 'HY Spread niski: {value:.2f}% - Dobry apetyt na ryzyko'),
+    'inflation_5y.current > inflation_high':
+        ('negative', '5Y Inflation', 'Oczekiwana inflacja wysoka: {value:.2f}%'),
+    'inflation_5y.current < inflation_low':
+        ('neutral', '5Y Inflation', 'Oczekiwana inflacja niska: {value:.2f}% - Ryzyko deflacji?'),
+    'unemployment.current > unemployment_high':
+        ('negative', 'Unemployment', 'Bezrobocie wysokie: {value:.1f}% - Slaby rynek pracy'),
+    'unemployment.current < unemployment_low':
+        ('positive', 'Unemployment', 'Bezrobocie niskie: {value:.1f}% - Mocny rynek pracy'),
+    'net_liquidity.change_7d < net_liquidity_drain':
+        ('negative', 'Net liquidity', 'Net liquidity spada: {value:.0f}B/tydzien - odplyw plynnosci'),
+    'net_liquidity.change_7d > net_liquidity_injection':
+        ('positive', 'Net liquidity', 'Net liquidity rosnie: +{value:.0f}B/tydzien - doplyw plynnosci'),
+}
+
+ALERT_SEVERITIES = ('critical', 'warning')
+
+# Reguły, które dają alert (a nie tylko sygnał): nazwa reguły -> (ważność, wskaźnik)
+RULE_ALERTS: Dict[str, Tuple[str, str]] = {
+    name: (kind, indicator) for name, (kind, indicator, _template) in RULE_MESSAGES.items()
+    if kind in ALERT_SEVERITIES
+}
+
+# Wzorce jak w detect_correlations_and_conflicts:
+# (typ, grupa, ważność alertu - tylko konflikty, warunki, ile warunków musi być spełnionych, punkty)
+# Wskaźnik w warunku może być parą (a, b) - wtedy liczy się różnica a - b.
+PATTERN_RULES = [
+    ('paradox_panic_liquidity', 'conflicts', 'medium',
+     [('vix', 'current', '>', 25), ('reserves', 'current', '>', 3200)], 2, 10),
+    ('paradox_false_calm', 'conflicts', 'high',
+     [('vix', 'current', '<', 15), ('nfci', 'current', '>', 0.3)], 2, -15),
+    ('policy_response', 'conflicts', 'medium',
+     [('yield_curve', 'current', '<', -0.2), ('m2', 'change_7d', '>', 50)], 2, 20),
+    ('perfect_risk_on', 'reinforcements', None,
+     [('vix', 'current', '<', 15), ('nfci', 'current', '<', -0.5),
+      ('yield_curve', 'current', '>', 0.5), ('hy_spread', 'current', '<', 3.5)], 3, 15),
+    ('triple_threat', 'reinforcements', None,
+     [('vix', 'current', '>', 25), ('yield_curve', 'current', '<', -0.2),
+      ('hy_spread', 'current', '>', 5.0), ('nfci', 'current', '>', 0.5)], 3, -25),
+    ('liquidity_drain', 'compound_signals', None,
+     [('reserves', 'change_7d', '<', -30), ('tga', 'change_7d', '>', 30),
+      ('reverse_repo', 'change_7d', '<', -20), ('fed_balance', 'change_7d', '<', -15)], 2, -15),
+    ('liquidity_flood', 'compound_signals', None,
+     [('reserves', 'change_7d', '>', 30), ('tga', 'change_7d', '<', -30),
+      ('fed_balance', 'change_7d', '>', 15), ('m2', 'change_7d', '>', 100)], 2, 20),
+    ('credit_crunch', 'compound_signals', None,
+     [('hy_spread', 'current', '>', 6.0), (('sofr', 'iorb'), 'current', '>', 0.15),
+      ('nfci', 'current', '>', 0.3)], 2, -20),
+]
+
+# Warunki reżimu jak w detect_market_regime (wskaźnik 'nfci' - ten sam klucz co tam)
+CRISIS_RULES = [('vix', '>=', 30), ('yield_curve', '<=', -0.5), ('nfci', '>=', 0.5), ('hy_spread', '>=', 7.0)]
+RISK_OFF_RULES = [('vix', '>=', 20), ('nfci', '>', 0), ('yield_curve', '<', 0)]
+REGIMES = ['RISK_ON', 'RISK_OFF', 'CRISIS']
+REGIME_MULTIPLIERS = np.array([1.0, 1.3, 1.8])
+
+# Klucze wag różniące się od nazw wskaźników
+WEIGHT_ALIASES = {'nfci': 'fin_conditions'}
+
+
+class ScoringModel:
+    """
+    Skompilowana tabela reguł: tablice progów, punktów i grup
+
+    Args:
+        thresholds: Progi nazwane (LiquidityMonitor.thresholds)
+        weights: Wagi wskaźników (LiquidityMonitor.indicator_weights)
+    """
+
+    def __init__(self, thresholds: Dict[str, float], weights: Dict[str, float]):
+        rules = [(g, rule) for g, group in enumerate(SCORING_RULES) for rule in group]
+
+        self.features: List[Tuple[str, str]] = []
+        for _, (indicator, field, *_rest) in rules:
+            if (indicator, field) not in self.features:
+                self.features.append((indicator, field))
+        for indicator, *_rest in CRISIS_RULES + RISK_OFF_RULES:
+            if (indicator, 'current') not in self.features:
+                self.features.append((indicator, 'current'))
+        conditions = [c for pattern in PATTERN_RULES for c in pattern[3]]
+        for indicator, field, *_rest in conditions:
+            for name in (indicator if isinstance(indicator, tuple) else (indicator,)):
+                if (name, field) not in self.features:
+                    self.features.append((name, field))
+
+        weight_names = {WEIGHT_ALIASES.get(k, k): v for k, v in weights.items()}
+        self.indicators = sorted({r[1][0] for r in rules} | set(weight_names))
+
+        self.rule_names = [
+            f"{indicator}.{field} {op} {threshold}" for _, (indicator, field, op, threshold, _p) in rules
+        ]
+        self.rule_feature = np.array([self.features.index((r[1][0], r[1][1])) for r in rules])
+        self.rule_sign = np.array([1.0 if r[1][2] == '>' else -1.0 for r in rules])
+        self.thresholds = np.array([
+            float(thresholds[t] if isinstance(t, str) else t) for _, (_i, _f, _o, t, _p) in rules
+        ])
+        self.points = np.array([float(r[1][4]) for r in rules])
+        groups = np.array([g for g, _ in rules])
+
+        # blocked_by[a, b] = reguła a stoi wcześniej w tym samym łańcuchu if/elif co b
+        order = np.arange(len(rules))
+        self.blocked_by = ((groups[:, None] == groups[None, :]) & (order[:, None] < order[None, :])).astype(np.int32)
+
+        # Agregacja reguł -> wskaźniki i normalizacja do -100..+100
+        rule_indicator = np.array([self.indicators.index(r[1][0]) for r in rules])
+        self.rule_to_indicator = np.zeros((len(rules), len(self.indicators)))
+        self.rule_to_indicator[np.arange(len(rules)), rule_indicator] = 1.0
+
+        max_points = np.zeros(len(self.indicators))
+        for g in np.unique(groups):
+            in_group = groups == g
+            idx = rule_indicator[in_group][0]
+            max_points[idx] += np.abs(self.points[in_group]).max()
+        self.max_points = np.where(max_points > 0, max_points, 1.0)
+
+        self.weights = np.array([weight_names.get(name, 0.0) for name in self.indicators])
+
+        self.alert_rules = np.array([i for i, name in enumerate(self.rule_names) if name in RULE_ALERTS], dtype=int)
+
+        # Wzorce: cecha warunku (i cecha odejmowana dla par, -1 = brak), próg, kierunek
+        self.pattern_names = [p[0] for p in PATTERN_RULES]
+        self.pattern_points = np.array([float(p[5]) for p in PATTERN_RULES])
+        self.pattern_min_hits = np.array([p[4] for p in PATTERN_RULES])
+        condition_pattern = [k for k, p in enumerate(PATTERN_RULES) for _c in p[3]]
+        self.condition_to_pattern = np.zeros((len(conditions), len(PATTERN_RULES)), dtype=np.int32)
+        self.condition_to_pattern[np.arange(len(conditions)), condition_pattern] = 1
+        self.condition_feature = np.array([
+            self.features.index((c[0][0] if isinstance(c[0], tuple) else c[0], c[1])) for c in conditions
+        ])
+        self.condition_minus = np.array([
+            self.features.index((c[0][1], c[1])) if isinstance(c[0], tuple) else -1 for c in conditions
+        ])
+        self.condition_sign = np.array([1.0 if c[2] == '>' else -1.0 for c in conditions])
+        self.condition_threshold = np.array([float(c[3]) for c in conditions])
+
+        # Skala zaburzeń progu: |próg|, a dla progu 0 - największy |próg| tego samego wskaźnika
+        scale = np.abs(self.thresholds)
+        for i in range(len(rules)):
+            if scale[i] == 0:
+                same = (rule_indicator == rule_indicator[i]) & (np.abs(self.thresholds) > 0)
+                scale[i] = np.abs(self.thresholds[same]).max() if same.any() else 1.0
+        self.threshold_scale = scale
+
+    def feature_vector(self, indicators: Dict) -> np.ndarray:
+        """Wartości cech (NaN gdy wskaźnika brak - reguła wtedy nie działa, jak `if x in indicators`)"""
+        return np.array([
+            float(indicators[name][field]) if name in indicators else np.nan
+            for name, field in self.features
+        ])
+
+    def fired(self, X: np.ndarray, thresholds: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Które reguły zadziałały (N x R, bool) - z semantyką łańcuchów if/elif
+
+        Args:
+            X: Cechy (N x F) albo (F,)
+            thresholds: Progi (N x R) albo (R,) - domyślnie bazowe
+        """
+        X = np.atleast_2d(X)
+        thresholds = self.thresholds if thresholds is None else thresholds
+        values = X[:, self.rule_feature]
+        with np.errstate(invalid='ignore'):
+            hits = (values - thresholds) * self.rule_sign > 0
+        earlier = hits.astype(np.int32) @ self.blocked_by
+        return hits & (earlier == 0)
+
+    def raw_score(self, fired: np.ndarray) -> np.ndarray:
+        """Suma punktów reguł (odpowiada `score` przed korektą z korelacji)"""
+        return fired @ self.points
+
+    def indicator_scores(self, fired: np.ndarray) -> np.ndarray:
+        """Ocena każdego wskaźnika -100..+100 (N x I)"""
+        return (fired * self.points) @ self.rule_to_indicator / self.max_points * 100
+
+    def present(self, X: np.ndarray) -> np.ndarray:
+        """Które wskaźniki są dostępne (N x I) - wskaźnik jest, jeśli ma jakąkolwiek cechę"""
+        X = np.atleast_2d(X)
+        mask = np.zeros((X.shape[0], len(self.indicators)), dtype=bool)
+        for f, (name, _field) in enumerate(self.features):
+            if name in self.indicators:
+                mask[:, self.indicators.index(name)] |= ~np.isnan(X[:, f])
+        return mask
+
+    def weighted_score(self, fired: np.ndarray, present: np.ndarray,
+                       weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Średnia ważona ocen wskaźników (-100..+100), wagi renormalizowane do dostępnych wskaźników"""
+        weights = self.weights if weights is None else weights
+        w = np.where(present, weights, 0.0)
+        total = w.sum(axis=-1)
+        return np.where(total > 0, (self.indicator_scores(fired) * w).sum(axis=-1) / np.where(total > 0, total, 1), 0.0)
+
+    def regime(self, X: np.ndarray, regime_shift: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reżim dla każdego scenariusza: 0 = RISK_ON, 1 = RISK_OFF, 2 = CRISIS
+
+        Args:
+            regime_shift: Przesunięcia progów reżimu (N x len(CRISIS_RULES + RISK_OFF_RULES))
+        """
+        X = np.atleast_2d(X)
+        rules = CRISIS_RULES + RISK_OFF_RULES
+        shift = np.zeros((1, len(rules))) if regime_shift is None else np.atleast_2d(regime_shift)
+
+        hits = np.zeros((X.shape[0], len(rules)), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for k, (name, op, threshold) in enumerate(rules):
+                x = X[:, self.features.index((name, 'current'))]
+                t = threshold + shift[:, k]
+                hits[:, k] = {'>=': x >= t, '<=': x <= t, '>': x > t, '<': x < t}[op]
+
+        # Górne granice RISK-OFF (VIX < 30, krzywa > -0.5) wynikają z tego, że kryzys sprawdzany jest pierwszy
+        crisis = hits[:, :len(CRISIS_RULES)].any(axis=1)
+        risk_off = hits[:, len(CRISIS_RULES):].any(axis=1)
+        return np.where(crisis, 2, np.where(risk_off, 1, 0))
+
+    def patterns(self, X: np.ndarray) -> np.ndarray:
+        """Które wzorce z PATTERN_RULES wystąpiły (N x P, bool)"""
+        X = np.atleast_2d(X)
+        values = X[:, self.condition_feature]
+        paired = self.condition_minus >= 0
+        values[:, paired] = values[:, paired] - X[:, self.condition_minus[paired]]
+        with np.errstate(invalid='ignore'):
+            hits = (values - self.condition_threshold) * self.condition_sign > 0
+        return hits.astype(np.int32) @ self.condition_to_pattern >= self.pattern_min_hits
+
+    def pattern_adjustment(self, patterns: np.ndarray) -> np.ndarray:
+        """Korekta z korelacji (odpowiada patterns['score_adjustments'])"""
+        return patterns @ self.pattern_points
+
+    def final_score(self, raw: np.ndarray, regime: np.ndarray,
+                    adjustment: Union[float, np.ndarray] = 0.0) -> np.ndarray:
+        """Ocena końcowa jak overall_score: + korekta z korelacji, mnożnik reżimu dla ujemnych, clip"""
+        score = raw + adjustment
+        adjusted = np.where(score < 0, score * REGIME_MULTIPLIERS[regime], score)
+        return np.clip(adjusted, -100, 100)
+
+
+def weighted_breakdown(model: ScoringModel, indicators: Dict) -> Tuple[float, Dict[str, Dict]]:
+    """
+    Ocena ważona jednego zestawu wskaźników + rozbicie na wskaźniki
+
+    Returns:
+        (weighted_score, {wskaźnik: {score, weight, contribution}})
+    """
+    x = model.feature_vector(indicators)
+    fired = model.fired(x)
+    present = model.present(x)[0]
+    scores = model.indicator_scores(fired)[0]
+
+    w = np.where(present, model.weights, 0.0)
+    total = w.sum()
+    breakdown = {}
+    for i, name in enumerate(model.indicators):
+        if present[i] and model.weights[i] > 0:
+            weight = w[i] / total
+            breakdown[name] = {
+                'score': float(scores[i]),
+                'weight': float(weight),
+                'contribution': float(scores[i] * weight),
+            }
+    return float(model.weighted_score(fired, present[None, :])[0]), breakdown
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Sensitivity - jak stabilna jest ocena i reżim przy innych wagach i progach
+
+Monte Carlo: tysiące scenariuszy z losowo zaburzonymi wagami wskaźników,
+progami reguł punktacji i progami reżimu, ocenianych naraz w NumPy przez
+ScoringModel. Odpowiada na pytania: "czy wynik -35 to solidny sygnał, czy
+przypadek progu?" i "które progi najbardziej przesuwają ocenę?".
+
+Użycie:
+    report = analyze_sensitivity(monitor, indicators, analysis, n=10000)
+    print_sensitivity(report)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from scoring import CRISIS_RULES, REGIMES, RISK_OFF_RULES, ScoringModel
+
+
+def _bucket(score: np.ndarray) -> np.ndarray:
+    """Przedział interpretacji jak w analyze_liquidity_conditions (>40, >0, >-40, reszta)"""
+    return np.digitize(score, [-40, 0, 40], right=True)
+
+
+def simulate(model: ScoringModel, x: np.ndarray, adjustment: float, n: int,
+             weight_sigma: float = 0.25, threshold_sigma: float = 0.10,
+             regime_sigma: float = 0.10, seed=None) -> Dict[str, np.ndarray]:
+    """
+    Jedna paczka scenariuszy (wszystko wektorowo, bez pętli po scenariuszach)
+
+    Args:
+        model: Skompilowane reguły
+        x: Cechy bieżących wskaźników (F,)
+        adjustment: Korekta z korelacji (patterns['score_adjustments'])
+        n: Liczba scenariuszy
+        weight_sigma: Odchylenie log-normalnego mnożnika wag
+        threshold_sigma: Odchylenie progu jako ułamek jego skali
+        regime_sigma: Odchylenie progów reżimu jako ułamek ich wartości (min. 0.25)
+        seed: Ziarno / SeedSequence
+    """
+    rng = np.random.default_rng(seed)
+
+    weights = model.weights * rng.lognormal(0.0, weight_sigma, (n, len(model.weights)))
+    threshold_noise = rng.standard_normal((n, len(model.thresholds)))
+    thresholds = model.thresholds + threshold_noise * threshold_sigma * model.threshold_scale
+
+    regime_base = np.array([abs(t) for _, _, t in CRISIS_RULES + RISK_OFF_RULES])
+    regime_noise = rng.standard_normal((n, len(regime_base)))
+    regime_shift = regime_noise * regime_sigma * np.maximum(regime_base, 0.25)
+
+    X = np.broadcast_to(x, (n, len(x)))
+    fired = model.fired(X, thresholds)
+    present = model.present(x[None, :])
+    regime = model.regime(X, regime_shift)
+
+    return {
+        'score': model.final_score(model.raw_score(fired), regime, adjustment),
+        'weighted': model.weighted_score(fired, present, weights),
+        'regime': regime,
+        'threshold_noise': threshold_noise,
+        'weight_noise': np.log(weights / np.where(model.weights > 0, model.weights, 1)),
+    }
+
+
+def _moments(noise: np.ndarray, target: np.ndarray):
+    """Sumy potrzebne do korelacji - paczki z różnych procesów da się po prostu dodać"""
+    return np.array([
+        np.full(noise.shape[1], len(target)), noise.sum(axis=0), (noise ** 2).sum(axis=0),
+        np.full(noise.shape[1], target.sum()), np.full(noise.shape[1], (target ** 2).sum()),
+        noise.T @ target,
+    ])
+
+
+def _correlation(moments: np.ndarray) -> np.ndarray:
+    n, sx, sxx, sy, syy, sxy = moments
+    cov = sxy - sx * sy / n
+    denom = np.sqrt(np.maximum(sxx - sx ** 2 / n, 0) * np.maximum(syy - sy ** 2 / n, 0))
+    return np.divide(cov, denom, out=np.zeros_like(cov), where=denom > 0)
+
+
+def _simulate_chunk(args):
+    """
+    Paczka scenariuszy zredukowana do wyników i sum korelacji
+
+    Funkcja modułu (musi dać się zpicklować dla procesów); macierze zaburzeń
+    nie wracają do procesu głównego - tylko ich sumy.
+    """
+    thresholds, weights, x, adjustment, n, sigmas, seed = args
+    result = simulate(ScoringModel(thresholds, weights), x, adjustment, n, *sigmas, seed=seed)
+    return {
+        'score': result['score'],
+        'weighted': result['weighted'],
+        'regime': result['regime'],
+        'threshold_moments': _moments(result['threshold_noise'], result['score']),
+        'weight_moments': _moments(result['weight_noise'], result['weighted']),
+    }
+
+
+def _summary(values: np.ndarray, base: float) -> Dict:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        'base': float(base),
+        'mean': float(values.mean()),
+        'std': float(values.std()),
+        'p5': float(p5),
+        'median': float(p50),
+        'p95': float(p95),
+    }
+
+
+def analyze_sensitivity(monitor, indicators: Dict, analysis: Dict, n: int = 10000,
+                        weight_sigma: float = 0.25, threshold_sigma: float = 0.10,
+                        regime_sigma: float = 0.10, workers: int = 1,
+                        seed: Optional[int] = None) -> Dict:
+    """
+    Raport stabilności oceny, oceny ważonej i reżimu
+
+    Args:
+        monitor: LiquidityMonitor (progi i wagi)
+        indicators: Wynik get_all_indicators()
+        analysis: Wynik analyze_liquidity_conditions() dla tych wskaźników
+        n: Liczba scenariuszy
+        workers: >1 = rozdziel paczki na procesy (tylko przy wielu rdzeniach i setkach
+                 tysięcy scenariuszy - 10k liczy się w ~50 ms w jednym procesie)
+        seed: Ziarno dla powtarzalności
+
+    Returns:
+        Dict: score / weighted_score (rozkład), regime (udziały), stabilność
+        przedziału interpretacji i najbardziej wpływowe progi i wagi
+    """
+    model = ScoringModel(monitor.thresholds, monitor.indicator_weights)
+    x = model.feature_vector(indicators)
+    adjustment = float(analysis.get('patterns', {}).get('score_adjustments', 0))
+    sigmas = (weight_sigma, threshold_sigma, regime_sigma)
+
+    jobs = [(monitor.thresholds, monitor.indicator_weights, x, adjustment, n, sigmas, seed)]
+    if workers > 1:
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        sizes = [n // workers + (1 if i < n % workers else 0) for i in range(workers)]
+        jobs = [job[:4] + (size, sigmas, s) for job, size, s in zip(jobs * workers, sizes, seeds)]
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as pool:
+            parts = list(pool.map(_simulate_chunk, jobs))
+    else:
+        parts = [_simulate_chunk(jobs[0])]
+
+    result = {key: np.concatenate([p[key] for p in parts]) for key in ('score', 'weighted', 'regime')}
+    threshold_corr = _correlation(sum(p['threshold_moments'] for p in parts))
+    weight_corr = _correlation(sum(p['weight_moments'] for p in parts))
+
+    base_score = float(analysis['overall_score'])
+    base_regime = REGIMES.index(analysis.get('market_regime', {}).get('regime', 'RISK_ON'))
+    base_weighted = analysis.get('weighted_score')
+    if base_weighted is None:
+        fired = model.fired(x)
+        base_weighted = float(model.weighted_score(fired, model.present(x[None, :]))[0])
+
+    # Wpływ parametrów: korelacja zaburzenia z oceną
+    def influence(corr: np.ndarray, names) -> Dict[str, float]:
+        top = np.argsort(-np.abs(corr))[:5]
+        return {names[i]: round(float(corr[i]), 3) for i in top if abs(corr[i]) > 0.01}
+
+    regime_counts = np.bincount(result['regime'], minlength=len(REGIMES)) / n
+
+    return {
+        'scenarios': n,
+        'score': _summary(result['score'], base_score),
+        'weighted_score': _summary(result['weighted'], base_weighted),
+        'score_band_stability': float((_bucket(result['score']) == _bucket(np.array([base_score]))[0]).mean()),
+        'regime': {
+            'base': REGIMES[base_regime],
+            'stability': float(regime_counts[base_regime]),
+            'distribution': {name: float(share) for name, share in zip(REGIMES, regime_counts)},
+        },
+        'sensitive_thresholds': influence(threshold_corr, model.rule_names),
+        'sensitive_weights': influence(weight_corr, model.indicators),
+    }
+
+
+def print_sensitivity(report: Dict):
+    """Wyświetla raport stabilności w terminalu"""
+    score = report['score']
+    weighted = report['weighted_score']
+    regime = report['regime']
+
+    print("\n" + "="*80)
+    print(f"[SENSITIVITY] {report['scenarios']} scenariuszy (wagi, progi, rezim)")
+    print("="*80)
+    print(f"Ocena:        {score['base']:+.0f}  (p5 {score['p5']:+.0f} / mediana {score['median']:+.0f} "
+          f"/ p95 {score['p95']:+.0f})")
+    print(f"   Ten sam przedzial interpretacji: {report['score_band_stability']:.0%}")
+    print(f"Ocena wazona: {weighted['base']:+.1f}  (p5 {weighted['p5']:+.1f} / p95 {weighted['p95']:+.1f})")
+    print(f"Rezim:        {regime['base']} w {regime['stability']:.0%} scenariuszy  "
+          + ", ".join(f"{k}: {v:.0%}" for k, v in regime['distribution'].items()))
+
+    if report['sensitive_thresholds']:
+        print("\nNajbardziej wplywowe progi:")
+        for name, corr in report['sensitive_thresholds'].items():
+            print(f"   {name:45s} {corr:+.2f}")
+    if report['sensitive_weights']:
+        print("\nNajbardziej wplywowe wagi:")
+        for name, corr in report['sensitive_weights'].items():
+            print(f"   {name:45s} {corr:+.2f}")
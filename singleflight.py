@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Single-flight - łączenie identycznych, równoległych zapytań
+
+Gdy kilka sesji Streamlit (albo CLI i aplikacja) jednocześnie nie trafi w
+cache, każda wołałaby FRED o tę samą serię. Tutaj pierwsze wywołanie dla
+danego klucza ("lider") robi zapytanie, a pozostałe czekają na jego wynik.
+
+Opcjonalnie działa też między procesami: lider zakłada plik-blokadę w
+katalogu `lock_dir` i zapisuje wynik obok, a inne procesy czekają na
+zwolnienie blokady i czytają gotowy wynik. Wynik idzie na dysk tylko jako
+dane (krotka tablic NumPy -> .npz bez pickle, reszta -> JSON), więc plik
+podrzucony do katalogu nie wykona kodu; wynik innego typu nie jest
+współdzielony (pozostałe procesy pobierają same). Pliki wyników starsze niż
+`result_ttl` są usuwane przez kolejnych liderów.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class _Call:
+    """Jedno wykonywane zapytanie i jego oczekujący"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Koalescencja wywołań o tym samym kluczu"""
+
+    def __init__(self, lock_dir: Optional[str] = None, poll_interval: float = 0.05,
+                 lock_timeout: float = 120, result_ttl: float = 60):
+        """
+        Args:
+            lock_dir: Katalog na pliki blokad między procesami (None = tylko w obrębie procesu)
+            poll_interval: Co ile sekund sprawdzać blokadę innego procesu
+            lock_timeout: Po ilu sekundach blokada jest uznawana za porzuconą
+            result_ttl: Po ilu sekundach plik wyniku jest usuwany (czekający czytają go od razu)
+        """
+        self.lock_dir = lock_dir
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self.result_ttl = result_ttl
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self.stats = {'calls': 0, 'shared': 0}
+
+        if lock_dir:
+            os.makedirs(lock_dir, mode=0o700, exist_ok=True)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Wykonuje `fn` raz dla wszystkich równoczesnych wywołań z tym samym kluczem
+
+        Wynik (albo wyjątek) lidera dostają wszyscy oczekujący. Zwracany obiekt
+        jest współdzielony - wywołujący nie powinni go modyfikować.
+        """
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats['shared'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.lock_dir:
+                call.result = self._do_across_processes(key, fn)
+            else:
+                call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def _paths(self, key: Hashable):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:24]
+        base = os.path.join(self.lock_dir, digest)
+        return base + '.lock', base + '.result'
+
+    def _read_result(self, result_path: str, since: float):
+        """Wynik zapisany przez inny proces po `since` - (True, wynik) albo (False, None)"""
+        for suffix in ('.npz', '.json'):
+            path = result_path + suffix
+            try:
+                if os.path.getmtime(path) < since:
+                    continue
+                if suffix == '.npz':
+                    with np.load(path, allow_pickle=False) as data:
+                        return True, tuple(data[f'arr_{k}'] for k in range(len(data.files)))
+                with open(path, 'r') as f:
+                    return True, json.load(f)
+            except (OSError, ValueError):
+                continue
+        return False, None
+
+    def _write_result(self, result_path: str, result: Any):
+        """Zapis wyniku dla innych procesów - tylko dane, bez pickle"""
+        tmp_path = f"{result_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if isinstance(result, tuple) and result and all(isinstance(a, np.ndarray) for a in result):
+                suffix = '.npz'
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, *result)
+            else:
+                suffix = '.json'
+                with open(tmp_path, 'w') as f:
+                    json.dump(result, f, separators=(',', ':'))
+            os.replace(tmp_path, result_path + suffix)
+        except (TypeError, ValueError, OSError):
+            # Wynik nie jest czystymi danymi - inne procesy pobiorą same
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _sweep(self):
+        """Usuwa pliki wyników starsze niż result_ttl (najwyżej raz na result_ttl)"""
+        now = time.time()
+        if now - self._last_sweep < self.result_ttl:
+            return
+        self._last_sweep = now
+        for name in os.listdir(self.lock_dir):
+            if '.result' not in name:
+                continue
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.result_ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _do_across_processes(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        lock_path, result_path = self._paths(key)
+        wait_started = time.time()
+
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Inny proces już pobiera - czekamy (chyba że blokada jest porzucona)
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > self.lock_timeout:
+                        os.remove(lock_path)
+                except OSError:
+                    pass
+                time.sleep(self.poll_interval)
+                continue
+
+            # Mamy blokadę. Jeśli w międzyczasie inny proces zapisał świeży wynik - bierzemy go
+            try:
+                os.close(fd)
+                found, result = self._read_result(result_path, wait_started)
+                if found:
+                    return result
+
+                self._sweep()
+                result = fn()
+                self._write_result(result_path, result)
+                return result
+            finally:
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Stand-ins - lokalne atrapy zewnętrznych API (FRED, NY Fed Markets, SMTP)
+
+Pozwalają uruchomić monitor, testy i demo bez internetu i bez klucza API.
+Dane są syntetyczne, ale deterministyczne (ten sam series_id = te same liczby).
+
+Użycie:
+    with StandInServer() as server:
+        monitor = LiquidityMonitor(fred_api_key='demo')
+        server.attach(monitor)
+        indicators = monitor.get_all_indicators()
+
+    with SmtpStandIn() as smtp:
+        SmtpSink('127.0.0.1', to=['ja@example.com'], port=smtp.port).send(event)
+        smtp.messages  # [(nadawca, [odbiorcy], treść), ...]
+"""
+
+import gzip
+import json
+import socketserver
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+# Przybliżone poziomy serii w jednostkach FRED (żeby analiza dawała sensowne wyniki) -
+# WALCL i WTREGEN w mln USD, RRPONTSYD, rezerwy i M2 w mld USD
+LEVELS = {
+    'TOTRESNS': (3200, 40), 'WRESBAL': (3200, 40), 'WTREGEN': (800_000, 60_000),
+    'RRPONTSYD': (250, 30), 'WALCL': (6_900_000, 50_000), 'SOFR': (4.33, 0.03),
+    'IORB': (4.40, 0.0), 'EFFR': (4.33, 0.01), 'M2SL': (21500, 80),
+    'T10Y2Y': (0.45, 0.08), 'VIXCLS': (17, 2.5), 'NFCI': (-0.5, 0.05),
+    'DTWEXBGS': (121, 0.8), 'DGS10': (4.2, 0.08), 'DGS2': (3.8, 0.08),
+    'T5YIE': (2.4, 0.05), 'BAMLH0A0HYM2': (3.1, 0.15), 'UNRATE': (4.1, 0.1),
+}
+
+# Serie publikowane rzadziej niż codziennie (częstotliwość w dniach)
+PERIODS = {'WTREGEN': 7, 'WALCL': 7, 'WRESBAL': 7, 'NFCI': 7, 'M2SL': 30, 'UNRATE': 30, 'TOTRESNS': 30}
+
+
+def synthetic_series(series_id: str, start: str, end: str) -> List[Tuple[str, float]]:
+    """
+    Deterministyczny szereg (random walk wokół typowego poziomu) dla zakresu dat
+
+    Returns:
+        Lista (data ISO, wartość) - w dni robocze, albo co 7/30 dni dla serii tygodniowych/miesięcznych
+    """
+    level, vol = LEVELS.get(series_id, (100.0, 1.0))
+    period = PERIODS.get(series_id, 1)
+
+    epoch = np.datetime64('1970-01-01', 'D')
+    first = np.datetime64(start, 'D')
+    last = np.datetime64(end, 'D')
+
+    days = np.arange(0, int((last - epoch).astype(np.int64)) + 1, dtype=np.int64)
+    days = days[(days % period == 0) if period > 1 else ((days + 3) % 7 < 5)]  # Pn-Pt dla dziennych
+
+    rng = np.random.default_rng(zlib.crc32(series_id.encode()))
+    steps = rng.standard_normal(len(days)) * vol * 0.1
+    # Random walk "przyciągany" do poziomu bazowego (żeby 50 lat historii nie odjechało)
+    values = np.empty(len(days))
+    current = level
+    for i, step in enumerate(steps):
+        current += step + (level - current) * 0.01
+        values[i] = current
+
+    keep = days >= int((first - epoch).astype(np.int64))
+    dates = (days[keep].astype('datetime64[D]')).astype(str)
+    return list(zip(dates.tolist(), np.round(values[keep], 4).tolist()))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Obsługa zapytań - routing po ścieżce"""
+
+    server_version = 'StandIn/1.0'
+
+    def log_message(self, format, *args):
+        pass  # Cisza w konsoli
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.requests_log.append((url.path, params))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        if self.server.fail_paths and any(url.path.startswith(p) for p in self.server.fail_paths):
+            return self._send(503, {'error_message': 'Stand-in: wymuszony blad'})
+
+        if url.path == '/fred/series/observations':
+            return self._fred_observations(params)
+        if url.path in ('/fred/category/series', '/fred/release/series'):
+            return self._fred_listing(url.path.split('/')[2], params)
+        if url.path.startswith('/api/rates/'):
+            return self._nyfed_rates(url.path, params)
+        if url.path == '/api/rp/reverserepo/propositions/search.json':
+            return self._nyfed_rrp(params)
+
+        self._send(404, {'error_message': f'Nieznana sciezka {url.path}'})
+
+    def do_POST(self):
+        # Odbiornik webhooków - zapisuje ciało JSON w requests_log
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.requests_log.append((url.path, payload))
+
+        if self.server.fail_paths and any(url.path.startswith(p) for p in self.server.fail_paths):
+            return self._send(503, {'error_message': 'Stand-in: wymuszony blad'})
+        if url.path.startswith('/hooks/'):
+            return self._send(200, {'ok': True})
+        self._send(404, {'error_message': f'Nieznana sciezka {url.path}'})
+
+    def _send(self, status: int, payload: Dict):
+        # Zwarty JSON i gzip na życzenie klienta - jak prawdziwe API FRED
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _range(self, params: Dict, start_key: str, end_key: str) -> Tuple[str, str]:
+        today = datetime.now()
+        end = min(params.get(end_key, today.strftime('%Y-%m-%d')), today.strftime('%Y-%m-%d'))
+        start = params.get(start_key, (today - timedelta(days=90)).strftime('%Y-%m-%d'))
+        return start, end
+
+    def _fred_observations(self, params: Dict):
+        series_id = params.get('series_id', '')
+        if series_id not in LEVELS and series_id not in self.server.extra_series:
+            return self._send(400, {'error_code': 400, 'error_message': 'Bad Request. The series does not exist.'})
+
+        start, end = self._range(params, 'observation_start', 'observation_end')
+        if series_id in self.server.extra_series:
+            # Własne serie - domyślnie cała historia, jak w FRED (syntetyczne tylko 90 dni)
+            start = params.get('observation_start', '1776-07-04')
+        rows = self.server.extra_series.get(series_id) or synthetic_series(series_id, start, end)
+        rows = [r for r in rows if start <= r[0] <= end]
+        lag = self.server.fred_lag_days
+        if lag:
+            cutoff = (datetime.now() - timedelta(days=lag)).strftime('%Y-%m-%d')
+            rows = [r for r in rows if r[0] <= cutoff]
+
+        if params.get('sort_order') == 'desc':
+            rows = rows[::-1]
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 100000))
+        page = rows[offset:offset + limit]
+
+        self._send(200, {
+            'observation_start': start,
+            'observation_end': end,
+            'count': len(rows),
+            'offset': offset,
+            'limit': limit,
+            'observations': [
+                {'realtime_start': end, 'realtime_end': end, 'date': d, 'value': f'{v}'}
+                for d, v in page
+            ],
+        })
+
+    def _fred_listing(self, kind: str, params: Dict):
+        # Listing kategorii / release - stronicowany jak w FRED (limit, offset, count)
+        listing_id = params.get(f'{kind}_id', '')
+        series = self.server.listings.get((kind, listing_id))
+        if series is None:
+            return self._send(400, {'error_code': 400, 'error_message': f'Bad Request. The {kind} does not exist.'})
+
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 1000))
+        self._send(200, {'count': len(series), 'offset': offset, 'limit': limit,
+                         'seriess': series[offset:offset + limit]})
+
+    def _nyfed_rates(self, path: str, params: Dict):
+        series_id = 'SOFR' if '/secured/sofr/' in path else 'EFFR'
+        start, end = self._range(params, 'startDate', 'endDate')
+        rows = synthetic_series(series_id, start, end)
+        self._send(200, {'refRates': [
+            {'effectiveDate': d, 'type': series_id, 'percentRate': v} for d, v in rows
+        ]})
+
+    def _nyfed_rrp(self, params: Dict):
+        start, end = self._range(params, 'startDate', 'endDate')
+        rows = synthetic_series('RRPONTSYD', start, end)
+        self._send(200, {'repo': {'operations': [
+            {'operationDate': d, 'operationType': 'Reverse Repo', 'totalAmtAccepted': int(v * 1e9)}
+            for d, v in rows
+        ]}})
+
+
+class StandInServer:
+    """
+    Lokalny serwer HTTP udający FRED (/fred/...), NY Fed Markets (/api/...)
+    i odbiornik webhooków (POST /hooks/...)
+
+    Args:
+        fred_lag_days: O ile dni FRED "spóźnia się" względem NY Fed
+        fail_paths: Prefiksy ścieżek, które zwracają 503 (symulacja awarii)
+        delay: Opóźnienie każdej odpowiedzi GET w sekundach (symulacja wolnego API)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fred_lag_days: int = 1,
+                 fail_paths: Optional[List[str]] = None, delay: float = 0.0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.requests_log = []
+        self.httpd.fred_lag_days = fred_lag_days
+        self.httpd.fail_paths = list(fail_paths or [])
+        self.httpd.delay = delay
+        self.httpd.extra_series = {}
+        self.httpd.listings = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def fred_url(self) -> str:
+        return f"{self.url}/fred"
+
+    @property
+    def requests_log(self) -> List:
+        """Lista (ścieżka, parametry) wszystkich obsłużonych zapytań"""
+        return self.httpd.requests_log
+
+    @property
+    def fail_paths(self) -> List[str]:
+        return self.httpd.fail_paths
+
+    @property
+    def delay(self) -> float:
+        return self.httpd.delay
+
+    @delay.setter
+    def delay(self, seconds: float):
+        self.httpd.delay = seconds
+
+    def add_series(self, series_id: str, rows: List[Tuple[str, float]]):
+        """Podmienia dane serii FRED na własne (lista (data, wartość))"""
+        self.httpd.extra_series[series_id] = rows
+
+    def add_listing(self, kind: str, listing_id: int, series: List[Dict]):
+        """Listing serii dla /fred/category/series lub /fred/release/series (kind: 'category' / 'release')"""
+        self.httpd.listings[(kind, str(listing_id))] = series
+
+    def attach(self, monitor):
+        """Przełącza monitor (FRED i NY Fed) na ten serwer"""
+        monitor.fred_api_root = self.fred_url
+        monitor.fred_base_url = f"{self.fred_url}/series/observations"
+        nyfed = monitor.sources.get('nyfed')
+        if nyfed is not None:
+            nyfed.base_url = self.url
+        return monitor
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Minimalny dialog SMTP: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def _reply(self, line: str):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        self._reply('220 standin ESMTP')
+        sender, recipients = None, []
+
+        for raw in self.rfile:
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            command = line[:4].upper()
+
+            if command in ('EHLO', 'HELO'):
+                self._reply('250 standin')
+            elif command == 'MAIL':
+                sender, recipients = line.split(':', 1)[1].strip().strip('<>'), []
+                self._reply('250 OK')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip().strip('<>'))
+                self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                body = []
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                    body.append(data_line)
+                if self.server.delay:
+                    time.sleep(self.server.delay)  # Symulacja wolnego serwera
+                self.server.messages.append((sender, recipients, b''.join(body).decode('utf-8', 'replace')))
+                self._reply('250 OK: queued')
+            elif command in ('RSET', 'NOOP'):
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class SmtpStandIn:
+    """
+    Lokalny serwer SMTP zbierający wiadomości w pamięci (bez wysyłki dalej)
+
+    Args:
+        delay: Opóźnienie (s) przy przyjmowaniu każdej wiadomości
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, delay: float = 0.0):
+        self.server = socketserver.ThreadingTCPServer((host, port), _SmtpHandler)
+        self.server.daemon_threads = True
+        self.server.messages = []
+        self.server.delay = delay
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    @property
+    def messages(self) -> List[Tuple[str, List[str], str]]:
+        """Lista (nadawca, odbiorcy, surowa treść) przyjętych wiadomości"""
+        return self.server.messages
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = StandInServer(port=8765).start()
+    smtp = SmtpStandIn(port=8025).start()
+    print(f"[STANDIN] FRED:  {server.fred_url}/series/observations")
+    print(f"[STANDIN] NY Fed: {server.url}/api/...")
+    print(f"[STANDIN] SMTP:  127.0.0.1:{smtp.port}")
+    print("Ctrl+C aby zakonczyc")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        smtp.stop()
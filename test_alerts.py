@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test silnika alertów - histereza, cooldown, deduplikacja, stan na dysku i
+asynchroniczne dostarczanie (stand-in SMTP + webhook). Działa bez internetu.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from alert_engine import AlertEngine, AlertEvent, FileSink, HistorySink, SmtpSink, WebhookSink, default_rules
+from checks import check, finish
+from history_store import HistoryStore
+from standins import SmtpStandIn, StandInServer
+
+print("="*70)
+print("  TEST SILNIKA ALERTOW")
+print("="*70)
+
+
+def run(score, spread=0.05, alerts=()):
+    indicators = {'sofr_iorb_spread': {'current': spread}}
+    analysis = {'overall_score': score, 'alerts': list(alerts)}
+    return indicators, analysis
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    state_path = os.path.join(tmp, 'alert_state.json')
+    events_path = os.path.join(tmp, 'events.jsonl')
+
+    print("\n[TEST] Histereza - wartosc krazaca wokol progu")
+    engine = AlertEngine(default_rules(score_threshold=-30), sinks=[FileSink(events_path)],
+                         state_path=state_path)
+    fired = [len(engine.evaluate(*run(score))) for score in (-20, -35, -28, -33, -25, -19)]
+    check(fired == [0, 1, 0, 0, 0, 1], f"Zdarzenia na przebieg: {fired} (alarm przy -35, koniec przy -19)")
+
+    print("\n[TEST] Cooldown - ponowny alarm zaraz po powrocie do normy jest tlumiony")
+    suppressed = engine.evaluate(*run(-40))
+    check(not suppressed and engine.active() == ['score'], "Alarm aktywny, ale bez powiadomienia")
+
+    print("\n[TEST] Stan przetrwa restart")
+    engine.flush()
+    restarted = AlertEngine(default_rules(score_threshold=-30), state_path=state_path)
+    check(restarted.active() == ['score'] and not restarted.evaluate(*run(-40)), "Aktywny alarm wczytany z pliku")
+    check(not restarted.evaluate(*run(0)), "Brak 'resolved' dla alarmu, o ktorym nie powiadomiono")
+
+    print("\n[TEST] Przeladowanie strony z ta sama analiza - bez duplikatow")
+    engine = AlertEngine(default_rules(), state_path=None)
+    first = engine.evaluate(*run(-40))
+    repeated = sum(len(engine.evaluate(*run(-40))) for _ in range(20))
+    check(len(first) == 1 and repeated == 0, f"Pierwszy przebieg: {len(first)}, kolejne: {repeated}")
+
+    print("\n[TEST] Alerty z analizy - klucz per wskaznik")
+    engine = AlertEngine(default_rules(), state_path=None)
+    alert = {'severity': 'critical', 'indicator': 'SOFR-IORB Spread', 'message': 'Spread 0.21%'}
+    first = engine.evaluate(*run(10, alerts=[alert]))
+    again = engine.evaluate(*run(10, alerts=[dict(alert, message='Spread 0.22%')]))
+    check(len(first) == 1 and not again, "Zmieniona tresc tego samego alertu nie wysyla ponownie")
+
+    with open(events_path) as f:
+        logged = [json.loads(line) for line in f]
+    check([e['kind'] for e in logged] == ['fired', 'resolved'], f"Plik zdarzen: {len(logged)} wpisy")
+
+    print("\n[TEST] Wolny SMTP nie blokuje evaluate(), webhook dostaje zdarzenie od razu")
+    with SmtpStandIn(delay=1.0) as smtp, StandInServer() as http:
+        engine = AlertEngine(default_rules(), state_path=None, sinks=[
+            SmtpSink('127.0.0.1', to=['ops@example.com'], port=smtp.port),
+            WebhookSink(f"{http.url}/hooks/liquidity"),
+        ])
+        started = time.perf_counter()
+        engine.evaluate(*run(-50, spread=0.25))
+        elapsed = time.perf_counter() - started
+        check(elapsed < 0.5, f"evaluate(): {elapsed * 1000:.0f} ms")
+
+        deadline = time.time() + 5
+        while len(http.requests_log) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        check(len(http.requests_log) == 2 and not smtp.messages, "Webhook: 2 zdarzenia przed pierwszym emailem")
+
+        engine.flush(timeout=10)
+        check(len(smtp.messages) == 2 and smtp.messages[0][1] == ['ops@example.com'],
+              f"SMTP: {len(smtp.messages)} wiadomosci")
+
+    print("\n[TEST] Jeden silnik, adresy z sesji jako subskrypcje")
+    with SmtpStandIn() as smtp:
+        engine = AlertEngine(default_rules(), state_path=None,
+                             sinks=[SmtpSink('127.0.0.1', to=[], port=smtp.port)])
+        engine.evaluate(*run(-50))
+        engine.flush(timeout=10)
+        check(not smtp.messages and engine.dispatcher.stats['sent'] == 1, "Bez subskrypcji - bez emaila")
+        for address in ('anna@example.com', 'ops@example.com', 'anna@example.com'):
+            engine.subscribe(address)
+        engine.evaluate(*run(0))
+        engine.flush(timeout=10)  # Adresaci ustalani przy wysyłce, nie przy evaluate()
+        engine.unsubscribe('ops@example.com')
+        engine.evaluate(*run(-50, spread=0.25))
+        engine.flush(timeout=10)
+        check([sorted(message[1]) for message in smtp.messages] ==
+              [['anna@example.com', 'ops@example.com'], ['anna@example.com']],
+              "Jedno zdarzenie - jeden email do wszystkich subskrybentow, po wypisaniu bez adresu")
+        check(len(engine.dispatcher._queues) == 1, "Jeden watek wysylki niezaleznie od liczby adresow")
+
+    print("\n[TEST] Historia - alert z analizy zapisany raz")
+    store = HistoryStore(':memory:')
+    engine = AlertEngine(default_rules(score_threshold=-30), state_path=None, sinks=[HistorySink(store)])
+    indicators, analysis = run(-40, alerts=[alert])
+    analysis.update(timestamp='2024-06-28 12:00:00', raw_score=-40, interpretation='test',
+                    market_regime={'regime': 'STRESS'}, signals=[], percentiles={})
+    store.record({}, analysis)
+    events = engine.evaluate(indicators, analysis)
+    engine.flush()
+    check(sorted(e.rule for e in events) == ['analysis', 'score'] and
+          sorted(store.alerts()['indicator']) == ['SOFR-IORB Spread', 'score'],
+          "Alert z analizy tylko z record(), alarm reguly 'score' z HistorySink")
+
+    print("\n[TEST] Liczniki dostarczenia z wielu watkow")
+    sinks = [FileSink(os.path.join(tmp, f'sink{k}.jsonl')) for k in range(8)]
+    for k, sink in enumerate(sinks):
+        sink.name = f'file{k}'
+    engine = AlertEngine(default_rules(), state_path=None, sinks=sinks)
+    for k in range(250):
+        engine.dispatcher.submit(AlertEvent(f'x{k}', 'x', 'fired', 'info', 'x', 'x'))
+    engine.flush(timeout=30)
+    check(engine.dispatcher.stats == {'sent': 8 * 250, 'failed': 0},
+          f"8 odbiorcow x 250 zdarzen: {engine.dispatcher.stats}")
+
+finish("Wszystkie testy alertow przeszly")
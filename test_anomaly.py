@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test strumieniowego detektora anomalii - skoki, odporność na pojedyncze
+skoki, stan po restarcie (bez ponownego przetwarzania historii). Działa bez internetu.
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from anomaly import AnomalyDetector, SeriesStats
+from checks import check, finish
+
+print("="*70)
+print("  TEST DETEKTORA ANOMALII")
+print("="*70)
+
+
+def series(values, start='2000-01-03'):
+    dates = pd.date_range(start, periods=len(values), freq='B')
+    return {'data': pd.DataFrame({'date': dates, 'value': values})}
+
+
+rng = np.random.default_rng(11)
+history = 100 + np.cumsum(rng.standard_normal(5000) * 0.5)
+
+with tempfile.TemporaryDirectory() as tmp:
+    state_path = os.path.join(tmp, 'anomaly_state.json')
+
+    print("\n[TEST] Pierwsze uruchomienie - historia buduje statystyki, bez zalewu alertow")
+    detector = AnomalyDetector(state_path)
+    started = time.perf_counter()
+    events = detector.update_indicators({'x': series(history)})
+    elapsed = time.perf_counter() - started
+    check(not events, f"Zgloszone anomalie: {len(events)} ({elapsed * 1000:.0f} ms dla 5000 odczytow)")
+    stats = detector.series['x']
+    check(abs(stats.median) < 0.1 and abs(stats.mad * 1.4826 - 0.5) < 0.1,
+          f"Mediana {stats.median:+.3f}, skala {stats.mad * 1.4826:.3f} (prawda: 0, 0.5)")
+
+    print("\n[TEST] Restart - tylko nowe odczyty, skok wykryty")
+    spiked = np.append(history, [history[-1] + 0.3, history[-1] + 5.0])
+    restarted = AnomalyDetector(state_path)
+    count_before = restarted.series['x'].count
+    events = restarted.update_indicators({'x': series(spiked)})
+    check(restarted.series['x'].count == count_before + 2, "Przetworzone 2 nowe odczyty")
+    check(len(events) == 1 and events[0]['robust_z'] > 4, f"Anomalia: {[round(e['robust_z'], 1) for e in events]}")
+    check(restarted.latest()['x']['anomaly'], "latest() pokazuje anomalie ostatniego odczytu")
+    check(not AnomalyDetector(state_path).update_indicators({'x': series(spiked)}), "Te same dane - nic nowego")
+
+    print("\n[TEST] Przebieg bez nowych odczytow - bez przegladania historii i zapisu")
+    many = {f's{k}': series(100 + np.cumsum(np.random.default_rng(k).standard_normal(13000))) for k in range(25)}
+    detector = AnomalyDetector(state_path)
+    detector.update_indicators(many)
+    os.utime(state_path, (0, 0))
+    started = time.perf_counter()
+    for _ in range(10):
+        events = detector.update_indicators(many)
+    rerun = (time.perf_counter() - started) / 10
+    check(not events and os.path.getmtime(state_path) == 0 and rerun < 0.01,
+          f"25 serii x 50 lat: {rerun * 1000:.2f} ms na przebieg, plik stanu nietkniety")
+    extended = dict(many, s0=series(np.append(many['s0']['data']['value'].to_numpy(), 0.0)))
+    count_before = detector.series['s0'].count
+    detector.update_indicators(extended)
+    check(detector.series['s0'].count == count_before + 1 and os.path.getmtime(state_path) > 0,
+          "Jeden nowy odczyt - przetworzony i zapisany")
+
+print("\n[TEST] Jeden skok nie rozdmuchuje skali (robust vs EWMA)")
+stats = SeriesStats(halflife=60)
+for change in rng.standard_normal(500):
+    stats.update(float(change))
+stats.update(50.0)
+z, robust_z = stats.score(4.0)
+check(robust_z > 3 > z, f"Zmiana +4 po skoku: z robust {robust_z:.1f}, z EWMA {z:.1f}")
+
+print("\n[TEST] Seria o rzadkich zmianach (stopa Fed) - MAD = 0")
+stats = SeriesStats()
+for _ in range(200):
+    stats.update(0.0)
+stats.update(0.01)
+z, robust_z = stats.score(0.25)
+check(stats.robust_scale() > 0 and robust_z is not None and robust_z > 4, f"Podwyzka 25 pb: z robust {robust_z:.1f}")
+
+finish("Wszystkie testy anomalii przeszly")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test API Server - migawka, ETag/304, wycinki historii, scenariusze (na lokalnych atrapach API)
+Działa bez internetu i bez klucza FRED.
+"""
+
+import gzip
+import json
+import time
+
+import requests
+
+from api_server import LiquidityAPIServer, LiquidityService, accepts_gzip
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer
+
+print("="*70)
+print("  TEST API SERVER (stand-in FRED + NY Fed)")
+print("="*70)
+
+
+with StandInServer() as upstream:
+    monitor = upstream.attach(LiquidityMonitor(fred_api_key='demo'))
+    service = LiquidityService(monitor, days_back=120, refresh_interval=3600)
+
+    with LiquidityAPIServer(service, port=0).start(background_refresh=False) as server:
+        api = requests.Session()
+
+        print("\n[TEST] Przed pierwszym odswiezeniem - 503")
+        r = api.get(f"{server.url}/api/snapshot")
+        check(r.status_code == 503 and 'Retry-After' in r.headers, f"Status: {r.status_code}")
+
+        service.refresh()
+
+        print("\n[TEST] Migawka")
+        r = api.get(f"{server.url}/api/snapshot")
+        data = r.json()
+        check(r.status_code == 200, f"Status: {r.status_code}")
+        check({'score', 'regime', 'alerts'} <= set(data['analysis']), "Ocena, rezim i alerty w odpowiedzi")
+        check(r.headers.get('ETag', '').startswith('"'), f"ETag: {r.headers.get('ETag')}")
+
+        print("\n[TEST] If-None-Match -> 304 bez ciala")
+        r2 = api.get(f"{server.url}/api/snapshot", headers={'If-None-Match': r.headers['ETag']})
+        check(r2.status_code == 304 and not r2.content, f"Status: {r2.status_code}")
+
+        print("\n[TEST] Odswiezenie bez zmian danych - ten sam ETag dla historii")
+        r = api.get(f"{server.url}/api/series/vix")
+        service.refresh()
+        r2 = api.get(f"{server.url}/api/series/vix", headers={'If-None-Match': r.headers['ETag']})
+        check(r2.status_code == 304, f"Status: {r2.status_code}")
+
+        print("\n[TEST] Wycinek historii")
+        r = api.get(f"{server.url}/api/series/vix", params={'limit': 5})
+        data = r.json()
+        check(data['count'] == 5 and len(data['dates']) == 5, f"Obserwacji: {data['count']}")
+        full = api.get(f"{server.url}/api/series/vix").json()
+        check(data['dates'] == full['dates'][-5:], "limit = ostatnie N obserwacji")
+        start = full['dates'][10]
+        r = api.get(f"{server.url}/api/series/vix", params={'start': start}).json()
+        check(r['dates'][0] == start and r['count'] == full['count'] - 10, f"start={start}")
+
+        print("\n[TEST] gzip")
+        r = requests.get(f"{server.url}/api/series/vix", headers={'Accept-Encoding': 'gzip'}, stream=True)
+        raw = r.raw.read()
+        check(r.headers.get('Content-Encoding') == 'gzip'
+              and json.loads(gzip.decompress(raw))['series'] == 'vix', f"{len(raw)} B skompresowane")
+        r = requests.get(f"{server.url}/api/series/vix", headers={'Accept-Encoding': 'br, gzip;q=0'}, stream=True)
+        check('Content-Encoding' not in r.headers and json.loads(r.raw.read())['series'] == 'vix',
+              "gzip;q=0 - odpowiedz bez kompresji")
+        cases = {'gzip': True, 'GZIP;q=0.5': True, 'gzip;q=0': False, 'gzip; q=0.0': False, 'identity': False,
+                 '*': True, 'br, *;q=0.1': True, '*, gzip;q=0': False, '*;q=0': False, 'gzip;q=x': False, '': False}
+        wrong = [header for header, expected in cases.items() if accepts_gzip(header) != expected]
+        check(not wrong, f"Wagi q w Accept-Encoding ({len(cases)} przypadkow, zle: {wrong or 'brak'})")
+
+        print("\n[TEST] Bledy")
+        check(api.get(f"{server.url}/api/series/nope").status_code == 404, "Nieznana seria - 404")
+        check(api.get(f"{server.url}/api/series/vix", params={'start': 'x'}).status_code == 400, "Zla data - 400")
+        check([api.get(f"{server.url}/api/series/vix", params={'limit': limit}).status_code
+               for limit in (0, -3, 'x')] == [400, 400, 400], "limit 0 / ujemny / nie-liczba - 400")
+        check(api.get(f"{server.url}/api/health").json()['status'] == 'ok', "Health: ok")
+
+        print("\n[TEST] Scenariusze what-if (POST)")
+        base = api.get(f"{server.url}/api/analysis").json()['score']
+        r = api.post(f"{server.url}/api/scenarios", json={'scenarios': [
+            {'name': 'bazowy', 'shocks': {}},
+            {'name': 'stres', 'shocks': {'vix': 35, 'reserves': {'delta': -200}, 'hy_spread': {'pct': 100}}},
+        ]})
+        results = r.json()['results'] if r.status_code == 200 else []
+        check(len(results) == 2 and results[0]['score'] == base, f"Bazowy scenariusz = ocena migawki ({base})")
+        check(len(results) == 2 and results[1]['score'] < base and results[1]['regime'] == 'CRISIS',
+              f"Stres: {results[1]['score'] if results else None}")
+        r = api.post(f"{server.url}/api/scenarios", json={'grid': {
+            'x': 'vix', 'x_values': list(range(10, 50, 5)), 'y': 'reserves', 'y_values': [-300, 0, 300],
+            'y_mode': 'delta'}})
+        check(r.status_code == 200 and len(r.json()['results']) == 24, "Siatka 8 x 3")
+        check(api.post(f"{server.url}/api/scenarios", json={'scenarios': [{'nope': 1}]}).status_code == 400,
+              "Nieznany wskaznik - 400")
+
+        print("\n[TEST] Przepustowosc (keep-alive, jeden klient)")
+        etag = api.get(f"{server.url}/api/snapshot").headers['ETag']
+        n = 500
+        started = time.perf_counter()
+        for i in range(n):
+            api.get(f"{server.url}/api/snapshot", headers={'If-None-Match': etag} if i % 2 else None)
+        rate = n / (time.perf_counter() - started)
+        check(rate > 200, f"{rate:.0f} zapytan/s")
+
+finish("Wszystkie testy API przeszly")
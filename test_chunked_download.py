@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test pobierania kawałkami - podział zakresu, zgodność z jednym zapytaniem,
+stronicowanie limit/offset, wznawianie z punktów kontrolnych po przerwaniu.
+Działa bez internetu (atrapa FRED).
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from checks import check, finish
+from chunked_download import ChunkedDownloader, plan_chunks
+from fred_parser import parse_observations
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer
+
+print("="*70)
+print("  TEST POBIERANIA KAWALKAMI")
+print("="*70)
+
+
+print("\n[TEST] Podzial zakresu")
+chunks = plan_chunks('1975-03-10', '2025-06-01', 1826)
+starts = np.array([c[0] for c in chunks])
+ends = np.array([c[1] for c in chunks])
+check(chunks[0][0] <= np.datetime64('1975-03-10') and ends[-1] == np.datetime64('2025-06-01'), "Caly zakres pokryty")
+check(((starts[1:] - ends[:-1]).astype(int) == 1).all(), f"{len(chunks)} kawalkow bez dziur i nakladania")
+check(all(c[2] for c in chunks[:-1]) and not chunks[-1][2], "Zamkniete wszystkie poza ostatnim")
+today = {c[:2] for c in plan_chunks('1980-01-01', '2025-01-01', 1826) if c[2]}
+later = {c[:2] for c in plan_chunks('1981-06-01', '2025-02-01', 1826)}
+check(today <= later, f"Granice wyrownane do kalendarza - {len(today)} zamknietych kawalkow takich samych pozniej")
+
+end = datetime.now().strftime('%Y-%m-%d')
+start = (datetime.now() - timedelta(days=18250)).strftime('%Y-%m-%d')
+
+with StandInServer() as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+
+    print("\n[TEST] Zgodnosc z jednym zapytaniem")
+    single = {sid: parse_observations(monitor.fetch_fred_raw('series/observations', series_id=sid,
+                                                             observation_start=start, observation_end=end))
+              for sid in ('SOFR', 'WALCL')}
+    downloader = ChunkedDownloader(monitor)
+    for sid, (dates, values) in single.items():
+        got = downloader.download(sid, start, end)
+        check(np.array_equal(got[0], dates) and np.array_equal(got[1], values), f"{sid}: {len(dates)} obserwacji")
+
+    paged = ChunkedDownloader(monitor, page_size=500)
+    got = paged.download('SOFR', start, end)
+    check(np.array_equal(got[0], single['SOFR'][0]) and paged.stats['requests'] > paged.stats['chunks'],
+          f"Stronicowanie po 500: {paged.stats['requests']} zapytan na {paged.stats['chunks']} kawalkow")
+
+    server.requests_log.clear()
+    monitor.fetch_fred_data('SOFR', days_back=18250)
+    check(len(server.requests_log) == 1, "Bez punktow kontrolnych - jedno zapytanie (limit FRED)")
+    with tempfile.TemporaryDirectory() as directory:
+        monitor.downloader.checkpoint_dir = directory
+        server.requests_log.clear()
+        df = monitor.fetch_fred_data('SOFR', days_back=18250)
+        check(len(server.requests_log) == len(plan_chunks(start, end, monitor.downloader.chunk_days)) and
+              np.array_equal(df['value'].to_numpy(), single['SOFR'][1]),
+              f"fetch_fred_data(18250 dni) z punktami kontrolnymi - kawalkami: {len(server.requests_log)} zapytan")
+        server.requests_log.clear()
+        monitor.fetch_fred_data('SOFR', days_back=18250)
+        check(len(server.requests_log) == 1, "Kolejne ladowanie - tylko otwarty kawalek")
+        server.requests_log.clear()
+        monitor.fetch_fred_data('SOFR', days_back=90)
+        check(len(server.requests_log) == 1, "Krotki zakres - jedno zapytanie")
+        monitor.downloader.checkpoint_dir = None
+
+    print("\n[TEST] Punkty kontrolne - przerwany backfill")
+    with tempfile.TemporaryDirectory() as directory:
+        flaky = server.attach(LiquidityMonitor(fred_api_key='demo'))
+        fetch, calls = flaky.fetch_fred_raw, [0]
+
+        def interrupted(endpoint, **params):
+            calls[0] += 1
+            if calls[0] > 6:
+                raise ConnectionError("zerwane polaczenie")
+            return fetch(endpoint, **params)
+
+        flaky.fetch_fred_raw = interrupted
+        first = ChunkedDownloader(flaky, max_workers=1, checkpoint_dir=directory)
+        results = first.backfill(['SOFR', 'WALCL'], days_back=18250)
+        saved = len(os.listdir(directory))
+        check('SOFR' in first.errors or 'WALCL' in first.errors, f"Przerwane po 6 zapytaniach, zapisane kawalki: {saved}")
+
+        flaky.fetch_fred_raw = fetch
+        resumed = ChunkedDownloader(flaky, checkpoint_dir=directory)
+        results = resumed.backfill(['SOFR', 'WALCL'], days_back=18250)
+        check(not resumed.errors and resumed.stats['from_checkpoint'] == saved,
+              f"Wznowienie: {resumed.stats['from_checkpoint']} z punktow kontrolnych, {resumed.stats['requests']} zapytan")
+        check(all(np.array_equal(results[sid][1], single[sid][1]) for sid in single), "Wynik jak jedno zapytanie")
+
+        again = ChunkedDownloader(flaky, checkpoint_dir=directory)
+        again.backfill(['SOFR', 'WALCL'], days_back=18250)
+        check(again.stats['requests'] == 2, f"Kolejne uruchomienie: tylko otwarte kawalki ({again.stats['requests']} zapytania)")
+
+finish("Wszystkie testy pobierania kawalkami przeszly")
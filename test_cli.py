@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test trybu wsadowego (liquidity_cli.py) - podkomendy fetch / analyze /
+export / backtest / backfill, formaty jsonl / json / csv / parquet, dane
+tylko na stdout (diagnostyka na stderr), dopisywanie migawek i kody wyjścia.
+Działa bez internetu (monitor CLI przełączony na atrapy ze standins).
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+import liquidity_cli
+from checks import check, finish
+from history_store import HistoryStore
+from liquidity_monitor import RateLimiter
+from standins import StandInServer, synthetic_series
+from vintage_store import VintageStore
+
+print("="*70)
+print("  TEST TRYBU WSADOWEGO (liquidity_cli.py)")
+print("="*70)
+
+
+def run(*argv):
+    """main(argv) z przechwyconym stdout / stderr - (kod wyjścia, stdout, stderr)"""
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            code = liquidity_cli.main(list(argv))
+        except SystemExit as e:
+            code = e.code
+    return code, out.getvalue(), err.getvalue()
+
+
+def args(command, *rest):
+    # Opcje wspólne (--api-key, --series, ...) przyjmuje podkomenda - `fetch --api-key demo ...`
+    return (command, '--api-key', 'demo') + rest
+
+
+with StandInServer() as server, tempfile.TemporaryDirectory() as directory:
+    make_monitor = liquidity_cli._make_monitor
+
+    def attached(parsed):
+        monitor = server.attach(make_monitor(parsed))
+        monitor.rate_limiter = RateLimiter(rate_per_sec=1000, burst=1000)  # Limiter FRED nie jest tu testowany
+        return monitor
+
+    liquidity_cli._make_monitor = attached
+
+    print("\n[TEST] fetch - JSON Lines na stdout")
+    code, out, err = run(*args('fetch', '--series', 'vix,sofr', '--days-back', '30', '-o', '-'))
+    lines = out.splitlines()
+    record = json.loads(lines[0]) if lines else {}
+    check(code == 0 and len(lines) == 1 and record.get('kind') == 'fetch' and
+          set(record['indicators']) == {'vix', 'sofr'},
+          "Jedna linia JSON, tylko wybrane serie")
+    check({'current', 'date', 'change_1d', 'change_7d'} <= set(record['indicators']['vix']) and 'Pobieram' in err,
+          "Wartosci wskaznikow na stdout, komunikaty monitora na stderr")
+    code, out, err = run(*args('fetch', '--series', 'vix', '-q', '-o', '-'))
+    check(code == 0 and 'Pobieram' not in err and json.loads(out)['indicators']['vix'], "--quiet - bez diagnostyki")
+
+    print("\n[TEST] Dopisywanie migawek do pliku")
+    history = os.path.join(directory, 'history.jsonl')
+    for _ in range(2):
+        run(*args('fetch', '--series', 'vix', '-q', '-o', history))
+    with open(history) as f:
+        check(len([json.loads(line) for line in f]) == 2, "jsonl - dwa uruchomienia = dwie linie")
+    snapshot = os.path.join(directory, 'last.json')
+    for _ in range(2):
+        run(*args('fetch', '--series', 'vix,iorb', '--format', 'json', '-q', '-o', snapshot))
+    with open(snapshot) as f:
+        check(set(json.load(f)['indicators']) == {'vix', 'iorb'}, "json - plik nadpisywany, jeden obiekt")
+
+    print("\n[TEST] analyze - ocena, historia i alerty")
+    db = os.path.join(directory, 'history.db')
+    alerts = os.path.join(directory, 'alert_state.json')
+    code, out, err = run(*args('analyze', '-q', '-o', '-', '--history', db, '--alerts', alerts, '--report'))
+    record = json.loads(out) if code == 0 else {}
+    check(code == 0 and record['kind'] == 'analysis' and -100 <= record['score'] <= 100 and record['regime'] and
+          'sofr' in record['indicators'], f"Ocena {record.get('score')}, rezim {record.get('regime')}")
+    store = HistoryStore(db)
+    check(len(store.scores(days=None)) == 1 and os.path.exists(alerts), "Przebieg w historii, stan alertow zapisany")
+    store.close()
+
+    print("\n[TEST] export - csv / json")
+    for fmt in ('csv', 'json'):
+        target = os.path.join(directory, f"export_{fmt}")
+        code, out, err = run(*args('export', '--series', 'vix,m2', '--format', fmt, '-q', '-o', target))
+        files = sorted(os.listdir(target))
+        path = os.path.join(target, files[0]) if files else ''
+        frame = pd.read_csv(path) if fmt == 'csv' else pd.read_json(path) if path else pd.DataFrame()
+        check(code == 0 and out == '' and len(files) == 2 and files[0].startswith('m2_') and
+              files[0].endswith(f'.{fmt}') and list(frame.columns) == ['date', 'value'] and len(frame) > 1,
+              f"{fmt}: plik na serie ({', '.join(files)}), kolumny date/value")
+
+    print("\n[TEST] Parquet")
+    code, out, err = run(*args('fetch', '--series', 'vix', '--format', 'parquet', '-q', '-o', '-'))
+    check(code == 2 and 'Parquet wymaga --output' in err, "Parquet na stdout - blad konfiguracji (kod 2)")
+    if importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet'):
+        target = os.path.join(directory, 'parquet')
+        for _ in range(2):
+            run(*args('fetch', '--series', 'vix,sofr', '--format', 'parquet', '-q', '-o', target))
+        parts = sorted(os.listdir(target))
+        frame = pd.read_parquet(os.path.join(target, parts[0]))
+        check(len(parts) == 2 and sorted(frame['indicator']) == ['sofr', 'vix'],
+              "Kazde uruchomienie - nowy plik part-*, wiersz na wskaznik")
+    else:
+        for command in ('fetch', 'export'):
+            server.requests_log.clear()
+            code, out, err = run(*args(command, '--series', 'vix', '--format', 'parquet', '-q',
+                                       '-o', os.path.join(directory, 'parquet')))
+            check(code == 2 and 'Parquet wymaga pyarrow' in err and not server.requests_log,
+                  f"{command}: brak pyarrow / fastparquet - kod 2 przed pobieraniem")
+
+    print("\n[TEST] backtest na magazynie vintage")
+    vintages = os.path.join(directory, 'vintages.db')
+    code, out, err = run(*args('backtest', '--start', '2024-03-01', '--end', '2024-03-31', '--store', vintages))
+    check(code == 1 and out == '', "Pusty magazyn - kod 1, nic na stdout")
+    store = VintageStore(vintages)
+    for series_id in ('VIXCLS', 'SOFR', 'IORB', 'BAMLH0A0HYM2', 'T10Y2Y'):
+        rows = synthetic_series(series_id, '2023-06-01', '2024-06-30')
+        store.ingest(series_id, pd.DataFrame({'date': [d for d, _ in rows], 'value': [v for _, v in rows],
+                                              'realtime_start': [d for d, _ in rows], 'realtime_end': '9999-12-31'}))
+    store.close()
+    code, out, err = run(*args('backtest', '--start', '2024-03-01', '--end', '2024-03-31', '--step', '7',
+                               '--days-back', '180', '--store', vintages, '-q'))
+    records = [json.loads(line) for line in out.splitlines()]
+    check(code == 0 and [r['as_of'] for r in records] == ['2024-03-01', '2024-03-08', '2024-03-15', '2024-03-22',
+                                                           '2024-03-29'] and all('score' in r for r in records),
+          f"5 dni co 7 - linia JSON na dzien (ocena {records[0]['score'] if records else None})")
+
+    print("\n[TEST] backfill z punktami kontrolnymi")
+    chunks = os.path.join(directory, 'chunks')
+    backfill = args('backfill', '--series', 'vix,m2', '--days-back', '2000', '--chunk-days', '500',
+                    '--checkpoint-dir', chunks)
+    code, out, err = run(*backfill)
+    check(code == 0 and out == '' and 'VIXCLS' in err and os.listdir(chunks),
+          "Pobrane kawalki zapisane, raport na stderr")
+    server.requests_log.clear()
+    code, out, err = run(*backfill)
+    check(code == 0 and len(server.requests_log) <= 2,
+          f"Ponowne uruchomienie - z punktow kontrolnych ({len(server.requests_log)} zapytan o ostatni kawalek)")
+
+    print("\n[TEST] Kody wyjscia")
+    code, out, err = run(*args('fetch', '--series', 'vix,brak'))
+    check(code == 2 and 'Nieznane serie: brak' in err, "Nieznana seria - kod 2")
+    key = os.environ.pop('FRED_API_KEY', None)
+    code, out, err = run('fetch', '--series', 'vix')
+    check(code == 2 and 'Brak klucza' in err, "Brak klucza - kod 2")
+    if key is not None:
+        os.environ['FRED_API_KEY'] = key
+    server.fail_paths.append('/fred/')
+    code, out, err = run(*args('fetch', '--series', 'vix', '-q', '-o', '-'))
+    server.fail_paths.clear()
+    check(code == 1 and out == '', "FRED niedostepny - kod 1, nic na stdout")
+
+    liquidity_cli._make_monitor = make_monitor
+
+finish("Wszystkie testy trybu wsadowego przeszly")
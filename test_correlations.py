@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test kroczących korelacji - zgodność z pandas (Pearson, Spearman z remisami),
+Spearman blokami dni (ten sam wynik, pamięć niezależna od historii), daty
+spoza panelu i wykrywanie załamania korelacji na danych syntetycznych.
+Działa bez internetu.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import correlations
+from checks import check, finish
+from correlations import RollingCorrelation, build_panel
+
+print("="*70)
+print("  TEST KORELACJI KROCZACYCH")
+print("="*70)
+
+
+rng = np.random.default_rng(7)
+n = 400
+dates = pd.date_range('2020-01-01', periods=n, freq='W-WED')
+
+# a i b skorelowane dodatnio, w ostatnich 30 tygodniach ujemnie; c z remisami (zaokrąglone), d z brakami
+a = rng.standard_normal(n)
+b = np.where(np.arange(n) < n - 30, a, -a) + rng.standard_normal(n) * 0.5
+c = np.round(rng.standard_normal(n))
+d = rng.standard_normal(n) * 1000 + 7_000_000
+d[50:60] = np.nan
+panel = pd.DataFrame({'a': a, 'b': b, 'c': c, 'd': d}, index=dates)
+
+print("\n[TEST] Zgodnosc z pandas")
+rolling = RollingCorrelation(panel, window=26)
+worst_pearson = worst_spearman = 0.0
+for x, y in rolling.pairs:
+    history = rolling.pair_history(x, y)
+    reference = panel[x].rolling(26, min_periods=rolling.min_periods).corr(panel[y])
+    worst_pearson = max(worst_pearson, np.nanmax(np.abs(reference - history['pearson'])))
+    for t in range(25, n, 7):
+        window = panel.iloc[t - 25:t + 1]
+        if window[[x, y]].isna().any().any():
+            continue
+        expected = window[x].rank().corr(window[y].rank())
+        worst_spearman = max(worst_spearman, abs(expected - history['spearman'].iloc[t]))
+check(worst_pearson < 1e-9, f"Pearson: max roznica {worst_pearson:.1e}")
+check(worst_spearman < 1e-9, f"Spearman (z remisami): max roznica {worst_spearman:.1e}")
+
+print("\n[TEST] Macierz")
+matrix = rolling.matrix('spearman')
+check(matrix.shape == (4, 4) and np.allclose(matrix.values, matrix.values.T, equal_nan=True),
+      "Symetryczna 4 x 4")
+check(rolling.matrix(at=dates[100]).loc['a', 'b'] == rolling.pair_history('a', 'b')['pearson'].iloc[100],
+      "Macierz na wybrana date")
+check(rolling.matrix(at=dates[100] + pd.Timedelta(days=3)).equals(rolling.matrix(at=dates[100])) and
+      rolling.matrix(at='2035-01-01').equals(rolling.matrix()) and rolling.matrix(at=-1).equals(rolling.matrix()),
+      "Data miedzy okresami / po ostatnim - ostatni wczesniejszy okres")
+outside = []
+for at in (dates[0] - pd.Timedelta(days=1), n, -n - 1):
+    try:
+        rolling.key_pairs(at=at)
+    except IndexError:
+        outside.append(at)
+check(len(outside) == 3, "Data przed pierwszym okresem / pozycja poza panelem - IndexError zamiast ostatniego wiersza")
+
+print("\n[TEST] Spearman blokami dni")
+cells = correlations.SPEARMAN_CELLS
+correlations.SPEARMAN_CELLS = 26 * 4 * 7  # 7 dni na blok, ostatni blok niepelny
+blocked = RollingCorrelation(panel, window=26)
+correlations.SPEARMAN_CELLS = cells
+check(np.array_equal(blocked.spearman, rolling.spearman, equal_nan=True), "Ten sam wynik co jednym blokiem")
+long = RollingCorrelation(pd.DataFrame(rng.standard_normal((5000, 20))), window=260, spearman=False)
+tracemalloc.start()
+started = time.perf_counter()
+long._rolling_spearman()
+elapsed = time.perf_counter() - started
+peak = tracemalloc.get_traced_memory()[1] / 1e6
+tracemalloc.stop()
+whole = 20 * (5000 - 259) * 260 * 8 / 1e6
+check(peak < whole / 4, f"20 serii x 5000 dni, okno 260: szczyt {peak:.0f} MB (same rangi calej historii "
+      f"{whole:.0f} MB), {elapsed:.1f} s")
+
+print("\n[TEST] Zalamanie korelacji")
+breaks = rolling.breaks()
+check(breaks and breaks[0]['pair'] == ('a', 'b') and breaks[0]['sign_flip'],
+      f"Wykryte: {[item['pair'] for item in breaks]}")
+check(not rolling.breaks(at=dates[200]), "Brak zalaman w spokojnym okresie")
+
+print("\n[TEST] Panel z wskaznikow o roznej czestotliwosci")
+daily = pd.DataFrame({'date': pd.date_range('2023-01-02', periods=300, freq='B'), 'value': np.arange(300.0)})
+monthly = pd.DataFrame({'date': pd.date_range('2023-01-01', periods=14, freq='MS'), 'value': np.arange(14.0)})
+aligned = build_panel({'daily': {'data': daily}, 'monthly': {'data': monthly}}, transform='level')
+check(aligned.index.freqstr == 'W-WED' and aligned['monthly'].notna().all(), f"Tygodniowo: {len(aligned)} wierszy")
+
+print("\n[TEST] Wydajnosc - 20 serii x 2600 dni")
+big = pd.DataFrame(rng.standard_normal((2600, 20)), index=pd.date_range('2015-01-01', periods=2600, freq='B'))
+started = time.perf_counter()
+RollingCorrelation(big, window=60, spearman=False)
+elapsed = time.perf_counter() - started
+check(elapsed < 1.0, f"Pearson 190 par: {elapsed * 1000:.0f} ms")
+
+finish("Wszystkie testy korelacji przeszly")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test wersji danych - skróty treści serii i wskaźników, artefakty liczone
+raz na wersję (także między procesami przez katalog), zmiana jednej serii
+unieważnia tylko zależne artefakty. Działa bez internetu.
+"""
+
+import os
+import stat
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from data_version import ArtifactCache, combine, frame_version, indicator_version, indicators_version
+from liquidity_monitor import PATTERN_INPUTS, LiquidityMonitor
+from standins import StandInServer
+
+print("="*70)
+print("  TEST WERSJI DANYCH")
+print("="*70)
+
+
+print("\n[TEST] Skroty tresci")
+dates = pd.date_range('2020-01-01', periods=2000, freq='D')
+frame = pd.DataFrame({'date': dates, 'value': np.arange(2000) / 8})
+version = frame_version(frame)
+check(version == frame_version(frame.copy()) and
+      version == frame_version(frame.assign(date=frame['date'].astype('datetime64[ns]'))),
+      f"Kopia i inna rozdzielczosc dat - ta sama wersja ({version})")
+revised = frame.copy()
+revised.loc[1000, 'value'] += 0.001
+check(frame_version(revised) != version and frame_version(frame.iloc[:-1]) != version,
+      "Rewizja jednej obserwacji / brak ostatniej - nowa wersja")
+indicator = {'data': frame, 'current': 249.875, 'change_1d': 0.125, 'change_7d': 0.875}
+check(indicator_version(indicator) != indicator_version(dict(indicator, current=300.0)),
+      "Podmienione current (scenariusz) zmienia wersje wskaznika")
+check(indicators_version({'a': indicator}, ['a', 'b']) != indicators_version({'a': indicator}, ['a']),
+      "Brakujacy wskaznik tez zmienia wersje zestawu")
+check(combine('x', 1, (2, 3)) == combine('x', 1, (2, 3)) != combine('x', 1, (2, 4)), "combine - deterministyczny")
+
+print("\n[TEST] ArtifactCache - pamiec i katalog wspolny dla procesow")
+with tempfile.TemporaryDirectory() as directory:
+    calls = []
+    first = ArtifactCache(directory)
+    value = first.get_or_compute('panel', 'v1', lambda: calls.append(1) or {'rows': 3})
+    again = first.get_or_compute('panel', 'v1', lambda: calls.append(1) or {'rows': 3})
+    check(value is again and len(calls) == 1 and dict(first.stats, bytes=0) == {'hits': 1, 'disk_hits': 0, 'misses': 1, 'bytes': 0},
+          "Ta sama wersja - liczona raz")
+    other = ArtifactCache(directory)  # Inny proces (CLI / API) z tym samym katalogiem
+    check(other.get_or_compute('panel', 'v1', lambda: calls.append(1)) == {'rows': 3} and len(calls) == 1 and
+          other.stats['disk_hits'] == 1, "Drugi proces - artefakt z dysku, bez liczenia")
+    with open(os.path.join(directory, 'panel-v2.json'), 'w') as f:
+        f.write('{uszkodzony')
+    check(other.get_or_compute('panel', 'v2', lambda: 'nowy') == 'nowy', "Uszkodzony plik - liczony od nowa")
+    check(other.get_or_compute('fn', 'v1', lambda: (lambda: 1))() == 1 and
+          not [name for name in os.listdir(directory) if name.startswith('fn-')], "Obiekt - tylko w pamieci")
+    check(stat.S_IMODE(os.stat(directory).st_mode) == 0o700 or os.name == 'nt', "Katalog z prawami 0700")
+
+    print("\n[TEST] Na dysku tylko dane")
+    panel = pd.DataFrame({'vix': np.arange(50.0), 'sofr': np.arange(50.0) / 7},
+                         index=pd.date_range('2024-01-05', periods=50, freq='W-FRI', name='date'))
+    first.put('panel', 'v3', panel)
+    first.put('percentile', 'v1', {'percentile': np.float64(42.5), 'complete': np.True_, 'windows': [1, 'x']})
+    first.put('pair', 'v1', (1, 2))
+    names = sorted(os.listdir(directory))
+    check('panel-v3.npz' in names and 'percentile-v1.json' in names and not [n for n in names if n.startswith('pair-')],
+          "Ramka -> .npz, slownik -> .json, krotka (wrocilaby jako lista) tylko w pamieci")
+    fresh = ArtifactCache(directory)
+    loaded = fresh.get('panel', 'v3')
+    check(loaded.equals(panel) and loaded.index.name == 'date' and
+          fresh.get('percentile', 'v1') == {'percentile': 42.5, 'complete': True, 'windows': [1, 'x']},
+          "Odczyt z dysku - te same dane")
+    with open(os.path.join(directory, 'obcy-v1.npz'), 'wb') as f:
+        np.savez(f, index=np.array([object()], dtype=object), columns=np.array(['a']), values=np.zeros((1, 1)),
+                 index_name=np.array(''))
+    check(fresh.get('obcy', 'v1') is None, "Podrzucony plik z pickle - nie wczytany")
+
+    print("\n[TEST] Sprzatanie katalogu")
+    with open(os.path.join(directory, 'stary-v1.pkl'), 'wb') as f:
+        f.write(b'pickle')
+    old = time.time() - 8 * 86400
+    os.utime(os.path.join(directory, 'panel-v1.json'), (old, old))
+    sweeper = ArtifactCache(directory, max_disk_bytes=os.path.getsize(os.path.join(directory, 'panel-v3.npz')) + 1024)
+    sweeper.put('panel', 'v4', panel)
+    names = sorted(os.listdir(directory))
+    check('stary-v1.pkl' not in names and 'panel-v1.json' not in names, "Pickle i pliki po max_age usuniete")
+    check(names == ['panel-v4.npz'] and
+          sum(os.path.getsize(os.path.join(directory, n)) for n in names) <= sweeper.max_disk_bytes,
+          f"Ponad max_disk_bytes - najdawniej czytane usuniete ({', '.join(names)})")
+
+print("\n[TEST] Budzet pamieci w bajtach")
+small = ArtifactCache(max_bytes=3 * 8000 + 2000)
+for k in range(5):
+    small.put('x', str(k), np.zeros(1000))
+check(len(small) == 3 and small.get('x', '0') is None and small.get('x', '4') is not None and
+      small.stats['bytes'] <= small.max_bytes, f"LRU - {len(small)} tablice po 8 KB, {small.stats['bytes']} B")
+small.put('panel', 'duzy', pd.DataFrame({'a': np.zeros(100_000)}))
+check(len(small) == 1 and small.stats['bytes'] >= 800_000, "Duzy artefakt wypiera mniejsze - zostaje sam")
+
+with StandInServer() as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    indicators = monitor.get_all_indicators(days_back=365)
+
+    print("\n[TEST] Analiza - raz na wersje danych i konfiguracji")
+    monitor.artifacts = ArtifactCache()
+    fresh = monitor.analyze_liquidity_conditions(indicators)
+    misses = monitor.artifacts.stats['misses']
+    cached = monitor.analyze_liquidity_conditions(indicators)
+    check(monitor.artifacts.stats['misses'] == misses and cached['data_version'] == fresh['data_version'],
+          f"Te same dane - bez ponownego liczenia ({misses} artefaktow przy pierwszej analizie)")
+    strip = lambda a: {k: v for k, v in a.items() if k != 'timestamp'}
+    check(strip(cached) == strip(fresh) and cached is not fresh, "Wynik z pamieci == policzony (kopia dla wywolujacego)")
+    cached['signals'].clear()
+    check(monitor.analyze_liquidity_conditions(indicators)['signals'] == fresh['signals'],
+          "Zmiana zwroconej analizy nie psuje pamieci")
+
+    print("\n[TEST] Zmiana jednej serii - tylko zalezne artefakty")
+    changed_name = next(name for name in ('dollar_index', 'treasury_10y', 'inflation_5y')
+                        if name in indicators and name not in PATTERN_INPUTS)
+    data = indicators[changed_name]['data']
+    changed = dict(indicators)
+    changed[changed_name] = monitor._build_indicator(data.assign(value=data['value'] + 0.5))
+    stats = dict(monitor.artifacts.stats)
+    analysis = monitor.analyze_liquidity_conditions(changed)
+    new = monitor.artifacts.stats['misses'] - stats['misses']
+    check(analysis['data_version'] != fresh['data_version'] and new == 2,
+          f"{changed_name}: przeliczone {new} artefakty (jego percentyl + analiza), wzorce i inne percentyle z pamieci")
+    fresh_monitor = LiquidityMonitor(fred_api_key='demo')
+    reference = fresh_monitor.analyze_liquidity_conditions(changed)
+    check(strip(reference) == strip(analysis), "Wynik jak liczony od zera")
+
+    monitor.thresholds = dict(monitor.thresholds, vix_panic=monitor.thresholds.get('vix_panic', 30) + 1)
+    check(monitor.analyze_liquidity_conditions(indicators)['data_version'] != fresh['data_version'],
+          "Zmiana progow - nowa wersja analizy")
+
+    print("\n[TEST] Wspolny katalog - CLI i aplikacja")
+    with tempfile.TemporaryDirectory() as directory:
+        app_monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+        app_monitor.artifacts = ArtifactCache(directory)
+        app_analysis = app_monitor.analyze_liquidity_conditions(indicators)
+        cli_monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+        cli_monitor.artifacts = ArtifactCache(directory)
+        cli_analysis = cli_monitor.analyze_liquidity_conditions(indicators)
+        check(cli_monitor.artifacts.stats['misses'] == 0 and cli_monitor.artifacts.stats['disk_hits'] == 1 and
+              strip(cli_analysis) == strip(app_analysis), "Druga instancja - analiza z dysku, bez liczenia")
+
+finish("Wszystkie testy wersji danych przeszly")
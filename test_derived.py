@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test rejestru serii pochodnych - zgodność spreadu z dotychczasowym merge,
+net liquidity (jednostki FRED przeliczone na mld USD, wyrównanie 'asof',
+przeterminowane odczyty, siatka tygodniowa),
+ilorazy / z-score / średnie, kolejność zależności, pamięć wyników i
+przyrostowe przeliczanie ogona. Działa bez internetu.
+"""
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from derived import DerivedRegistry, DerivedSeries
+from liquidity_monitor import LiquidityMonitor
+from scoring import ScoringModel
+from standins import StandInServer
+
+print("="*70)
+print("  TEST SERII POCHODNYCH")
+print("="*70)
+
+
+def frame(dates, values):
+    return pd.DataFrame({'date': pd.to_datetime(dates), 'value': np.asarray(values, dtype=float)})
+
+
+rng = np.random.default_rng(5)
+daily_dates = pd.date_range('2024-01-01', periods=300, freq='B')
+weekly_dates = pd.date_range('2024-01-03', periods=60, freq='W-WED')
+raw = {
+    'sofr': frame(daily_dates, 4.3 + rng.standard_normal(300) * 0.02),
+    'iorb': frame(daily_dates[5:], np.full(295, 4.4)),
+    'effr': frame(daily_dates, 4.33 + rng.standard_normal(300) * 0.01),
+    # Jak w FRED: WALCL i WTREGEN w mln USD, RRPONTSYD w mld USD
+    'fed_balance': frame(weekly_dates, 6_900_000 + np.cumsum(rng.standard_normal(60)) * 1000),
+    'tga': frame(weekly_dates, 800_000 + np.cumsum(rng.standard_normal(60)) * 1000),
+    'reverse_repo': frame(daily_dates, 250 + np.cumsum(rng.standard_normal(300))),
+}
+
+print("\n[TEST] Spready w build_indicators - jak dotychczasowy merge")
+monitor = LiquidityMonitor(fred_api_key='demo')
+indicators = monitor.build_indicators(raw)
+merged = pd.merge(raw['sofr'], raw['iorb'], on='date', suffixes=('_sofr', '_iorb'))
+spread = indicators['sofr_iorb_spread']['data']
+check(spread['date'].equals(merged['date']) and
+      np.array_equal(spread['value'].to_numpy(), (merged['value_sofr'] - merged['value_iorb']).to_numpy()),
+      f"SOFR-IORB: {len(spread)} wspolnych dat")
+check(indicators['effr_iorb_spread']['current'] == raw['effr']['value'].iloc[-1] - 4.4, "EFFR-IORB - ostatni odczyt")
+
+print("\n[TEST] Net liquidity - tygodniowe skladniki z ostatnim znanym odczytem")
+net = indicators['net_liquidity']['data']
+last = net.iloc[-1]
+expected = (raw['fed_balance']['value'].iloc[-1] / 1000 - raw['tga']['value'].iloc[-1] / 1000 -
+            raw['reverse_repo']['value'].iloc[-1])
+check(last['date'] == daily_dates[-1] and np.isclose(last['value'], expected), f"Ostatni odczyt {last['value']:.1f}")
+check(3000 < last['value'] < 10000 and 6000 < indicators['fed_balance']['current'] < 8000 and
+      500 < indicators['tga']['current'] < 1100, "Bilans Fed i TGA z mln na mld USD - net liquidity w mld USD")
+check(raw['fed_balance']['value'].iloc[-1] > 1e6, "Ramki wejsciowe bez zmian")
+check(net['date'].iloc[0] == weekly_dates[0], "Start od pierwszej daty wszystkich skladnikow")
+model = ScoringModel(monitor.thresholds, monitor.indicator_weights)
+check(('net_liquidity', 'change_7d') in model.features and model.weights[model.indicators.index('net_liquidity')] > 0,
+      "Net liquidity w punktacji (regula zmiany tygodniowej i waga)")
+
+with StandInServer() as server:
+    served = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    served_net = served.build_indicators(served.fetch_raw(['fed_balance', 'tga', 'reverse_repo'], 120))
+net_change = served_net['net_liquidity']['change_7d']
+check(3000 < served_net['net_liquidity']['current'] < 10000 and abs(net_change) < 1000,
+      f"Atrapa FRED: net liquidity {served_net['net_liquidity']['current']:.0f} mld USD, "
+      f"zmiana tygodniowa {net_change:+.0f} (progi +/-{served.thresholds['net_liquidity_injection']})")
+
+stale = dict(raw, fed_balance=raw['fed_balance'].iloc[:-3])
+net = DerivedRegistry(shared=False).evaluate(stale)['net_liquidity']
+check(net['date'].iloc[-1] == raw['fed_balance']['date'].iloc[-4] + pd.Timedelta(days=14),
+      f"Bilans Fed sprzed 3 tygodni - seria konczy sie {net['date'].iloc[-1].date()} (14 dni po odczycie)")
+
+weekly = DerivedSeries('net_weekly', 'linear', ('fed_balance', 'tga', 'reverse_repo'), weights=(1, -1, -1),
+                       align='asof', freq='W-WED')
+frames = DerivedRegistry([weekly], shared=False).evaluate(raw)
+check(frames['net_weekly']['date'].dt.dayofweek.eq(2).all() and len(frames['net_weekly']) == 60,
+      f"Siatka tygodniowa (sroda): {len(frames['net_weekly'])} odczytow")
+
+print("\n[TEST] Iloraz, z-score, srednia i zaleznosci")
+registry = DerivedRegistry([
+    DerivedSeries('spread_z', 'zscore', ('spread',), window=20),
+    DerivedSeries('spread', 'linear', ('sofr', 'iorb'), weights=(1, -1)),
+    DerivedSeries('rrp_ma', 'ma', ('reverse_repo',), window=5),
+    DerivedSeries('tga_to_fed', 'ratio', ('tga', 'fed_balance')),
+], shared=False)
+check(registry.order.index('spread') < registry.order.index('spread_z'), f"Kolejnosc: {registry.order}")
+frames = registry.evaluate(raw)
+values = frames['spread']['value']
+reference = ((values - values.rolling(20).mean()) / values.rolling(20).std()).dropna()
+check(np.allclose(frames['spread_z']['value'].to_numpy(), reference.to_numpy()), "z-score jak pandas")
+check(np.allclose(frames['rrp_ma']['value'].to_numpy(),
+                  raw['reverse_repo']['value'].rolling(5).mean().dropna().to_numpy()), "Srednia jak pandas")
+check(np.allclose(frames['tga_to_fed']['value'].to_numpy(),
+                  (raw['tga']['value'] / raw['fed_balance']['value']).to_numpy()), "Iloraz")
+
+try:
+    registry.register(DerivedSeries('spread', 'linear', ('spread_z',)))
+    check(False, "Cykl zaleznosci odrzucony")
+except ValueError as e:
+    check(registry.get('spread').inputs == ('sofr', 'iorb'), f"Cykl zaleznosci odrzucony: {e}")
+
+print("\n[TEST] Pamiec wynikow")
+again = registry.evaluate(raw)
+check(all(again[name] is frames[name] for name in frames), "Te same dane - bez ponownego liczenia")
+changed = dict(raw, sofr=raw['sofr'].assign(value=raw['sofr']['value'] + 0.01))
+again = registry.evaluate(changed)
+check(again['spread'] is not frames['spread'] and again['rrp_ma'] is frames['rrp_ma'],
+      "Zmiana SOFR - przeliczony tylko spread i zalezne")
+
+print("\n[TEST] Przyrostowe przeliczanie - nowe odczyty skladnikow")
+registry = DerivedRegistry()
+history = {name: frame.iloc[:-20] for name, frame in raw.items()}
+registry.evaluate(history)
+for day in range(19, -1, -1):
+    history = {name: frame.iloc[:len(frame) - day] for name, frame in raw.items()}
+    incremental = registry.evaluate(history)
+full = DerivedRegistry(shared=False).evaluate(raw)
+check(all(incremental[name]['date'].equals(full[name]['date']) and
+          np.allclose(incremental[name]['value'], full[name]['value'], rtol=0, atol=1e-12) for name in full),
+      f"Po 20 dniach przyrostowo == od zera ({', '.join(full)})")
+revised = dict(raw, tga=raw['tga'].assign(value=np.where(raw['tga'].index == 40, 0.0, raw['tga']['value'])))
+check(np.allclose(registry.evaluate(revised)['net_liquidity']['value'],
+                  DerivedRegistry(shared=False).evaluate(revised)['net_liquidity']['value'], rtol=0, atol=1e-12),
+      "Rewizja starszego odczytu TGA - przeliczony ogon od rewizji")
+check(LiquidityMonitor(fred_api_key='demo').derived.evaluate(raw)['net_liquidity'] is
+      registry.evaluate(raw)['net_liquidity'], "Nowy monitor korzysta z tej samej pamieci wynikow")
+
+finish("Wszystkie testy serii pochodnych przeszly")
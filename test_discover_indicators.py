@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test skanera wskaźników - infer_frequency, probe (dostępna / ograniczona /
+niedostępna seria, tylko kilka najnowszych obserwacji), cache z TTL (także
+z pliku), równoległe sondowanie i stronicowany listing kategorii / release.
+Działa bez internetu (atrapa FRED ze standins).
+"""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from checks import check, finish
+from discover_indicators import STALE_AFTER_DAYS, IndicatorScanner, infer_frequency
+from liquidity_monitor import LiquidityMonitor, RateLimiter
+from standins import StandInServer
+
+print("="*70)
+print("  TEST SKANERA WSKAZNIKOW")
+print("="*70)
+
+
+def days(freq, periods=12, end='2024-06-28'):
+    return [d.strftime('%Y-%m-%d') for d in pd.date_range(end=end, periods=periods, freq=freq)]
+
+
+print("\n[TEST] infer_frequency")
+check([infer_frequency(days(freq)) for freq in ('B', 'W-FRI', 'MS', 'QS', 'YS')] == ['D', 'W', 'M', 'Q', 'A'],
+      "Dzienna (dni robocze) / tygodniowa / miesieczna / kwartalna / roczna")
+check(infer_frequency(days('MS')[::-1]) == 'M', "Daty malejace (sort_order=desc) - ta sama czestotliwosc")
+check(infer_frequency(['2024-01-01']) == '?' and infer_frequency([]) == '?', "Za malo dat - '?'")
+
+with StandInServer(fred_lag_days=0) as server, tempfile.TemporaryDirectory() as directory:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    monitor.rate_limiter = RateLimiter(rate_per_sec=1000, burst=1000)  # Limiter FRED nie jest tu testowany
+    old = (datetime.now() - timedelta(days=STALE_AFTER_DAYS + 200)).strftime('%Y-%m-%d')
+    server.add_series('OLDSER', [(d, 1.5) for d in days('MS', 40, end=old)])
+
+    print("\n[TEST] probe")
+    scanner = IndicatorScanner(monitor, cache_path=None)
+    server.requests_log.clear()
+    vix = scanner.probe('VIXCLS', 'VIX')
+    params = server.requests_log[-1][1]
+    check(vix['status'] == 'available' and vix['frequency'] == 'D' and vix['staleness_days'] <= 4 and
+          vix['latency_ms'] is not None and vix['error'] is None, f"VIXCLS dostepna, D, {vix['latest_date']}")
+    check(params.get('sort_order') == 'desc' and params.get('limit') == '12',
+          "Tylko 12 najnowszych obserwacji (sort_order=desc)")
+    check(scanner.probe('M2SL')['frequency'] == 'M' and scanner.probe('WALCL')['frequency'] == 'W',
+          "M2SL miesieczna, WALCL tygodniowa")
+    stale = scanner.probe('OLDSER')
+    check(stale['status'] == 'limited' and stale['staleness_days'] > STALE_AFTER_DAYS and
+          stale['latest_date'] == old[:8] + '01',
+          f"Seria bez nowych danych - limited ({stale['staleness_days']} dni)")
+    missing = scanner.probe('NIEMA')
+    check(missing['status'] == 'unavailable' and '400' in missing['error'],
+          "Nieistniejaca seria - unavailable z bledem")
+
+    print("\n[TEST] Cache z TTL")
+    cache_path = os.path.join(directory, 'discovery_cache.json')
+    candidates = {'VIXCLS': 'VIX', 'DGS10': '10Y', 'NIEMA': 'brak'}
+    scanner = IndicatorScanner(monitor, cache_path=cache_path, cache_ttl=0.5)
+    first = scanner.scan(candidates)
+    server.requests_log.clear()
+    second = scanner.scan(candidates)
+    check(not server.requests_log and all(r.get('cached') for r in second) and
+          [r['id'] for r in second] == list(candidates), "Drugi skan w TTL - bez zapytan, kolejnosc kandydatow")
+    check([{k: v for k, v in r.items() if k != 'cached'} for r in second] == first,
+          "Wyniki z cache = wyniki sondowania")
+    restarted = IndicatorScanner(monitor, cache_path=cache_path, cache_ttl=0.5)
+    check(all(r.get('cached') for r in restarted.scan(candidates)) and not server.requests_log,
+          "Nowa instancja - cache z pliku")
+    scanner.scan(candidates, use_cache=False)
+    check(len(server.requests_log) == len(candidates), "use_cache=False - sondowanie wszystkich")
+    time.sleep(0.6)
+    server.requests_log.clear()
+    expired = scanner.scan(candidates)
+    check(len(server.requests_log) == len(candidates) and not any(r.get('cached') for r in expired),
+          "Po TTL - sondowanie od nowa")
+    with open(cache_path, 'w') as f:
+        f.write('{zly json')
+    check(IndicatorScanner(monitor, cache_path=cache_path)._cache == {}, "Uszkodzony plik cache - start od zera")
+    with open(os.path.join(directory, 'stary.json'), 'w') as f:
+        json.dump({'VIXCLS': {'checked_at': 0, 'result': vix}}, f)
+    check(IndicatorScanner(monitor, cache_path=os.path.join(directory, 'stary.json'))._cached('VIXCLS') is None,
+          "Wpis starszy niz TTL pomijany")
+
+    print("\n[TEST] Przejsciowe bledy poza cache")
+    server.add_series('PUSTA', [('2024-01-02', '.')])
+    flaky = IndicatorScanner(monitor, cache_path=None)
+    server.fail_paths.append('/fred/')
+    outage = {r['id']: r for r in flaky.scan({'VIXCLS': 'VIX', 'SOFR': 'SOFR'})}
+    server.fail_paths.clear()
+    check(all(r['retryable'] and '503' in r['error'] for r in outage.values()) and not flaky._cache,
+          "503 - wynik z bledem, ale nie w cache")
+    server.requests_log.clear()
+    retried = flaky.scan({'VIXCLS': 'VIX', 'SOFR': 'SOFR', 'NIEMA': 'brak', 'PUSTA': 'pusta'})
+    check(len(server.requests_log) == 4 and [r['status'] for r in retried][:2] == ['available', 'available'],
+          "Kolejny skan sprawdza serie od nowa")
+    check(retried[2]['error'] and retried[3]['error'] == 'Brak obserwacji' and
+          not any(r['retryable'] for r in retried) and set(flaky._cache) == {'VIXCLS', 'SOFR', 'NIEMA', 'PUSTA'},
+          "Nieznana seria i 'Brak obserwacji' - odpowiedzi rozstrzygajace, w cache")
+
+    print("\n[TEST] Rownolegle sondowanie")
+    many = {series_id: '' for series_id in ('VIXCLS', 'DGS10', 'DGS2', 'T10Y2Y', 'NFCI', 'M2SL', 'WALCL', 'SOFR',
+                                            'EFFR', 'IORB', 'UNRATE', 'T5YIE', 'DTWEXBGS', 'WTREGEN', 'TOTRESNS',
+                                            'BAMLH0A0HYM2')}
+    server.delay = 0.1
+    started = time.perf_counter()
+    results = IndicatorScanner(monitor, max_workers=8, cache_path=None).scan(many)
+    elapsed = time.perf_counter() - started
+    server.delay = 0.0
+    check(all(r['status'] == 'available' for r in results) and elapsed < len(many) * 0.1 / 2,
+          f"{len(many)} serii po 100 ms, 8 watkow: {elapsed:.2f} s (po kolei {len(many) * 0.1:.1f} s)")
+
+    print("\n[TEST] Stronicowany listing")
+    category = [{'id': f'CAT{k:05d}', 'title': f'Seria {k}', 'frequency_short': 'M',
+                 'observation_end': (datetime.now() - timedelta(days=k % 200)).strftime('%Y-%m-%d')}
+                for k in range(2500)]
+    server.add_listing('category', 32991, category)
+    server.add_listing('release', 20, category[:1000])
+    server.requests_log.clear()
+    listing = scanner.candidates_from_category(32991)
+    offsets = [params['offset'] for path, params in server.requests_log]
+    check(list(listing) == [meta['id'] for meta in category] and offsets == ['0', '1000', '2000'],
+          f"Kategoria: {len(listing)} serii z 3 stron (offset {', '.join(offsets)})")
+    server.requests_log.clear()
+    check(len(scanner.candidates_from_release(20)) == 1000 and len(server.requests_log) == 1,
+          "Release: dokladnie jedna pelna strona - bez pustego zapytania")
+    server.add_listing('category', 1, [])
+    check(scanner.candidates_from_category(1) == {}, "Pusta kategoria")
+
+    statuses = [scanner.from_metadata(sid, meta)['status'] for sid, meta in list(listing.items())[:200]]
+    check(statuses.count('available') == STALE_AFTER_DAYS + 1 and set(statuses) == {'available', 'limited'},
+          "from_metadata - status z observation_end, bez sondowania")
+
+finish("Wszystkie testy skanera wskaznikow przeszly")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test pamięci wykresów - przerzedzanie (skoki zostają), wersja danych,
+jedna budowa na klucz (także przy równoległych sesjach), budżet bajtów
+i zysk czasu względem budowania od nowa. Działa bez internetu.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from checks import check, finish
+from figure_cache import FigureCache, downsample, figure_bytes, series_version
+
+print("="*70)
+print("  TEST PAMIECI WYKRESOW")
+print("="*70)
+
+
+def frame(dates, values):
+    return pd.DataFrame({'date': pd.to_datetime(dates), 'value': np.asarray(values, dtype=float)})
+
+
+rng = np.random.default_rng(11)
+dates = pd.date_range('1975-01-01', periods=13000, freq='D')
+values = np.cumsum(rng.standard_normal(13000))
+values[7000] += 80  # Jednodniowy skok - musi przetrwać przerzedzenie
+indicators = {name: {'data': frame(dates, values + k)} for k, name in enumerate(('vix', 'sofr', 'tga'))}
+
+print("\n[TEST] Przerzedzanie")
+x, y = downsample(dates.to_numpy(), values, 2000)
+check(len(x) <= 2000 and (np.diff(x) > np.timedelta64(0)).all(), f"{len(values)} -> {len(x)} punktow, daty rosnaco")
+check(x[0] == dates[0] and x[-1] == dates[-1] and y.max() == values.max() and y.min() == values.min(),
+      "Pierwszy i ostatni punkt, minimum i maksimum (skok) zachowane")
+check(set(zip(x.tolist(), y.tolist())) <= set(zip(dates.to_numpy().tolist(), values.tolist())), "Tylko oryginalne punkty")
+short_x, short_y = downsample(dates.to_numpy()[:500], values[:500], 2000)
+check(len(short_x) == 500 and downsample(dates.to_numpy(), values, None)[1] is values, "Krotka seria / None - bez zmian")
+
+print("\n[TEST] Wersja danych")
+version = series_version(indicators, ('vix', 'sofr'))
+check(version == series_version({k: {'data': v['data'].copy()} for k, v in indicators.items()}, ('vix', 'sofr')),
+      f"Te same dane - ta sama wersja ({version})")
+revised = dict(indicators, sofr={'data': indicators['sofr']['data'].assign(value=lambda d: d['value'].where(d.index != 100, 0))})
+check(series_version(revised, ('vix', 'sofr')) != version and series_version(revised, ('vix',)) == series_version(indicators, ('vix',)),
+      "Rewizja jednej obserwacji zmienia wersje tylko zestawow z ta seria")
+
+
+def build(names, max_points):
+    builds.append(names)
+    fig = go.Figure()
+    for name in names:
+        data = indicators[name]['data']
+        px, py = downsample(data['date'].to_numpy(), data['value'].to_numpy(), max_points)
+        fig.add_trace(go.Scatter(x=px, y=py, name=name))
+    fig.update_layout(template='plotly_white', height=600)
+    return fig
+
+
+print("\n[TEST] Jedna budowa na klucz")
+builds = []
+cache = FigureCache()
+names = ('vix', 'sofr', 'tga')
+started = time.perf_counter()
+first = cache.get('multi', names, series_version(indicators, names), 2000, lambda: build(names, 2000))
+build_time = time.perf_counter() - started
+started = time.perf_counter()
+again = cache.get('multi', names, series_version(indicators, names), 2000, lambda: build(names, 2000))
+hit_time = time.perf_counter() - started
+check(again is first and len(builds) == 1, f"Kolejny przebieg - ta sama figura (budowa {build_time * 1000:.0f} ms, "
+                                           f"z pamieci {hit_time * 1000:.2f} ms)")
+check(cache.peek('multi', names, series_version(indicators, names), 2000) is first and
+      len(first.data) == 3 and all(len(trace.x) <= 2000 for trace in first.data) and
+      cache.stats['bytes'] == figure_bytes(first) and figure_bytes(first) < 3 * 2000 * 16 + 1024 * 2,
+      f"Wpis: 3 linie po <= 2000 punktow, {cache.stats['bytes'] / 1024:.0f} KB w budzecie")
+check(cache.peek('multi', names, 'inna', 2000) is None and cache.stats['hits'] == 1, "peek - bez budowy i trafien")
+cache.get('multi', names, series_version(indicators, names), None, lambda: build(names, None))
+cache.get('multi', names, series_version(revised, names), 2000, lambda: build(names, 2000))
+check(len(builds) == 3 and cache.stats['hits'] == 1 and cache.stats['misses'] == 3,
+      "Inny poziom przerzedzenia / nowa wersja danych - nowa budowa")
+
+builds.clear()
+barrier = threading.Barrier(4)
+results = []
+
+
+def session():
+    barrier.wait()
+    results.append(cache.get('tier1', ('vix',), 'v1', 2000, lambda: (time.sleep(0.1), build(('vix',), 2000))[1]))
+
+
+threads = [threading.Thread(target=session) for _ in range(4)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+check(len(builds) == 1 and all(result is results[0] for result in results), "4 rownolegle sesje - jedna budowa")
+
+print("\n[TEST] Budzet bajtow")
+small = FigureCache(max_bytes=int(figure_bytes(cache.peek('tier1', ('vix',), 'v1', 2000)) * 2.5))
+for k in range(5):
+    small.get('series', ('vix',), f"v{k}", 2000, lambda: build(('vix',), 2000))
+check(len(small) == 2 and small.stats['evictions'] == 3 and small.stats['bytes'] <= small.max_bytes,
+      f"Najdawniej uzywane wypadaja: {len(small)} wpisy, {small.stats['bytes'] / 1024:.0f} KB")
+check(small.peek('series', ('vix',), 'v0', 2000) is None and small.peek('series', ('vix',), 'v4', 2000) is not None,
+      "Najstarszy wpis usuniety, najnowszy zostaje")
+small.clear()
+check(len(small) == 0 and small.stats['bytes'] == 0, "clear")
+
+finish("Wszystkie testy pamieci wykresow przeszly")
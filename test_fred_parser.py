@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test parsera odpowiedzi FRED - zgodność z dotychczasową ścieżką
+(json -> DataFrame -> to_datetime / to_numeric), znacznik braku '.',
+nietypowe wartości, ścieżka zapasowa i pobieranie przez atrapę FRED.
+Działa bez internetu.
+"""
+
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from fred_parser import observations_frame, parse_observations
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer
+
+print("="*70)
+print("  TEST PARSERA ODPOWIEDZI FRED")
+print("="*70)
+
+
+def payload(dates, values, **dumps):
+    observations = [{'realtime_start': '2024-06-01', 'realtime_end': '2024-06-01', 'date': str(d), 'value': v}
+                    for d, v in zip(dates, values)]
+    return json.dumps({'count': len(observations), 'observations': observations}, **dumps).encode()
+
+
+def reference(content):
+    """Dotychczasowa ścieżka fetch_fred_data"""
+    df = pd.DataFrame(json.loads(content)['observations'])
+    df['date'] = pd.to_datetime(df['date'])
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    return df[['date', 'value']].dropna().sort_values('date').reset_index(drop=True)
+
+
+rng = np.random.default_rng(11)
+n = 13500
+dates = pd.date_range('1975-01-01', periods=n, freq='B').date
+values = [f"{v:.{rng.integers(0, 6)}f}" for v in rng.standard_normal(n) * 10 ** rng.integers(0, 7, n)]
+for k in rng.choice(n, 200, replace=False):
+    values[k] = '.'
+content = payload(dates, values, separators=(',', ':'))
+
+print("\n[TEST] Zgodnosc z dotychczasowa sciezka")
+parsed = observations_frame(*parse_observations(content))
+expected = reference(content)
+check(parsed['date'].equals(expected['date']), f"Daty: {len(parsed)} obserwacji (200 z '.' pominietych)")
+check(np.array_equal(parsed['value'].to_numpy(), expected['value'].to_numpy()), "Wartosci identyczne bit w bit")
+
+print("\n[TEST] Nietypowe wartosci i sciezka zapasowa")
+odd = ['1e-5', '-.5', '5.', 'abc', '.', '00012.30', '-0', '123456789012345678.5']
+small = payload(pd.date_range('2024-01-01', periods=len(odd)).date, odd, separators=(',', ':'))
+got = observations_frame(*parse_observations(small))
+want = reference(small)
+check(got['date'].equals(want['date']) and np.array_equal(got['value'].to_numpy(), want['value'].to_numpy()),
+      f"Jak pd.to_numeric: {got['value'].tolist()}")
+spaced = payload(dates[::-1], values[::-1])
+fallback = observations_frame(*parse_observations(spaced))
+check(fallback['date'].equals(expected['date']) and np.array_equal(fallback['value'], expected['value']),
+      "Spacje i kolejnosc malejaca - json.loads + sortowanie, ten sam wynik")
+check(len(parse_observations(b'{"observations":[]}')[0]) == 0, "Pusta odpowiedz")
+
+print("\n[TEST] Czas parsowania")
+started = time.perf_counter()
+for _ in range(5):
+    parse_observations(content)
+fast = (time.perf_counter() - started) / 5
+started = time.perf_counter()
+for _ in range(5):
+    reference(content)
+slow = (time.perf_counter() - started) / 5
+check(fast < slow, f"Parser {fast * 1000:.1f} ms vs dotychczas {slow * 1000:.1f} ms ({slow / fast:.1f}x)")
+
+print("\n[TEST] Pobieranie przez atrape FRED")
+with StandInServer() as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    df = monitor.fetch_fred_data('WALCL', days_back=365)
+    check(not df.empty and df['date'].is_monotonic_increasing and df['value'].dtype == float,
+          f"WALCL: {len(df)} odczytow, ostatni {df['value'].iloc[-1]:.1f}")
+    check(df['date'].dtype == pd.to_datetime(pd.Series(['2024-01-01'])).dtype, f"Typ daty jak to_datetime: {df['date'].dtype}")
+
+finish("Wszystkie testy parsera FRED przeszly")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test historii analiz - record zapisuje tę samą analizę raz, scores(days)
+i filtr źródła, stronicowanie alertów kursorem (bez powtórek i dziur, także
+przy remisach czasu), filtr prefiksu wskaźnika, import alert_log.json
+i koszt strony przy 300 tys. alertów. Działa bez internetu.
+"""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from checks import check, finish
+from history_store import HistoryStore, _to_epoch
+
+print("="*70)
+print("  TEST HISTORII ANALIZ")
+print("="*70)
+
+
+def analysis_at(when, score=10, alerts=()):
+    """Minimalna analiza w formacie LiquidityMonitor"""
+    return {
+        'timestamp': when.strftime('%Y-%m-%d %H:%M:%S'),
+        'overall_score': score,
+        'raw_score': score,
+        'interpretation': 'test',
+        'market_regime': {'regime': 'NEUTRAL'},
+        'signals': [],
+        'percentiles': {'vix': {'percentile': 42.0}},
+        'alerts': [{'severity': severity, 'indicator': indicator, 'message': f'{indicator} {severity}'}
+                   for severity, indicator in alerts],
+    }
+
+
+def walk(store, limit, **filters):
+    """Wszystkie strony po kursorze - (lista id, liczba stron)"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page = store.alerts(limit=limit, before=cursor, **filters)
+        pages += 1
+        ids += page['id'].tolist()
+        cursor = page.attrs['cursor']
+        if cursor is None:
+            return ids, pages
+
+
+indicators = {'vix': {'date': '2024-06-28', 'current': 17.0, 'change_1d': 0.5, 'change_7d': -1.0},
+              'sofr': {'date': '2024-06-28', 'current': 5.33, 'change_1d': 0.0, 'change_7d': 0.01}}
+now = datetime.now().replace(microsecond=0)
+
+print("\n[TEST] record - ta sama analiza raz")
+store = HistoryStore(':memory:')
+analysis = analysis_at(now, alerts=[('critical', 'VIX')])
+first = store.record(indicators, analysis)
+check(first is not None and store.record(indicators, analysis) is None,
+      "Drugie przeladowanie strony - bez nowego wiersza")
+check(store.record(indicators, analysis, source='cli') is not None, "Ta sama chwila z innego zrodla - osobny przebieg")
+check(len(store.scores(days=None)) == 2 and store.count_alerts() == 2 and len(store.indicator_history('vix')) == 2,
+      "Dwa przebiegi, alerty i wartosci bez duplikatow")
+check(store.indicator_history('sofr')['value'].tolist() == [5.33, 5.33], "Wartosci wskaznika zapisane")
+
+print("\n[TEST] scores(days) i zrodlo")
+store = HistoryStore(':memory:')
+for age in (0, 3, 10, 40, 200):
+    store.record(indicators, analysis_at(now - timedelta(days=age), score=age))
+store.record(indicators, analysis_at(now - timedelta(days=1), score=-1), source='api')
+recent = store.scores(days=7)
+check(recent['score'].tolist() == [3, -1, 0] and recent['timestamp'].is_monotonic_increasing,
+      "Ostatnie 7 dni, rosnaco po czasie")
+check(store.scores(days=60)['score'].tolist() == [40, 10, 3, -1, 0] and len(store.scores(days=None)) == 6,
+      "60 dni / cala historia")
+check(store.scores(days=None, source='api')['score'].tolist() == [-1], "Filtr zrodla")
+check(store.scores(days=None)['timestamp'].iloc[-1] == now, "timestamp = czas z analizy")
+
+print("\n[TEST] Stronicowanie kursorem")
+store = HistoryStore(':memory:')
+names = ['SOFR-IORB', 'SOFR-IORB Spread', 'SOFR', 'VIX', 'Ocena ogolna']
+base = datetime(2024, 1, 1)
+for k in range(503):
+    # Co trzy alerty ten sam czas - kursor musi rozstrzygać remisy po id
+    store.add_alert(('critical', 'warning')[k % 2], names[k % len(names)], f'alert {k}',
+                    timestamp=(base + timedelta(hours=k // 3)).isoformat())
+expected = [row[0] for row in store.conn.execute("SELECT id FROM alerts ORDER BY ts DESC, id DESC")]
+ids, pages = walk(store, limit=50)
+check(ids == expected and len(set(ids)) == 503 and pages == 11,
+      f"503 alerty w {pages} stronach - kolejnosc od najnowszych, bez powtorek i dziur")
+ids, pages = walk(store, limit=503)
+check(len(ids) == 503 and pages == 2, "Pelna ostatnia strona - nastepna pusta, kursor None")
+check(store.alerts(limit=1000).attrs['cursor'] is None, "Strona niepelna - brak kursora")
+
+print("\n[TEST] Filtr prefiksu wskaznika")
+check(store.alert_indicators(prefix='SOFR-IORB') == ['SOFR-IORB', 'SOFR-IORB Spread'] and
+      store.alert_indicators(prefix='SOFR') == ['SOFR', 'SOFR-IORB', 'SOFR-IORB Spread'] and
+      store.alert_indicators(prefix='XYZ') == [], "alert_indicators - tylko nazwy z prefiksem")
+for indicator, severity in (('SOFR-IORB', None), ('SOFR', 'critical'), ('VIX', 'warning')):
+    sql = "SELECT id FROM alerts WHERE indicator LIKE ? || '%'" + (" AND severity = ?" if severity else "")
+    params = [indicator] + ([severity] if severity else [])
+    direct = [row[0] for row in store.conn.execute(sql + " ORDER BY ts DESC, id DESC", params)]
+    ids, pages = walk(store, limit=17, indicator=indicator, severity=severity)
+    check(ids == direct and store.count_alerts(severity=severity, indicator=indicator) == len(direct),
+          f"{indicator!r} / {severity}: {len(direct)} alertow stronami jak zapytanie wprost")
+check(store.alerts(indicator='BRAK').empty and store.count_alerts(indicator='BRAK') == 0, "Nieznany prefiks - pusto")
+
+print("\n[TEST] Import alert_log.json")
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'alert_log.json')
+    with open(path, 'w') as f:
+        f.write(json.dumps({'timestamp': '2024-03-01T08:00:00', 'score': -45, 'interpretation': 'Stres',
+                            'alerts': [{'severity': 'critical', 'indicator': 'SOFR-IORB', 'message': 'spread'},
+                                       {'severity': 'warning', 'indicator': 'VIX', 'message': 'vix'}]}) + '\n\n')
+        f.write(json.dumps({'timestamp': '2024-03-02T08:00:00', 'score': -50}) + '\n')
+    store = HistoryStore(os.path.join(directory, 'history.db'))
+    check(store.import_alert_log(path) == 4 and store.import_alert_log(path) == 0,
+          "4 alerty (2 oceny + 2 wskazniki), drugi import pomijany")
+    page = store.alerts()
+    check(page['indicator'].tolist() == ['Ocena ogolna', 'VIX', 'SOFR-IORB', 'Ocena ogolna'] and
+          page['message'].tolist()[3] == 'Score -45: Stres', "Ocena jako alert 'Ocena ogolna' + alerty wpisu")
+    check(page['message'].iloc[0] == 'Score -50: ' and
+          page['timestamp'].iloc[0] == datetime(2024, 3, 2, 8) and page['run_id'].isna().all(),
+          "Tresc i czas z logu, bez przebiegu")
+    check(store.alert_indicators() == ['Ocena ogolna', 'SOFR-IORB', 'VIX'], "Nazwy w slowniku prefiksow")
+    check(store.import_alert_log(os.path.join(directory, 'brak.json')) == 0, "Brak pliku - 0")
+    store.close()
+
+print("\n[TEST] Koszt strony przy 300 tys. alertow")
+store = HistoryStore(':memory:')
+start = _to_epoch('2015-01-01T00:00:00')
+indicator_names = [f'IND-{k:02d}' for k in range(30)] + ['SOFR-IORB', 'SOFR-IORB Spread']
+rows = [(start + k * 600, ('critical', 'warning', 'info')[k % 3], indicator_names[k % len(indicator_names)], f'a{k}')
+        for k in range(300_000)]
+with store.conn:
+    store.conn.executemany("INSERT INTO alerts (ts, severity, indicator, message) VALUES (?, ?, ?, ?)", rows)
+    store._add_names(indicator_names)
+timings = {}
+for label, filters in (('bez filtra', {}), ('critical', {'severity': 'critical'}),
+                       ("prefiks 'SOFR-IORB'", {'indicator': 'SOFR-IORB'}),
+                       ("prefiks + critical", {'indicator': 'SOFR-IORB', 'severity': 'critical'})):
+    page = store.alerts(limit=50, **filters)
+    for _ in range(100):  # Strona daleko w historii - ten sam koszt co pierwsza
+        page = store.alerts(limit=50, before=page.attrs['cursor'], **filters)
+    started = time.perf_counter()
+    for _ in range(20):
+        store.alerts(limit=50, before=page.attrs['cursor'], **filters)
+    timings[label] = (time.perf_counter() - started) / 20 * 1000
+check(max(timings.values()) < 10,
+      "Strona 50 alertow (po 100 stronach): " + ', '.join(f"{k} {v:.1f} ms" for k, v in timings.items()))
+
+finish("Wszystkie testy historii analiz przeszly")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test zmian w horyzontach - zgodność z filtrowaniem ramki (stara semantyka
+change_1d / change_7d), YTD, brak historii. Działa bez internetu.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from horizons import HORIZONS, change_table, changes
+
+print("="*70)
+print("  TEST HORYZONTOW ZMIAN")
+print("="*70)
+
+
+def filtered(data, days):
+    """Stara metoda - filtrowanie całej ramki"""
+    latest = data.iloc[-1]
+    past = data[data['date'] <= latest['date'] - pd.Timedelta(days=days)]
+    return latest['value'] - past.iloc[-1]['value'] if len(past) else latest['value'] - latest['value']
+
+
+rng = np.random.default_rng(3)
+
+print("\n[TEST] Zgodnosc z filtrowaniem ramki")
+mismatches = 0
+for freq, periods in (('B', 600), ('W-WED', 200), ('MS', 60), ('D', 30)):
+    data = pd.DataFrame({'date': pd.date_range('2020-01-01', periods=periods, freq=freq),
+                         'value': np.cumsum(rng.standard_normal(periods))})
+    for end in range(2, periods, max(periods // 25, 1)):
+        part = data.iloc[:end]
+        result = changes(part['date'].to_numpy(), part['value'].to_numpy(dtype=float), ('1d', '7d', '30d', '90d'),
+                         missing='latest')
+        expected_1d = part['value'].iloc[-1] - part['value'].iloc[-2]
+        mismatches += not np.isclose(result['1d'], expected_1d)
+        mismatches += sum(not np.isclose(result[f'{days}d'], filtered(part, days)) for days in (7, 30, 90))
+check(mismatches == 0, f"Niezgodnosci: {mismatches}")
+
+print("\n[TEST] YTD i brak historii")
+data = pd.DataFrame({'date': pd.to_datetime(['2023-12-28', '2023-12-29', '2024-01-02', '2024-03-01']),
+                     'value': [10.0, 11.0, 12.0, 15.0]})
+result = changes(data['date'].to_numpy(), data['value'].to_numpy(dtype=float), HORIZONS)
+check(result['ytd'] == 4.0, f"YTD wzgledem 2023-12-29: {result['ytd']}")
+check(np.isnan(result['1y']), "1y bez historii = NaN")
+check(changes(data['date'].to_numpy(), data['value'].to_numpy(dtype=float), ('1y',), missing='latest')['1y'] == 0,
+      "1y bez historii (missing='latest') = 0")
+check(abs(changes(data['date'].to_numpy(), data['value'].to_numpy(dtype=float), ('ytd',), pct=True)['ytd']
+          - 400 / 11) < 1e-9, "Zmiana procentowa")
+
+print("\n[TEST] Tabela zmian - 20 serii x 50 lat dziennie")
+dates = pd.date_range('1975-01-01', periods=13000, freq='B')
+indicators = {f's{k}': {'data': pd.DataFrame({'date': dates, 'value': rng.standard_normal(13000)}), 'date': None}
+              for k in range(20)}
+started = time.perf_counter()
+table = change_table(indicators)
+elapsed = time.perf_counter() - started
+check(table.shape == (20, 2 + len(HORIZONS)) and table[list(HORIZONS)].notna().all().all(),
+      f"Tabela {table.shape[0]} x {table.shape[1]}")
+check(elapsed < 0.1, f"Czas: {elapsed * 1000:.1f} ms ({elapsed / 20 * 1e6:.0f} us na serie)")
+
+finish("Wszystkie testy horyzontow przeszly")
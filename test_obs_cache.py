@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test skompresowanego przechowywania obserwacji - kodowanie bit w bit,
+rozmiar 50 lat historii, scalanie z kopią na dysku, gzip w transmisji
+i raport bajtów (sieć / dysk). Działa bez internetu.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from checks import check, finish
+from obs_cache import ObservationCache, decode_observations, encode_observations
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer, synthetic_series
+
+print("="*70)
+print("  TEST SKOMPRESOWANEGO CACHE OBSERWACJI")
+print("="*70)
+
+
+def arrays(series_id, start='1975-01-01', end='2025-01-01'):
+    rows = synthetic_series(series_id, start, end)
+    return np.array([r[0] for r in rows], dtype='datetime64[D]'), np.array([r[1] for r in rows])
+
+
+def same(a, b):
+    return np.array_equal(a[0], b[0]) and np.array_equal(np.asarray(a[1]).view(np.uint64), np.asarray(b[1]).view(np.uint64))
+
+
+print("\n[TEST] Kodowanie bit w bit i rozmiar")
+dates, values = arrays('SOFR')
+blob = encode_observations(dates, values)
+check(same(decode_observations(blob), (dates, values)),
+      f"SOFR 50 lat: {len(dates)} obs., {len(dates) * 16 / 1024:.0f} KB -> {len(blob) / 1024:.1f} KB")
+check(len(blob) < len(dates) * 2, f"{len(blob) / len(dates):.2f} bajta na obserwacje")
+rng = np.random.default_rng(2)
+cases = {
+    'dowolne float64': (dates, rng.standard_normal(len(dates))),
+    'jedna obserwacja': (dates[:1], np.array([1.5])),
+    'pusta': (dates[:0], np.empty(0)),
+    'ujemne zero i duze liczby': (dates[:4], np.array([-0.0, 1e300, -2.5, 3.0])),
+    'ujemne ulamki': (dates[:4], np.array([-1.25, -1.5, 2.75, -1e6])),
+}
+for name, case in cases.items():
+    check(same(decode_observations(encode_observations(*case)), case), name)
+try:
+    decode_observations(b'XXXX' + blob[4:])
+    check(False, "Zly format odrzucony")
+except ValueError:
+    check(True, "Zly format odrzucony (ValueError)")
+
+print("\n[TEST] Scalanie z kopia na dysku")
+with tempfile.TemporaryDirectory() as directory:
+    cache = ObservationCache(directory)
+    cache.merge('SOFR', dates, values)
+    recent = dates >= np.datetime64('2024-10-01')
+    revised = values[recent] + 0.01
+    cache.merge('SOFR', dates[recent], revised)
+    got = cache.get('SOFR')
+    check(len(got[0]) == len(dates) and np.array_equal(got[1][recent], revised) and
+          np.array_equal(got[1][~recent], values[~recent]), "Krotkie odswiezenie nie kasuje historii, nowe wartosci wygrywaja")
+    with open(os.path.join(directory, 'SOFR.obs'), 'r+b') as f:
+        f.seek(40)
+        f.write(b'\xff' * 16)
+    check(cache.get('SOFR') is None, "Uszkodzony plik = brak kopii")
+
+print("\n[TEST] Transmisja gzip i raport bajtow")
+with tempfile.TemporaryDirectory() as directory, StandInServer() as server:
+    os.environ['LIQUIDITY_OBS_CACHE'] = directory
+    try:
+        monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    finally:
+        del os.environ['LIQUIDITY_OBS_CACHE']
+    check('gzip' in monitor.session.headers['Accept-Encoding'], "Naglowek Accept-Encoding: gzip")
+    with monitor.sources.refresh():
+        for series_id in monitor.series.values():
+            monitor.fetch_fred_data(series_id, days_back=18250)
+    report = monitor.storage_report()
+    totals = report.sum()
+    check(len(report) == len(monitor.series) and (report['wire_bytes'] < report['decoded_bytes'] / 5).all(),
+          f"Siec: {totals['wire_bytes'] / 1024:.0f} KB zamiast {totals['decoded_bytes'] / 1024:.0f} KB")
+    check(totals['disk_bytes'] < 1024 * 1024 and (report['observations'] > 0).all(),
+          f"Dysk: {len(report)} serii x 50 lat = {totals['disk_bytes'] / 1024:.0f} KB "
+          f"({totals['observations']} obs.)")
+    cached = monitor.obs_cache.get('WALCL')
+    check(same(cached[:2], monitor.fetch_fred_arrays('WALCL', days_back=18250)), "Kopia na dysku = pobrane dane")
+
+finish("Wszystkie testy cache obserwacji przeszly")
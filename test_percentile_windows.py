@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test percentyli w oknach - zgodność z liczeniem wprost dla każdego okna
+(percentyl i statystyki), koszt kolejnych okien, okna dłuższe niż historia,
+percentyle w analizie monitora (pola główne jak dotąd + 'windows').
+Działa bez internetu.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from percentile_windows import PERCENTILE_WINDOWS, WindowedHistory, window_days, window_percentiles
+from standins import StandInServer
+
+print("="*70)
+print("  TEST PERCENTYLI W OKNACH")
+print("="*70)
+
+
+def direct(dates, values, current, days):
+    """Percentyl liczony wprost - filtr okna i zliczenie"""
+    if days is not None:
+        values = values[dates > dates[-1] - np.timedelta64(days, 'D')]
+    return (values < current).sum() / len(values) * 100
+
+
+rng = np.random.default_rng(5)
+dates = pd.bdate_range('1990-01-01', '2024-06-28').to_numpy()
+values = np.round(np.cumsum(rng.standard_normal(len(dates))), 2)  # Zaokrąglone - są remisy
+current = float(values[-1])
+
+print("\n[TEST] Zgodnosc z liczeniem wprost")
+history = WindowedHistory(dates, values)
+for window in PERCENTILE_WINDOWS:
+    days = window_days(window)
+    expected = direct(dates, values, current, days)
+    in_window = values if days is None else values[dates > dates[-1] - np.timedelta64(days, 'D')]
+    summary = history.summary(current, window)
+    check(abs(summary['percentile'] - expected) < 1e-9 and abs(history.rank(current, window) - expected) < 1e-9 and
+          summary['count'] == len(in_window) and summary['min'] == in_window.min() and
+          summary['max'] == in_window.max() and np.isclose(summary['mean'], in_window.mean()) and
+          np.isclose(summary['std'], in_window.std()),
+          f"{window}: {summary['percentile']:.2f}% ({summary['count']} odczytow, sr {summary['mean']:.2f})")
+check(all((np.diff(history.sorted_values(window)) >= 0).all() for window in PERCENTILE_WINDOWS),
+      "Wartosci okien posortowane bez ponownego sortowania")
+probe = np.array([-50.0, 0.0, current, 50.0])
+check(np.allclose(history.rank(probe, '5y'), [direct(dates, values, v, 5 * 365) for v in probe]),
+      "rank dla tablicy wartosci naraz")
+
+with_nan = values.copy()
+with_nan[100] = np.nan
+check(len(WindowedHistory(dates, with_nan)) == len(values) - 1, "NaN pomijane")
+
+print("\n[TEST] Okna dluzsze niz historia")
+short = window_percentiles(dates[-800:], values[-800:], current)
+check(short['1y']['complete'] and not short['5y']['complete'] and short['all']['complete'],
+      "Historia ~3 lata: 1y pelne, 5y oznaczone jako niepelne")
+check(short['5y']['count'] == short['20y']['count'] == 800 and short['5y']['start'] == str(dates[-800].astype('datetime64[D]')),
+      "Niepelne okno liczone z calej dostepnej historii")
+check('1y' not in window_percentiles(dates[-5:], values[-5:], current), "Za malo odczytow - okno pominiete")
+try:
+    window_days('3m')
+    check(False, "Nieznane okno - blad")
+except ValueError:
+    check(True, "Nieznane okno - ValueError")
+
+print("\n[TEST] Koszt kolejnych okien")
+many = tuple(f"{years}y" for years in range(1, 31))
+started = time.perf_counter()
+window_percentiles(dates, values, current, ('all',))
+one = time.perf_counter() - started
+started = time.perf_counter()
+window_percentiles(dates, values, current, many)
+thirty = time.perf_counter() - started
+started = time.perf_counter()
+for years in range(1, 31):
+    np.sort(values[dates > dates[-1] - np.timedelta64(years * 365, 'D')])
+resort = time.perf_counter() - started
+check(thirty < resort * 2, f"30 okien: {thirty * 1000:.1f} ms (1 okno {one * 1000:.1f} ms, "
+                               f"sortowanie kazdego okna {resort * 1000:.1f} ms)")
+
+print("\n[TEST] Percentyle w analizie monitora")
+with StandInServer() as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    indicators = monitor.get_all_indicators(days_back=6 * 365)
+    percentiles = monitor.calculate_percentiles(indicators)
+    vix = percentiles['vix']
+    old = [float(v) for v in indicators['vix']['history']]
+    check(vix['percentile'] == sum(1 for v in old if v < vix['current']) / len(old) * 100 and
+          vix['historical_max'] == max(old), f"Pole glowne jak dotad - cala pobrana historia ({vix['percentile']:.1f}%)")
+    check(list(vix['windows']) == list(PERCENTILE_WINDOWS) and vix['windows']['5y']['complete'] and
+          not vix['windows']['20y']['complete'] and vix['windows']['all']['percentile'] == vix['percentile'],
+          "Okna 1y / 5y / 20y / all, 20y oznaczone jako niepelne")
+    check(all('interpretation' in entry for entry in vix['windows'].values()), "Interpretacja dla kazdego okna")
+
+    monitor.percentile_windows = ('1y', 'all')
+    check(list(monitor.calculate_percentiles(indicators)['vix']['windows']) == ['1y', 'all'],
+          "Inne okna - nowy wpis (wersja uwzglednia okna)")
+
+finish("Wszystkie testy percentyli w oknach przeszly")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test ładowania progresywnego - grupy serii według wag oceny, pierwsza
+grupa wystarcza do wstępnej oceny i kart krytycznych, kolejne ją
+uzupełniają do wyniku pełnego ładowania. Działa bez internetu.
+"""
+
+import time
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer
+
+print("="*70)
+print("  TEST LADOWANIA PROGRESYWNEGO")
+print("="*70)
+
+
+print("\n[TEST] Grupy wedlug wag")
+monitor = LiquidityMonitor(fred_api_key='demo')
+tiers = monitor.load_tiers()
+flat = [name for tier in tiers for name in tier]
+check(sorted(flat) == sorted(monitor.series), f"{len(tiers)} grupy, kazda seria raz: {[len(t) for t in tiers]}")
+check({'sofr', 'iorb', 'reserves', 'yield_curve'} == set(tiers[0]),
+      f"Pierwsza grupa - wejscia spreadu SOFR-IORB, rezerwy, krzywa: {tiers[0]}")
+check(tiers[1][:2] == ['tga', 'reverse_repo'], "TGA i RRP dziedzicza wage net liquidity")
+
+with StandInServer(delay=0.05) as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+
+    print("\n[TEST] Pierwsza grupa - wstepna ocena")
+    started = time.perf_counter()
+    steps = []
+    for loaded, total, indicators in monitor.iter_indicators(days_back=90):
+        steps.append((loaded, time.perf_counter() - started, indicators, list(monitor.unavailable)))
+    first_paint, full_load = steps[0][1], steps[-1][1]
+    first = steps[0][2]
+    check('sofr_iorb_spread' in first and 'reserves' in first and 'yield_curve' in first,
+          f"Po pierwszej grupie: {', '.join(first)}")
+    check(not steps[0][3], "Niepobrane jeszcze serie nie sa oznaczane jako brakujace")
+    check(first_paint < full_load / 2, f"Pierwsza grupa {first_paint:.2f} s z {full_load:.2f} s pelnego ladowania")
+    preliminary = monitor.analyze_liquidity_conditions(first)
+
+    print("\n[TEST] Ostatnia grupa = pelne ladowanie")
+    final = steps[-1][2]
+    full = monitor.get_all_indicators(days_back=90)
+    check(list(final) == list(full) and list(full)[:len(monitor.series)] == [n for n in monitor.series if n in full],
+          "Te same wskazniki w kolejnosci self.series")
+    score = monitor.analyze_liquidity_conditions(final)['overall_score']
+    check(score == monitor.analyze_liquidity_conditions(full)['overall_score'],
+          f"Ocena wstepna {preliminary['overall_score']:.1f} -> pelna {score:.1f}")
+
+finish("Wszystkie testy ladowania progresywnego przeszly")
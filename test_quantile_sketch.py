@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test szkiców kwantyli - błąd rangi w granicy rank_error (także po łączeniu
+i dla danych posortowanych), stała pamięć, stan na dysku z dokładaniem tylko
+nowych odczytów, łączenie magazynów z różnych procesów i percentyl 'sketch'
+w analizie monitora. Działa bez internetu.
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from quantile_sketch import KLLSketch, SketchStore, rank_error
+from standins import StandInServer
+from workers import WorkerPool
+
+print("="*70)
+print("  TEST SZKICOW KWANTYLI")
+print("="*70)
+
+
+def max_error(sketch, values):
+    """Największy błąd rangi na siatce 99 kwantyli (ułamek liczby odczytów)"""
+    ordered = np.sort(values)
+    probes = np.quantile(values, np.linspace(0.01, 0.99, 99))
+    return max(abs(sketch.rank(q) - np.searchsorted(ordered, q) / len(values)) for q in probes)
+
+
+def fill(sketch, values):
+    for value in values.tolist():
+        sketch.update(value)
+    return sketch
+
+
+def store_from(path, name, dates, values):
+    store = SketchStore(path)
+    store.update(name, dates, values)
+    store.save()
+    return path
+
+
+rng = np.random.default_rng(21)
+bound = rank_error(200)
+
+print("\n[TEST] Blad rangi i pamiec")
+small = fill(KLLSketch(200, seed=1), np.arange(150, dtype=float))
+check(small.rank(100.0) == 100 / 150 and small.quantile(0.5) == 74.0, "Mniej odczytow niz pojemnosc - wynik dokladny")
+stream = rng.standard_normal(200_000)
+started = time.perf_counter()
+sketch = fill(KLLSketch(200, seed=2), stream)
+update_time = (time.perf_counter() - started) / len(stream)
+error = max_error(sketch, stream)
+check(error < bound, f"200 tys. odczytow: blad {error * 100:.2f} pp < {bound * 100:.2f} pp "
+                     f"({update_time * 1e6:.1f} us na odczyt)")
+check(len(sketch) < 4 * 200 and sketch.n == len(stream) and sketch.min == stream.min() and sketch.max == stream.max(),
+      f"Stala pamiec: {len(sketch)} elementow, min / max dokladne")
+for label, values in (('rosnace', np.sort(stream)), ('malejace', np.sort(stream)[::-1])):
+    check(max_error(fill(KLLSketch(200, seed=3), values), values) < bound, f"Dane {label} - w granicy bledu")
+started = time.perf_counter()
+for _ in range(1000):
+    sketch.rank(0.5)
+check(True, f"Zapytanie: {(time.perf_counter() - started) * 1000:.1f} us (niezaleznie od dlugosci historii)")
+spikes = np.where(rng.random(100_000) < 0.01, 50.0, rng.standard_normal(100_000))
+check(max_error(fill(KLLSketch(200, seed=4), spikes), spikes) < bound, "Remisy i skoki - w granicy bledu")
+
+print("\n[TEST] Laczenie szkicow")
+left, right = fill(KLLSketch(200, seed=5), stream[:130_000]), fill(KLLSketch(200, seed=6), stream[130_000:])
+left.merge(right)
+check(left.n == len(stream) and max_error(left, stream) < bound,
+      f"Dwa strumienie -> blad {max_error(left, stream) * 100:.2f} pp")
+restored = KLLSketch.from_dict(left.to_dict())
+check(restored.rank(0.3) == left.rank(0.3) and restored.n == left.n, "to_dict / from_dict - te same odpowiedzi")
+
+print("\n[TEST] Stan na dysku i dokladanie nowych odczytow")
+dates = pd.bdate_range('1990-01-01', periods=9000).strftime('%Y-%m-%d').to_numpy()
+values = np.cumsum(rng.standard_normal(9000))
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'sketch_state.json')
+    store = SketchStore(path)
+    check(store.update('vix', dates[:8000], values[:8000]) == 8000, "Pierwsze uruchomienie - cala historia")
+    store.save()
+    store = SketchStore(path)  # Restart
+    check(store.update('vix', dates[:8500], values[:8500]) == 500 and store.sketches['vix'].n == 8500,
+          "Po restarcie tylko nowsze odczyty (500)")
+    check(store.update('vix', dates[:8500], values[:8500] + 1) == 0, "Rewizje starszych odczytow ignorowane")
+    summary = store.summary('vix', values[8499])
+    exact = (values[:8500] < values[8499]).mean() * 100
+    check(abs(summary['percentile'] - exact) < summary['error'] and summary['since'] == dates[0],
+          f"Percentyl {summary['percentile']:.1f}% vs dokladny {exact:.1f}% (+/-{summary['error']:.1f} pp)")
+    with open(path, 'w') as f:
+        f.write('{zly json')
+    check(len(SketchStore(path).sketches) == 0, "Uszkodzony stan - start od zera")
+
+    print("\n[TEST] Laczenie magazynow z procesow")
+    pool = WorkerPool(io_workers=1, cpu_workers=2)
+    # Rozłączne zakresy dat - każdy proces buduje własny szkic
+    parts = [(os.path.join(directory, f"part{k}.json"), 'vix', dates[k * 4500:(k + 1) * 4500],
+              values[k * 4500:(k + 1) * 4500]) for k in range(2)]
+    paths = pool.submit_cpu('sketch', store_from, parts).result(timeout=120)
+    pool.shutdown()
+    merged = SketchStore(None)
+    for part in paths:
+        merged.merge(SketchStore(part))
+    exact = (values < values[-1]).mean() * 100
+    estimate = merged.summary('vix', values[-1])['percentile']
+    check(merged.sketches['vix'].n == 9000 and merged.last_dates['vix'] == dates[-1] and
+          merged.first_dates['vix'] == dates[0] and abs(estimate - exact) < bound * 100,
+          f"2 procesy -> jeden szkic: {estimate:.1f}% vs {exact:.1f}%")
+
+    print("\n[TEST] Percentyl ze szkicu w analizie")
+    os.environ['LIQUIDITY_SKETCH_STATE'] = os.path.join(directory, 'monitor_sketch.json')
+    try:
+        with StandInServer() as server:
+            monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+            indicators = monitor.get_all_indicators(days_back=365)
+            first = monitor.analyze_liquidity_conditions(indicators)
+            again = monitor.analyze_liquidity_conditions(indicators)
+            vix = first['percentiles']['vix']
+            check(vix['sketch']['count'] == len(indicators['vix']['data']) and
+                  abs(vix['sketch']['percentile'] - vix['percentile']) < vix['sketch']['error'],
+                  f"VIX: szkic {vix['sketch']['percentile']:.1f}% vs dokladny {vix['percentile']:.1f}%")
+            check(again['data_version'] == first['data_version'], "Te same dane - szkice bez zmian, analiza z pamieci")
+            check(os.path.exists(os.environ['LIQUIDITY_SKETCH_STATE']) and
+                  SketchStore(os.environ['LIQUIDITY_SKETCH_STATE']).sketches['vix'].n == vix['sketch']['count'],
+                  "Stan szkicow zapisany")
+    finally:
+        del os.environ['LIQUIDITY_SKETCH_STATE']
+
+finish("Wszystkie testy szkicow kwantyli przeszly")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test wektorowej punktacji (scoring.py), scenariuszy what-if i analizy
+wrażliwości - tabela reguł jest jedynym źródłem punktacji: daje te same wyniki
+(ocena, reżim, alerty, wzorce) co analyze_liquidity_conditions().
+Działa bez internetu (dane ze stand-in serwera).
+"""
+
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from scenarios import ScenarioEngine
+from scoring import REGIMES, RULE_MESSAGES, SCORING_RULES, ScoringModel
+from sensitivity import analyze_sensitivity
+from standins import StandInServer
+
+print("="*70)
+print("  TEST PUNKTACJI, SCENARIUSZY I WRAZLIWOSCI")
+print("="*70)
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+with StandInServer() as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+    indicators = quiet(monitor.get_all_indicators, 365)
+
+model = ScoringModel(monitor.thresholds, monitor.indicator_weights)
+
+print("\n[TEST] Tabela regul == analyze_liquidity_conditions (300 losowych stanow)")
+rng = np.random.default_rng(0)
+mismatches = 0
+for _ in range(300):
+    state = {name: dict(data) for name, data in indicators.items()}
+    for data in state.values():
+        data['current'] = data['current'] * rng.uniform(0.3, 2.0) + rng.uniform(-0.3, 0.3)
+        data['change_7d'] = data['change_7d'] * rng.uniform(-50, 50)
+    state['vix']['current'] = rng.uniform(10, 40)
+    state['yield_curve']['current'] = rng.uniform(-1, 1.5)
+
+    analysis = quiet(monitor.analyze_liquidity_conditions, state)
+    adjustment = analysis['patterns']['score_adjustments']
+    x = model.feature_vector(state)
+    raw = model.raw_score(model.fired(x))
+    regime = model.regime(x)
+    final = model.final_score(raw, regime, adjustment)[0]
+    if (abs(raw[0] + adjustment - analysis['raw_score']) > 1e-9
+            or REGIMES[regime[0]] != analysis['market_regime']['regime']
+            or abs(final - analysis['overall_score']) > 1e-9):
+        mismatches += 1
+check(mismatches == 0, f"Niezgodnosci: {mismatches}")
+
+print("\n[TEST] SCORING_RULES jedynym zrodlem punktacji")
+check(sorted(RULE_MESSAGES) == sorted(model.rule_names), "Kazda regula ma komunikat, kazdy komunikat - regule")
+x = model.feature_vector(indicators)
+expected = [RULE_MESSAGES[model.rule_names[i]] for i in np.flatnonzero(model.fired(x)[0])]
+analysis = quiet(monitor.analyze_liquidity_conditions, indicators)
+produced = ([('alert', a['severity'], a['indicator']) for a in analysis['alerts'] if a['indicator'] != 'Korelacje'] +
+            [('signal', s['type'], s['indicator']) for s in analysis['signals']
+             if s['indicator'] not in ('Wzmocnienia', 'Compound Signals')])
+check(sorted(produced) == sorted(('alert' if kind in ('critical', 'warning') else 'signal', kind, indicator)
+                                 for kind, indicator, _template in expected),
+      f"Alerty i sygnaly analizy = zadzialane reguly ({len(expected)})")
+original = [list(group) for group in SCORING_RULES]
+SCORING_RULES[0][0] = SCORING_RULES[0][0][:4] + (SCORING_RULES[0][0][4] + 1000,)  # Zmiana tylko w tabeli
+SCORING_RULES[0][1] = SCORING_RULES[0][1][:4] + (SCORING_RULES[0][1][4] - 1000,)
+changed = quiet(monitor._analyze, indicators)
+SCORING_RULES[:] = original
+check(abs(changed['raw_score'] - analysis['raw_score']) == 1000 * ('reserves' in indicators),
+      "Zmiana punktow w SCORING_RULES zmienia ocene analizy")
+
+print("\n[TEST] Ocena wazona w analizie")
+analysis = quiet(monitor.analyze_liquidity_conditions, indicators)
+contributions = sum(v['contribution'] for v in analysis['weighted_scores'].values())
+check(abs(contributions - analysis['weighted_score']) < 0.05,
+      f"weighted_score {analysis['weighted_score']:+.1f} = suma wkladow {contributions:+.1f}")
+
+print("\n[TEST] Scenariusze == analiza recznie zmienionych wskaznikow (200 scenariuszy)")
+engine = ScenarioEngine(monitor, indicators)
+names = ['vix', 'reserves', 'hy_spread', 'yield_curve', 'sofr', 'iorb', 'tga', 'm2', 'fed_balance', 'dollar_index']
+scenarios = [{}]
+for _ in range(200):
+    shocks = {}
+    for name in rng.choice(names, 3, replace=False):
+        current = indicators[name]['current']
+        shocks[str(name)] = [float(current * rng.uniform(0.5, 2)), {'delta': float(current * rng.uniform(-0.5, 0.5))},
+                             {'pct': float(rng.uniform(-60, 60))}][rng.integers(3)]
+    scenarios.append(shocks)
+results = engine.run(scenarios)
+
+mismatches = 0
+for shocks, (_, row) in zip(scenarios, results.iterrows()):
+    state = {name: dict(data) for name, data in indicators.items()}
+    for name, shock in shocks.items():
+        current = state[name]['current']
+        new = shock if not isinstance(shock, dict) else (
+            current + shock['delta'] if 'delta' in shock else current * (1 + shock['pct'] / 100))
+        state[name]['current'] = new
+        state[name]['change_7d'] += new - current
+        # Serie pochodne liniowe (spready, net liquidity) przesuwają się razem ze składnikiem
+        for definition in monitor.derived.linear():
+            if name in definition.inputs and definition.name in state:
+                shift = definition.weights[definition.inputs.index(name)] * (new - current)
+                state[definition.name]['current'] += shift
+                state[definition.name]['change_7d'] += shift
+
+    expected = quiet(monitor.analyze_liquidity_conditions, state)
+    expected_alerts = sorted((a['severity'], a['indicator']) for a in expected['alerts'])
+    patterns = sum(len(expected['patterns'][k]) for k in ('conflicts', 'reinforcements', 'compound_signals'))
+    if (row['score'] != expected['overall_score'] or row['regime'] != expected['market_regime']['regime']
+            or sorted((a['severity'], a['indicator']) for a in row['alerts']) != expected_alerts
+            or len(row['patterns']) != patterns):
+        mismatches += 1
+check(mismatches == 0, f"Niezgodnosci: {mismatches}")
+
+started = time.perf_counter()
+grid = engine.grid('vix', np.linspace(10, 45, 100), 'reserves', np.linspace(-800, 400, 100), y_mode='delta')
+elapsed = time.perf_counter() - started
+check(len(grid) == 10000 and elapsed < 1.0, f"Siatka 100 x 100: {elapsed * 1000:.0f} ms")
+
+print("\n[TEST] Monte Carlo - 10 000 scenariuszy")
+started = time.perf_counter()
+report = analyze_sensitivity(monitor, indicators, analysis, n=10000, seed=1)
+elapsed = time.perf_counter() - started
+check(elapsed < 1.0, f"Czas: {elapsed * 1000:.0f} ms")
+check(report['score']['base'] == analysis['overall_score'], "Bazowa ocena z analizy")
+check(abs(sum(report['regime']['distribution'].values()) - 1) < 1e-9, "Rozklad rezimow sumuje sie do 1")
+check(report['sensitive_thresholds'] == analyze_sensitivity(monitor, indicators, analysis, n=10000,
+                                                            seed=1)['sensitive_thresholds'],
+      "Powtarzalne przy tym samym ziarnie")
+
+print("\n[TEST] Bez zaburzen - wszystkie scenariusze jak bazowy")
+flat = analyze_sensitivity(monitor, indicators, analysis, n=500, weight_sigma=0, threshold_sigma=0,
+                           regime_sigma=0)
+check(flat['score']['std'] == 0 and flat['score_band_stability'] == 1 and flat['regime']['stability'] == 1,
+      "Zerowa wariancja oceny i rezimu")
+
+finish("Wszystkie testy punktacji przeszly")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test single-flight - jedno wykonanie dla równoczesnych wywołań w wątkach
+i w osobnych procesach (katalog blokad), wyjątek lidera u wszystkich
+czekających, wyniki na dysku tylko jako dane (bez pickle), sprzątanie
+plików wyników po TTL i klucz zależny od api_key. Działa bez internetu.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from singleflight import SingleFlight
+from standins import StandInServer
+
+print("="*70)
+print("  TEST SINGLE-FLIGHT")
+print("="*70)
+
+# Proces-klient: lider dopisuje linię do logu i "pobiera" 3 s, wszyscy drukują wynik
+CLIENT = """
+import sys, time
+import numpy as np
+from singleflight import SingleFlight
+
+lock_dir, log = sys.argv[1], sys.argv[2]
+
+def load():
+    with open(log, 'a') as f:
+        f.write('pobranie\\n')
+    time.sleep(3)
+    return np.arange('2024-01-01', '2024-01-06', dtype='datetime64[D]'), np.arange(5.0)
+
+dates, values = SingleFlight(lock_dir).do(('WALCL', 365), load)
+print(dates[-1], values.sum(), values.dtype)
+"""
+
+
+def in_threads(flight, key, fn, count):
+    """Uruchamia count równoczesnych flight.do - zwraca listę (wynik, wyjątek)"""
+    outcomes = [None] * count
+    start = threading.Barrier(count)
+
+    def run(k):
+        start.wait()
+        try:
+            outcomes[k] = (flight.do(key, fn), None)
+        except Exception as e:
+            outcomes[k] = (None, e)
+
+    threads = [threading.Thread(target=run, args=(k,)) for k in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+print("\n[TEST] Koalescencja w watkach")
+flight = SingleFlight()
+calls = []
+outcomes = in_threads(flight, 'VIXCLS', lambda: calls.append(1) or time.sleep(0.3) or {'rows': 10}, 10)
+check(len(calls) == 1 and all(result is outcomes[0][0] for result, _ in outcomes),
+      "10 watkow - jedno wykonanie, ten sam wynik u wszystkich")
+check(flight.stats == {'calls': 10, 'shared': 9} and not flight._calls, "stats: 9 wspoldzielonych, klucz zwolniony")
+check(len(in_threads(flight, 'VIXCLS', lambda: calls.append(1), 1)) == 1 and len(calls) == 2,
+      "Po zakonczeniu - kolejne wywolanie wykonuje sie od nowa")
+
+print("\n[TEST] Wyjatek lidera")
+failure = ValueError("Bad Request. The value for variable api_key is not registered.")
+
+
+def fail():
+    calls.append(1)
+    time.sleep(0.3)
+    raise failure
+
+
+calls.clear()
+outcomes = in_threads(flight, 'SOFR', fail, 5)
+check(len(calls) == 1 and all(result is None and error is failure for result, error in outcomes),
+      "5 watkow - ten sam wyjatek u wszystkich, jedno wykonanie")
+check(not flight._calls and flight.do('SOFR', lambda: 'ok') == 'ok', "Po bledzie klucz zwolniony - nowa proba")
+
+with tempfile.TemporaryDirectory() as directory:
+    print("\n[TEST] Koalescencja miedzy procesami")
+    lock_dir = os.path.join(directory, 'locks')
+    log = os.path.join(directory, 'log.txt')
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    processes = [subprocess.Popen([sys.executable, '-c', CLIENT, lock_dir, log], stdout=subprocess.PIPE, text=True,
+                                  env=env) for _ in range(4)]
+    outputs = [process.communicate(timeout=60)[0].strip() for process in processes]
+    with open(log) as f:
+        fetches = f.read().count('pobranie')
+    check(fetches == 1 and len(set(outputs)) == 1 and outputs[0] == '2024-01-05 10.0 float64',
+          f"4 procesy - jedno pobranie, wynik u wszystkich ({outputs[0]})")
+    names = os.listdir(lock_dir)
+    check(not [name for name in names if name.endswith('.lock')] and
+          all(name.endswith('.result.npz') for name in names),
+          f"Blokada zwolniona, wynik jako .npz ({len(names)} plik)")
+
+    print("\n[TEST] Wyniki na dysku tylko jako dane")
+    flight = SingleFlight(lock_dir, result_ttl=0.3)
+    observations = [{'date': '2024-01-02', 'value': '4.33'}]
+    flight.do('json', lambda: observations)
+    lock_path, result_path = flight._paths('json')
+    check(os.path.exists(result_path + '.json') and flight._read_result(result_path, 0) == (True, observations),
+          "Lista obserwacji - JSON")
+    flight.do('obiekt', lambda: object())
+    check(not any(os.path.exists(flight._paths('obiekt')[1] + suffix) for suffix in ('.npz', '.json')),
+          "Wynik niebedacy danymi - nie trafia na dysk")
+
+    # Inny proces trzyma blokadę, w tym czasie ktoś podrzuca plik z pickle (tablica obiektów)
+    lock_path, result_path = flight._paths('podrzucony')
+    open(lock_path, 'w').close()
+    outcomes = []
+    waiter = threading.Thread(target=lambda: outcomes.append(flight.do('podrzucony', lambda: 'liczone')))
+    waiter.start()
+    time.sleep(0.2)
+    with open(result_path + '.npz', 'wb') as f:
+        np.savez(f, np.array([object()], dtype=object))
+    os.remove(lock_path)
+    waiter.join(timeout=10)
+    check(outcomes == ['liczone'], "Plik z pickle w katalogu - nie wczytany, wynik liczony od nowa")
+
+    print("\n[TEST] Sprzatanie plikow wynikow")
+    time.sleep(0.4)
+    flight._last_sweep = 0.0
+    flight.do('nowy', lambda: [1, 2, 3])
+    left = sorted(os.listdir(lock_dir))
+    check(left == [os.path.basename(flight._paths('nowy')[1]) + '.json'],
+          f"Po result_ttl starsze wyniki usuniete, zostaje tylko najnowszy ({len(left)} plik)")
+
+print("\n[TEST] Klucz zalezy od api_key")
+with StandInServer(delay=0.3) as server:
+    monitors = [server.attach(LiquidityMonitor(fred_api_key=key)) for key in ('klucz-a', 'klucz-b', 'klucz-a')]
+    threads = [threading.Thread(target=monitor.fetch_fred_arrays, args=('VIXCLS', 60)) for monitor in monitors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    keys = sorted(params['api_key'] for path, params in server.requests_log)
+    check(keys == ['klucz-a', 'klucz-b'], "Dwa klucze - dwa zapytania, ten sam klucz - wspolne")
+
+finish("Wszystkie testy single-flight przeszly")
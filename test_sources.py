@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test źródeł danych - rejestr (FRED / NY Fed / pliki lokalne) na lokalnych atrapach API
+Działa bez internetu i bez klucza FRED.
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer
+
+print("="*70)
+print("  TEST ZRODEL DANYCH (stand-in FRED + NY Fed)")
+print("="*70)
+
+
+with StandInServer(fred_lag_days=1) as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+
+    print("\n[TEST] NY Fed publikuje wczesniej - wygrywa dla SOFR")
+    sofr = monitor.fetch_ny_fed_sofr()
+    check(sofr.get('source') == 'nyfed', f"SOFR ze zrodla: {sofr.get('source')}")
+
+    print("\n[TEST] Jedna seria = jedno pobranie w ramach odswiezenia")
+    server.requests_log.clear()
+    with monitor.sources.refresh():
+        indicators = monitor.get_all_indicators(days_back=90)
+        monitor.fetch_reverse_repo()
+    rrp_calls = [p for p, q in server.requests_log
+                 if q.get('series_id') == 'RRPONTSYD' or p.endswith('reverserepo/propositions/search.json')]
+    check(len(rrp_calls) == 2, f"RRPONTSYD: {len(rrp_calls)} zapytania (FRED + NY Fed, bez powtorek)")
+    check('sofr_iorb_spread' in indicators, "Spread SOFR-IORB policzony")
+
+    print("\n[TEST] Cache zrodla - drugie odswiezenie bez sieci")
+    server.requests_log.clear()
+    monitor.get_all_indicators(days_back=90)
+    check(len(server.requests_log) == 0, f"Zapytan do atrap: {len(server.requests_log)}")
+
+    print("\n[TEST] Dluga historia z FRED + swiezszy ogon z NY Fed")
+    monitor.sources.get('nyfed').clear_cache()
+    server.requests_log.clear()
+    sofr = monitor.sources.fetch('SOFR', days_back=3650)
+    nyfed_params = [q for p, q in server.requests_log if p.startswith('/api/')]
+    fred = monitor.fetch_fred_data('SOFR', days_back=3650)
+    check(sofr['date'].iloc[0] == fred['date'].iloc[0] and sofr['date'].iloc[-1] > fred['date'].iloc[-1] and
+          len(sofr) > len(fred) and sofr['date'].is_monotonic_increasing and sofr['date'].is_unique,
+          f"{len(fred)} obserwacji z FRED + {len(sofr) - len(fred)} nowsze z NY Fed (historia nie wyparta)")
+    check(sofr.iloc[:len(fred)].equals(fred) and monitor.sources.last_source['SOFR'] == 'nyfed',
+          "Historia FRED bez zmian, ogon z NY Fed")
+    window = [(pd.Timestamp(q['endDate']) - pd.Timestamp(q['startDate'])).days for q in nyfed_params]
+    check(window and max(window) <= 30, f"NY Fed pytany tylko o ostatnie {max(window or [0])} dni")
+    server.requests_log.clear()
+    monitor.sources.fetch('SOFR', days_back=18250)
+    check(not any(p.startswith('/api/') for p, q in server.requests_log),
+          "Inny zakres historii - NY Fed z cache (ten sam krotki zakres)")
+
+    print("\n[TEST] Awaria NY Fed - zostaje FRED")
+    server.fail_paths.append('/api/')
+    for source in monitor.sources._sources:
+        source.clear_cache()
+    sofr = monitor.fetch_ny_fed_sofr()
+    check(sofr.get('source') == 'fred', f"SOFR ze zrodla: {sofr.get('source')}")
+    server.fail_paths.clear()
+
+    print("\n[TEST] Plik lokalny swiezszy od FRED")
+    with tempfile.TemporaryDirectory() as tmp:
+        local = monitor.sources.get('local')
+        local.directory = tmp
+        with open(os.path.join(tmp, 'VIXCLS.csv'), 'w') as f:
+            f.write("date,value\n2000-01-03,24.2\n2099-01-01,42.0\n")
+        vix = monitor.sources.fetch('VIXCLS', days_back=90)
+        check(monitor.sources.last_source.get('VIXCLS') == 'local', "VIX z pliku lokalnego")
+        check(float(vix['value'].iloc[-1]) == 42.0, f"Ostatnia wartosc: {vix['value'].iloc[-1]}")
+
+finish("Wszystkie testy zrodel przeszly")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test stale-while-revalidate - po TTL (albo "Odśwież dane" = expire) seria
+jest pobierana od nowa z limitem czasu: świeże dane, gdy źródło zdąży, a
+ostatnia dobra kopia (z wiekiem w analizie) tylko przy błędzie albo wolnym
+API - wtedy odświeżenie kończy się w tle. Niedostępny FRED nie zmienia po
+cichu oceny, kopia z dysku przeżywa restart. Działa bez internetu (atrapy API).
+"""
+
+import os
+import tempfile
+import time
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor, RateLimiter
+from standins import StandInServer
+
+print("="*70)
+print("  TEST STALE-WHILE-REVALIDATE")
+print("="*70)
+
+
+with tempfile.TemporaryDirectory() as directory, StandInServer() as server:
+    os.environ['LIQUIDITY_OBS_CACHE'] = directory
+    try:
+        monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+        monitor.rate_limiter = RateLimiter(rate_per_sec=1000, burst=1000)  # Limiter FRED nie jest tu testowany
+        indicators = monitor.get_all_indicators(days_back=120)
+        baseline = monitor.analyze_liquidity_conditions(indicators)
+        check(not baseline['stale'] and not baseline['unavailable'], f"Swieze dane: {len(indicators)} wskaznikow")
+
+        fred = monitor.sources.get('fred')
+
+        print("\n[TEST] Po TTL - swieze dane, gdy zrodlo zdazy")
+        expired_at = time.time()
+        monitor.sources.expire()
+        server.requests_log.clear()
+        refreshed = monitor.get_all_indicators(days_back=120)
+        analysis = monitor.analyze_liquidity_conditions(refreshed)
+        check(len(server.requests_log) >= len(monitor.series) and not analysis['stale'],
+              f"{len(server.requests_log)} zapytan przed zwroceniem danych - nic nie oznaczone jako nieaktualne")
+        check(all(entry[0] >= expired_at for entry in fred._cache.values()), "Kopie w cache zastapione nowymi")
+
+        print("\n[TEST] Wolne API - kopia po limicie czasu, odswiezenie w tle")
+        for source in monitor.sources._sources:
+            source.revalidate_timeout = 0.2
+        monitor.sources.expire()
+        server.delay = 1.0
+        started = time.perf_counter()
+        stale = monitor.get_all_indicators(days_back=120)
+        elapsed = time.perf_counter() - started
+        analysis = monitor.analyze_liquidity_conditions(stale)
+        fetches = len(monitor.series) + 3  # + SOFR / EFFR / RRP z NY Fed
+        check(elapsed < fetches * 0.2 + 1.0,
+              f"Ladowanie {elapsed:.2f} s przy API odpowiadajacym po 1 s (limit 0.2 s na serie, "
+              f"bez limitu {fetches} s)")
+        check(set(stale) == set(indicators) and analysis['overall_score'] == baseline['overall_score'],
+              f"Te same wskazniki i ocena ({analysis['overall_score']:.1f})")
+        check('sofr_iorb_spread' in analysis['stale'] and len(analysis['stale']) >= len(monitor.series),
+              f"Oznaczone jako nieaktualne: {len(analysis['stale'])} serii (z pochodnymi)")
+        deadline = time.time() + 30
+        while fred._revalidating and time.time() < deadline:
+            time.sleep(0.1)
+        check(not fred._revalidating and all(time.time() - entry[0] < 30 for entry in fred._cache.values()),
+              "Odswiezenie w tle zakonczone - kopie zaktualizowane")
+        server.delay = 0.0
+
+        print("\n[TEST] Awaria FRED i NY Fed - ocena bez zmian, jawnie oznaczona")
+        server.fail_paths.extend(['/fred/', '/api/'])
+        for source in monitor.sources._sources:
+            source.revalidate_timeout = 2.0
+        monitor.sources.expire()
+        stale = monitor.get_all_indicators(days_back=120)
+        analysis = monitor.analyze_liquidity_conditions(stale)
+        check(set(stale) == set(indicators) and analysis['overall_score'] == baseline['overall_score'],
+              "Awaria nie zmienia zestawu wskaznikow ani oceny")
+        check(monitor.sources.freshness['WALCL'].get('error') == 'niedostepne',
+              "Nieudane odswiezenie - kopia z bledem zrodla")
+        snapshot = monitor.snapshot(stale, analysis)
+        check(snapshot['analysis']['stale'] and 'stale_age' in snapshot['indicators']['sofr'],
+              "Wiek danych w migawce (API / historia / CLI)")
+
+        print("\n[TEST] Restart procesu w trakcie awarii - kopia z dysku")
+        restarted = server.attach(LiquidityMonitor(fred_api_key='demo'))
+        recovered = restarted.get_all_indicators(days_back=120)
+        analysis = restarted.analyze_liquidity_conditions(recovered)
+        fred_only = [name for name, sid in restarted.series.items() if sid not in ('SOFR', 'EFFR', 'RRPONTSYD')]
+        check(all(name in recovered for name in fred_only), f"Serie FRED z dysku: {len(fred_only)}")
+        check(all(restarted.sources.freshness[sid].get('error') for sid in ('WALCL', 'VIXCLS')),
+              "Zrodlo oznaczone jako niedostepne")
+        check(set(recovered) == set(indicators) and not analysis['unavailable'] and
+              analysis['overall_score'] == baseline['overall_score'],
+              "SOFR / EFFR / RRP z kopii FRED - pelny zestaw i ta sama ocena")
+
+        print("\n[TEST] Awaria bez zadnej kopii - jawny brak zamiast cichej zmiany")
+        del os.environ['LIQUIDITY_OBS_CACHE']
+        empty = server.attach(LiquidityMonitor(fred_api_key='demo'))
+        check(not empty.get_all_indicators(days_back=120) and empty.unavailable == list(empty.series),
+              f"Brakujace serie w monitor.unavailable: {len(empty.unavailable)}")
+    finally:
+        os.environ.pop('LIQUIDITY_OBS_CACHE', None)
+        server.fail_paths.clear()
+
+finish("Wszystkie testy stale-while-revalidate przeszly")
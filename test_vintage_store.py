@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test magazynu vintage - rewizja widoczna dopiero od swojego realtime_start,
+obserwacje z przyszłości i wycofane pomijane, filtr start, nadpisanie przy
+zamknięciu vintage, zgodność z filtrowaniem wprost na losowych rewizjach
+i koszt zapytania niezależny od liczby wersji. Działa bez internetu.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from standins import synthetic_series
+from vintage_store import VintageStore, _to_days
+
+print("="*70)
+print("  TEST MAGAZYNU VINTAGE (point-in-time)")
+print("="*70)
+
+
+def vintages(rows):
+    """(date, value, realtime_start, realtime_end) -> ramka jak fetch_fred_vintages"""
+    return pd.DataFrame(rows, columns=['date', 'value', 'realtime_start', 'realtime_end'])
+
+
+def values_as_of(store, as_of, start=None):
+    frame = store.as_of('M2SL', as_of, start=start)
+    return dict(zip(frame['date'].dt.strftime('%Y-%m-%d'), frame['value']))
+
+
+def direct(table, t, start=None):
+    """Filtrowanie wprost - wiersze obowiązujące w dniu t"""
+    mask = (table['realtime_start'] <= t) & (table['realtime_end'] >= t) & (table['date'] <= t)
+    if start is not None:
+        mask &= table['date'] >= start
+    return table[mask].sort_values('date')
+
+
+store = VintageStore(':memory:')
+store.ingest('M2SL', vintages([
+    ('2024-01-01', 100.0, '2024-01-10', '2024-02-09'),   # Pierwszy odczyt
+    ('2024-01-01', 105.0, '2024-02-10', '9999-12-31'),   # Rewizja
+    ('2024-02-01', 110.0, '2024-02-10', '2024-03-09'),
+    ('2024-02-01', 111.0, '2024-03-10', '9999-12-31'),
+    ('2024-03-01', 120.0, '2024-03-10', '2024-04-01'),   # Wycofana 2024-04-01
+]))
+
+print("\n[TEST] Rewizja widoczna dopiero od realtime_start")
+check(values_as_of(store, '2024-01-09') == {}, "Przed publikacja - brak danych")
+check(values_as_of(store, '2024-01-10') == {'2024-01-01': 100.0}, "Dzien publikacji - pierwszy odczyt")
+check(values_as_of(store, '2024-02-09') == {'2024-01-01': 100.0}, "Dzien przed rewizja - nadal pierwszy odczyt")
+check(values_as_of(store, '2024-02-10') == {'2024-01-01': 105.0, '2024-02-01': 110.0},
+      "Dzien rewizji - wartosc zrewidowana + nowa obserwacja")
+check(values_as_of(store, '2024-03-15') == {'2024-01-01': 105.0, '2024-02-01': 111.0, '2024-03-01': 120.0},
+      "Kolejna rewizja i kolejny miesiac")
+check(values_as_of(store, '2024-05-01') == {'2024-01-01': 105.0, '2024-02-01': 111.0},
+      "Obserwacja wycofana (realtime_end minal) - pominieta")
+check(values_as_of(store, '2024-03-15', start='2024-02-01') == {'2024-02-01': 111.0, '2024-03-01': 120.0},
+      "Filtr start")
+check(list(store.as_of('BRAK', '2024-03-15').columns) == ['date', 'value'] and store.as_of('BRAK', '2024-03-15').empty,
+      "Seria spoza magazynu - pusta ramka")
+
+print("\n[TEST] Zamkniecie vintage przy nowej rewizji")
+store.ingest('M2SL', vintages([
+    ('2024-02-01', 111.0, '2024-03-10', '2024-04-09'),   # FRED zamyka poprzedni vintage
+    ('2024-02-01', 112.5, '2024-04-10', '9999-12-31'),
+]))
+check(values_as_of(store, '2024-04-09')['2024-02-01'] == 111.0 and
+      values_as_of(store, '2024-04-10')['2024-02-01'] == 112.5, "Nadpisany wiersz + nowa rewizja (cache odswiezony)")
+
+print("\n[TEST] Zgodnosc z filtrowaniem wprost (losowe rewizje)")
+rng = np.random.default_rng(3)
+rows = []
+for date in pd.date_range('2000-01-01', '2023-12-01', freq='MS'):
+    published = date + pd.Timedelta(days=int(rng.integers(5, 40)))
+    for _ in range(int(rng.integers(1, 6))):
+        end = published + pd.Timedelta(days=int(rng.integers(20, 400)))
+        rows.append((date, float(rng.normal()), published, end))
+        published = end + pd.Timedelta(days=1)
+    if rng.random() < 0.9:  # Większość obserwacji ma otwarty ostatni vintage
+        rows[-1] = rows[-1][:3] + (pd.Timestamp('2262-01-01'),)
+table = vintages([(d.strftime('%Y-%m-%d'), v, s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d'))
+                  for d, v, s, e in rows])
+random_store = VintageStore(':memory:')
+random_store.ingest('M2SL', table)
+days = table.assign(**{column: pd.to_datetime(table[column]).values.astype('datetime64[D]').astype(np.int64)
+                       for column in ('date', 'realtime_start', 'realtime_end')})
+mismatches = 0
+probes = pd.date_range('1999-12-01', '2026-01-01', freq='17D')
+for day in probes:
+    t = _to_days(day)
+    expected = direct(days, t, start=t - 3650)
+    got = random_store.as_of('M2SL', day, start=str(np.datetime64(t - 3650, 'D')))
+    if (got['date'].values.astype('datetime64[D]').astype(np.int64).tolist() != expected['date'].tolist() or
+            got['value'].tolist() != expected['value'].tolist()):
+        mismatches += 1
+check(mismatches == 0, f"{len(probes)} dni, {len(table)} wersji - wynik jak filtrowanie wprost")
+
+print("\n[TEST] Koszt zapytania")
+dense = VintageStore(':memory:')
+series = synthetic_series('DGS10', '1990-01-01', '2024-06-28')
+dense_rows = []
+for revision in range(20):  # 20 wersji każdej obserwacji dziennej
+    for date, value in series:
+        start = pd.Timestamp(date) + pd.Timedelta(days=revision * 30)
+        end = start + pd.Timedelta(days=29) if revision < 19 else pd.Timestamp('2262-01-01')
+        dense_rows.append((date, value + revision, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+dense.ingest('DGS10', vintages(dense_rows))
+dense.as_of('DGS10', '2024-01-02')  # Załadowanie tablic
+started = time.perf_counter()
+for _ in range(50):
+    recent = dense.as_of('DGS10', '2024-01-02', start='2023-01-02')
+indexed = (time.perf_counter() - started) / 50
+arrays = dense._arrays['DGS10']
+t = _to_days('2024-01-02')
+started = time.perf_counter()
+for _ in range(50):
+    mask = ((arrays['realtime_start'] <= t) & (arrays['realtime_end'] >= t) &
+            (arrays['date'] <= t) & (arrays['date'] >= t - 365))
+    order = np.argsort(arrays['date'][mask], kind='stable')
+    pd.DataFrame({'date': pd.to_datetime(arrays['date'][mask][order].astype('datetime64[D]')),
+                  'value': arrays['value'][mask][order]})
+masked = (time.perf_counter() - started) / 50
+columns = ('date', 'realtime_start', 'realtime_end', 'value')
+expected = direct(pd.DataFrame({column: arrays[column] for column in columns}), t, start=_to_days('2023-01-02'))
+check(recent['value'].tolist() == expected['value'].tolist() and indexed < masked,
+      f"{len(dense_rows)} wersji, rok danych: {indexed * 1000:.2f} ms (filtr calosci {masked * 1000:.2f} ms)")
+
+print("\n[TEST] Panel wskaznikow na dzien")
+monitor = LiquidityMonitor(fred_api_key='demo')
+panel_store = VintageStore(':memory:')
+vix = synthetic_series(monitor.series['vix'], '2023-01-02', '2024-06-28')
+panel_store.ingest(monitor.series['vix'], vintages([(d, v, d, '9999-12-31') for d, v in vix]))
+indicators = panel_store.indicators_as_of(monitor, '2024-01-02', days_back=180)
+check(list(indicators) == ['vix'] and indicators['vix']['data']['date'].max() == pd.Timestamp('2024-01-02'),
+      "Tylko seria z magazynu, ostatnia obserwacja = dzien as_of")
+
+finish("Wszystkie testy magazynu vintage przeszly")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test puli zadań - ładowanie i analiza w wątku puli (wątek wywołujący wolny,
+postęp i wstępna ocena w trakcie), jedno zadanie dla wielu sesji, ponowienie
+po błędzie i backtest paczkami w procesach zgodny z liczonym na miejscu.
+Działa bez internetu.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from checks import check, finish
+from liquidity_monitor import LiquidityMonitor
+from standins import StandInServer, synthetic_series
+from vintage_store import VintageStore, backtest
+from workers import WorkerPool, load_and_analyze, report_progress
+
+print("="*70)
+print("  TEST PULI ZADAN")
+print("="*70)
+
+
+pool = WorkerPool(io_workers=2, cpu_workers=2)
+
+with StandInServer(delay=0.05) as server:
+    monitor = server.attach(LiquidityMonitor(fred_api_key='demo'))
+
+    print("\n[TEST] Ladowanie w tle - postep i wstepna ocena")
+    started = time.perf_counter()
+    job = pool.submit(('load', 90), load_and_analyze, monitor, 90)
+    submitted = time.perf_counter() - started
+    check(submitted < 0.05 and not job.done(), f"Zgloszenie wraca od razu ({submitted * 1000:.1f} ms)")
+
+    same = pool.submit(('load', 90), load_and_analyze, monitor, 90)
+    check(same is job, "Druga sesja z tym samym kluczem dostaje to samo zadanie")
+
+    progress, partial = [], None
+    while not job.done():
+        progress.append(job.progress)
+        partial = partial or job.partial
+        time.sleep(0.01)
+    indicators, analysis = job.result()
+    check(progress == sorted(progress) and job.progress == 1.0 and job.stage == 'gotowe',
+          f"Postep rosnie do 1.0 ({len(set(progress))} roznych odczytow)")
+    check(partial is not None and partial['loaded'] < partial['total'] and 'sofr_iorb_spread' in partial['indicators'],
+          f"Wstepna ocena {partial and partial['analysis']['overall_score']:.1f} przed koncem zadania")
+
+    full = monitor.get_all_indicators(days_back=90)
+    check(list(indicators) == list(full) and
+          analysis['overall_score'] == monitor.analyze_liquidity_conditions(full)['overall_score'],
+          f"Wynik jak get_all_indicators + analiza: ocena {analysis['overall_score']:.1f}")
+
+    print("\n[TEST] Gotowy wynik i jego waznosc")
+    check(pool.submit(('load', 90), load_and_analyze, monitor, 90) is job and pool.stats['reused'] == 2,
+          "Swiezy wynik zwracany kolejnym zgloszeniom")
+    pool.forget(('load', 90))
+    check(pool.get(('load', 90)) is None, "forget - nastepne zgloszenie liczy od nowa")
+    short = WorkerPool(io_workers=1, result_ttl=0)
+    first = short.submit('x', sum, [1, 2])
+    check(first.result() == 3 and short.submit('x', sum, [1, 2]) is not first, "Po result_ttl zadanie od nowa")
+    short.shutdown()
+
+print("\n[TEST] Blad zadania i report_progress poza pula")
+calls = []
+
+
+def flaky():
+    calls.append(threading.current_thread().name)
+    report_progress("proba", 0.5)
+    if len(calls) == 1:
+        raise ConnectionError("FRED nie odpowiada")
+    return 'ok'
+
+
+job = pool.submit('flaky', flaky)
+error = job.future.exception(timeout=10)
+check(isinstance(error, ConnectionError) and job.error() is error and pool.jobs()[-1]['failed'],
+      f"Wyjatek w zadaniu: {error!r}")
+retry = pool.submit('flaky', flaky)
+check(retry is not job and retry.result() == 'ok', "Kolejne zgloszenie ponawia nieudane zadanie")
+check(all(name.startswith('liquidity-worker') for name in calls), "Zadania w watkach puli, nie w wywolujacym")
+report_progress("poza pula", 1.0)
+check(True, "report_progress poza pula nic nie robi")
+
+print("\n[TEST] Backtest paczkami w procesach")
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'vintages.db')
+    store = VintageStore(path)
+    monitor = LiquidityMonitor(fred_api_key='demo')
+    for name in ('sofr', 'iorb', 'vix', 'hy_spread', 'yield_curve'):
+        rows = synthetic_series(monitor.series[name], '2023-01-01', '2024-06-30')
+        store.ingest(monitor.series[name], pd.DataFrame({
+            'date': [date for date, _ in rows], 'value': [value for _, value in rows],
+            'realtime_start': [date for date, _ in rows], 'realtime_end': '9999-12-31',
+        }))
+    store.close()
+
+    days = [str(day.date()) for day in pd.date_range('2024-01-01', '2024-06-30', freq='7D')]
+    started = time.perf_counter()
+    local = backtest(monitor, path, days, days_back=180)
+    local_time = time.perf_counter() - started
+
+    chunks = [(monitor, path, days[k::4], 180) for k in range(4)]
+    job = pool.submit_cpu(('backtest', path), backtest, chunks)
+    parts = job.result(timeout=120)
+    merged = sorted((record for part in parts for record in part), key=lambda record: record['as_of'])
+    check(len(local) == len(days) and merged == local,
+          f"{len(merged)} dni jak na miejscu ({local_time:.2f} s), {job.stage}, {job.status()['seconds']:.2f} s w procesach")
+    check(job.progress == 1.0 and job.kind == 'cpu', "Postep = ukonczone paczki")
+
+    broken = pool.submit_cpu(('backtest', 'brak'), backtest, [(monitor, os.path.join(directory, 'brak', 'x.db'), days, 180)])
+    try:
+        broken.result(timeout=60)
+        check(False, "Blad paczki konczy zadanie")
+    except Exception as e:
+        check(broken.error() is e, f"Blad paczki konczy zadanie: {type(e).__name__}")
+
+pool.shutdown()
+
+finish("Wszystkie testy puli zadan przeszly")
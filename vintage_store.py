@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Vintage Store - lokalny magazyn wersji historycznych danych (ALFRED)
+
+FRED zwraca dane już zrewidowane (M2SL, UNRATE itd.), więc backtest na nich
+"widzi przyszłość". Tutaj trzymamy każdą wersję obserwacji razem z okresem
+obowiązywania (realtime_start / realtime_end) i odtwarzamy panel wskaźników
+dokładnie tak, jak był znany w wybranym dniu.
+"""
+
+import contextlib
+import os
+import sqlite3
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+# Mnożnik daty w kluczu (date, realtime_start) - większy niż dzień 9999-12-31
+_KEY_STRIDE = 1 << 22
+
+
+def _to_days(value: DateLike) -> int:
+    """Zamienia datę na liczbę dni od 1970-01-01 (tak trzymamy daty w bazie)"""
+    if isinstance(value, str):
+        return int(np.datetime64(value[:10], 'D').astype(np.int64))
+    if isinstance(value, datetime):
+        value = value.date()
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+def _column_to_days(values) -> np.ndarray:
+    """Wektorowa wersja _to_days - radzi sobie też z '9999-12-31' (otwarty vintage)"""
+    if isinstance(values, pd.Series) and pd.api.types.is_datetime64_any_dtype(values):
+        return values.values.astype('datetime64[D]').astype(np.int64)
+    return np.array([str(v)[:10] for v in values], dtype='datetime64[D]').astype(np.int64)
+
+
+class VintageStore:
+    """Magazyn point-in-time obserwacji FRED/ALFRED oparty o SQLite"""
+
+    def __init__(self, path: str = 'vintages.db'):
+        """
+        Args:
+            path: Plik bazy SQLite (':memory:' dla testów)
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS vintages (
+                series_id      TEXT    NOT NULL,
+                date           INTEGER NOT NULL,
+                realtime_start INTEGER NOT NULL,
+                realtime_end   INTEGER NOT NULL,
+                value          REAL    NOT NULL,
+                PRIMARY KEY (series_id, date, realtime_start)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_vintages_realtime
+                ON vintages (series_id, realtime_start, realtime_end);
+        """)
+        self.conn.commit()
+
+        # Cache tablic numpy per seria (posortowane po realtime_start)
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def ingest(self, series_id: str, vintages: pd.DataFrame) -> int:
+        """
+        Zapisuje vintage serii (wynik LiquidityMonitor.fetch_fred_vintages)
+
+        Wiersz z tym samym (date, realtime_start) jest nadpisywany - tak FRED
+        "zamyka" vintage gdy pojawia się rewizja (zmienia się realtime_end).
+
+        Returns:
+            Liczba zapisanych wierszy
+        """
+        if vintages is None or vintages.empty:
+            return 0
+
+        rows = zip(
+            [series_id] * len(vintages),
+            _column_to_days(vintages['date']).tolist(),
+            _column_to_days(vintages['realtime_start']).tolist(),
+            _column_to_days(vintages['realtime_end']).tolist(),
+            vintages['value'].astype(float).tolist(),
+        )
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vintages "
+                "(series_id, date, realtime_start, realtime_end, value) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        self._arrays.pop(series_id, None)
+        return len(vintages)
+
+    def sync(self, monitor, days_back: int = 3650, series_ids: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Pobiera vintage z ALFRED dla serii monitora i zapisuje je w magazynie
+
+        Args:
+            monitor: LiquidityMonitor (używamy jego warstwy pobierania)
+            days_back: Zakres obserwacji do pobrania
+            series_ids: Opcjonalny podzbiór ID serii (domyślnie wszystkie z monitor.series)
+        """
+        if series_ids is None:
+            series_ids = sorted(set(monitor.series.values()))
+
+        counts = {}
+        for series_id in series_ids:
+            print(f"   [VINTAGE] Pobieram {series_id}...")
+            counts[series_id] = self.ingest(series_id, monitor.fetch_fred_vintages(series_id, days_back=days_back))
+
+        print(f"[VINTAGE] Zapisano {sum(counts.values())} wierszy dla {len(counts)} serii")
+        return counts
+
+    def _load(self, series_id: str) -> Dict[str, np.ndarray]:
+        """
+        Ładuje (raz) wszystkie vintage serii do tablic posortowanych po (date, realtime_start)
+
+        To kolejność klucza głównego, więc SQLite nie sortuje. `key` łączy obie
+        kolumny w jedną liczbę - as_of szuka w niej binarnie.
+        """
+        arrays = self._arrays.get(series_id)
+        if arrays is not None:
+            return arrays
+
+        rows = self.conn.execute(
+            "SELECT date, realtime_start, realtime_end, value FROM vintages "
+            "WHERE series_id = ? ORDER BY date, realtime_start",
+            (series_id,),
+        ).fetchall()
+
+        table = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        dates = table[:, 0].astype(np.int64)
+        starts = table[:, 1].astype(np.int64)
+        arrays = {
+            'date': dates,
+            'realtime_start': starts,
+            'realtime_end': table[:, 2].astype(np.int64),
+            'value': table[:, 3],
+            'key': dates * _KEY_STRIDE + starts,
+            'dates': np.unique(dates),
+        }
+        self._arrays[series_id] = arrays
+        return arrays
+
+    def as_of(self, series_id: str, as_of: DateLike, start: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Zwraca serię dokładnie taką, jaka była znana w dniu `as_of`
+
+        Dla każdej daty obserwacji z zakresu [start, as_of] wyszukiwanie binarne
+        w `key` daje ostatni vintage opublikowany do `as_of` - koszt zależy od
+        liczby zwracanych dat, nie od liczby wszystkich wersji serii.
+
+        Args:
+            series_id: ID serii w FRED
+            as_of: Dzień, z perspektywy którego patrzymy na dane
+            start: Opcjonalna najwcześniejsza data obserwacji
+
+        Returns:
+            DataFrame z kolumnami date/value (jak fetch_fred_data)
+        """
+        arrays = self._load(series_id)
+        t = _to_days(as_of)
+
+        dates = arrays['dates']
+        first = 0 if start is None else int(np.searchsorted(dates, _to_days(start), side='left'))
+        dates = dates[first:int(np.searchsorted(dates, t, side='right'))]
+
+        # Ostatni wiersz z kluczem <= (date, t); wiersz innej daty albo późniejszy start = nic
+        # nie opublikowano do t, realtime_end < t = obserwacja wycofana przed t
+        rows = np.maximum(np.searchsorted(arrays['key'], dates * _KEY_STRIDE + t, side='right') - 1, 0)
+        known = ((arrays['date'][rows] == dates) & (arrays['realtime_start'][rows] <= t) &
+                 (arrays['realtime_end'][rows] >= t))
+
+        return pd.DataFrame({
+            'date': pd.to_datetime(dates[known].astype('datetime64[D]')),
+            'value': arrays['value'][rows[known]],
+        })
+
+    def indicators_as_of(self, monitor, as_of: DateLike, days_back: int = 365) -> Dict:
+        """
+        Odtwarza cały panel wskaźników (jak get_all_indicators) na dzień `as_of`
+
+        Args:
+            monitor: LiquidityMonitor - dostarcza mapowanie serii i budowę wskaźników
+            as_of: Dzień, na który odtwarzamy wiedzę
+            days_back: Ile dni historii (dla percentyli i zmian)
+        """
+        t = _to_days(as_of)
+        start = str(np.datetime64(t - days_back, 'D'))
+
+        raw_data = {
+            name: self.as_of(series_id, as_of, start=start)
+            for name, series_id in monitor.series.items()
+        }
+        return monitor.build_indicators(raw_data)
+
+    def series_ids(self) -> List[str]:
+        """Lista serii obecnych w magazynie"""
+        rows = self.conn.execute("SELECT DISTINCT series_id FROM vintages ORDER BY series_id").fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        """Zamyka połączenie z bazą"""
+        self.conn.close()
+
+
+def backtest(monitor, store_path: str, as_of_dates: Iterable[DateLike], days_back: int = 365) -> List[Dict]:
+    """
+    Ocena dzień po dniu na danych point-in-time - funkcja modułu, więc paczki dni
+    mogą iść do procesów (WorkerPool.submit_cpu); każdy proces otwiera własne połączenie
+
+    Returns:
+        Lista {'as_of', 'score', 'raw_score', 'regime', 'alerts', 'indicators'} (dni bez danych pominięte)
+    """
+    store = VintageStore(store_path)
+    records = []
+    # Odczyty z przeszłych dni nie trafiają do szkiców kwantyli bieżących serii (quantile_sketch)
+    sketches, monitor.sketches = monitor.sketches, None
+    try:
+        # Analiza jest gadatliwa - przy tysiącach dni wyciszamy zawsze (stdout CLI to dane)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for as_of in as_of_dates:
+                indicators = store.indicators_as_of(monitor, str(as_of), days_back=days_back)
+                if not indicators:
+                    continue
+                analysis = monitor.analyze_liquidity_conditions(indicators)
+                records.append({
+                    'as_of': str(as_of),
+                    'score': analysis['overall_score'],
+                    'raw_score': analysis.get('raw_score'),
+                    'regime': analysis.get('market_regime', {}).get('regime'),
+                    'alerts': len(analysis['alerts']),
+                    'indicators': len(indicators),
+                })
+    finally:
+        monitor.sketches = sketches
+        store.close()
+    return records
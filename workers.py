@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Workers - pobieranie i analiza poza wątkiem skryptu Streamlit
+
+Streamlit wykonuje skrypt strony w wątku sesji: pobieranie z FRED i cała
+analiza w load_data zatrzymywały stronę przy każdym chybieniu cache, a
+równoległe sesje liczyły to samo, konkurując o GIL. WorkerPool (jeden na
+proces aplikacji) przejmuje tę pracę:
+
+    - zadania I/O (pobieranie + analiza) - pula wątków; zadanie zgłasza
+      postęp (etap, ułamek, częściowy wynik) przez report_progress,
+    - ciężkie obliczenia (backtest dzień po dniu) - pula procesów, praca
+      podzielona na paczki; postęp = ukończone paczki,
+    - zadanie identyfikuje klucz: sesje proszące o to samo (ten sam klucz API
+      i zakres) dostają to samo zadanie, a gotowy wynik żyje `result_ttl`
+      sekund (jak dotychczasowe st.cache_data(ttl=3600)),
+    - nieudane albo anulowane zadanie nie jest pamiętane - kolejne zgłoszenie
+      uruchamia je od nowa.
+
+Strona zgłasza zadanie i dopóki nie jest gotowe, pokazuje postęp i częściowe
+wyniki, odświeżając się co chwilę - widżety nie czekają na sieć.
+
+Użycie:
+    pool = WorkerPool()
+    job = pool.submit(('load', days_back), load_and_analyze, monitor, days_back)
+    job.stage, job.progress, job.partial     # w trakcie
+    indicators, analysis = job.result()       # gotowe (albo wyjątek zadania)
+
+    job = pool.submit_cpu(('backtest', ...), backtest, [(monitor, 'vintages.db', days), ...])
+    records = job.result()                    # lista wyników paczek, w kolejności
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+_local = threading.local()
+
+
+def current_job() -> Optional['Job']:
+    """Zadanie wykonywane w bieżącym wątku (None poza pulą)"""
+    return getattr(_local, 'job', None)
+
+
+def report_progress(stage: str, fraction: Optional[float] = None, partial: Any = None):
+    """
+    Postęp bieżącego zadania - poza wątkiem puli nic nie robi, więc te same
+    funkcje działają też wywołane bezpośrednio (CLI, testy)
+    """
+    job = current_job()
+    if job is not None:
+        job.report(stage, fraction, partial)
+
+
+class Job:
+    """Zgłoszone zadanie - future z wynikiem, etap, postęp 0..1 i ostatni częściowy wynik"""
+
+    def __init__(self, key: Hashable, kind: str):
+        self.key = key
+        self.kind = kind
+        self.future: Future = Future()
+        self.stage = 'w kolejce'
+        self.progress = 0.0
+        self.partial: Any = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._parts: List[Future] = []
+        self._lock = threading.Lock()
+
+    def report(self, stage: str, fraction: Optional[float] = None, partial: Any = None):
+        with self._lock:
+            self.stage = stage
+            if fraction is not None:
+                self.progress = min(max(float(fraction), 0.0), 1.0)
+            if partial is not None:
+                self.partial = partial
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None):
+        """Wynik zadania (czeka najwyżej `timeout` sekund) - wyjątek zadania jest rzucany dalej"""
+        return self.future.result(timeout)
+
+    def error(self) -> Optional[BaseException]:
+        """Wyjątek zakończonego zadania (None w trakcie, po sukcesie i po anulowaniu)"""
+        if not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def cancel(self) -> bool:
+        """Anuluje zadanie, które jeszcze nie ruszyło (w zadaniu procesowym - paczki w kolejce)"""
+        cancelled = self.future.cancel()
+        for part in self._parts:
+            part.cancel()
+        return cancelled
+
+    def status(self) -> Dict:
+        """Stan do wyświetlenia (sidebar, /health)"""
+        now = time.time()
+        return {
+            'key': self.key,
+            'kind': self.kind,
+            'stage': self.stage,
+            'progress': self.progress,
+            'done': self.done(),
+            'failed': self.error() is not None,
+            'seconds': (self.finished_at or now) - (self.started_at or self.submitted_at),
+        }
+
+
+class WorkerPool:
+    """Wspólna pula zadań: wątki dla I/O i analizy, procesy dla ciężkich obliczeń"""
+
+    def __init__(self, io_workers: int = 4, cpu_workers: Optional[int] = None, result_ttl: float = 3600):
+        """
+        Args:
+            io_workers: Wątki dla zadań submit (pobieranie trzyma i tak RateLimiter monitora)
+            cpu_workers: Procesy dla zadań submit_cpu (domyślnie liczba rdzeni); pula
+                         procesów powstaje przy pierwszym takim zadaniu
+            result_ttl: Ile sekund gotowy wynik jest zwracany kolejnym zgłoszeniom
+        """
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.result_ttl = result_ttl
+        self.stats = {'submitted': 0, 'reused': 0}
+        self._threads = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='liquidity-worker')
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+
+    def _reusable(self, job: Job, now: float) -> bool:
+        if not job.done():
+            return True
+        if job.future.cancelled() or job.future.exception() is not None:
+            return False
+        return now - job.finished_at < self.result_ttl
+
+    def _claim(self, key: Hashable, kind: str, start: Callable[[Job], None]) -> Job:
+        """Istniejące (trwające albo świeże) zadanie o tym kluczu albo nowe, uruchomione przez `start`"""
+        with self._lock:
+            now = time.time()
+            for old in [k for k, job in self._jobs.items() if not self._reusable(job, now)]:
+                del self._jobs[old]
+            job = self._jobs.get(key)
+            if job is not None:
+                self.stats['reused'] += 1
+                return job
+            job = Job(key, kind)
+            start(job)  # Pod blokadą - nikt nie zobaczy zadania bez jego future
+            self._jobs[key] = job
+            self.stats['submitted'] += 1
+            return job
+
+    # === ZADANIA W WĄTKACH ===
+
+    @staticmethod
+    def _run(job: Job, fn: Callable, args, kwargs):
+        _local.job = job
+        job.started_at = time.time()
+        job.report('w toku')
+        try:
+            result = fn(*args, **kwargs)
+            job.report('gotowe', 1.0)
+            return result
+        finally:
+            job.finished_at = time.time()
+            _local.job = None
+
+    def submit(self, key: Hashable, fn: Callable, *args, **kwargs) -> Job:
+        """
+        Zadanie w puli wątków (pobieranie, analiza) - `fn` może wołać report_progress
+
+        Returns:
+            Job - ten sam dla wszystkich zgłoszeń o kluczu `key`, dopóki trwa albo jego
+            wynik jest młodszy niż result_ttl
+        """
+        def start(job: Job):
+            job.future = self._threads.submit(self._run, job, fn, args, kwargs)
+
+        return self._claim(key, 'io', start)
+
+    # === ZADANIA W PROCESACH ===
+
+    def submit_cpu(self, key: Hashable, fn: Callable, chunks: Sequence[tuple]) -> Job:
+        """
+        Ciężkie obliczenia w puli procesów - fn(*chunk) dla każdej paczki
+
+        Args:
+            fn: Funkcja modułu (musi dać się zpicklować); argumenty paczek też
+            chunks: Argumenty kolejnych paczek
+
+        Returns:
+            Job z wynikiem [fn(*chunk) dla każdej paczki] w kolejności paczek; błąd paczki
+            kończy zadanie jej wyjątkiem i anuluje paczki jeszcze w kolejce
+        """
+        def start(job: Job):
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            total = len(chunks)
+            results: List[Any] = [None] * total
+            remaining = [total]
+            job.started_at = time.time()
+            job.stage = f"paczki 0/{total}"
+
+            def finished(part: Future, index: int):
+                with job._lock:
+                    if job.future.done() or part.cancelled():
+                        return
+                    error = part.exception()
+                    try:
+                        if error is not None:
+                            for other in job._parts:
+                                other.cancel()
+                            job.finished_at = time.time()
+                            job.future.set_exception(error)
+                            return
+                        results[index] = part.result()
+                        remaining[0] -= 1
+                        job.stage = f"paczki {total - remaining[0]}/{total}"
+                        job.progress = (total - remaining[0]) / total
+                        if not remaining[0]:
+                            job.finished_at = time.time()
+                            job.future.set_result(results)
+                    except InvalidStateError:
+                        pass  # Zadanie anulowane w międzyczasie
+
+            job._parts = [self._processes.submit(fn, *chunk) for chunk in chunks]
+            for index, part in enumerate(job._parts):
+                part.add_done_callback(lambda part, index=index: finished(part, index))
+            if not total:
+                job.finished_at = time.time()
+                job.future.set_result(results)
+
+        return self._claim(key, 'cpu', start)
+
+    # === STAN ===
+
+    def get(self, key: Hashable) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def forget(self, key: Optional[Hashable] = None):
+        """Zapomina wynik (None = wszystkie) - następne zgłoszenie liczy od nowa; trwające zadania kończą się normalnie"""
+        with self._lock:
+            if key is None:
+                self._jobs.clear()
+            else:
+                self._jobs.pop(key, None)
+
+    def jobs(self) -> List[Dict]:
+        """Stan wszystkich pamiętanych zadań"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.status() for job in jobs]
+
+    def shutdown(self, wait: bool = True):
+        self._threads.shutdown(wait=wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+
+
+def load_and_analyze(monitor, days_back: int = 90):
+    """
+    Zadanie ładowania strony: grupy serii z load_tiers, po każdej (poza ostatnią) częściowy
+    wynik {'indicators', 'analysis', 'loaded', 'total'} dla wstępnej oceny, na końcu pełna analiza
+
+    Returns:
+        (indicators, analysis) - (None, None), gdy nic się nie pobrało
+    """
+    indicators = {}
+    for loaded, total, indicators in monitor.iter_indicators(days_back):
+        partial = None
+        if loaded < total and indicators:
+            partial = {
+                'indicators': indicators,
+                'analysis': monitor.analyze_liquidity_conditions(indicators),
+                'loaded': loaded,
+                'total': total,
+            }
+        report_progress(f"Wczytano {loaded}/{total} grup danych", loaded / (total + 1), partial)
+
+    if not indicators:
+        return None, None
+    report_progress("Analiza", total / (total + 1))
+    return indicators, monitor.analyze_liquidity_conditions(indicators)